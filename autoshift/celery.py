@@ -0,0 +1,22 @@
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'autoshift.settings')
+
+app = Celery('autoshift')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+@app.on_after_configure.connect
+def create_local_folders(sender, **kwargs):
+    # The filesystem broker and the file result backend expect their folders to exist
+    folders = []
+    if sender.conf.broker_url and sender.conf.broker_url.startswith('filesystem://'):
+        options = sender.conf.broker_transport_options or {}
+        folders += [options.get(key) for key in ('data_folder_in', 'data_folder_out', 'processed_folder')]
+    backend = sender.conf.result_backend
+    if isinstance(backend, str) and backend.startswith('file://'):
+        folders.append(backend[len('file://'):])
+    for folder in filter(None, folders):
+        os.makedirs(folder, exist_ok=True)
@@ -168,3 +168,26 @@ ALLOWED_IMAGE_EXTENSIONS = [
 # Shift Optimizer Settings
 SHIFT_OPTIMIZER_HOST = config('SHIFT_OPTIMIZER_HOST', default='shift_optimizer')
 SHIFT_OPTIMIZER_PORT = config('SHIFT_OPTIMIZER_PORT', default='50051')
+SHIFT_OPTIMIZER_STREAMING = config('SHIFT_OPTIMIZER_STREAMING', default=True, cast=bool)
+SHIFT_OPTIMIZER_UPLOAD_CHUNK_SIZE = config('SHIFT_OPTIMIZER_UPLOAD_CHUNK_SIZE', default=2000, cast=int)
+SHIFT_OPTIMIZER_MAX_MESSAGE_MB = config('SHIFT_OPTIMIZER_MAX_MESSAGE_MB', default=64, cast=int)
+# Seconds the Celery task waits for the optimizer; 0 waits without a deadline
+SHIFT_OPTIMIZER_TASK_TIMEOUT = config('SHIFT_OPTIMIZER_TASK_TIMEOUT', default=3600, cast=int)
+
+# Celery Settings
+# Locally the broker and the results live in files under CELERY_DATA_DIR, so no extra service is needed;
+# set CELERY_BROKER_URL and CELERY_RESULT_BACKEND to Redis or RabbitMQ in production
+CELERY_DATA_DIR = Path(config('CELERY_DATA_DIR', default=str(BASE_DIR / '.celery')))
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='filesystem://')
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'data_folder_in': str(CELERY_DATA_DIR / 'queue'),
+    'data_folder_out': str(CELERY_DATA_DIR / 'queue'),
+    'processed_folder': str(CELERY_DATA_DIR / 'processed'),
+}
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=f"file://{CELERY_DATA_DIR / 'results'}")
+CELERY_RESULT_EXPIRES = timedelta(days=1)
+CELERY_TASK_TRACK_STARTED = True
+# Runs tasks inside the calling process, e.g. with the in-memory broker ('memory://') in tests
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+# Keeps results of in-process runs, so the status endpoint reports them as well
+CELERY_TASK_STORE_EAGER_RESULT = True
@@ -31,3 +31,8 @@ REST_FRAMEWORK = {
 }
 
 
+
+# Run Celery tasks in-process with the in-memory broker and result store
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
+CELERY_TASK_ALWAYS_EAGER = True
@@ -13,6 +13,42 @@ def parse_args():
     server_parser = subparsers.add_parser('server', help='Start the gRPC server')
     server_parser.add_argument('--port', type=int, default=50051, help='Port number (default: 50051)')
     server_parser.add_argument('--host', type=str, default='[::]', help='Host address (default: [::])')
+    server_parser.add_argument('--processes', type=int, default=1,
+                               help='Processes used to solve the days of one request in parallel (default: 1, serial)')
+    server_parser.add_argument('--strategy', type=str, default='greedy', choices=['auto', 'greedy', 'min_cost_flow'],
+                               help='Solver used when a request does not choose one (default: greedy)')
+    server_parser.add_argument('--cache-size', type=int, default=128,
+                               help='Optimization results kept in memory, 0 disables the cache (default: 128)')
+    server_parser.add_argument('--cache-ttl', type=float, default=600.0,
+                               help='Seconds a cached result stays valid (default: 600)')
+    server_parser.add_argument('--cache-dir', type=str, default=None,
+                               help='Directory for the on-disk cache tier that survives restarts (default: disabled)')
+    server_parser.add_argument('--snapshot-limit', type=int, default=16,
+                               help='Uploaded workforce snapshots kept in memory (default: 16)')
+    server_parser.add_argument('--snapshot-memory-mb', type=int, default=1024,
+                               help='Memory budget for uploaded snapshots in MB (default: 1024)')
+    server_parser.add_argument('--stream-chunk-size', type=int, default=5000,
+                               help='Maximum shifts per message of a streamed optimization (default: 5000)')
+    server_parser.add_argument('--max-message-mb', type=int, default=64,
+                               help='Largest gRPC message the server sends or accepts in MB (default: 64)')
+    server_parser.add_argument('--aio', action='store_true',
+                               help='Run the asyncio server and solve requests in a process pool')
+    server_parser.add_argument('--solver-processes', type=int, default=None,
+                               help='Size of the solver process pool in --aio mode (default: CPU count, '
+                                    'divided between --workers)')
+    server_parser.add_argument('--workers', type=int, default=1,
+                               help='Server processes sharing the port through SO_REUSEPORT, supervised and '
+                                    'restarted when they die (default: 1)')
+    server_parser.add_argument('--job-workers', type=int, default=2,
+                               help='Threads running jobs from SubmitOptimization (default: 2)')
+    server_parser.add_argument('--max-queued-jobs', type=int, default=64,
+                               help='Jobs waiting to run before SubmitOptimization is refused (default: 64)')
+    server_parser.add_argument('--max-concurrent-solves', type=int, default=4,
+                               help='Optimization calls solved at the same time; one slot is kept for interactive '
+                                    'calls (default: 4)')
+    server_parser.add_argument('--max-queued-solves', type=int, default=32,
+                               help='Optimization calls waiting for a slot before new ones get RESOURCE_EXHAUSTED '
+                                    '(default: 32)')
     
     generate_parser = subparsers.add_parser('generate', help='Generate gRPC files from proto')
     
@@ -25,8 +61,41 @@ def main():
     if args.command == 'server':
         logger.info(f"Starting gRPC server on {args.host}:{args.port}")
         try:
-            from shift_optimizer.server.server import serve
-            serve(port=args.port)
+            if args.workers > 1:
+                from shift_optimizer.server.prefork import serve_workers
+                options = dict(port=args.port, strategy=args.strategy, cache_size=args.cache_size,
+                               cache_ttl=args.cache_ttl, cache_dir=args.cache_dir,
+                               snapshot_limit=args.snapshot_limit, snapshot_memory_mb=args.snapshot_memory_mb,
+                               stream_chunk_size=args.stream_chunk_size, max_message_mb=args.max_message_mb,
+                               job_workers=args.job_workers, max_queued_jobs=args.max_queued_jobs,
+                               max_concurrent_solves=args.max_concurrent_solves,
+                               max_queued_solves=args.max_queued_solves)
+                if args.aio:
+                    options['solver_processes'] = args.solver_processes or max(1, (os.cpu_count() or 1) // args.workers)
+                else:
+                    options['processes'] = args.processes
+                serve_workers(args.workers, aio=args.aio, **options)
+            elif args.aio:
+                import asyncio
+                from shift_optimizer.server.aio_server import serve_async
+                asyncio.run(serve_async(port=args.port, solver_processes=args.solver_processes,
+                                        strategy=args.strategy, cache_size=args.cache_size,
+                                        cache_ttl=args.cache_ttl, cache_dir=args.cache_dir,
+                                        snapshot_limit=args.snapshot_limit,
+                                        snapshot_memory_mb=args.snapshot_memory_mb,
+                                        stream_chunk_size=args.stream_chunk_size,
+                                        max_message_mb=args.max_message_mb, job_workers=args.job_workers,
+                                        max_queued_jobs=args.max_queued_jobs,
+                                        max_concurrent_solves=args.max_concurrent_solves,
+                                        max_queued_solves=args.max_queued_solves))
+            else:
+                from shift_optimizer.server.server import serve
+                serve(port=args.port, processes=args.processes, strategy=args.strategy,
+                      cache_size=args.cache_size, cache_ttl=args.cache_ttl, cache_dir=args.cache_dir,
+                      snapshot_limit=args.snapshot_limit, snapshot_memory_mb=args.snapshot_memory_mb,
+                      stream_chunk_size=args.stream_chunk_size, max_message_mb=args.max_message_mb,
+                      job_workers=args.job_workers, max_queued_jobs=args.max_queued_jobs,
+                      max_concurrent_solves=args.max_concurrent_solves, max_queued_solves=args.max_queued_solves)
         except ImportError:
             logger.error("Failed to import server module. Make sure gRPC files are generated.")
             print("Error: Failed to import server module. Run 'python -m shift_optimizer generate' first.")
@@ -64,4 +133,4 @@ def main():
         print("Use 'python -m shift_optimizer help' for usage information.")
         sys.exit(1)
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+class ShiftOptimizerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'shift_optimizer'
+    
+    def ready(self):
+        # Saved workers, qualifications and preferences invalidate their cached request frames
+        from shift_optimizer.client.django_integration import connect_worker_signals
+        connect_worker_signals()
\ No newline at end of file
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import statistics
+import time
+from concurrent import futures
+import grpc
+from shift_optimizer.server.server import ShiftOptimizerServicer
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+import shift_optimizer.shift_optimizer_pb2_grpc as shift_optimizer_pb2_grpc
+from shift_optimizer.client.channels import CHANNEL_OPTIONS, get_channel, close_channels
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+def round_trip(channel, timeout):
+    # A job status call does no work on the server, so the time is the connection and the call itself
+    stub = shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub(channel)
+    stub.GetOptimizationStatus(shift_optimizer_pb2.OptimizationJobRequest(job_id="missing"), timeout=timeout,
+                               wait_for_ready=True)
+def cold(target, timeout):
+    # What every request paid before: a new channel and one call. The local subchannel pool keeps gRPC from
+    # quietly reusing the pooled channel's connection, which a fresh web worker would not have either
+    channel = grpc.insecure_channel(target, options=list(CHANNEL_OPTIONS) + [('grpc.use_local_subchannel_pool', 1)])
+    try:
+        round_trip(channel, timeout)
+    finally:
+        channel.close()
+def pooled(target, timeout):
+    round_trip(get_channel(target), timeout)
+def measure(call, target, timeout, requests):
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        call(target, timeout)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+def report(label, timings, baseline=None):
+    timings = sorted(timings)
+    mean = statistics.mean(timings)
+    ratio = f"{statistics.mean(baseline) / mean:6.1f}x" if baseline else f"{'':>7}"
+    print(f"  {label:<16} {mean:8.2f} {timings[len(timings) // 2]:8.2f} "
+          f"{timings[int(len(timings) * 0.95) - 1]:8.2f} {ratio}")
+def main():
+    parser = argparse.ArgumentParser(description='Compare round trips on a new channel per call and on a pooled one')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--target', type=str, default=None,
+                        help='host:port of a running server (default: start one in this process)')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    args = parser.parse_args()
+    
+    server = None
+    target = args.target
+    if target is None:
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        shift_optimizer_pb2_grpc.add_ShiftOptimizerServiceServicer_to_server(ShiftOptimizerServicer(), server)
+        target = f'127.0.0.1:{server.add_insecure_port("127.0.0.1:0")}'
+        server.start()
+    
+    try:
+        # The pooled channel connects once before the timed calls, like it would after the first request
+        pooled(target, args.timeout)
+        print(f"{args.requests} round trips to {target}")
+        print(f"  {'':<16} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'faster':>7}")
+        cold_timings = measure(cold, target, args.timeout, args.requests)
+        report('cold channel', cold_timings)
+        report('pooled channel', measure(pooled, target, args.timeout, args.requests), cold_timings)
+    finally:
+        close_channels()
+        if server is not None:
+            server.stop(0)
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import argparse
+import gc
+import logging
+import time
+import tracemalloc
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from shift_optimizer.server import compact
+from shift_optimizer.server.columnar import index_from_messages, index_from_compact
+from shift_optimizer.server.index import WorkforceIndex
+from shift_optimizer.server.server import ShiftOptimizerServicer
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+def measure(run):
+    # Peak is taken over the conversion alone; the parsed request is already in memory
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    # The result is still referenced, so current memory is what the optimizer keeps for the whole solve
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, kept, result
+def main():
+    parser = argparse.ArgumentParser(description='Compare dataclass conversion with building the index from messages')
+    parser.add_argument('--workers', type=int, default=50000)
+    parser.add_argument('--warehouses', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    workers, warehouses, cargo_loads, days = generate_instance(args.workers, args.warehouses, 7, seed=args.seed)
+    request = shift_optimizer_pb2.OptimizeShiftsRequest.FromString(
+        to_request(workers, warehouses, cargo_loads, days).SerializeToString())
+    compact_request = shift_optimizer_pb2.OptimizeShiftsRequestV2.FromString(
+        compact.encode_request(workers, warehouses, cargo_loads, days).SerializeToString())
+    del workers, cargo_loads
+    
+    servicer = ShiftOptimizerServicer()
+    grpc_warehouses = servicer._convert_warehouses(request.warehouses)
+    matrix_mb = args.workers * args.warehouses * 16 / 1024 / 1024
+    print(f"{args.workers} workers, {args.warehouses} warehouses "
+          f"(priority and distance matrices: {matrix_mb:.0f} MB in every variant)")
+    print(f"  {'':<28} {'time':>10} {'peak':>10} {'kept':>10}")
+    
+    def dataclasses_then_index():
+        return WorkforceIndex(servicer._convert_workers(request.workers), grpc_warehouses)
+    
+    runs = [
+        ('v1 dataclasses + index', dataclasses_then_index),
+        ('v1 messages -> index', lambda: index_from_messages(request.workers, grpc_warehouses)),
+        ('v2 dataclasses + index', lambda: WorkforceIndex(compact.decode_request(compact_request)[0],
+                                                          grpc_warehouses)),
+        ('v2 columns -> index', lambda: index_from_compact(compact_request.workers, compact_request.warehouses,
+                                                           grpc_warehouses)),
+    ]
+    for label, run in runs:
+        elapsed, peak, kept, index = measure(run)
+        print(f"  {label:<28} {elapsed:9.3f}s {peak / 1024 / 1024:7.0f} MB {kept / 1024 / 1024:7.0f} MB")
+        del index
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import random
+import time
+from shift_optimizer.server.models import CargoLoad, Worker
+from shift_optimizer.server.optimizer import ShiftOptimizer
+from shift_optimizer.server.incremental import IncrementalSchedule
+from shift_optimizer.benchmarks.synthetic import generate_instance
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+SIZES = [(1000, 60), (5000, 200), (20000, 500)]
+def make_delta(rng, workers, cargo_loads):
+    # A typical edit: one worker loses a qualification, one leaves and one cargo load changes
+    changed = rng.choice(workers)
+    changed = Worker(uuid=changed.uuid, username=changed.username, qualifications=changed.qualifications[:1],
+                     warehouse_preferences=changed.warehouse_preferences)
+    removed = rng.choice(workers).uuid
+    load = rng.choice(cargo_loads)
+    heavier = CargoLoad(warehouse_uuid=load.warehouse_uuid, date=load.date, total_weight=load.total_weight + 1500)
+    return [changed], [removed] if removed != changed.uuid else [], [heavier]
+def main():
+    parser = argparse.ArgumentParser(description='Compare a full re-solve with an incremental update')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--strategy', type=str, default='greedy')
+    parser.add_argument('--edits', type=int, default=20)
+    args = parser.parse_args()
+    
+    print(f"{'workers':>8} {'warehouses':>10} {'full':>9} {'incremental':>12} {'speedup':>8} {'changed shifts':>15}")
+    for worker_count, warehouse_count in SIZES:
+        workers, warehouses, cargo_loads, days = generate_instance(worker_count, warehouse_count, args.days,
+                                                                   seed=args.seed)
+        rng = random.Random(args.seed)
+        
+        started = time.perf_counter()
+        optimizer = ShiftOptimizer(list(workers), warehouses, cargo_loads, days, strategy=args.strategy)
+        optimizer.optimize()
+        full_elapsed = time.perf_counter() - started
+        schedule = IncrementalSchedule.from_optimizer(optimizer)
+        
+        incremental_elapsed, changed_shifts = 0.0, 0
+        for _ in range(args.edits):
+            upserted_workers, removed_worker_uuids, upserted_cargo_loads = make_delta(rng, workers, cargo_loads)
+            started = time.perf_counter()
+            result = schedule.apply(upserted_workers, removed_worker_uuids, upserted_cargo_loads, [])
+            incremental_elapsed += time.perf_counter() - started
+            changed_shifts += len(result.added_shifts) + len(result.removed_shifts)
+        incremental_elapsed /= args.edits
+        
+        print(f"{worker_count:8d} {warehouse_count:10d} {full_elapsed:8.3f}s {incremental_elapsed * 1000:10.2f}ms "
+              f"{full_elapsed / incremental_elapsed:7.0f}x {changed_shifts / args.edits:15.1f}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+import argparse
+import gc
+import logging
+import sys
+import tracemalloc
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from shift_optimizer.server.models import ScheduledShift, ShiftTable
+from shift_optimizer.server.server import ShiftOptimizerServicer
+from shift_optimizer.benchmarks.legacy import LegacyQualification, LegacyWarehousePreference, LegacyWorker
+from shift_optimizer.benchmarks.legacy import LegacyScheduledShift
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+SHIFT_TIMES = [("08:00", "16:00"), ("16:00", "00:00")]
+def kept_bytes(build):
+    # Memory still referenced once the builder returns, i.e. what a snapshot or schedule holds on to
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, result
+def convert_legacy(grpc_workers):
+    # The converter as it was before the models became slotted: one object per nested message
+    return [
+        LegacyWorker(
+            uuid=grpc_worker.uuid,
+            username=grpc_worker.username,
+            qualifications=[
+                LegacyQualification(type=shift_optimizer_pb2.QualificationType.Name(grpc_qual.type),
+                                    level=grpc_qual.level)
+                for grpc_qual in grpc_worker.qualifications
+            ],
+            warehouse_preferences=[
+                LegacyWarehousePreference(warehouse_uuid=grpc_pref.warehouse_uuid, priority=grpc_pref.priority,
+                                          distance=grpc_pref.distance)
+                for grpc_pref in grpc_worker.warehouse_preferences
+            ]
+        )
+        for grpc_worker in grpc_workers
+    ]
+def report(label, kept, count, baseline=None):
+    ratio = f"{baseline / kept:6.2f}x" if baseline else f"{'':>7}"
+    print(f"  {label:<24} {kept / 1024 / 1024:8.1f} MB {kept / count:10.0f} B {ratio}")
+def main():
+    parser = argparse.ArgumentParser(description='Compare the memory held by the legacy and the slotted models')
+    parser.add_argument('--workers', type=int, default=100000)
+    parser.add_argument('--warehouses', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    workers, warehouses, cargo_loads, days = generate_instance(args.workers, args.warehouses, 7, seed=args.seed)
+    request = shift_optimizer_pb2.OptimizeShiftsRequest.FromString(
+        to_request(workers, warehouses, cargo_loads, days).SerializeToString())
+    del workers, cargo_loads
+    servicer = ShiftOptimizerServicer()
+    
+    # Both variants copy the same uuid and username strings out of the request, the difference is the objects
+    print(f"{args.workers} workers converted from a request")
+    print(f"  {'':<24} {'kept':>11} {'per item':>12} {'smaller':>7}")
+    legacy_kept, legacy_workers = kept_bytes(lambda: convert_legacy(request.workers))
+    report('legacy dataclasses', legacy_kept, args.workers)
+    slotted_kept, slotted_workers = kept_bytes(lambda: servicer._convert_workers(request.workers))
+    report('slotted, frozen', slotted_kept, args.workers, legacy_kept)
+    print(f"  one worker object: {sys.getsizeof(legacy_workers[0]) + sys.getsizeof(legacy_workers[0].__dict__)} B "
+          f"-> {sys.getsizeof(slotted_workers[0])} B")
+    
+    uuids = [worker.uuid for worker in slotted_workers]
+    warehouse_uuids = [warehouse.uuid for warehouse in warehouses]
+    del legacy_workers, slotted_workers
+    
+    def rows(shift_class):
+        return [shift_class(uuid, warehouse_uuids[i % len(warehouse_uuids)], days[i % len(days)],
+                            *SHIFT_TIMES[i % len(SHIFT_TIMES)])
+                for i, uuid in enumerate(uuids)]
+    
+    print(f"{len(uuids)} scheduled shifts")
+    print(f"  {'':<24} {'kept':>11} {'per item':>12} {'smaller':>7}")
+    legacy_kept, _ = kept_bytes(lambda: rows(LegacyScheduledShift))
+    report('legacy dataclasses', legacy_kept, len(uuids))
+    slotted_kept, shifts = kept_bytes(lambda: rows(ScheduledShift))
+    report('slotted, frozen', slotted_kept, len(uuids), legacy_kept)
+    table_kept, _ = kept_bytes(lambda: ShiftTable.from_shifts(shifts))
+    report('ShiftTable', table_kept, len(uuids), legacy_kept)
+if __name__ == "__main__":
+    main()
\ No newline at end of file
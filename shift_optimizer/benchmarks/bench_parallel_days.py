@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import os
+import time
+from shift_optimizer.server.optimizer import ShiftOptimizer
+from shift_optimizer.benchmarks.synthetic import generate_instance
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serial against per-day parallel solving')
+    parser.add_argument('--workers', type=int, default=20000)
+    parser.add_argument('--warehouses', type=int, default=300)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--processes', type=int, nargs='+', default=[2, 4, 7])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    workers, warehouses, cargo_loads, days = generate_instance(args.workers, args.warehouses, args.days, seed=args.seed)
+    print(f"Instance: {args.workers} workers, {args.warehouses} warehouses, {len(days)} days, {os.cpu_count()} CPUs")
+    
+    started = time.perf_counter()
+    baseline = ShiftOptimizer(workers, warehouses, cargo_loads, days).optimize()
+    serial_time = time.perf_counter() - started
+    print(f"serial:        {serial_time:8.3f}s")
+    
+    for processes in args.processes:
+        started = time.perf_counter()
+        result = ShiftOptimizer(workers, warehouses, cargo_loads, days, processes=processes).optimize()
+        elapsed = time.perf_counter() - started
+        print(f"{processes:2d} processes:  {elapsed:8.3f}s  speedup {serial_time / elapsed:5.2f}x  identical {result == baseline}")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import time
+from shift_optimizer.server.optimizer import ShiftOptimizer
+from shift_optimizer.benchmarks.synthetic import generate_instance
+from shift_optimizer.benchmarks.legacy import LegacyShiftOptimizer
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+def run(optimizer_class, workers, warehouses, cargo_loads, days):
+    optimizer = optimizer_class(workers, warehouses, cargo_loads, days)
+    started = time.perf_counter()
+    shifts, staffing = optimizer.optimize()
+    return time.perf_counter() - started, shifts, staffing
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the indexed greedy optimizer against the original per-call sort and scan')
+    parser.add_argument('--workers', type=int, default=2000)
+    parser.add_argument('--warehouses', type=int, default=50)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    workers, warehouses, cargo_loads, days = generate_instance(args.workers, args.warehouses, args.days, seed=args.seed)
+    print(f"Instance: {args.workers} workers, {args.warehouses} warehouses, {len(days)} days")
+    
+    legacy_time, legacy_shifts, legacy_staffing = run(LegacyShiftOptimizer, workers, warehouses, cargo_loads, days)
+    indexed_time, indexed_shifts, indexed_staffing = run(ShiftOptimizer, workers, warehouses, cargo_loads, days)
+    
+    identical = legacy_shifts == indexed_shifts and legacy_staffing == indexed_staffing
+    print(f"legacy greedy:     {legacy_time:8.3f}s")
+    print(f"indexed greedy:    {indexed_time:8.3f}s")
+    print(f"speedup:           {legacy_time / indexed_time:8.1f}x")
+    print(f"identical results: {identical} ({len(indexed_shifts)} shifts)")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+import argparse
+import datetime
+import logging
+import os
+import random
+import time
+import django
+# Needs the Django project on the path; the test settings use an in-memory SQLite database
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'autoshift.test_settings')
+django.setup()
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from shift_optimizer.client.django_integration import ShiftOptimizationService
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+QUALIFICATION_TYPES = ['basic_worker', 'cargo_driver', 'engineer']
+QUALIFICATION_CODES = {
+    'basic_worker': shift_optimizer_pb2.QualificationType.BASIC_WORKER,
+    'cargo_driver': shift_optimizer_pb2.QualificationType.CARGO_DRIVER,
+    'engineer': shift_optimizer_pb2.QualificationType.ENGINEER,
+}
+def populate(worker_count, warehouse_count, start_date, days, seed):
+    from user.models import User, WorkerQualification, WorkerWarehousePreference
+    from warehouses.models import Warehouse
+    from cargo.models import CargoLoad
+    rng = random.Random(seed)
+    
+    warehouses = Warehouse.objects.bulk_create([
+        Warehouse(name=f"Warehouse {i}", address=f"{i} Test St", capacity=rng.randint(20, 80), min_workers=3,
+                  min_basic_workers=1, min_drivers=1, min_engineers=1)
+        for i in range(warehouse_count)
+    ])
+    workers = User.objects.bulk_create([
+        User(username=f"worker{i}", email=f"worker{i}@example.com", role='worker', password='!')
+        for i in range(worker_count)
+    ], batch_size=5000)
+    WorkerQualification.objects.bulk_create([
+        WorkerQualification(user=worker, qualification_type=qualification_type, level=rng.randint(1, 5))
+        for worker in workers
+        for qualification_type in rng.sample(QUALIFICATION_TYPES, rng.randint(1, 2))
+    ], batch_size=5000)
+    WorkerWarehousePreference.objects.bulk_create([
+        WorkerWarehousePreference(user=worker, warehouse=warehouse, priority=priority,
+                                  distance=round(rng.uniform(1, 30), 1))
+        for worker in workers
+        for priority, warehouse in enumerate(rng.sample(warehouses, 3), start=1)
+    ], batch_size=5000)
+    CargoLoad.objects.bulk_create([
+        CargoLoad(warehouse=warehouse, date=start_date + datetime.timedelta(days=day),
+                  total_weight=rng.randint(1000, 20000))
+        for warehouse in warehouses
+        for day in range(days)
+    ], batch_size=5000)
+def legacy_request(start_date, end_date):
+    # The loader and request builder as they were: model instances, prefetches, then field by field.
+    # The debug f-strings run with debug logging off and read foreign keys one query at a time.
+    from user.models import User
+    from warehouses.models import Warehouse
+    from cargo.models import CargoLoad
+    warehouses = list(Warehouse.objects.filter(is_active=True))
+    workers = list(User.objects.filter(role='worker').prefetch_related('qualifications', 'warehouse_preferences'))
+    cargo_loads = list(CargoLoad.objects.filter(date__gte=start_date, date__lte=end_date, warehouse__in=warehouses))
+    
+    request = shift_optimizer_pb2.OptimizeShiftsRequest()
+    for worker in workers:
+        grpc_worker = request.workers.add()
+        grpc_worker.uuid = str(worker.uuid)
+        grpc_worker.username = worker.username
+        qual_count = 0
+        for qualification in worker.qualifications.all():
+            grpc_qual = grpc_worker.qualifications.add()
+            grpc_qual.type = QUALIFICATION_CODES[qualification.qualification_type]
+            grpc_qual.level = qualification.level
+            qual_count += 1
+        pref_count = 0
+        for preference in worker.warehouse_preferences.all():
+            grpc_pref = grpc_worker.warehouse_preferences.add()
+            grpc_pref.warehouse_uuid = str(preference.warehouse.uuid)
+            grpc_pref.priority = preference.priority
+            grpc_pref.distance = float(preference.distance or 0)
+            pref_count += 1
+        logger.debug(f"Added worker {worker.username} with {qual_count} qualifications and {pref_count} preferences")
+    for warehouse in warehouses:
+        grpc_warehouse = request.warehouses.add()
+        grpc_warehouse.uuid = str(warehouse.uuid)
+        grpc_warehouse.name = warehouse.name
+        grpc_warehouse.capacity = warehouse.capacity
+        grpc_warehouse.min_workers = warehouse.min_workers
+        grpc_warehouse.min_basic_workers = warehouse.min_basic_workers
+        grpc_warehouse.min_drivers = warehouse.min_drivers
+        grpc_warehouse.min_engineers = warehouse.min_engineers
+        grpc_warehouse.is_active = warehouse.is_active
+        logger.debug(f"Added warehouse {warehouse.name}")
+    for cargo in cargo_loads:
+        grpc_cargo = request.cargo_loads.add()
+        grpc_cargo.warehouse_uuid = str(cargo.warehouse.uuid)
+        grpc_cargo.date = cargo.date.strftime("%Y-%m-%d")
+        grpc_cargo.total_weight = cargo.total_weight
+        logger.debug(f"Added cargo load for {cargo.date} at warehouse {cargo.warehouse.name}")
+    return request
+def bulk_request(service, start_date, end_date):
+    _, workers, warehouses, cargo_loads, _ = service._load_optimization_input(start_date, end_date)
+    request = shift_optimizer_pb2.OptimizeShiftsRequest()
+    service.client._add_workers(request.workers, workers)
+    service.client._add_warehouses(request.warehouses, warehouses)
+    service.client._add_cargo_loads(request.cargo_loads, cargo_loads)
+    return request
+def measure(build):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        request = build()
+        elapsed = time.perf_counter() - started
+    return request, len(queries.captured_queries), elapsed
+def clear():
+    from user.models import User
+    from warehouses.models import Warehouse
+    # Qualifications, preferences and cargo loads go with their users and warehouses
+    User.objects.filter(role='worker').delete()
+    Warehouse.objects.all().delete()
+def main():
+    parser = argparse.ArgumentParser(description='Compare the ORM request builder with the values_list one')
+    parser.add_argument('--workers', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--warehouses', type=int, default=300)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    start_date = datetime.date(2025, 6, 2)
+    end_date = start_date + datetime.timedelta(days=args.days - 1)
+    service = ShiftOptimizationService()
+    
+    print(f"{'workers':>8} {'builder':<10} {'queries':>8} {'time':>9} {'faster':>7}")
+    for worker_count in args.workers:
+        clear()
+        populate(worker_count, args.warehouses, start_date, args.days, args.seed)
+        legacy, legacy_queries, legacy_time = measure(lambda: legacy_request(start_date, end_date))
+        bulk, bulk_queries, bulk_time = measure(lambda: bulk_request(service, start_date, end_date))
+        # Only preferences for warehouses outside the request may differ, and there are none here
+        assert legacy.SerializeToString(deterministic=True) == bulk.SerializeToString(deterministic=True)
+        print(f"{worker_count:>8} {'ORM':<10} {legacy_queries:>8} {legacy_time:8.2f}s")
+        print(f"{worker_count:>8} {'values':<10} {bulk_queries:>8} {bulk_time:8.2f}s {legacy_time / bulk_time:6.1f}x")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
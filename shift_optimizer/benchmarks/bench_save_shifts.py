@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+import argparse
+import datetime
+import logging
+import random
+import time
+# Sets up Django with the test settings and provides the workforce fixtures
+from shift_optimizer.benchmarks.bench_request_builder import populate, clear
+from django.core.management import call_command
+from django.db import connection
+from shift_optimizer.client.django_integration import ShiftOptimizationService
+logger = logging.getLogger(__name__)
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+def legacy_save(shifts):
+    # The save as it was: two lookups and an update_or_create per shift, each in its own transaction
+    from user.models import User
+    from warehouses.models import Warehouse
+    from shifts.models import Shift
+    saved_count = 0
+    for shift_data in shifts:
+        try:
+            user = User.objects.get(uuid=shift_data['worker_uuid'])
+            warehouse = Warehouse.objects.get(uuid=shift_data['warehouse_uuid'])
+            Shift.objects.update_or_create(
+                user=user,
+                warehouse=warehouse,
+                day_of_week=shift_data['day_of_week'],
+                defaults={
+                    'start_time': shift_data['start_time'],
+                    'end_time': shift_data['end_time'],
+                    'is_optimized': True
+                }
+            )
+            saved_count += 1
+        except Exception:
+            # A shift moved to another warehouse collides with the worker's old one on the unique key
+            continue
+    return saved_count
+def schedule(rng, workers, warehouses, days, changed=0.0, previous=None):
+    # One shift per worker and day; a share of them moves to another warehouse or ends later
+    shifts = []
+    for worker_uuid in workers:
+        for day in days:
+            if previous is not None and rng.random() >= changed:
+                shifts.append(previous[len(shifts)])
+                continue
+            shifts.append({'worker_uuid': worker_uuid, 'warehouse_uuid': rng.choice(warehouses), 'day_of_week': day,
+                           'start_time': '09:00', 'end_time': rng.choice(['17:00', '18:00'])})
+    return shifts
+def measure(save):
+    # Counted with a wrapper: the query log of CaptureQueriesContext stops at 9000 entries
+    queries = [0]
+    
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+    
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        save()
+        elapsed = time.perf_counter() - started
+    return queries[0], elapsed
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-row shift saving with the bulk diff')
+    parser.add_argument('--workers', type=int, default=2000)
+    parser.add_argument('--warehouses', type=int, default=50)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--changed', type=float, default=0.1,
+                        help='Share of shifts that differ in the second run')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    from user.models import User
+    from warehouses.models import Warehouse
+    from shifts.models import Shift
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    rng = random.Random(args.seed)
+    clear()
+    populate(args.workers, args.warehouses, datetime.date(2025, 6, 2), args.days, args.seed)
+    workers = [str(uuid) for uuid in User.objects.filter(role='worker').values_list('uuid', flat=True)]
+    warehouses = [str(uuid) for uuid in Warehouse.objects.values_list('uuid', flat=True)]
+    days = DAYS[:args.days]
+    first = schedule(rng, workers, warehouses, days)
+    second = schedule(rng, workers, warehouses, days, changed=args.changed, previous=first)
+    service = ShiftOptimizationService()
+    
+    print(f"{len(first)} shifts, {args.changed:.0%} changed in the second run")
+    print(f"  {'':<22} {'queries':>8} {'time':>9}")
+    for label, save in [('per row', legacy_save),
+                        ('bulk diff', lambda shifts: service.save_optimized_shifts(shifts, days=days,
+                                                                                   warehouse_uuids=warehouses))]:
+        Shift.objects.all().delete()
+        for run, shifts in (('first', first), ('second', second)):
+            queries, elapsed = measure(lambda: save(shifts))
+            print(f"  {label + ', ' + run + ' run':<22} {queries:>8} {elapsed:8.2f}s")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import os
+import random
+import time
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from shift_optimizer.server.server import ShiftOptimizerServicer
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+class _Context:
+    def add_callback(self, callback):
+        return True
+    
+    def is_active(self):
+        return True
+    
+    def time_remaining(self):
+        return None
+def scenario_loads(cargo_loads, rng):
+    # A cargo forecast: every load scaled by its own factor
+    return [shift_optimizer_pb2.CargoLoad(warehouse_uuid=load.warehouse_uuid, date=load.date,
+                                          total_weight=int(load.total_weight * rng.uniform(0.5, 2.0)))
+            for load in cargo_loads]
+def main():
+    parser = argparse.ArgumentParser(description='Compare N optimization calls with one scenario batch')
+    parser.add_argument('--workers', type=int, default=20000)
+    parser.add_argument('--warehouses', type=int, default=300)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--scenarios', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    workers, warehouses, cargo_loads, days = generate_instance(args.workers, args.warehouses, args.days,
+                                                               seed=args.seed)
+    base = to_request(workers, warehouses, cargo_loads, days)
+    forecasts = [scenario_loads(cargo_loads, rng) for _ in range(args.scenarios)]
+    
+    # Separate calls re-send and re-index the whole workforce for every forecast
+    payloads = []
+    for loads in forecasts:
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(workers=base.workers, warehouses=base.warehouses,
+                                                            cargo_loads=loads, days=days, strategy='greedy')
+        payloads.append(request.SerializeToString())
+    servicer = ShiftOptimizerServicer(default_strategy='greedy')
+    started = time.perf_counter()
+    for payload in payloads:
+        servicer.OptimizeShifts(shift_optimizer_pb2.OptimizeShiftsRequest.FromString(payload), _Context())
+    separate = time.perf_counter() - started
+    print(f"{args.scenarios} scenarios, {args.workers} workers, {args.warehouses} warehouses, {args.days} days")
+    print(f"  {'':<28} {'sent':>10} {'time':>10}")
+    print(f"  {'separate OptimizeShifts':<28} {sum(map(len, payloads)) / 1024 / 1024:7.1f} MB {separate:9.2f}s")
+    
+    batch = shift_optimizer_pb2.OptimizeScenariosRequest(workers=base.workers, warehouses=base.warehouses,
+                                                         cargo_loads=base.cargo_loads, days=days, strategy='greedy')
+    for i, loads in enumerate(forecasts):
+        batch.scenarios.add(name=f"forecast-{i}", upserted_cargo_loads=loads)
+    payload = batch.SerializeToString()
+    for processes in sorted({1, args.processes}):
+        servicer = ShiftOptimizerServicer(default_strategy='greedy', scenario_processes=processes)
+        started = time.perf_counter()
+        servicer.OptimizeScenarios(shift_optimizer_pb2.OptimizeScenariosRequest.FromString(payload), _Context())
+        elapsed = time.perf_counter() - started
+        print(f"  {f'OptimizeScenarios, {processes} proc':<28} {len(payload) / 1024 / 1024:7.1f} MB "
+              f"{elapsed:9.2f}s {separate / elapsed:5.1f}x")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
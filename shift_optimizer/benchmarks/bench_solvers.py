@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import time
+from shift_optimizer.server.optimizer import ShiftOptimizer
+from shift_optimizer.benchmarks.synthetic import generate_instance
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+SIZES = [(100, 10), (300, 40), (1000, 60)]
+def run(strategy, workers, warehouses, cargo_loads, days):
+    started = time.perf_counter()
+    shifts, staffing = ShiftOptimizer(workers, warehouses, cargo_loads, days, strategy=strategy).optimize()
+    elapsed = time.perf_counter() - started
+    fully_staffed = sum(report.is_fully_staffed for report in staffing) / max(len(staffing), 1)
+    return elapsed, fully_staffed, len(shifts)
+def main():
+    parser = argparse.ArgumentParser(description='Compare the greedy and min-cost-flow solvers')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--strategies', type=str, nargs='+', default=['greedy', 'min_cost_flow'])
+    args = parser.parse_args()
+    
+    print(f"{'workers':>8} {'warehouses':>10} {'strategy':>14} {'runtime':>9} {'fully staffed':>14} {'shifts':>7}")
+    for worker_count, warehouse_count in SIZES:
+        instance = generate_instance(worker_count, warehouse_count, args.days, seed=args.seed)
+        for strategy in args.strategies:
+            elapsed, fully_staffed, shift_count = run(strategy, *instance)
+            print(f"{worker_count:8d} {warehouse_count:10d} {strategy:>14} {elapsed:8.3f}s {fully_staffed:14.1%} {shift_count:7d}")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
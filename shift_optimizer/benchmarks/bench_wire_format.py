@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import time
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from shift_optimizer.server import compact
+from shift_optimizer.server.models import ScheduledShift
+from shift_optimizer.server.optimizer import ShiftOptimizer
+from shift_optimizer.server.server import ShiftOptimizerServicer
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+SIZES = [(1000, 60), (20000, 500), (50000, 1000)]
+def best_of(repeats, run):
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+def report(label, size, encode, decode, baseline_size=None):
+    ratio = f"{baseline_size / size:6.1f}x" if baseline_size else f"{'':>7}"
+    print(f"  {label:<12} {size / 1024 / 1024:9.2f} MB {ratio} {encode * 1000:10.1f}ms {decode * 1000:10.1f}ms")
+def main():
+    parser = argparse.ArgumentParser(description='Compare the v1 and compact v2 wire formats')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    servicer = ShiftOptimizerServicer()
+    for worker_count, warehouse_count in SIZES:
+        workers, warehouses, cargo_loads, days = generate_instance(worker_count, warehouse_count, args.days,
+                                                                   seed=args.seed)
+        optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, days, strategy='greedy')
+        shifts, staffing = optimizer.optimize()
+        print(f"{worker_count} workers, {warehouse_count} warehouses, {len(shifts)} shifts")
+        print(f"  {'':<12} {'size':>12} {'smaller':>7} {'encode':>12} {'decode':>12}")
+        
+        # Encoding covers building the message from model objects, decoding covers parsing and converting back
+        v1_encode, v1_payload = best_of(args.repeats, lambda: to_request(workers, warehouses, cargo_loads,
+                                                                         days).SerializeToString())
+        
+        def decode_v1():
+            request = shift_optimizer_pb2.OptimizeShiftsRequest.FromString(v1_payload)
+            servicer._convert_workers(request.workers)
+            servicer._convert_warehouses(request.warehouses)
+            servicer._convert_cargo_loads(request.cargo_loads)
+        
+        v1_decode, _ = best_of(args.repeats, decode_v1)
+        report('request v1', len(v1_payload), v1_encode, v1_decode)
+        
+        v2_encode, v2_payload = best_of(args.repeats, lambda: compact.encode_request(
+            workers, warehouses, cargo_loads, days).SerializeToString())
+        v2_decode, _ = best_of(args.repeats, lambda: compact.decode_request(
+            shift_optimizer_pb2.OptimizeShiftsRequestV2.FromString(v2_payload)))
+        report('request v2', len(v2_payload), v2_encode, v2_decode, len(v1_payload))
+        
+        v1_encode, v1_payload = best_of(args.repeats, lambda: servicer._optimization_response(
+            optimizer, shifts, staffing).SerializeToString())
+        
+        def decode_v1_response():
+            response = shift_optimizer_pb2.OptimizeShiftsResponse.FromString(v1_payload)
+            return [ScheduledShift(worker_uuid=shift.worker_uuid, warehouse_uuid=shift.warehouse_uuid,
+                                   day_of_week=shift.day_of_week, start_time=shift.start_time,
+                                   end_time=shift.end_time)
+                    for shift in response.shifts]
+        
+        v1_decode, _ = best_of(args.repeats, decode_v1_response)
+        report('response v1', len(v1_payload), v1_encode, v1_decode)
+        
+        worker_ordinals = {worker.uuid: ordinal for ordinal, worker in enumerate(workers)}
+        warehouse_ordinals = {warehouse.uuid: ordinal for ordinal, warehouse in enumerate(warehouses)}
+        worker_uuids = [worker.uuid for worker in workers]
+        warehouse_uuids = [warehouse.uuid for warehouse in warehouses]
+        v2_encode, v2_payload = best_of(args.repeats, lambda: compact.fill_response(
+            shift_optimizer_pb2.OptimizeShiftsResponseV2(success=True), shifts, staffing, worker_ordinals,
+            warehouse_ordinals).SerializeToString())
+        v2_decode, _ = best_of(args.repeats, lambda: compact.decode_shifts(
+            shift_optimizer_pb2.OptimizeShiftsResponseV2.FromString(v2_payload), worker_uuids, warehouse_uuids))
+        report('response v2', len(v2_payload), v2_encode, v2_decode, len(v1_payload))
+if __name__ == "__main__":
+    main()
\ No newline at end of file
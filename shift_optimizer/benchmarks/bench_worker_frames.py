@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import random
+import time
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from shift_optimizer.client.worker_cache import EncodedWorkers, WorkerFrameCache, frame_worker
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+def worker_message(worker):
+    grpc_worker = shift_optimizer_pb2.Worker(uuid=worker.uuid, username=worker.username)
+    for qualification in worker.qualifications:
+        grpc_worker.qualifications.add(type=shift_optimizer_pb2.QualificationType.Value(qualification.type),
+                                       level=qualification.level)
+    for preference in worker.warehouse_preferences:
+        grpc_worker.warehouse_preferences.add(warehouse_uuid=preference.warehouse_uuid,
+                                              priority=preference.priority, distance=preference.distance)
+    return grpc_worker
+def encode_all(workers, rest):
+    # What every optimization paid before: all Worker messages built and serialized with the request
+    request = shift_optimizer_pb2.OptimizeShiftsRequest()
+    request.workers.extend([worker_message(worker) for worker in workers])
+    request.MergeFrom(rest)
+    return request.SerializeToString()
+def encode_changed(workers, rest, cache, stamps):
+    # The Django loader with the frame cache: only workers with a new stamp are built and encoded
+    frames = cache.get_many('all', stamps)
+    changed = {index: frame_worker(worker_message(workers[index])) for index in stamps if index not in frames}
+    cache.set_many('all', {index: (stamps[index], frame) for index, frame in changed.items()})
+    frames.update(changed)
+    encoded = EncodedWorkers([frames[index] for index in range(len(workers))])
+    return encoded.to_bytes() + rest.SerializeToString()
+def timed(run):
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+def main():
+    parser = argparse.ArgumentParser(description='Compare encoding every worker with reusing cached worker frames')
+    parser.add_argument('--workers', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--warehouses', type=int, default=300)
+    parser.add_argument('--changed', type=float, nargs='+', default=[0.0, 0.01, 0.1],
+                        help='Share of workers whose stamp is bumped before each run')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    print(f"{'workers':>8} {'changed':>8} {'encode all':>11} {'cached':>9} {'faster':>7}")
+    for worker_count in args.workers:
+        workers, warehouses, cargo_loads, days = generate_instance(worker_count, args.warehouses, 7, seed=args.seed)
+        rest = to_request([], warehouses, cargo_loads, days)
+        full = min(timed(lambda: encode_all(workers, rest)) for _ in range(args.runs))
+        
+        for share in args.changed:
+            cache = WorkerFrameCache()
+            stamps = {index: 0 for index in range(worker_count)}
+            encode_changed(workers, rest, cache, stamps)
+            timings = []
+            for run in range(args.runs):
+                for index in rng.sample(range(worker_count), int(worker_count * share)):
+                    stamps[index] = run + 1
+                timings.append(timed(lambda: encode_changed(workers, rest, cache, stamps)))
+            # Field order differs on the wire, the parsed requests do not
+            assert (shift_optimizer_pb2.OptimizeShiftsRequest.FromString(encode_changed(workers, rest, cache, stamps))
+                    == shift_optimizer_pb2.OptimizeShiftsRequest.FromString(encode_all(workers, rest)))
+            cached = min(timings)
+            print(f"{worker_count:>8} {share:>7.0%} {full:10.3f}s {cached:8.3f}s {full / cached:6.1f}x")
+if __name__ == "__main__":
+    main()
\ No newline at end of file
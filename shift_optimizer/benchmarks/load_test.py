@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import grpc
+from shift_optimizer.client.client import shift_optimizer_pb2_grpc
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+def start_server(port: int, server_args) -> subprocess.Popen:
+    command = [sys.executable, '-m', 'shift_optimizer', 'server', '--port', str(port), '--cache-size', '0',
+               '--strategy', 'greedy'] + server_args
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    grpc.channel_ready_future(grpc.insecure_channel(f'localhost:{port}')).result(timeout=30)
+    return process
+def run_load(port: int, requests, concurrency: int) -> float:
+    channel = grpc.insecure_channel(f'localhost:{port}')
+    stub = shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub(channel)
+    stub.OptimizeShifts(requests[0], timeout=300)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        responses = list(executor.map(lambda request: stub.OptimizeShifts(request, timeout=300), requests))
+    elapsed = time.perf_counter() - started
+    
+    failed = sum(not response.success for response in responses)
+    if failed:
+        logger.warning(f"{failed} of {len(responses)} requests failed")
+    channel.close()
+    return len(requests) / elapsed
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of the threaded and the asyncio server under load')
+    parser.add_argument('--workers', type=int, default=2000)
+    parser.add_argument('--warehouses', type=int, default=60)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--solver-processes', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    
+    # Every request has its own seed, so nothing is served from a cache or shared in flight
+    requests = [to_request(*generate_instance(args.workers, args.warehouses, args.days, seed=seed))
+                for seed in range(args.requests)]
+    print(f"{args.requests} requests of {args.workers} workers, {args.warehouses} warehouses, {args.days} days; "
+          f"{args.concurrency} concurrent clients, {os.cpu_count()} CPUs")
+    
+    configurations = [('threaded', [])] + [(f'aio, {n} processes', ['--aio', '--solver-processes', str(n)])
+                                           for n in args.solver_processes]
+    for name, server_args in configurations:
+        port = free_port()
+        server = start_server(port, server_args)
+        try:
+            throughput = run_load(port, requests, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{name:>20}: {throughput:7.2f} requests/s")
+if __name__ == "__main__":
+    main()
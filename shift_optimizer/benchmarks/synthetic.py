@@ -0,0 +1,86 @@
+import random
+import uuid
+from typing import List, Tuple
+from shift_optimizer.server.models import Worker, Warehouse, CargoLoad, Qualification, WarehousePreference
+QUALIFICATION_TYPES = ["BASIC_WORKER", "CARGO_DRIVER", "ENGINEER"]
+WEEK_DATES = {
+    "monday": "2025-06-02",
+    "tuesday": "2025-06-03",
+    "wednesday": "2025-06-04",
+    "thursday": "2025-06-05",
+    "friday": "2025-06-06",
+    "saturday": "2025-06-07",
+    "sunday": "2025-06-08",
+}
+def generate_instance(worker_count: int, warehouse_count: int, day_count: int,
+                      preferences_per_worker: int = 3, seed: int = 42) -> Tuple[List[Worker], List[Warehouse], List[CargoLoad], List[str]]:
+    rng = random.Random(seed)
+    
+    warehouses = [
+        Warehouse(
+            uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+            name=f"warehouse_{i}",
+            capacity=rng.randint(50, 500),
+            min_workers=3,
+            min_basic_workers=rng.randint(1, 3),
+            min_drivers=rng.randint(0, 2),
+            min_engineers=rng.randint(0, 1),
+            is_active=True
+        ) for i in range(warehouse_count)
+    ]
+    
+    workers = []
+    for i in range(worker_count):
+        qualifications = [Qualification(type=rng.choice(QUALIFICATION_TYPES), level=rng.randint(1, 5))]
+        if rng.random() < 0.2:
+            qualifications.append(Qualification(type=rng.choice(QUALIFICATION_TYPES), level=rng.randint(1, 5)))
+        
+        preferred = rng.sample(warehouses, min(preferences_per_worker, warehouse_count))
+        preferences = [
+            WarehousePreference(
+                warehouse_uuid=warehouse.uuid,
+                priority=priority + 1,
+                distance=round(rng.uniform(0.5, 50.0), 1)
+            ) for priority, warehouse in enumerate(preferred)
+        ]
+        
+        workers.append(Worker(
+            uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+            username=f"worker_{i}",
+            qualifications=tuple(qualifications),
+            warehouse_preferences=tuple(preferences)
+        ))
+    
+    days = list(WEEK_DATES)[:min(day_count, 7)]
+    while len(days) < day_count:
+        days.append(days[len(days) % 7])
+    
+    cargo_loads = [
+        CargoLoad(
+            warehouse_uuid=warehouse.uuid,
+            date=WEEK_DATES[day],
+            total_weight=rng.randint(0, 30000)
+        ) for warehouse in warehouses for day in dict.fromkeys(days)
+    ]
+    
+    return workers, warehouses, cargo_loads, days
+def to_request(workers: List[Worker], warehouses: List[Warehouse], cargo_loads: List[CargoLoad], days: List[str]):
+    import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+    
+    request = shift_optimizer_pb2.OptimizeShiftsRequest(days=days)
+    for worker in workers:
+        grpc_worker = request.workers.add(uuid=worker.uuid, username=worker.username)
+        for qualification in worker.qualifications:
+            grpc_worker.qualifications.add(type=shift_optimizer_pb2.QualificationType.Value(qualification.type),
+                                           level=qualification.level)
+        for preference in worker.warehouse_preferences:
+            grpc_worker.warehouse_preferences.add(warehouse_uuid=preference.warehouse_uuid,
+                                                  priority=preference.priority, distance=preference.distance)
+    for warehouse in warehouses:
+        request.warehouses.add(uuid=warehouse.uuid, name=warehouse.name, capacity=warehouse.capacity,
+                               min_workers=warehouse.min_workers, min_basic_workers=warehouse.min_basic_workers,
+                               min_drivers=warehouse.min_drivers, min_engineers=warehouse.min_engineers,
+                               is_active=warehouse.is_active)
+    for cargo in cargo_loads:
+        request.cargo_loads.add(warehouse_uuid=cargo.warehouse_uuid, date=cargo.date, total_weight=cargo.total_weight)
+    return request
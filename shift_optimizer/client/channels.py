@@ -0,0 +1,79 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+import grpc
+logger = logging.getLogger(__name__)
+# Pings keep idle connections alive through proxies and NAT and detect a dead server before the next call
+KEEPALIVE_TIME_MS = 60000
+KEEPALIVE_TIMEOUT_MS = 20000
+# A restarting server is retried quickly at first, then at most every 10 seconds
+INITIAL_RECONNECT_BACKOFF_MS = 500
+MIN_RECONNECT_BACKOFF_MS = 500
+MAX_RECONNECT_BACKOFF_MS = 10000
+CHANNEL_OPTIONS = (
+    ('grpc.keepalive_time_ms', KEEPALIVE_TIME_MS),
+    ('grpc.keepalive_timeout_ms', KEEPALIVE_TIMEOUT_MS),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.initial_reconnect_backoff_ms', INITIAL_RECONNECT_BACKOFF_MS),
+    ('grpc.min_reconnect_backoff_ms', MIN_RECONNECT_BACKOFF_MS),
+    ('grpc.max_reconnect_backoff_ms', MAX_RECONNECT_BACKOFF_MS),
+)
+class ChannelPool:
+    def __init__(self, options: Tuple[Tuple[str, int], ...] = CHANNEL_OPTIONS):
+        self.options = options
+        self._lock = threading.Lock()
+        self._channels: Dict[Tuple[str, Optional[int]], grpc.Channel] = {}
+        self._pid = os.getpid()
+        # Channels inherited over fork are kept referenced and never used or closed: closing one in the
+        # child would shut down the connection the parent still owns
+        self._inherited: List[grpc.Channel] = []
+    
+    def get(self, target: str, max_message_mb: Optional[int] = None) -> grpc.Channel:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._forget_inherited()
+            
+            key = (target, max_message_mb)
+            channel = self._channels.get(key)
+            if channel is None:
+                options = list(self.options)
+                if max_message_mb:
+                    max_message_bytes = max_message_mb * 1024 * 1024
+                    options += [('grpc.max_receive_message_length', max_message_bytes),
+                                ('grpc.max_send_message_length', max_message_bytes)]
+                channel = grpc.insecure_channel(target, options=options)
+                self._channels[key] = channel
+                logger.info(f"Opened shared gRPC channel to {target} (pid {self._pid})")
+            return channel
+    
+    def close(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._forget_inherited()
+            channels, self._channels = list(self._channels.values()), {}
+        for channel in channels:
+            channel.close()
+    
+    def after_fork(self):
+        # Runs in the child; the lock may have been held by another thread of the parent at fork time
+        self._lock = threading.Lock()
+        self._forget_inherited()
+    
+    def _forget_inherited(self):
+        if self._channels:
+            logger.info(f"Dropping {len(self._channels)} gRPC channels inherited from process {self._pid}")
+        self._inherited.extend(self._channels.values())
+        self._channels = {}
+        self._pid = os.getpid()
+_pool = ChannelPool()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_pool.after_fork)
+atexit.register(_pool.close)
+def get_channel(target: str, max_message_mb: Optional[int] = None) -> grpc.Channel:
+    # One channel per target and message limit for the whole process, reused by every client
+    return _pool.get(target, max_message_mb)
+def close_channels():
+    _pool.close()
\ No newline at end of file
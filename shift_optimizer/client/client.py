@@ -1,134 +1,682 @@
+import datetime
 import grpc
 import logging
 import sys
 import os
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
 import shift_optimizer.shift_optimizer_pb2_grpc as shift_optimizer_pb2_grpc
+from .channels import get_channel
+from .worker_cache import EncodedWorkers
 logger = logging.getLogger(__name__)
-
+DEFAULT_TIMEOUT = 30.0
+# Workers per message of a chunked upload; with preferences this keeps messages well under 4 MB
+DEFAULT_UPLOAD_CHUNK_SIZE = 2000
+COMPACT_QUALIFICATION_TYPES = {
+    'basic_worker': shift_optimizer_pb2.QualificationType.BASIC_WORKER,
+    'cargo_driver': shift_optimizer_pb2.QualificationType.CARGO_DRIVER,
+    'engineer': shift_optimizer_pb2.QualificationType.ENGINEER,
+}
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# Lane the server admits calls into: 'interactive' calls are solved ahead of queued 'batch' ones
+PRIORITY_METADATA_KEY = 'x-priority'
+SERVICE_PATH = '/shift_optimizer.ShiftOptimizerService/'
+class _PriorityInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor,
+                           grpc.StreamUnaryClientInterceptor, grpc.StreamStreamClientInterceptor):
+    def __init__(self, priority: str):
+        self.priority = priority
+    
+    def _with_priority(self, client_call_details):
+        metadata = list(client_call_details.metadata or ()) + [(PRIORITY_METADATA_KEY, self.priority)]
+        return client_call_details._replace(metadata=metadata)
+    
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        return continuation(self._with_priority(client_call_details), request)
+    
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        return continuation(self._with_priority(client_call_details), request)
+    
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        return continuation(self._with_priority(client_call_details), request_iterator)
+    
+    def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
+        return continuation(self._with_priority(client_call_details), request_iterator)
 class ShiftOptimizerClient:
-    def __init__(self, host='shift_optimizer', port='50051'):
+    def __init__(self, host='shift_optimizer', port='50051', max_message_mb=None, priority=None):
         logger.info(f"Initializing ShiftOptimizerClient with host={host}, port={port}")
         try:
-            self.channel = grpc.insecure_channel(f'{host}:{port}')
+            # The channel is shared by every client of the process, so only the first one pays for the connection
+            self.channel = get_channel(f'{host}:{port}', max_message_mb)
+            if priority:
+                self.channel = grpc.intercept_channel(self.channel, _PriorityInterceptor(priority))
             self.stub = shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub(self.channel)
+            # The same calls taking an already serialized request, for bodies assembled from cached worker frames
+            self._optimize_shifts_raw = self.channel.unary_unary(
+                SERVICE_PATH + 'OptimizeShifts',
+                response_deserializer=shift_optimizer_pb2.OptimizeShiftsResponse.FromString)
+            self._optimize_shifts_upload_raw = self.channel.stream_unary(
+                SERVICE_PATH + 'OptimizeShiftsUpload',
+                response_deserializer=shift_optimizer_pb2.OptimizeShiftsResponse.FromString)
+            self._optimize_shifts_stream_raw = self.channel.unary_stream(
+                SERVICE_PATH + 'OptimizeShiftsStream',
+                response_deserializer=shift_optimizer_pb2.OptimizeShiftsChunk.FromString)
+            self._optimize_shifts_upload_stream_raw = self.channel.stream_stream(
+                SERVICE_PATH + 'OptimizeShiftsUploadStream',
+                response_deserializer=shift_optimizer_pb2.OptimizeShiftsChunk.FromString)
             logger.info(f"Successfully connected to gRPC server at {host}:{port}")
         except Exception as e:
             logger.error(f"Error initializing gRPC client: {str(e)}")
             raise
     
-    def optimize_shifts(self, workers, warehouses, cargo_loads, days) -> Tuple[bool, str, List, List]:
-        try:
+    def optimize_shifts(self, workers, warehouses, cargo_loads, days, strategy=None, anytime=False,
+                        timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List]:
+        # EncodedWorkers are sent as they are, in front of the rest of the request
+        encoded_workers = workers if isinstance(workers, EncodedWorkers) else None
+        
+        def build(request):
             logger.info(f"Creating optimization request with {len(workers)} workers, {len(warehouses)} warehouses")
+            if encoded_workers is None:
+                self._add_workers(request.workers, workers)
+            self._add_warehouses(request.warehouses, warehouses)
+            self._add_cargo_loads(request.cargo_loads, cargo_loads)
+        
+        return self._run_optimization(build, days, strategy, anytime, timeout, encoded_workers)
+    
+    def optimize_shifts_chunked(self, workers, warehouses, cargo_loads, days, strategy=None, anytime=False,
+                                chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE,
+                                timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List]:
+        # Запрос отправляется частями по chunk_size сотрудников и не собирается в памяти целиком
+        encoded = isinstance(workers, EncodedWorkers)
+        try:
+            logger.info(f"Sending chunked optimization request with {len(workers)} workers "
+                        f"in chunks of {chunk_size}")
+            upload = self._optimize_shifts_upload_raw if encoded else self.stub.OptimizeShiftsUpload
+            response = upload(self._upload_chunks(workers, warehouses, cargo_loads, days, strategy, anytime,
+                                                  chunk_size), timeout=timeout)
+            return self._handle_response(response, anytime)
+        except grpc.RpcError as e:
+            error_msg = self._rpc_error_message(e)
+            logger.error(f"gRPC error: {error_msg}", exc_info=True)
+            return False, error_msg, [], []
+        except Exception as e:
+            error_msg = f"Error during optimization: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, [], []
+    
+    def optimize_shifts_stream(self, workers, warehouses, cargo_loads, days,
+                               on_chunk: Callable[[str, List, List], None], strategy=None,
+                               timeout=DEFAULT_TIMEOUT, chunk_size=None) -> Tuple[bool, str, int, List]:
+        # Смены приходят по дням и сразу передаются в on_chunk, целиком ответ в памяти не собирается.
+        # Составы больше chunk_size сотрудников отправляются частями, как в optimize_shifts_chunked
+        try:
+            if chunk_size and len(workers) > chunk_size:
+                logger.info(f"Sending chunked streaming optimization request with {len(workers)} workers "
+                            f"in chunks of {chunk_size}")
+                upload = (self._optimize_shifts_upload_stream_raw if isinstance(workers, EncodedWorkers)
+                          else self.stub.OptimizeShiftsUploadStream)
+                chunks = upload(self._upload_chunks(workers, warehouses, cargo_loads, days, strategy, False,
+                                                    chunk_size), timeout=timeout)
+                return self._receive_stream(chunks, on_chunk)
+            
             request = shift_optimizer_pb2.OptimizeShiftsRequest()
+            logger.info(f"Creating streaming optimization request with {len(workers)} workers, "
+                        f"{len(warehouses)} warehouses")
+            encoded = isinstance(workers, EncodedWorkers)
+            if not encoded:
+                self._add_workers(request.workers, workers)
+            self._add_warehouses(request.warehouses, warehouses)
+            self._add_cargo_loads(request.cargo_loads, cargo_loads)
+            request.days.extend(days)
+            if strategy:
+                request.strategy = strategy
             
-            for worker in workers:
-                grpc_worker = request.workers.add()
-                grpc_worker.uuid = str(worker.uuid)
-                grpc_worker.username = worker.username
-                
-                qual_count = 0
-                for qualification in worker.qualifications.all():
-                    grpc_qual = grpc_worker.qualifications.add()
-                    
-                    if qualification.qualification_type == 'basic_worker':
-                        grpc_qual.type = shift_optimizer_pb2.QualificationType.BASIC_WORKER
-                    elif qualification.qualification_type == 'cargo_driver':
-                        grpc_qual.type = shift_optimizer_pb2.QualificationType.CARGO_DRIVER
-                    elif qualification.qualification_type == 'engineer':
-                        grpc_qual.type = shift_optimizer_pb2.QualificationType.ENGINEER
-                    
-                    grpc_qual.level = qualification.level
-                    qual_count += 1
+            if encoded:
+                chunks = self._optimize_shifts_stream_raw(workers.to_bytes() + request.SerializeToString(),
+                                                          timeout=timeout)
+            else:
+                chunks = self.stub.OptimizeShiftsStream(request, timeout=timeout)
+            return self._receive_stream(chunks, on_chunk)
+        
+        except grpc.RpcError as e:
+            error_msg = f"gRPC error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, 0, []
+        except Exception as e:
+            error_msg = f"Error during optimization: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, 0, []
+    
+    def optimize_shifts_compact(self, workers, warehouses, cargo_loads, days, strategy=None, anytime=False,
+                                timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List]:
+        # Компактный формат v2: UUID и названия складов передаются один раз, смены ссылаются на них по номеру
+        try:
+            logger.info(f"Creating compact optimization request with {len(workers)} workers, "
+                        f"{len(warehouses)} warehouses")
+            request, worker_uuids, warehouse_rows = self._build_compact_request(workers, warehouses, cargo_loads, days)
+            if strategy:
+                request.strategy = strategy
+            request.anytime = anytime
+            
+            response = self.stub.OptimizeShiftsV2(request, timeout=timeout)
+            if not response.success:
+                logger.error(f"Optimization failed: {response.message}")
+                return False, response.message, [], []
+            
+            shifts, staffing = self._compact_response_to_dicts(response, worker_uuids, warehouse_rows)
+            logger.info(f"Optimization successful. Received {len(shifts)} shifts")
+            if anytime:
+                logger.info(f"Local search ran {response.search_iterations} iterations, "
+                            f"{response.search_improvements} improvements")
+            return True, "Optimization successful", shifts, staffing
+        
+        except grpc.RpcError as e:
+            error_msg = self._rpc_error_message(e)
+            logger.error(f"gRPC error: {error_msg}", exc_info=True)
+            return False, error_msg, [], []
+        except Exception as e:
+            error_msg = f"Error during optimization: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, [], []
+    
+    def optimize_snapshot(self, snapshot_id, days, upserted_workers=(), removed_worker_uuids=(),
+                          upserted_cargo_loads=(), removed_cargo_loads=(), strategy=None, anytime=False,
+                          timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List]:
+        def build(request):
+            logger.info(f"Creating optimization request for snapshot {snapshot_id} with "
+                        f"{len(upserted_workers)} changed and {len(removed_worker_uuids)} removed workers")
+            request.snapshot_id = snapshot_id
+            self._add_workers(request.delta.upserted_workers, upserted_workers)
+            request.delta.removed_worker_uuids.extend(str(uuid) for uuid in removed_worker_uuids)
+            self._add_cargo_loads(request.delta.upserted_cargo_loads, upserted_cargo_loads)
+            self._add_cargo_loads(request.delta.removed_cargo_loads, removed_cargo_loads)
+        
+        return self._run_optimization(build, days, strategy, anytime, timeout)
+    
+    def reoptimize_snapshot(self, snapshot_id, days, upserted_workers=(), removed_worker_uuids=(),
+                            upserted_cargo_loads=(), removed_cargo_loads=(), strategy=None,
+                            timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List, Optional[str]]:
+        # Возвращает только изменившиеся смены и идентификатор снимка с учётом изменений
+        try:
+            request = shift_optimizer_pb2.OptimizeShiftsRequest(snapshot_id=snapshot_id, incremental=True)
+            self._add_workers(request.delta.upserted_workers, upserted_workers)
+            request.delta.removed_worker_uuids.extend(str(uuid) for uuid in removed_worker_uuids)
+            self._add_cargo_loads(request.delta.upserted_cargo_loads, upserted_cargo_loads)
+            self._add_cargo_loads(request.delta.removed_cargo_loads, removed_cargo_loads)
+            request.days.extend(days)
+            if strategy:
+                request.strategy = strategy
+            
+            logger.info(f"Sending incremental optimization request for snapshot {snapshot_id}")
+            response = self.stub.OptimizeShifts(request, timeout=timeout)
+            
+            if not response.success:
+                if response.snapshot_missing:
+                    logger.warning(f"Snapshot is no longer on the server: {response.message}")
+                logger.error(f"Incremental optimization failed: {response.message}")
+                return False, response.message, [], [], None
+            
+            added = [self._shift_to_dict(shift) for shift in response.shifts]
+            removed = [self._shift_to_dict(shift) for shift in response.removed_shifts]
+            logger.info(f"Incremental optimization successful: {len(added)} shifts added, {len(removed)} removed")
+            return True, "Optimization successful", added, removed, response.snapshot_id
+        
+        except grpc.RpcError as e:
+            error_msg = f"gRPC error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, [], [], None
+        except Exception as e:
+            error_msg = f"Error during optimization: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, [], [], None
+    
+    def upload_snapshot(self, workers, warehouses, cargo_loads,
+                        timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, Optional[str]]:
+        try:
+            logger.info(f"Uploading snapshot with {len(workers)} workers, {len(warehouses)} warehouses")
+            request = shift_optimizer_pb2.UploadSnapshotRequest()
+            self._add_workers(request.workers, workers)
+            self._add_warehouses(request.warehouses, warehouses)
+            self._add_cargo_loads(request.cargo_loads, cargo_loads)
+            
+            response = self.stub.UploadSnapshot(request, timeout=timeout)
+            if not response.success:
+                logger.error(f"Snapshot upload failed: {response.message}")
+                return False, response.message, None
+            
+            logger.info(f"Snapshot uploaded as {response.snapshot_id}")
+            return True, "Snapshot uploaded", response.snapshot_id
+        
+        except grpc.RpcError as e:
+            error_msg = f"gRPC error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None
+        except Exception as e:
+            error_msg = f"Error uploading snapshot: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None
+    
+    def optimize_scenarios(self, workers, warehouses, cargo_loads, days, scenarios, strategy=None,
+                           snapshot_id=None, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List[dict]]:
+        # Сравнение сценариев на одном составе: сотрудники и склады передаются и индексируются один раз.
+        # Сценарий — словарь с ключами name, cargo_loads (заменяют грузы с теми же складом и датой),
+        # removed_cargo_loads, closed_warehouse_uuids и days; отсутствующие ключи не меняют базу.
+        try:
+            request = shift_optimizer_pb2.OptimizeScenariosRequest()
+            if snapshot_id:
+                request.snapshot_id = snapshot_id
+            else:
+                self._add_workers(request.workers, workers)
+                self._add_warehouses(request.warehouses, warehouses)
+                self._add_cargo_loads(request.cargo_loads, cargo_loads)
+            request.days.extend(days)
+            if strategy:
+                request.strategy = strategy
+            
+            for scenario in scenarios:
+                grpc_scenario = request.scenarios.add(name=scenario['name'])
+                self._add_cargo_loads(grpc_scenario.upserted_cargo_loads, scenario.get('cargo_loads', ()))
+                self._add_cargo_loads(grpc_scenario.removed_cargo_loads, scenario.get('removed_cargo_loads', ()))
+                grpc_scenario.closed_warehouse_uuids.extend(
+                    str(uuid) for uuid in scenario.get('closed_warehouse_uuids', ()))
+                grpc_scenario.days.extend(scenario.get('days', ()))
+            
+            logger.info(f"Sending {len(scenarios)} scenarios for days: {days}")
+            response = self.stub.OptimizeScenarios(request, timeout=timeout)
+            if not response.success:
+                if response.snapshot_missing:
+                    logger.warning(f"Snapshot is no longer on the server: {response.message}")
+                logger.error(f"Scenario optimization failed: {response.message}")
+                return False, response.message, []
+            
+            results = [
+                {
+                    'name': result.name,
+                    'success': result.success,
+                    'message': result.message,
+                    'shifts': [self._shift_to_dict(shift) for shift in result.shifts],
+                    'staffing': [self._staffing_to_dict(staff_info) for staff_info in result.warehouse_staffing],
+                    'shift_count': result.shift_count,
+                    'understaffed_cells': result.understaffed_cells,
+                    'missing_workers': result.missing_workers
+                }
+                for result in response.scenarios
+            ]
+            logger.info(f"Scenario optimization successful for {len(results)} scenarios")
+            return True, "Optimization successful", results
+        
+        except grpc.RpcError as e:
+            error_msg = self._rpc_error_message(e)
+            logger.error(f"gRPC error: {error_msg}", exc_info=True)
+            return False, error_msg, []
+        except Exception as e:
+            error_msg = f"Error during optimization: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, []
+    
+    def submit_optimization(self, workers, warehouses, cargo_loads, days, strategy=None, anytime=False,
+                            time_budget=None, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, Optional[str]]:
+        # Ставит оптимизацию в очередь сервера и сразу возвращает идентификатор задачи.
+        # В режиме anytime время поиска ограничивает time_budget, у задачи нет таймаута вызова.
+        try:
+            request = shift_optimizer_pb2.OptimizeShiftsRequest(anytime=anytime)
+            logger.info(f"Submitting optimization job with {len(workers)} workers, {len(warehouses)} warehouses")
+            self._add_workers(request.workers, workers)
+            self._add_warehouses(request.warehouses, warehouses)
+            self._add_cargo_loads(request.cargo_loads, cargo_loads)
+            request.days.extend(days)
+            if strategy:
+                request.strategy = strategy
+            if time_budget:
+                request.time_budget_seconds = time_budget
+            
+            response = self.stub.SubmitOptimization(request, timeout=timeout)
+            if not response.success:
+                if response.queue_full:
+                    logger.warning(f"Optimizer job queue is full: {response.message}")
+                logger.error(f"Job submission failed: {response.message}")
+                return False, response.message, None
+            
+            logger.info(f"Optimization job submitted as {response.job_id}")
+            return True, "Job submitted", response.job_id
+        
+        except grpc.RpcError as e:
+            error_msg = self._rpc_error_message(e)
+            logger.error(f"gRPC error: {error_msg}", exc_info=True)
+            return False, error_msg, None
+        except Exception as e:
+            error_msg = f"Error submitting optimization: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None
+    
+    def get_optimization_status(self, job_id, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, Optional[dict]]:
+        try:
+            response = self.stub.GetOptimizationStatus(shift_optimizer_pb2.OptimizationJobRequest(job_id=job_id),
+                                                       timeout=timeout)
+            if not response.success:
+                logger.error(f"Cannot get job status: {response.message}")
+                return False, response.message, None
+            return True, response.message or "Status received", self._job_status_to_dict(response)
+        
+        except grpc.RpcError as e:
+            error_msg = f"gRPC error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None
+    
+    def get_optimization_result(self, job_id, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List]:
+        try:
+            response = self.stub.GetOptimizationResult(shift_optimizer_pb2.OptimizationJobRequest(job_id=job_id),
+                                                       timeout=timeout)
+            return self._handle_response(response, False)
+        
+        except grpc.RpcError as e:
+            error_msg = f"gRPC error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, [], []
+    
+    def cancel_optimization(self, job_id, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, Optional[dict]]:
+        try:
+            response = self.stub.CancelOptimization(shift_optimizer_pb2.OptimizationJobRequest(job_id=job_id),
+                                                    timeout=timeout)
+            if not response.success:
+                logger.error(f"Cannot cancel job: {response.message}")
+                return False, response.message, None
+            logger.info(f"Cancellation requested for job {job_id}")
+            return True, "Cancellation requested", self._job_status_to_dict(response)
+        
+        except grpc.RpcError as e:
+            error_msg = f"gRPC error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None
+    
+    def _upload_chunks(self, workers, warehouses, cargo_loads, days, strategy, anytime, chunk_size):
+        # Warehouses go first so the server can index each worker chunk on arrival
+        encoded = isinstance(workers, EncodedWorkers)
+        header = shift_optimizer_pb2.OptimizeShiftsRequest(anytime=anytime)
+        header.days.extend(days)
+        if strategy:
+            header.strategy = strategy
+        self._add_warehouses(header.warehouses, warehouses)
+        self._add_cargo_loads(header.cargo_loads, cargo_loads)
+        yield header.SerializeToString() if encoded else header
+        
+        for start in range(0, len(workers), chunk_size):
+            if encoded:
+                yield workers[start:start + chunk_size].to_bytes()
+                continue
+            chunk = shift_optimizer_pb2.OptimizeShiftsRequest()
+            self._add_workers(chunk.workers, workers[start:start + chunk_size])
+            yield chunk
+    
+    def _receive_stream(self, chunks, on_chunk) -> Tuple[bool, str, int, List]:
+        shift_count = 0
+        staffing = []
+        for chunk in chunks:
+            if not chunk.success:
+                logger.error(f"Streaming optimization failed after {shift_count} shifts: {chunk.message}")
+                return False, chunk.message, shift_count, staffing
+            
+            chunk_shifts = [self._shift_to_dict(shift) for shift in chunk.shifts]
+            chunk_staffing = [self._staffing_to_dict(staff_info) for staff_info in chunk.warehouse_staffing]
+            on_chunk(chunk.day, chunk_shifts, chunk_staffing)
+            shift_count += len(chunk_shifts)
+            staffing.extend(chunk_staffing)
+            logger.info(f"Received {len(chunk_shifts)} shifts for {chunk.day}")
+        
+        logger.info(f"Streaming optimization successful. Received {shift_count} shifts")
+        return True, "Optimization successful", shift_count, staffing
+    
+    def _add_workers(self, target, workers):
+        if self._is_message_list(workers, shift_optimizer_pb2.Worker):
+            # Messages built by the Django loader are copied in one call
+            target.extend(workers)
+            return
+        
+        for worker in workers:
+            grpc_worker = target.add()
+            grpc_worker.uuid = str(worker.uuid)
+            grpc_worker.username = worker.username
+            
+            for qualification in worker.qualifications.all():
+                grpc_qual = grpc_worker.qualifications.add()
                 
-                pref_count = 0
-                for preference in worker.warehouse_preferences.all():
-                    grpc_pref = grpc_worker.warehouse_preferences.add()
-                    grpc_pref.warehouse_uuid = str(preference.warehouse.uuid)
-                    grpc_pref.priority = preference.priority
-                    grpc_pref.distance = float(preference.distance or 0)
-                    pref_count += 1
+                if qualification.qualification_type == 'basic_worker':
+                    grpc_qual.type = shift_optimizer_pb2.QualificationType.BASIC_WORKER
+                elif qualification.qualification_type == 'cargo_driver':
+                    grpc_qual.type = shift_optimizer_pb2.QualificationType.CARGO_DRIVER
+                elif qualification.qualification_type == 'engineer':
+                    grpc_qual.type = shift_optimizer_pb2.QualificationType.ENGINEER
                 
-                logger.debug(f"Added worker {worker.username} with {qual_count} qualifications and {pref_count} preferences")
-            
-            for warehouse in warehouses:
-                grpc_warehouse = request.warehouses.add()
-                grpc_warehouse.uuid = str(warehouse.uuid)
-                grpc_warehouse.name = warehouse.name
-                grpc_warehouse.capacity = warehouse.capacity
-                grpc_warehouse.min_workers = warehouse.min_workers
-                grpc_warehouse.min_basic_workers = warehouse.min_basic_workers
-                grpc_warehouse.min_drivers = warehouse.min_drivers
-                grpc_warehouse.min_engineers = warehouse.min_engineers
-                grpc_warehouse.is_active = warehouse.is_active
-                logger.debug(f"Added warehouse {warehouse.name}")
-            
-            for cargo in cargo_loads:
-                grpc_cargo = request.cargo_loads.add()
-                grpc_cargo.warehouse_uuid = str(cargo.warehouse.uuid)
-                grpc_cargo.date = cargo.date.strftime("%Y-%m-%d")
-                grpc_cargo.total_weight = cargo.total_weight
-                logger.debug(f"Added cargo load for {cargo.date} at warehouse {cargo.warehouse.name}")
+                grpc_qual.level = qualification.level
+            
+            for preference in worker.warehouse_preferences.all():
+                grpc_pref = grpc_worker.warehouse_preferences.add()
+                grpc_pref.warehouse_uuid = str(preference.warehouse.uuid)
+                grpc_pref.priority = preference.priority
+                grpc_pref.distance = float(preference.distance or 0)
+        
+        # One summary line: a per-item f-string is built even with debug off and reads related objects
+        logger.debug(f"Added {len(target)} workers")
+    
+    def _add_warehouses(self, target, warehouses):
+        if self._is_message_list(warehouses, shift_optimizer_pb2.Warehouse):
+            target.extend(warehouses)
+            return
+        
+        for warehouse in warehouses:
+            grpc_warehouse = target.add()
+            grpc_warehouse.uuid = str(warehouse.uuid)
+            grpc_warehouse.name = warehouse.name
+            grpc_warehouse.capacity = warehouse.capacity
+            grpc_warehouse.min_workers = warehouse.min_workers
+            grpc_warehouse.min_basic_workers = warehouse.min_basic_workers
+            grpc_warehouse.min_drivers = warehouse.min_drivers
+            grpc_warehouse.min_engineers = warehouse.min_engineers
+            grpc_warehouse.is_active = warehouse.is_active
+        logger.debug(f"Added {len(target)} warehouses")
+    
+    def _add_cargo_loads(self, target, cargo_loads):
+        if self._is_message_list(cargo_loads, shift_optimizer_pb2.CargoLoad):
+            target.extend(cargo_loads)
+            return
+        
+        for cargo in cargo_loads:
+            grpc_cargo = target.add()
+            grpc_cargo.warehouse_uuid = str(cargo.warehouse.uuid)
+            grpc_cargo.date = cargo.date.strftime("%Y-%m-%d")
+            grpc_cargo.total_weight = cargo.total_weight
+        logger.debug(f"Added {len(target)} cargo loads")
+    
+    def _is_message_list(self, items, message_class) -> bool:
+        # Only lists are checked, indexing a queryset would run a query
+        return isinstance(items, (list, tuple)) and len(items) > 0 and isinstance(items[0], message_class)
+    
+    def _build_compact_request(self, workers, warehouses, cargo_loads, days):
+        request = shift_optimizer_pb2.OptimizeShiftsRequestV2(days=[DAY_NAMES.index(day) for day in days])
+        self._add_warehouses(request.warehouses, warehouses)
+        warehouse_rows = [(grpc_warehouse.uuid, grpc_warehouse.name) for grpc_warehouse in request.warehouses]
+        warehouse_ordinals = {uuid: ordinal for ordinal, (uuid, _) in enumerate(warehouse_rows)}
+        
+        columns = request.workers
+        worker_uuids = []
+        for worker in workers:
+            worker_uuids.append(str(worker.uuid))
+            columns.usernames.append(worker.username)
+            
+            qualifications = list(worker.qualifications.all())
+            columns.qualification_counts.append(len(qualifications))
+            for qualification in qualifications:
+                columns.qualification_types.append(COMPACT_QUALIFICATION_TYPES[qualification.qualification_type])
+                columns.qualification_levels.append(qualification.level)
+            
+            preference_count = 0
+            for preference in worker.warehouse_preferences.all():
+                ordinal = warehouse_ordinals.get(str(preference.warehouse.uuid))
+                if ordinal is None:
+                    continue
+                columns.preference_warehouses.append(ordinal)
+                columns.preference_priorities.append(preference.priority)
+                columns.preference_distances.append(float(preference.distance or 0))
+                preference_count += 1
+            columns.preference_counts.append(preference_count)
+        columns.uuids.extend(worker_uuids)
+        
+        epoch = datetime.date(1970, 1, 1)
+        for cargo in cargo_loads:
+            ordinal = warehouse_ordinals.get(str(cargo.warehouse.uuid))
+            if ordinal is not None:
+                request.cargo_loads.warehouses.append(ordinal)
+                request.cargo_loads.dates.append((cargo.date - epoch).days)
+                request.cargo_loads.total_weights.append(cargo.total_weight)
+        
+        return request, worker_uuids, warehouse_rows
+    
+    def _compact_response_to_dicts(self, response, worker_uuids, warehouse_rows) -> Tuple[List, List]:
+        times = {}
+        for minutes in set(response.shifts.start_minutes) | set(response.shifts.end_minutes):
+            times[minutes] = f"{minutes // 60:02d}:{minutes % 60:02d}"
+        
+        shifts = [
+            {
+                'worker_uuid': worker_uuids[worker],
+                'warehouse_uuid': warehouse_rows[warehouse][0],
+                'day_of_week': DAY_NAMES[day],
+                'start_time': times[start],
+                'end_time': times[end]
+            }
+            for worker, warehouse, day, start, end in zip(
+                response.shifts.workers, response.shifts.warehouses, response.shifts.days,
+                response.shifts.start_minutes, response.shifts.end_minutes)
+        ]
+        
+        rows = response.warehouse_staffing
+        staffing = [
+            {
+                'warehouse_uuid': warehouse_rows[warehouse][0],
+                'warehouse_name': warehouse_rows[warehouse][1],
+                'day': DAY_NAMES[day],
+                'required_basic_workers': required_basic,
+                'scheduled_basic_workers': scheduled_basic,
+                'required_drivers': required_drivers,
+                'scheduled_drivers': scheduled_drivers,
+                'required_engineers': required_engineers,
+                'scheduled_engineers': scheduled_engineers,
+                'is_fully_staffed': is_fully_staffed
+            }
+            for (warehouse, day, required_basic, scheduled_basic, required_drivers, scheduled_drivers,
+                 required_engineers, scheduled_engineers, is_fully_staffed) in zip(
+                rows.warehouses, rows.days, rows.required_basic_workers, rows.scheduled_basic_workers,
+                rows.required_drivers, rows.scheduled_drivers, rows.required_engineers, rows.scheduled_engineers,
+                rows.is_fully_staffed)
+        ]
+        return shifts, staffing
+    
+    def _shift_to_dict(self, shift) -> dict:
+        return {
+            'worker_uuid': shift.worker_uuid,
+            'warehouse_uuid': shift.warehouse_uuid,
+            'day_of_week': shift.day_of_week,
+            'start_time': shift.start_time,
+            'end_time': shift.end_time
+        }
+    
+    def _staffing_to_dict(self, staff_info) -> dict:
+        return {
+            'warehouse_uuid': staff_info.warehouse_uuid,
+            'warehouse_name': staff_info.warehouse_name,
+            'day': staff_info.day,
+            'required_basic_workers': staff_info.required_basic_workers,
+            'scheduled_basic_workers': staff_info.scheduled_basic_workers,
+            'required_drivers': staff_info.required_drivers,
+            'scheduled_drivers': staff_info.scheduled_drivers,
+            'required_engineers': staff_info.required_engineers,
+            'scheduled_engineers': staff_info.scheduled_engineers,
+            'is_fully_staffed': staff_info.is_fully_staffed
+        }
+    
+    def _job_status_to_dict(self, status) -> dict:
+        return {
+            'job_id': status.job_id,
+            'state': shift_optimizer_pb2.JobState.Name(status.state)[len('JOB_'):].lower(),
+            'days_done': status.days_done,
+            'days_total': status.days_total,
+            'elapsed_seconds': status.elapsed_seconds,
+            'message': status.message
+        }
+    
+    def _run_optimization(self, build, days, strategy, anytime, timeout,
+                          encoded_workers=None) -> Tuple[bool, str, List, List]:
+        try:
+            request = shift_optimizer_pb2.OptimizeShiftsRequest()
+            build(request)
             
             for day in days:
                 request.days.append(day)
             
+            if strategy:
+                request.strategy = strategy
+            
+            # В режиме anytime сервер улучшает расписание, пока не истечёт таймаут вызова
+            request.anytime = anytime
+            
             logger.info(f"Sending optimization request for days: {days}")
             
             # Установка таймаута для вызова gRPC
-            response = self.stub.OptimizeShifts(
-                request,
-                timeout=30.0  # 30 секунд таймаут
-            )
-            
-            if response.success:
-                shifts = []
-                for shift in response.shifts:
-                    shifts.append({
-                        'worker_uuid': shift.worker_uuid,
-                        'warehouse_uuid': shift.warehouse_uuid,
-                        'day_of_week': shift.day_of_week,
-                        'start_time': shift.start_time,
-                        'end_time': shift.end_time
-                    })
-                
-                staffing = []
-                for staff_info in response.warehouse_staffing:
-                    staffing.append({
-                        'warehouse_uuid': staff_info.warehouse_uuid,
-                        'warehouse_name': staff_info.warehouse_name,
-                        'day': staff_info.day,
-                        'required_basic_workers': staff_info.required_basic_workers,
-                        'scheduled_basic_workers': staff_info.scheduled_basic_workers,
-                        'required_drivers': staff_info.required_drivers,
-                        'scheduled_drivers': staff_info.scheduled_drivers,
-                        'required_engineers': staff_info.required_engineers,
-                        'scheduled_engineers': staff_info.scheduled_engineers,
-                        'is_fully_staffed': staff_info.is_fully_staffed
-                    })
-                
-                logger.info(f"Optimization successful. Received {len(shifts)} shifts")
-                return True, "Optimization successful", shifts, staffing
-            else:
-                logger.error(f"Optimization failed: {response.message}")
-                return False, response.message, [], []
-                
-        except grpc.RpcError as e:
-            status_code = e.code()
-            if status_code == grpc.StatusCode.UNAVAILABLE:
-                error_msg = f"Cannot connect to the optimizer server: {str(e)}. Please check that the server is running."
-            elif status_code == grpc.StatusCode.DEADLINE_EXCEEDED:
-                error_msg = "Request to optimizer server timed out."
+            if encoded_workers is not None:
+                # Only warehouses, cargo and options are serialized here, the worker frames are joined as they are
+                response = self._optimize_shifts_raw(encoded_workers.to_bytes() + request.SerializeToString(),
+                                                     timeout=timeout)
             else:
-                error_msg = f"gRPC error: {str(e)}"
+                response = self.stub.OptimizeShifts(
+                    request,
+                    timeout=timeout
+                )
             
+            return self._handle_response(response, anytime)
+        
+        except grpc.RpcError as e:
+            error_msg = self._rpc_error_message(e)
             logger.error(f"gRPC error: {error_msg}", exc_info=True)
             return False, error_msg, [], []
         except Exception as e:
             error_msg = f"Error during optimization: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            return False, error_msg, [], []
\ No newline at end of file
+            return False, error_msg, [], []
+    
+    def _handle_response(self, response, anytime) -> Tuple[bool, str, List, List]:
+        if response.snapshot_missing:
+            logger.warning(f"Snapshot is no longer on the server: {response.message}")
+        
+        if response.success:
+            shifts = [self._shift_to_dict(shift) for shift in response.shifts]
+            
+            staffing = [self._staffing_to_dict(staff_info) for staff_info in response.warehouse_staffing]
+            
+            logger.info(f"Optimization successful. Received {len(shifts)} shifts")
+            if anytime:
+                logger.info(f"Local search ran {response.search_iterations} iterations, "
+                            f"{response.search_improvements} improvements")
+            return True, "Optimization successful", shifts, staffing
+        else:
+            logger.error(f"Optimization failed: {response.message}")
+            return False, response.message, [], []
+    
+    def _rpc_error_message(self, e: grpc.RpcError) -> str:
+        status_code = e.code()
+        if status_code == grpc.StatusCode.UNAVAILABLE:
+            return f"Cannot connect to the optimizer server: {str(e)}. Please check that the server is running."
+        elif status_code == grpc.StatusCode.DEADLINE_EXCEEDED:
+            return "Request to optimizer server timed out."
+        elif status_code == grpc.StatusCode.RESOURCE_EXHAUSTED and self._is_overloaded(e):
+            return f"Optimizer server is busy, retry later: {e.details()}"
+        elif status_code == grpc.StatusCode.RESOURCE_EXHAUSTED:
+            return f"Request exceeds the message size limit, use optimize_shifts_chunked: {str(e)}"
+        else:
+            return f"gRPC error: {str(e)}"
+    
+    def _is_overloaded(self, e: grpc.RpcError) -> bool:
+        # Admission control and the server's concurrent call limit also answer RESOURCE_EXHAUSTED
+        details = e.details() or ''
+        return 'overloaded' in details or 'Concurrent RPC limit' in details
\ No newline at end of file
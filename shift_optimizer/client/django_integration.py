@@ -1,66 +1,95 @@
 import logging
 import datetime
+import uuid
+from collections import defaultdict
 from typing import List, Tuple
 from django.conf import settings
-from .client import ShiftOptimizerClient
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from .client import ShiftOptimizerClient, DEFAULT_TIMEOUT, DEFAULT_UPLOAD_CHUNK_SIZE, COMPACT_QUALIFICATION_TYPES
+from .worker_cache import EncodedWorkers, WorkerFrameCache, frame_worker
 logger = logging.getLogger(__name__)
-
+WORKER_VERSION_KEY = 'shift_optimizer:worker-version:{}'
+# Bumped with every worker, so a process reads the per-worker stamps again only after something changed
+WORKFORCE_VERSION_KEY = 'shift_optimizer:workforce-version'
+# Up to this many changed workers, only their qualifications and preferences are read
+CHANGED_WORKERS_QUERY_LIMIT = 500
+_worker_frames = WorkerFrameCache()
+# Rows per upsert statement when optimized shifts are saved
+SAVE_BATCH_SIZE = 1000
+def _worker_version_cache():
+    # The stamps must be shared by every process that saves or optimizes (web, admin, background workers),
+    # so the frame cache is used only when a shared cache alias is configured
+    alias = getattr(settings, 'SHIFT_OPTIMIZER_WORKER_CACHE', None)
+    if not alias:
+        return None
+    from django.core.cache import caches
+    return caches[alias]
+def bump_worker_versions(user_ids):
+    # Called by the model signals; code that changes workers with update() or bulk_create() calls it itself
+    version_cache = _worker_version_cache()
+    if version_cache is not None:
+        version_cache.set_many({WORKER_VERSION_KEY.format(user_id): uuid.uuid4().hex for user_id in user_ids},
+                               timeout=None)
+        # Written after the worker stamps: a reader seeing the new generation also sees the new stamps
+        version_cache.set(WORKFORCE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+def _bump_after_commit(user_id):
+    from django.db import transaction
+    # A stamp bumped before commit could be read together with the old rows and keep them cached
+    transaction.on_commit(lambda: bump_worker_versions([user_id]))
+def _user_changed(sender, instance, **kwargs):
+    _bump_after_commit(instance.pk)
+def _worker_data_changed(sender, instance, **kwargs):
+    _bump_after_commit(instance.user_id)
+def _report(progress, stage, **counts):
+    # Progress is informational: a reporter that fails must not fail the optimization
+    if progress is None:
+        return
+    try:
+        progress(stage, **counts)
+    except Exception as e:
+        logger.warning(f"Could not report optimization progress: {str(e)}")
+def connect_worker_signals():
+    from django.db.models.signals import post_delete, post_save
+    post_save.connect(_user_changed, sender='user.User', dispatch_uid='shift_optimizer.user_saved')
+    for model in ('user.WorkerQualification', 'user.WorkerWarehousePreference'):
+        post_save.connect(_worker_data_changed, sender=model, dispatch_uid=f'shift_optimizer.{model}.saved')
+        post_delete.connect(_worker_data_changed, sender=model, dispatch_uid=f'shift_optimizer.{model}.deleted')
 class ShiftOptimizationService:
     def __init__(self):
         host = getattr(settings, 'SHIFT_OPTIMIZER_HOST', 'shift_optimizer')
         port = getattr(settings, 'SHIFT_OPTIMIZER_PORT', '50051')
-        self.client = ShiftOptimizerClient(host=host, port=port)
+        max_message_mb = getattr(settings, 'SHIFT_OPTIMIZER_MAX_MESSAGE_MB', None)
+        self.upload_chunk_size = getattr(settings, 'SHIFT_OPTIMIZER_UPLOAD_CHUNK_SIZE', DEFAULT_UPLOAD_CHUNK_SIZE)
+        # 'interactive' or 'batch'; the server solves interactive calls first when it is busy
+        priority = getattr(settings, 'SHIFT_OPTIMIZER_PRIORITY', None)
+        self.client = ShiftOptimizerClient(host=host, port=port, max_message_mb=max_message_mb, priority=priority)
+        self.worker_versions = _worker_version_cache()
     
-    def optimize_shifts(self, start_date, end_date=None, warehouse_ids=None) -> Tuple[bool, str, List, List]:
+    def optimize_shifts(self, start_date, end_date=None, warehouse_ids=None,
+                        progress=None, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, List, List]:
+        # progress(stage, **counts) is called with 'loading', 'solving' and 'saving' as the run goes on.
+        # timeout is the gRPC deadline in seconds; None waits for the optimizer however long it takes
         try:
-            from user.models import User, WorkerQualification, WorkerWarehousePreference
-            from warehouses.models import Warehouse
-            from cargo.models import CargoLoad
-            
-            if not end_date:
-                end_date = start_date
-            
-            if not isinstance(start_date, datetime.date) or not isinstance(end_date, datetime.date):
-                return False, "Invalid date format", [], []
-                
-            if start_date > end_date:
-                return False, "Start date cannot be after end date", [], []
-            
-            delta = end_date - start_date
-            if delta.days > 14:
-                return False, "Optimization period cannot exceed 14 days", [], []
-            
-            warehouse_queryset = Warehouse.objects.filter(is_active=True)
-            if warehouse_ids:
-                warehouse_queryset = warehouse_queryset.filter(id__in=warehouse_ids)
-            
-            warehouses = list(warehouse_queryset)
-            
-            if not warehouses:
-                return False, "No active warehouses found", [], []
-            
-            workers = list(User.objects.filter(role='worker').prefetch_related(
-                'qualifications', 'warehouse_preferences'
-            ))
-            
-            if not workers:
-                return False, "No active workers found", [], []
-            
-            cargo_loads = list(CargoLoad.objects.filter(
-                date__gte=start_date,
-                date__lte=end_date,
-                warehouse__in=warehouses
-            ))
-            
-            days = []
-            current_date = start_date
-            while current_date <= end_date:
-                days.append(current_date.strftime("%A").lower())
-                current_date += datetime.timedelta(days=1)
+            _report(progress, 'loading')
+            error, workers, warehouses, cargo_loads, days = self._load_optimization_input(
+                start_date, end_date, warehouse_ids, encoded=True
+            )
+            if error:
+                return False, error, [], []
             
+            _report(progress, 'solving', workers=len(workers), warehouses=len(warehouses),
+                    cargo_loads=len(cargo_loads), days=len(days))
             try:
                 logger.info(f"Calling optimization service with {len(workers)} workers, {len(warehouses)} warehouses, {len(cargo_loads)} cargo loads")
-                success, message, shifts, staffing = self.client.optimize_shifts(workers, warehouses, cargo_loads, days)
+                if len(workers) > self.upload_chunk_size:
+                    # Большие составы отправляются частями, чтобы не упереться в лимит размера сообщения
+                    success, message, shifts, staffing = self.client.optimize_shifts_chunked(
+                        workers, warehouses, cargo_loads, days, chunk_size=self.upload_chunk_size, timeout=timeout
+                    )
+                else:
+                    success, message, shifts, staffing = self.client.optimize_shifts(
+                        workers, warehouses, cargo_loads, days, timeout=timeout
+                    )
             except Exception as e:
                 logger.error(f"Error communicating with optimizer service: {str(e)}", exc_info=True)
                 return False, f"Error: {str(e)}", [], []
@@ -70,57 +99,298 @@ class ShiftOptimizationService:
                 return success, message, shifts, staffing
             
             logger.info(f"Optimization successful. Received {len(shifts)} shifts")
+            _report(progress, 'saving', shifts=len(shifts))
             
-            save_success, save_message, saved_count = self.save_optimized_shifts(shifts)
+            save_success, save_message, saved_count = self.save_optimized_shifts(
+                shifts, days=days, warehouse_uuids=[warehouse.uuid for warehouse in warehouses]
+            )
             
             if not save_success:
                 logger.warning(f"Failed to save shifts: {save_message}")
-            else:
-                logger.info(f"Saved {saved_count} shifts successfully")
             
             return success, message, shifts, staffing
         except Exception as e:
             logger.error(f"Error in shift optimization service: {str(e)}", exc_info=True)
             return False, f"Error: {str(e)}", [], []
     
-    def save_optimized_shifts(self, shifts) -> Tuple[bool, str, int]:
+    def optimize_shifts_streaming(self, start_date, end_date=None, warehouse_ids=None,
+                                  progress=None, timeout=DEFAULT_TIMEOUT) -> Tuple[bool, str, int, int, List]:
+        # Each day is saved as soon as the optimizer streams it, instead of after the whole period is solved.
+        # Only the current day's shifts are held, so the counts of saved shifts and days are returned, not the shifts
+        try:
+            _report(progress, 'loading')
+            error, workers, warehouses, cargo_loads, days = self._load_optimization_input(
+                start_date, end_date, warehouse_ids, encoded=True
+            )
+            if error:
+                return False, error, 0, 0, []
+            
+            _report(progress, 'solving', workers=len(workers), warehouses=len(warehouses),
+                    cargo_loads=len(cargo_loads), days=len(days))
+            saved = [0]
+            saved_days = [0]
+            warehouse_uuids = [warehouse.uuid for warehouse in warehouses]
+            # A day can arrive in several chunks; it is saved whole, since saving replaces the day's shifts
+            pending = {'day': None, 'shifts': []}
+            
+            def save_pending_day():
+                if pending['day'] is None:
+                    return
+                save_success, save_message, saved_count = self.save_optimized_shifts(
+                    pending['shifts'], days=[pending['day']], warehouse_uuids=warehouse_uuids
+                )
+                if not save_success:
+                    logger.warning(f"Failed to save shifts for {pending['day']}: {save_message}")
+                pending['shifts'] = []
+                saved[0] += saved_count
+                saved_days[0] += 1
+                # Solving and saving overlap here: each report covers the days solved and saved so far
+                _report(progress, 'saving', days_saved=saved_days[0], shifts=saved[0])
+            
+            def persist_chunk(day, chunk_shifts, chunk_staffing):
+                if day != pending['day']:
+                    save_pending_day()
+                    pending['day'] = day
+                pending['shifts'].extend(chunk_shifts)
+            
+            try:
+                logger.info(f"Streaming optimization for {len(workers)} workers, {len(warehouses)} warehouses, {len(cargo_loads)} cargo loads")
+                # Большие составы отправляются частями, как и в optimize_shifts
+                success, message, streamed, staffing = self.client.optimize_shifts_stream(
+                    workers, warehouses, cargo_loads, days, persist_chunk, chunk_size=self.upload_chunk_size,
+                    timeout=timeout
+                )
+            except Exception as e:
+                logger.error(f"Error communicating with optimizer service: {str(e)}", exc_info=True)
+                return False, f"Error: {str(e)}", saved[0], saved_days[0], []
+            
+            # After a failure the last day may be incomplete, so it is not saved
+            if success:
+                save_pending_day()
+            
+            if not success:
+                logger.error(f"Optimization failed after saving {saved[0]} shifts: {message}")
+                return success, message, saved[0], saved_days[0], staffing
+            
+            logger.info(f"Optimization successful. Saved {saved[0]} of {streamed} streamed shifts "
+                        f"for {saved_days[0]} days")
+            return success, message, saved[0], saved_days[0], staffing
+        except Exception as e:
+            logger.error(f"Error in shift optimization service: {str(e)}", exc_info=True)
+            return False, f"Error: {str(e)}", 0, 0, []
+    
+    def _load_optimization_input(self, start_date, end_date=None, warehouse_ids=None, encoded=False):
+        from user.models import User, WorkerQualification, WorkerWarehousePreference
+        from warehouses.models import Warehouse
+        from cargo.models import CargoLoad
+        
+        if not end_date:
+            end_date = start_date
+        
+        if not isinstance(start_date, datetime.date) or not isinstance(end_date, datetime.date):
+            return "Invalid date format", None, None, None, None
+        
+        if start_date > end_date:
+            return "Start date cannot be after end date", None, None, None, None
+        
+        delta = end_date - start_date
+        if delta.days > 14:
+            return "Optimization period cannot exceed 14 days", None, None, None, None
+        
+        warehouse_queryset = Warehouse.objects.filter(is_active=True)
+        if warehouse_ids:
+            warehouse_queryset = warehouse_queryset.filter(id__in=warehouse_ids)
+        
+        # Flat rows joined on integer IDs here instead of model instances and related lookups, so the
+        # request takes five queries whatever the size of the workforce
+        warehouse_rows = list(warehouse_queryset.values_list(
+            'id', 'uuid', 'name', 'capacity', 'min_workers', 'min_basic_workers', 'min_drivers', 'min_engineers',
+            'is_active'
+        ))
+        
+        if not warehouse_rows:
+            return "No active warehouses found", None, None, None, None
+        
+        worker_rows = list(User.objects.filter(role='worker').values_list('id', 'uuid', 'username'))
+        
+        if not worker_rows:
+            return "No active workers found", None, None, None, None
+        
+        warehouse_uuids = {row[0]: str(row[1]) for row in warehouse_rows}
+        warehouses = [
+            shift_optimizer_pb2.Warehouse(uuid=warehouse_uuids[warehouse_id], name=name, capacity=capacity,
+                                          min_workers=min_workers, min_basic_workers=min_basic_workers,
+                                          min_drivers=min_drivers, min_engineers=min_engineers, is_active=is_active)
+            for (warehouse_id, _, name, capacity, min_workers, min_basic_workers, min_drivers, min_engineers,
+                 is_active) in warehouse_rows
+        ]
+        qualifications = WorkerQualification.objects.filter(user__role='worker')
+        # The optimizer ignores preferences for warehouses outside the request, so they are not loaded
+        preferences = WorkerWarehousePreference.objects.filter(user__role='worker', warehouse__in=warehouse_queryset)
+        if encoded and self.worker_versions is not None:
+            workers = self._encoded_workers(worker_rows, qualifications, preferences, warehouse_uuids)
+        else:
+            workers = self._worker_messages(
+                worker_rows, qualifications.values_list('user_id', 'qualification_type', 'level'),
+                preferences.values_list('user_id', 'warehouse_id', 'priority', 'distance'), warehouse_uuids
+            )
+        
+        cargo_loads = [
+            shift_optimizer_pb2.CargoLoad(warehouse_uuid=warehouse_uuids[warehouse_id],
+                                          date=date.strftime("%Y-%m-%d"), total_weight=total_weight)
+            for warehouse_id, date, total_weight in CargoLoad.objects.filter(
+                date__gte=start_date,
+                date__lte=end_date,
+                warehouse__in=warehouse_queryset
+            ).values_list('warehouse_id', 'date', 'total_weight')
+        ]
+        
+        days = []
+        current_date = start_date
+        while current_date <= end_date:
+            days.append(current_date.strftime("%A").lower())
+            current_date += datetime.timedelta(days=1)
+        
+        return None, workers, warehouses, cargo_loads, days
+    
+    def _encoded_workers(self, worker_rows, qualifications, preferences, warehouse_uuids) -> EncodedWorkers:
+        # Preferences depend on the requested warehouses, so each selection has its own frames
+        scope = tuple(warehouse_uuids)
+        # Stamps are read before the rows: a change committed in between leaves a stale stamp, not stale frames
+        stamps = self._worker_stamps([row[0] for row in worker_rows])
+        frames = _worker_frames.get_many(scope, stamps)
+        changed_rows = [row for row in worker_rows if row[0] not in frames]
+        
+        if changed_rows:
+            if len(changed_rows) <= CHANGED_WORKERS_QUERY_LIMIT:
+                changed_ids = [row[0] for row in changed_rows]
+                qualifications = qualifications.filter(user_id__in=changed_ids)
+                preferences = preferences.filter(user_id__in=changed_ids)
+            messages = self._worker_messages(
+                changed_rows, qualifications.values_list('user_id', 'qualification_type', 'level'),
+                preferences.values_list('user_id', 'warehouse_id', 'priority', 'distance'), warehouse_uuids
+            )
+            encoded = {row[0]: frame_worker(message) for row, message in zip(changed_rows, messages)}
+            _worker_frames.set_many(scope, {user_id: (stamps[user_id], frame) for user_id, frame in encoded.items()})
+            frames.update(encoded)
+        
+        logger.info(f"Encoded {len(changed_rows)} of {len(worker_rows)} workers, the rest came from the cache")
+        return EncodedWorkers([frames[row[0]] for row in worker_rows])
+    
+    def _worker_stamps(self, user_ids):
+        generation = self.worker_versions.get(WORKFORCE_VERSION_KEY)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.worker_versions.set(WORKFORCE_VERSION_KEY, generation, timeout=None)
+        stamps = _worker_frames.known_stamps(generation)
+        
+        keys = {WORKER_VERSION_KEY.format(user_id): user_id for user_id in user_ids if user_id not in stamps}
+        if keys:
+            found = self.worker_versions.get_many(keys)
+            stamps.update((keys[key], stamp) for key, stamp in found.items())
+            # Never bumped or evicted from the cache: a new stamp invalidates whatever frame was kept before
+            missing = {key: uuid.uuid4().hex for key in keys.keys() - found.keys()}
+            if missing:
+                self.worker_versions.set_many(missing, timeout=None)
+                stamps.update((keys[key], stamp) for key, stamp in missing.items())
+            _worker_frames.remember_stamps(generation, stamps)
+        return stamps
+    
+    def _worker_messages(self, worker_rows, qualification_rows, preference_rows, warehouse_uuids):
+        qualifications = defaultdict(list)
+        for user_id, qualification_type, level in qualification_rows:
+            # Unknown types were sent as the enum default before as well
+            qualifications[user_id].append((COMPACT_QUALIFICATION_TYPES.get(qualification_type, 0), level))
+        preferences = defaultdict(list)
+        for user_id, warehouse_id, priority, distance in preference_rows:
+            preferences[user_id].append((warehouse_uuids[warehouse_id], priority, float(distance or 0)))
+        
+        workers = []
+        for user_id, user_uuid, username in worker_rows:
+            worker = shift_optimizer_pb2.Worker(uuid=str(user_uuid), username=username)
+            add_qualification = worker.qualifications.add
+            for qualification_type, level in qualifications.get(user_id, ()):
+                add_qualification(type=qualification_type, level=level)
+            add_preference = worker.warehouse_preferences.add
+            for warehouse_uuid, priority, distance in preferences.get(user_id, ()):
+                add_preference(warehouse_uuid=warehouse_uuid, priority=priority, distance=distance)
+            workers.append(worker)
+        return workers
+    
+    def save_optimized_shifts(self, shifts, days=None, warehouse_uuids=None) -> Tuple[bool, str, int]:
+        # The optimized shifts of the given days and warehouses (by default those of the shifts) are replaced
+        # by shifts in one transaction: inserted, updated or deleted in bulk after a diff with what is stored
         try:
+            from django.db import transaction
             from user.models import User
             from warehouses.models import Warehouse
             from shifts.models import Shift
             
-            saved_count = 0
+            if days is None:
+                days = {shift_data['day_of_week'] for shift_data in shifts}
+            warehouse_uuids = set(warehouse_uuids or ()) | {shift_data['warehouse_uuid'] for shift_data in shifts}
+            
+            user_ids = {str(user_uuid): user_id for user_uuid, user_id in User.objects.filter(
+                uuid__in={shift_data['worker_uuid'] for shift_data in shifts}
+            ).values_list('uuid', 'id')}
+            warehouse_ids = {str(warehouse_uuid): warehouse_id for warehouse_uuid, warehouse_id in
+                             Warehouse.objects.filter(uuid__in=warehouse_uuids).values_list('uuid', 'id')}
             
+            # Keyed like the unique constraint of Shift: one shift per worker, day and start time
+            planned = {}
+            skipped = 0
             for shift_data in shifts:
-                try:
-                    user = User.objects.get(uuid=shift_data['worker_uuid'])
-                    warehouse = Warehouse.objects.get(uuid=shift_data['warehouse_uuid'])
-                    
-                    shift, created = Shift.objects.update_or_create(
-                        user=user,
-                        warehouse=warehouse,
-                        day_of_week=shift_data['day_of_week'],
-                        defaults={
-                            'start_time': shift_data['start_time'],
-                            'end_time': shift_data['end_time'],
-                            'is_optimized': True
-                        }
-                    )
-                    
-                    saved_count += 1
-                    
-                except User.DoesNotExist:
-                    logger.warning(f"User with UUID {shift_data['worker_uuid']} not found")
-                    continue
-                except Warehouse.DoesNotExist:
-                    logger.warning(f"Warehouse with UUID {shift_data['warehouse_uuid']} not found")
-                    continue
-                except Exception as e:
-                    logger.error(f"Error saving shift: {str(e)}", exc_info=True)
+                user_id = user_ids.get(shift_data['worker_uuid'])
+                warehouse_id = warehouse_ids.get(shift_data['warehouse_uuid'])
+                if user_id is None or warehouse_id is None:
+                    skipped += 1
                     continue
+                key = (user_id, shift_data['day_of_week'], self._parse_time(shift_data['start_time']))
+                planned[key] = (warehouse_id, self._parse_time(shift_data['end_time']))
+            if skipped:
+                logger.warning(f"Skipped {skipped} shifts of workers or warehouses that no longer exist")
             
-            return True, f"Successfully saved {saved_count} shifts", saved_count
+            with transaction.atomic():
+                stored = {
+                    (user_id, day_of_week, start_time): (shift_id, warehouse_id, end_time)
+                    for shift_id, user_id, warehouse_id, day_of_week, start_time, end_time in Shift.objects.filter(
+                        is_optimized=True, day_of_week__in=days, warehouse_id__in=warehouse_ids.values()
+                    ).values_list('id', 'user_id', 'warehouse_id', 'day_of_week', 'start_time', 'end_time')
+                }
+                
+                created = 0
+                changed = []
+                for (user_id, day_of_week, start_time), (warehouse_id, end_time) in planned.items():
+                    current = stored.get((user_id, day_of_week, start_time))
+                    if current is None:
+                        created += 1
+                    elif current[1:] == (warehouse_id, end_time):
+                        continue
+                    changed.append(Shift(user_id=user_id, warehouse_id=warehouse_id, day_of_week=day_of_week,
+                                         start_time=start_time, end_time=end_time, is_optimized=True))
+                stale = [shift_id for key, (shift_id, _, _) in stored.items() if key not in planned]
+                
+                if stale:
+                    Shift.objects.filter(id__in=stale).delete()
+                if changed:
+                    # New and changed shifts go through one upsert on the unique key: bulk_update builds a CASE
+                    # expression per row and was several times slower. A manual shift or an optimized one
+                    # outside the scope with the same key becomes this optimized shift
+                    Shift.objects.bulk_create(changed, batch_size=SAVE_BATCH_SIZE, update_conflicts=True,
+                                              unique_fields=['user', 'day_of_week', 'start_time'],
+                                              update_fields=['warehouse', 'end_time', 'is_optimized', 'updated_at'])
             
+            updated = len(changed) - created
+            unchanged = len(planned) - len(changed)
+            message = (f"Saved {len(planned)} shifts: {created} created, {updated} updated, "
+                       f"{len(stale)} removed, {unchanged} unchanged")
+            logger.info(message)
+            return True, message, len(planned)
+        
         except Exception as e:
             logger.error(f"Error saving optimized shifts: {str(e)}", exc_info=True)
-            return False, f"Error: {str(e)}", 0
\ No newline at end of file
+            return False, f"Error: {str(e)}", 0
+    
+    def _parse_time(self, value):
+        # The optimizer sends "HH:MM"; stored times come back as datetime.time
+        return value if isinstance(value, datetime.time) else datetime.time.fromisoformat(value)
\ No newline at end of file
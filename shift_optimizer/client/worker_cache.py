@@ -0,0 +1,86 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+logger = logging.getLogger(__name__)
+# Warehouse selections whose frames are kept; preferences are encoded for the requested warehouses only
+DEFAULT_MAX_SCOPES = 4
+def frame_worker(worker: shift_optimizer_pb2.Worker) -> bytes:
+    # The worker as field 1 of OptimizeShiftsRequest: tag, length and message. Repeated fields may be
+    # concatenated on the wire, so joined frames plus the rest of the request parse as one request
+    return shift_optimizer_pb2.OptimizeShiftsRequest(workers=[worker]).SerializeToString()
+class EncodedWorkers:
+    __slots__ = ('frames',)
+    
+    def __init__(self, frames: List[bytes]):
+        self.frames = frames
+    
+    def __len__(self) -> int:
+        return len(self.frames)
+    
+    def __getitem__(self, index: slice) -> 'EncodedWorkers':
+        # Slices only, for chunked uploads
+        return EncodedWorkers(self.frames[index])
+    
+    def to_bytes(self) -> bytes:
+        return b''.join(self.frames)
+    
+    def to_messages(self) -> List[shift_optimizer_pb2.Worker]:
+        return list(shift_optimizer_pb2.OptimizeShiftsRequest.FromString(self.to_bytes()).workers)
+class WorkerFrameCache:
+    def __init__(self, max_scopes: int = DEFAULT_MAX_SCOPES):
+        self.max_scopes = max_scopes
+        self._lock = threading.Lock()
+        # scope -> worker ID -> (version stamp, frame), least recently used scope first
+        self._scopes: 'OrderedDict[Hashable, Dict[int, Tuple[str, bytes]]]' = OrderedDict()
+        # Version stamps last read from the shared cache and the workforce generation they were read at
+        self._generation: Optional[str] = None
+        self._stamps: Dict[int, str] = {}
+    
+    def get_many(self, scope: Hashable, stamps: Dict[int, str]) -> Dict[int, bytes]:
+        # Frames of the workers whose stamp is unchanged; everyone else has to be encoded again
+        with self._lock:
+            frames = self._frames(scope)
+            cached = {}
+            for worker_id, stamp in stamps.items():
+                entry = frames.get(worker_id)
+                if entry is not None and entry[0] == stamp:
+                    cached[worker_id] = entry[1]
+            # Workers no longer in the workforce are dropped
+            for worker_id in frames.keys() - stamps.keys():
+                del frames[worker_id]
+        return cached
+    
+    def set_many(self, scope: Hashable, entries: Dict[int, Tuple[str, bytes]]):
+        with self._lock:
+            self._frames(scope).update(entries)
+    
+    def known_stamps(self, generation: str) -> Dict[int, str]:
+        # Still valid while no worker has been bumped since they were read
+        with self._lock:
+            return dict(self._stamps) if generation == self._generation else {}
+    
+    def remember_stamps(self, generation: str, stamps: Dict[int, str]):
+        with self._lock:
+            self._generation, self._stamps = generation, dict(stamps)
+    
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+            self._generation, self._stamps = None, {}
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(frames) for frames in self._scopes.values())
+    
+    def _frames(self, scope: Hashable) -> Dict[int, Tuple[str, bytes]]:
+        frames = self._scopes.get(scope)
+        if frames is None:
+            frames = self._scopes[scope] = {}
+            while len(self._scopes) > self.max_scopes:
+                _, evicted = self._scopes.popitem(last=False)
+                logger.info(f"Dropped cached frames of {len(evicted)} workers for an unused warehouse selection")
+        else:
+            self._scopes.move_to_end(scope)
+        return frames
\ No newline at end of file
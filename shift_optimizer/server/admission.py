@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+import grpc
+logger = logging.getLogger(__name__)
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+# Request metadata choosing the lane; callers that do not send it are interactive
+PRIORITY_METADATA_KEY = 'x-priority'
+DEFAULT_MAX_CONCURRENT_SOLVES = 4
+DEFAULT_MAX_QUEUED_SOLVES = 32
+# Handler threads beyond running and waiting solves, so status polls and job calls are still answered
+SPARE_HANDLER_THREADS = 8
+# How often a job waiting for a slot checks whether it was cancelled
+JOB_CANCEL_POLL_SECONDS = 0.1
+# RPCs that solve or index a workforce; everything else is cheap and is never held back. Jobs take their
+# batch slot when a job worker starts solving them, not when they are submitted
+ADMITTED_METHODS = frozenset({
+    'OptimizeShifts', 'OptimizeShiftsUpload', 'OptimizeShiftsStream', 'OptimizeShiftsUploadStream',
+    'OptimizeShiftsV2', 'OptimizeScenarios', 'UploadSnapshot',
+})
+class AdmissionRejected(Exception):
+    pass
+class _Waiter:
+    __slots__ = ('lane', 'wake', 'admitted')
+    
+    def __init__(self, lane: str, wake: Callable[[], None]):
+        self.lane = lane
+        self.wake = wake
+        self.admitted = False
+class AdmissionController:
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT_SOLVES,
+                 max_queued: int = DEFAULT_MAX_QUEUED_SOLVES, interactive_reserve: int = 1):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        # Batch solves never take the reserved slots, so an interactive solve does not wait for a bulk one
+        self.batch_limit = max(1, max_concurrent - interactive_reserve)
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {INTERACTIVE: 0, BATCH: 0}
+        self._lanes: Dict[str, deque] = {INTERACTIVE: deque(), BATCH: deque()}
+        self.rejected = 0
+    
+    def acquire(self, lane: str, context):
+        # Blocks until a slot is free; raises AdmissionRejected when the wait queue is full or the call ends first
+        event = threading.Event()
+        waiter = self._enter(lane, event.set)
+        if waiter is None:
+            return
+        
+        if not context.add_callback(event.set):
+            event.set()
+        event.wait(context.time_remaining())
+        if self._withdraw(waiter):
+            if context.is_active():
+                return
+            self.release(lane)
+        raise AdmissionRejected("Call ended while waiting for a solver slot")
+    
+    async def acquire_async(self, lane: str, context):
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+        waiter = self._enter(lane, lambda: loop.call_soon_threadsafe(
+            lambda: admitted.done() or admitted.set_result(None)))
+        if waiter is None:
+            return
+        
+        try:
+            await asyncio.wait_for(admitted, context.time_remaining())
+        except asyncio.TimeoutError:
+            if self._withdraw(waiter):
+                self.release(lane)
+            raise AdmissionRejected("Call deadline passed while waiting for a solver slot")
+        except asyncio.CancelledError:
+            if self._withdraw(waiter):
+                self.release(lane)
+            raise
+    
+    def acquire_job(self, lane: str, cancel_event: threading.Event) -> bool:
+        # Queued jobs have no call to end the wait, so it lasts until a slot is free or the job is cancelled;
+        # False if the job was cancelled first
+        event = threading.Event()
+        waiter = self._enter(lane, event.set)
+        if waiter is None:
+            return True
+        
+        while not event.wait(JOB_CANCEL_POLL_SECONDS):
+            if cancel_event.is_set():
+                break
+        if self._withdraw(waiter):
+            if not cancel_event.is_set():
+                return True
+            self.release(lane)
+        return False
+    
+    def release(self, lane: str):
+        with self._lock:
+            self._running[lane] -= 1
+            woken = self._promote()
+        for waiter in woken:
+            waiter.wake()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'running_interactive': self._running[INTERACTIVE],
+                'running_batch': self._running[BATCH],
+                'queued_interactive': len(self._lanes[INTERACTIVE]),
+                'queued_batch': len(self._lanes[BATCH]),
+                'rejected': self.rejected,
+            }
+    
+    def _can_start(self, lane: str) -> bool:
+        # Called with the lock held
+        if self._running[INTERACTIVE] + self._running[BATCH] >= self.max_concurrent:
+            return False
+        return lane == INTERACTIVE or self._running[BATCH] < self.batch_limit
+    
+    def _enter(self, lane: str, wake: Callable[[], None]) -> Optional[_Waiter]:
+        with self._lock:
+            if not self._lanes[lane] and self._can_start(lane):
+                self._running[lane] += 1
+                return None
+            
+            queued = len(self._lanes[INTERACTIVE]) + len(self._lanes[BATCH])
+            if queued >= self.max_queued:
+                self.rejected += 1
+                running = self._running[INTERACTIVE] + self._running[BATCH]
+                raise AdmissionRejected(f"Optimizer is overloaded ({running} solves running, {queued} waiting), "
+                                        f"retry later")
+            waiter = _Waiter(lane, wake)
+            self._lanes[lane].append(waiter)
+            return waiter
+    
+    def _promote(self):
+        # Called with the lock held; interactive waiters are admitted before any batch waiter
+        woken = []
+        for lane in (INTERACTIVE, BATCH):
+            while self._lanes[lane] and self._can_start(lane):
+                waiter = self._lanes[lane].popleft()
+                waiter.admitted = True
+                self._running[lane] += 1
+                woken.append(waiter)
+        return woken
+    
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        # Takes a waiter out of its lane; True if it was admitted in the meantime and now holds a slot
+        with self._lock:
+            if not waiter.admitted:
+                self._lanes[waiter.lane].remove(waiter)
+            return waiter.admitted
+def priority_from_metadata(metadata) -> str:
+    for key, value in metadata or ():
+        if key == PRIORITY_METADATA_KEY:
+            return BATCH if value.strip().lower() == BATCH else INTERACTIVE
+    return INTERACTIVE
+def _method_name(handler_call_details) -> str:
+    return handler_call_details.method.rsplit('/', 1)[-1]
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+    
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or _method_name(handler_call_details) not in ADMITTED_METHODS:
+            return handler
+        lane = priority_from_metadata(handler_call_details.invocation_metadata)
+        controller = self.controller
+        
+        def admit(context):
+            try:
+                controller.acquire(lane, context)
+            except AdmissionRejected as e:
+                logger.warning(f"Rejected {_method_name(handler_call_details)} ({lane}): {str(e)}")
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+        
+        # The slot is held for the whole call, including the upload and every streamed chunk
+        if handler.unary_unary:
+            def unary_unary(request, context):
+                admit(context)
+                try:
+                    return handler.unary_unary(request, context)
+                finally:
+                    controller.release(lane)
+            return grpc.unary_unary_rpc_method_handler(unary_unary, request_deserializer=handler.request_deserializer,
+                                                       response_serializer=handler.response_serializer)
+        if handler.unary_stream:
+            def unary_stream(request, context):
+                admit(context)
+                try:
+                    yield from handler.unary_stream(request, context)
+                finally:
+                    controller.release(lane)
+            return grpc.unary_stream_rpc_method_handler(unary_stream,
+                                                        request_deserializer=handler.request_deserializer,
+                                                        response_serializer=handler.response_serializer)
+        if handler.stream_unary:
+            def stream_unary(request_iterator, context):
+                admit(context)
+                try:
+                    return handler.stream_unary(request_iterator, context)
+                finally:
+                    controller.release(lane)
+            return grpc.stream_unary_rpc_method_handler(stream_unary,
+                                                        request_deserializer=handler.request_deserializer,
+                                                        response_serializer=handler.response_serializer)
+        if handler.stream_stream:
+            def stream_stream(request_iterator, context):
+                admit(context)
+                try:
+                    yield from handler.stream_stream(request_iterator, context)
+                finally:
+                    controller.release(lane)
+            return grpc.stream_stream_rpc_method_handler(stream_stream,
+                                                         request_deserializer=handler.request_deserializer,
+                                                         response_serializer=handler.response_serializer)
+        return handler
+class AsyncAdmissionInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+    
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or _method_name(handler_call_details) not in ADMITTED_METHODS:
+            return handler
+        lane = priority_from_metadata(handler_call_details.invocation_metadata)
+        controller = self.controller
+        
+        async def admit(context):
+            try:
+                await controller.acquire_async(lane, context)
+            except AdmissionRejected as e:
+                logger.warning(f"Rejected {_method_name(handler_call_details)} ({lane}): {str(e)}")
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+        
+        if handler.unary_unary:
+            async def unary_unary(request, context):
+                await admit(context)
+                try:
+                    return await handler.unary_unary(request, context)
+                finally:
+                    controller.release(lane)
+            return grpc.unary_unary_rpc_method_handler(unary_unary, request_deserializer=handler.request_deserializer,
+                                                       response_serializer=handler.response_serializer)
+        if handler.unary_stream:
+            async def unary_stream(request, context):
+                await admit(context)
+                try:
+                    async for chunk in handler.unary_stream(request, context):
+                        yield chunk
+                finally:
+                    controller.release(lane)
+            return grpc.unary_stream_rpc_method_handler(unary_stream,
+                                                        request_deserializer=handler.request_deserializer,
+                                                        response_serializer=handler.response_serializer)
+        if handler.stream_unary:
+            async def stream_unary(request_iterator, context):
+                await admit(context)
+                try:
+                    return await handler.stream_unary(request_iterator, context)
+                finally:
+                    controller.release(lane)
+            return grpc.stream_unary_rpc_method_handler(stream_unary,
+                                                        request_deserializer=handler.request_deserializer,
+                                                        response_serializer=handler.response_serializer)
+        if handler.stream_stream:
+            async def stream_stream(request_iterator, context):
+                await admit(context)
+                try:
+                    async for chunk in handler.stream_stream(request_iterator, context):
+                        yield chunk
+                finally:
+                    controller.release(lane)
+            return grpc.stream_stream_rpc_method_handler(stream_stream,
+                                                         request_deserializer=handler.request_deserializer,
+                                                         response_serializer=handler.response_serializer)
+        return handler
\ No newline at end of file
@@ -0,0 +1,370 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import grpc
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+import shift_optimizer.shift_optimizer_pb2_grpc as shift_optimizer_pb2_grpc
+from .server import ShiftOptimizerServicer, DEFAULT_STREAM_CHUNK_SIZE, DEFAULT_MAX_MESSAGE_MB, KEEPALIVE_OPTIONS
+from .admission import AdmissionController, AsyncAdmissionInterceptor
+from .admission import DEFAULT_MAX_CONCURRENT_SOLVES, DEFAULT_MAX_QUEUED_SOLVES
+from .jobs import DEFAULT_JOB_WORKERS, DEFAULT_MAX_QUEUED_JOBS
+from .solvers import DEFAULT_STRATEGY
+from .cache import ResultCache, request_fingerprint, compact_request_fingerprint
+from .snapshots import SnapshotStore
+logger = logging.getLogger(__name__)
+# Solves that can be cancelled at the same time; further ones run to completion
+CANCEL_SLOTS = 4096
+_STREAM_END = object()
+class _SharedFlag:
+    # threading.Event look-alike over one byte of shared memory, set by the server process
+    __slots__ = ('_flags', '_slot')
+    
+    def __init__(self, flags, slot: int):
+        self._flags = flags
+        self._slot = slot
+    
+    def is_set(self) -> bool:
+        return self._flags[self._slot] != 0
+class _CancelSlots:
+    def __init__(self, size: int = CANCEL_SLOTS):
+        self.flags = multiprocessing.RawArray('b', size)
+        self._free = deque(range(size))
+    
+    def acquire(self) -> int:
+        if not self._free:
+            return -1
+        slot = self._free.popleft()
+        self.flags[slot] = 0
+        return slot
+    
+    def cancel(self, slot: int):
+        if slot >= 0:
+            self.flags[slot] = 1
+    
+    def release(self, slot: int):
+        if slot >= 0:
+            self._free.append(slot)
+_process_servicer: Optional[ShiftOptimizerServicer] = None
+_process_cancel_flags = None
+def _init_solver_process(cancel_flags, default_strategy: str):
+    global _process_servicer, _process_cancel_flags
+    _process_servicer = ShiftOptimizerServicer(processes=1, default_strategy=default_strategy)
+    _process_cancel_flags = cancel_flags
+def _solve_in_process(payload: bytes, strategy: str, time_budget: Optional[float],
+                      slot: int, compact: bool = False) -> Tuple[bytes, bool]:
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    cancel_event = _SharedFlag(_process_cancel_flags, slot) if slot >= 0 else None
+    if compact:
+        request = shift_optimizer_pb2.OptimizeShiftsRequestV2.FromString(payload)
+        response = _process_servicer._optimize_compact(request, None, strategy, deadline, cancel_event)
+    else:
+        request = shift_optimizer_pb2.OptimizeShiftsRequest.FromString(payload)
+        response = _process_servicer._optimize(request, None, strategy, deadline, cancel_event)
+    return response.SerializeToString(), response.success
+class AsyncShiftOptimizerServicer(shift_optimizer_pb2_grpc.ShiftOptimizerServiceServicer):
+    def __init__(self, solver_processes: int, default_strategy: str = DEFAULT_STRATEGY,
+                 cache: Optional[ResultCache] = None, snapshots: Optional[SnapshotStore] = None,
+                 stream_chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE, job_workers: int = DEFAULT_JOB_WORKERS,
+                 max_queued_jobs: int = DEFAULT_MAX_QUEUED_JOBS, admission: Optional[AdmissionController] = None):
+        # Snapshot, streaming, chunked and job calls reuse the threaded servicer; they need server-side
+        # state or incremental I/O, which does not fit a stateless solver process
+        self.servicer = ShiftOptimizerServicer(default_strategy=default_strategy, cache=cache,
+                                               snapshots=snapshots, stream_chunk_size=stream_chunk_size,
+                                               job_workers=job_workers, max_queued_jobs=max_queued_jobs,
+                                               scenario_processes=solver_processes, admission=admission)
+        self.default_strategy = default_strategy
+        self.cache = cache
+        self.cancel_slots = _CancelSlots()
+        
+        context = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        )
+        self.executor = ProcessPoolExecutor(
+            max_workers=solver_processes,
+            mp_context=context,
+            initializer=_init_solver_process,
+            initargs=(self.cancel_slots.flags, default_strategy)
+        )
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+    
+    async def OptimizeShifts(self, request, context):
+        logger.info("Received optimization request")
+        deadline = self.servicer._search_deadline(request, context)
+        
+        try:
+            strategy = request.strategy or self.default_strategy
+            key = request_fingerprint(request, strategy)
+            
+            if self.cache is not None and key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    logger.info(f"Serving cached result {key[:12]}")
+                    return shift_optimizer_pb2.OptimizeShiftsResponse.FromString(cached)
+            
+            payload = await self._join(key, lambda: self._solve(request, key, strategy, deadline))
+            return shift_optimizer_pb2.OptimizeShiftsResponse.FromString(payload)
+        
+        except asyncio.CancelledError:
+            logger.info("Caller went away before the optimization finished")
+            raise
+        except Exception as e:
+            logger.error(f"Error during optimization: {str(e)}", exc_info=True)
+            return self.servicer._error_response(str(e))
+    
+    async def OptimizeShiftsV2(self, request, context):
+        logger.info("Received compact optimization request")
+        deadline = self.servicer._search_deadline(request, context)
+        
+        try:
+            strategy = request.strategy or self.default_strategy
+            key = compact_request_fingerprint(request, strategy)
+            
+            if self.cache is not None and key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    logger.info(f"Serving cached result {key[:12]}")
+                    return shift_optimizer_pb2.OptimizeShiftsResponseV2.FromString(cached)
+            
+            payload = await self._join(key, lambda: self._solve(request, key, strategy, deadline, compact=True))
+            return shift_optimizer_pb2.OptimizeShiftsResponseV2.FromString(payload)
+        
+        except asyncio.CancelledError:
+            logger.info("Caller went away before the optimization finished")
+            raise
+        except Exception as e:
+            logger.error(f"Error during compact optimization: {str(e)}", exc_info=True)
+            return self.servicer._compact_error_response(str(e))
+    
+    async def UploadSnapshot(self, request, context):
+        return await asyncio.get_running_loop().run_in_executor(None, self.servicer.UploadSnapshot, request, context)
+    
+    async def SubmitOptimization(self, request, context):
+        # Job calls only touch the job table; the solve runs on the job worker threads
+        return self.servicer.SubmitOptimization(request, context)
+    
+    async def GetOptimizationStatus(self, request, context):
+        return self.servicer.GetOptimizationStatus(request, context)
+    
+    async def GetOptimizationResult(self, request, context):
+        return self.servicer.GetOptimizationResult(request, context)
+    
+    async def CancelOptimization(self, request, context):
+        return self.servicer.CancelOptimization(request, context)
+    
+    async def OptimizeScenarios(self, request, context):
+        # The shared index is built in this process and shipped to a scenario pool of solver_processes
+        thread_context = _ThreadContext(context.time_remaining())
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.servicer.OptimizeScenarios, request, thread_context)
+        except asyncio.CancelledError:
+            thread_context.terminate()
+            raise
+    
+    async def OptimizeShiftsStream(self, request, context):
+        loop = asyncio.get_running_loop()
+        thread_context = _ThreadContext(context.time_remaining())
+        chunks: "asyncio.Queue" = asyncio.Queue()
+        
+        def produce():
+            try:
+                for chunk in self.servicer.OptimizeShiftsStream(request, thread_context):
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, _STREAM_END)
+        
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+        finally:
+            thread_context.terminate()
+            await asyncio.shield(producer)
+    
+    async def OptimizeShiftsUploadStream(self, request_iterator, context):
+        # Chunks go to the threaded servicer as they arrive, solved days come back the same way
+        loop = asyncio.get_running_loop()
+        thread_context = _ThreadContext(context.time_remaining())
+        uploaded: "queue.Queue" = queue.Queue()
+        chunks: "asyncio.Queue" = asyncio.Queue()
+        
+        def produce():
+            try:
+                upload = iter(uploaded.get, _STREAM_END)
+                for chunk in self.servicer.OptimizeShiftsUploadStream(upload, thread_context):
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, _STREAM_END)
+        
+        producer = loop.run_in_executor(None, produce)
+        try:
+            async for chunk in request_iterator:
+                uploaded.put(chunk)
+            uploaded.put(_STREAM_END)
+            while True:
+                chunk = await chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+        finally:
+            thread_context.terminate()
+            uploaded.put(_STREAM_END)
+            await asyncio.shield(producer)
+    
+    async def OptimizeShiftsUpload(self, request_iterator, context):
+        # Chunks are handed to the threaded servicer as they arrive, so it still indexes during the transfer
+        thread_context = _ThreadContext(context.time_remaining())
+        chunks: "queue.Queue" = queue.Queue()
+        consumer = asyncio.get_running_loop().run_in_executor(
+            None, lambda: self.servicer.OptimizeShiftsUpload(iter(chunks.get, _STREAM_END), thread_context)
+        )
+        try:
+            async for chunk in request_iterator:
+                chunks.put(chunk)
+            chunks.put(_STREAM_END)
+            return await asyncio.shield(consumer)
+        except asyncio.CancelledError:
+            thread_context.terminate()
+            chunks.put(_STREAM_END)
+            raise
+    
+    async def _join(self, key: Optional[str], start) -> bytes:
+        # Identical requests share one solve; it is cancelled once every caller has gone.
+        # Without a key the caller solves alone
+        if key is None:
+            return await start()
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(start())
+            self._in_flight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._forget_flight(key, done))
+        else:
+            logger.info(f"Joining in-flight optimization {key[:12]}")
+        
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._in_flight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    logger.info("Every caller of an in-flight optimization has gone, cancelling it")
+                    # Forgotten at once: a caller arriving before the cancellation lands starts a new solve
+                    self._forget_flight(key, task)
+                    task.cancel()
+            raise
+    
+    def _forget_flight(self, key: str, task):
+        # Only the flight's own entry is removed, the key may already belong to a newer flight
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+            del self._waiters[key]
+    
+    async def _solve(self, request, key: Optional[str], strategy: str, deadline: Optional[float],
+                     compact: bool = False) -> bytes:
+        loop = asyncio.get_running_loop()
+        
+        if not compact and request.snapshot_id:
+            # The snapshot lives in this process, so the solve runs in a thread next to it
+            cancel_event = threading.Event()
+            future = loop.run_in_executor(None, self.servicer._optimize, request, key, strategy, deadline,
+                                          cancel_event)
+            try:
+                return (await asyncio.shield(future)).SerializeToString()
+            except asyncio.CancelledError:
+                cancel_event.set()
+                raise
+        
+        slot = self.cancel_slots.acquire()
+        time_budget = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        future = loop.run_in_executor(self.executor, _solve_in_process, request.SerializeToString(), strategy,
+                                      time_budget, slot, compact)
+        try:
+            payload, success = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # A queued solve is dropped, a running one stops at its next cancellation check
+            future.cancel()
+            self.cancel_slots.cancel(slot)
+            future.add_done_callback(lambda _: self.cancel_slots.release(slot))
+            raise
+        self.cancel_slots.release(slot)
+        
+        if self.cache is not None and key is not None and success:
+            self.cache.put(key, payload)
+        return payload
+class _ThreadContext:
+    # Stand-in for a gRPC context when a threaded handler is driven from the event loop
+    def __init__(self, time_remaining: Optional[float]):
+        self._deadline = time.monotonic() + time_remaining if time_remaining is not None else None
+        self._callbacks = []
+        self._active = True
+    
+    def add_callback(self, callback) -> bool:
+        self._callbacks.append(callback)
+        return True
+    
+    def is_active(self) -> bool:
+        return self._active
+    
+    def time_remaining(self) -> Optional[float]:
+        return self._deadline - time.monotonic() if self._deadline is not None else None
+    
+    def terminate(self):
+        if self._active:
+            self._active = False
+            for callback in self._callbacks:
+                callback()
+async def serve_async(port='50051', solver_processes=None, strategy=DEFAULT_STRATEGY, cache_size=128, cache_ttl=600.0,
+                      cache_dir=None, snapshot_limit=16, snapshot_memory_mb=1024,
+                      stream_chunk_size=DEFAULT_STREAM_CHUNK_SIZE, max_message_mb=DEFAULT_MAX_MESSAGE_MB,
+                      reuse_port=False, job_workers=DEFAULT_JOB_WORKERS, max_queued_jobs=DEFAULT_MAX_QUEUED_JOBS,
+                      max_concurrent_solves=DEFAULT_MAX_CONCURRENT_SOLVES, max_queued_solves=DEFAULT_MAX_QUEUED_SOLVES):
+    solver_processes = solver_processes or os.cpu_count() or 1
+    cache = ResultCache(max_entries=cache_size, ttl=cache_ttl, directory=cache_dir) if cache_size > 0 else None
+    snapshots = SnapshotStore(max_snapshots=snapshot_limit, max_bytes=snapshot_memory_mb * 1024 * 1024)
+    
+    max_message_bytes = max_message_mb * 1024 * 1024
+    # Without admission every call would wait in the solver pool's unbounded queue
+    admission = AdmissionController(max_concurrent=max_concurrent_solves, max_queued=max_queued_solves)
+    server = grpc.aio.server(interceptors=[AsyncAdmissionInterceptor(admission)], options=[
+        ('grpc.max_receive_message_length', max_message_bytes),
+        ('grpc.max_send_message_length', max_message_bytes),
+        ('grpc.so_reuseport', 1 if reuse_port else 0),
+    ] + KEEPALIVE_OPTIONS)
+    servicer = AsyncShiftOptimizerServicer(solver_processes, default_strategy=strategy, cache=cache,
+                                           snapshots=snapshots, stream_chunk_size=stream_chunk_size,
+                                           job_workers=job_workers, max_queued_jobs=max_queued_jobs,
+                                           admission=admission)
+    shift_optimizer_pb2_grpc.add_ShiftOptimizerServiceServicer_to_server(servicer, server)
+    
+    server_address = f'[::]:{port}'
+    server.add_insecure_port(server_address)
+    await server.start()
+    
+    logger.info(f"Shift Optimizer asyncio gRPC server started and listening on {server_address}")
+    logger.info(f"Server is ready to receive requests (solver processes: {solver_processes}, "
+                f"default strategy: {strategy}, concurrent solves: {max_concurrent_solves}, "
+                f"queued solves: {max_queued_solves})")
+    
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(0)
+        servicer.executor.shutdown(cancel_futures=True)
+        logger.info("Server stopped")
\ No newline at end of file
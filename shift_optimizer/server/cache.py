@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+logger = logging.getLogger(__name__)
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 600.0
+def _sort_repeated(field):
+    items = sorted(field, key=lambda message: message.SerializeToString(deterministic=True))
+    del field[:]
+    field.extend(items)
+def request_fingerprint(request, strategy: str) -> Optional[str]:
+    # Order of workers, warehouses, cargo loads, days and nested lists does not change the problem,
+    # and without anytime search the time budget is not used. An anytime result depends on how long the
+    # search ran, so it gets no key: it is neither cached nor shared with a caller that has a longer budget
+    if request.anytime:
+        return None
+    canonical = shift_optimizer_pb2.OptimizeShiftsRequest()
+    canonical.CopyFrom(request)
+    canonical.strategy = strategy
+    canonical.time_budget_seconds = 0.0
+    
+    for worker in canonical.workers:
+        _sort_repeated(worker.qualifications)
+        _sort_repeated(worker.warehouse_preferences)
+    _sort_repeated(canonical.workers)
+    _sort_repeated(canonical.warehouses)
+    _sort_repeated(canonical.cargo_loads)
+    for worker in canonical.delta.upserted_workers:
+        _sort_repeated(worker.qualifications)
+        _sort_repeated(worker.warehouse_preferences)
+    _sort_repeated(canonical.delta.upserted_workers)
+    _sort_repeated(canonical.delta.upserted_cargo_loads)
+    _sort_repeated(canonical.delta.removed_cargo_loads)
+    removed_uuids = sorted(canonical.delta.removed_worker_uuids)
+    del canonical.delta.removed_worker_uuids[:]
+    canonical.delta.removed_worker_uuids.extend(removed_uuids)
+    days = sorted(canonical.days)
+    del canonical.days[:]
+    canonical.days.extend(days)
+    
+    return hashlib.sha256(canonical.SerializeToString(deterministic=True)).hexdigest()
+def compact_request_fingerprint(request, strategy: str) -> Optional[str]:
+    # Compact requests refer to workers and warehouses by position, so they are hashed as sent;
+    # the prefix keeps their keys apart from the v1 ones, whose cached payloads have another type
+    if request.anytime:
+        return None
+    canonical = shift_optimizer_pb2.OptimizeShiftsRequestV2()
+    canonical.CopyFrom(request)
+    canonical.strategy = strategy
+    canonical.time_budget_seconds = 0.0
+    
+    return hashlib.sha256(b"v2:" + canonical.SerializeToString(deterministic=True)).hexdigest()
+class ResultCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = DEFAULT_TTL, directory: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = directory
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def get(self, key: str) -> Optional[bytes]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, payload = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                self._remove(key)
+        
+        loaded = self._read_disk(key, now)
+        with self._lock:
+            if loaded is None:
+                self.misses += 1
+                return None
+            stored_at, payload = loaded
+            self._insert(key, stored_at, payload)
+            self.hits += 1
+            self.disk_hits += 1
+            return payload
+    
+    def put(self, key: str, payload: bytes):
+        now = self._clock()
+        with self._lock:
+            self._insert(key, now, payload)
+        self._write_disk(key, payload)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+    
+    def _insert(self, key: str, stored_at: float, payload: bytes):
+        if key in self._entries:
+            self._remove(key)
+        if len(payload) > self.max_bytes or self.max_entries <= 0:
+            return
+        
+        self._entries[key] = (stored_at, payload)
+        self._size += len(payload)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._size -= len(payload)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+    
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, bytes]]:
+        if not self.directory:
+            return None
+        
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if now - stored_at > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return stored_at, f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read cached result {key}: {str(e)}")
+            return None
+    
+    def _write_disk(self, key: str, payload: bytes):
+        if not self.directory:
+            return
+        
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist cached result {key}: {str(e)}")
\ No newline at end of file
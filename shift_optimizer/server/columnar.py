@@ -0,0 +1,85 @@
+import logging
+from typing import List
+import numpy as np
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from .models import Warehouse
+from .index import NO_PREFERENCE, QUALIFICATION_BITS, WorkforceIndex
+logger = logging.getLogger(__name__)
+# Qualification bit for every QualificationType code, so masks are built without going through enum names
+QUALIFICATION_CODE_BITS = {
+    value: QUALIFICATION_BITS.get(name, 0) for name, value in shift_optimizer_pb2.QualificationType.items()
+}
+_CODE_BITS_TABLE = np.zeros(max(QUALIFICATION_CODE_BITS) + 1, dtype=np.uint8)
+for _code, _bit in QUALIFICATION_CODE_BITS.items():
+    _CODE_BITS_TABLE[_code] = _bit
+def unique_warehouses(warehouses: List[Warehouse]) -> List[Warehouse]:
+    # Same order and de-duplication as ShiftOptimizer, so index columns line up with its requirement table
+    return list({warehouse.uuid: warehouse for warehouse in warehouses}.values())
+def _build_index(worker_uuids: List[str], warehouses: List[Warehouse], masks: np.ndarray, rows: np.ndarray,
+                 columns: np.ndarray, priorities: np.ndarray, distances: np.ndarray) -> WorkforceIndex:
+    worker_count = len(worker_uuids)
+    priority_matrix = np.full((worker_count, len(warehouses)), NO_PREFERENCE, dtype=np.int64)
+    distance_matrix = np.full((worker_count, len(warehouses)), NO_PREFERENCE, dtype=np.float64)
+    
+    # When a worker lists a warehouse twice the first entry counts, as in fill_preferences
+    _, first = np.unique(rows * len(warehouses) + columns, return_index=True)
+    priority_matrix[rows[first], columns[first]] = priorities[first]
+    distance_matrix[rows[first], columns[first]] = distances[first]
+    return WorkforceIndex.from_columns(worker_uuids, warehouses, masks, priority_matrix, distance_matrix)
+def index_from_messages(grpc_workers, warehouses: List[Warehouse]) -> WorkforceIndex:
+    # One pass over the request messages straight into the index arrays, no Worker objects in between
+    warehouses = unique_warehouses(warehouses)
+    warehouse_ordinals = {warehouse.uuid: i for i, warehouse in enumerate(warehouses)}
+    code_bits = QUALIFICATION_CODE_BITS
+    worker_uuids, masks = [], []
+    rows, columns, priorities, distances = [], [], [], []
+    
+    for worker_idx, grpc_worker in enumerate(grpc_workers):
+        worker_uuids.append(grpc_worker.uuid)
+        mask = 0
+        for grpc_qual in grpc_worker.qualifications:
+            mask |= code_bits.get(grpc_qual.type, 0)
+        masks.append(mask)
+        
+        for grpc_pref in grpc_worker.warehouse_preferences:
+            warehouse_idx = warehouse_ordinals.get(grpc_pref.warehouse_uuid)
+            if warehouse_idx is not None:
+                rows.append(worker_idx)
+                columns.append(warehouse_idx)
+                priorities.append(grpc_pref.priority)
+                distances.append(grpc_pref.distance)
+    
+    return _build_index(worker_uuids, warehouses, np.array(masks, dtype=np.uint8),
+                        np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64),
+                        np.array(priorities, dtype=np.int64), np.array(distances, dtype=np.float64))
+def index_from_compact(compact_workers, request_warehouses, warehouses: List[Warehouse]) -> WorkforceIndex:
+    # The v2 columns are already flat, so the index is built without a Python loop over workers.
+    # Preference ordinals point into the request table and are mapped onto the optimizer's warehouses.
+    worker_count = len(compact_workers.uuids)
+    if len(compact_workers.qualification_counts) != worker_count \
+            or len(compact_workers.preference_counts) != worker_count:
+        raise ValueError("Compact worker columns have different lengths")
+    
+    qualification_counts = np.array(compact_workers.qualification_counts, dtype=np.int64)
+    qualification_types = np.array(compact_workers.qualification_types, dtype=np.int64)
+    if qualification_types.size != qualification_counts.sum():
+        raise ValueError("Compact qualification columns do not match their counts")
+    masks = np.zeros(worker_count, dtype=np.uint8)
+    known = qualification_types < len(_CODE_BITS_TABLE)
+    qualification_rows = np.repeat(np.arange(worker_count), qualification_counts)
+    np.bitwise_or.at(masks, qualification_rows[known], _CODE_BITS_TABLE[qualification_types[known]])
+    
+    preference_counts = np.array(compact_workers.preference_counts, dtype=np.int64)
+    columns = np.array(compact_workers.preference_warehouses, dtype=np.int64)
+    priorities = np.array(compact_workers.preference_priorities, dtype=np.int64)
+    distances = np.array(compact_workers.preference_distances, dtype=np.float64)
+    if not columns.size == priorities.size == distances.size == preference_counts.sum():
+        raise ValueError("Compact preference columns do not match their counts")
+    if columns.size and columns.max() >= len(request_warehouses):
+        raise ValueError("Compact preference refers to an unknown warehouse")
+    
+    warehouses = unique_warehouses(warehouses)
+    ordinals = {warehouse.uuid: i for i, warehouse in enumerate(warehouses)}
+    remap = np.array([ordinals[grpc_warehouse.uuid] for grpc_warehouse in request_warehouses], dtype=np.int64)
+    rows = np.repeat(np.arange(worker_count), preference_counts)
+    return _build_index(list(compact_workers.uuids), warehouses, masks, rows, remap[columns], priorities, distances)
\ No newline at end of file
@@ -0,0 +1,190 @@
+import datetime
+import logging
+from typing import Dict, List, Tuple
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+from .models import Worker, Warehouse, CargoLoad, Qualification, WarehousePreference, ScheduledShift, WarehouseStaffing
+from .models import ShiftTable, StaffingTable
+logger = logging.getLogger(__name__)
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DAY_ORDINALS = {name: ordinal for ordinal, name in enumerate(DAY_NAMES)}
+EPOCH = datetime.date(1970, 1, 1)
+def minutes_from_time(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+def time_from_minutes(value: int) -> str:
+    return f"{value // 60:02d}:{value % 60:02d}"
+def date_to_days(value: str) -> int:
+    return (datetime.date.fromisoformat(value) - EPOCH).days
+def days_to_date(value: int) -> str:
+    return (EPOCH + datetime.timedelta(days=value)).isoformat()
+def decode_header(request) -> Tuple[List[Warehouse], List[CargoLoad], List[str]]:
+    warehouses = [
+        Warehouse(uuid=grpc_warehouse.uuid, name=grpc_warehouse.name, capacity=grpc_warehouse.capacity,
+                  min_workers=grpc_warehouse.min_workers, min_basic_workers=grpc_warehouse.min_basic_workers,
+                  min_drivers=grpc_warehouse.min_drivers, min_engineers=grpc_warehouse.min_engineers,
+                  is_active=grpc_warehouse.is_active)
+        for grpc_warehouse in request.warehouses
+    ]
+    
+    cargo = request.cargo_loads
+    cargo_loads = [
+        CargoLoad(warehouse_uuid=warehouses[warehouse].uuid, date=days_to_date(date), total_weight=total_weight)
+        for warehouse, date, total_weight in zip(cargo.warehouses, cargo.dates, cargo.total_weights)
+    ]
+    days = [DAY_NAMES[day] for day in request.days]
+    return warehouses, cargo_loads, days
+def decode_request(request) -> Tuple[List[Worker], List[Warehouse], List[CargoLoad], List[str]]:
+    warehouses, cargo_loads, days = decode_header(request)
+    warehouse_uuids = [warehouse.uuid for warehouse in warehouses]
+    qualification_names = {value: name for name, value in shift_optimizer_pb2.QualificationType.items()}
+    
+    columns = request.workers
+    if len(columns.usernames) != len(columns.uuids) or len(columns.qualification_counts) != len(columns.uuids) \
+            or len(columns.preference_counts) != len(columns.uuids):
+        raise ValueError("Compact worker columns have different lengths")
+    
+    qualification_types = columns.qualification_types
+    preference_warehouses = columns.preference_warehouses
+    if not len(qualification_types) == len(columns.qualification_levels) == sum(columns.qualification_counts):
+        raise ValueError("Compact qualification columns do not match their counts")
+    if not (len(preference_warehouses) == len(columns.preference_priorities) == len(columns.preference_distances)
+            == sum(columns.preference_counts)):
+        raise ValueError("Compact preference columns do not match their counts")
+    
+    # Nested objects are built in one pass over the packed columns and then sliced per worker.
+    # Equal qualifications share one immutable instance.
+    shared_qualifications = {}
+    qualifications = []
+    for key in zip(qualification_types, columns.qualification_levels):
+        qualification = shared_qualifications.get(key)
+        if qualification is None:
+            qualification = shared_qualifications[key] = Qualification(type=qualification_names[key[0]], level=key[1])
+        qualifications.append(qualification)
+    preferences = [WarehousePreference(warehouse_uuid=warehouse_uuids[warehouse], priority=priority, distance=distance)
+                   for warehouse, priority, distance in zip(preference_warehouses, columns.preference_priorities,
+                                                            columns.preference_distances)]
+    
+    workers = []
+    qualification_offset = preference_offset = 0
+    for uuid, username, qualification_count, preference_count in zip(
+            columns.uuids, columns.usernames, columns.qualification_counts, columns.preference_counts):
+        qualification_end = qualification_offset + qualification_count
+        preference_end = preference_offset + preference_count
+        workers.append(Worker(uuid=uuid, username=username,
+                              qualifications=tuple(qualifications[qualification_offset:qualification_end]),
+                              warehouse_preferences=tuple(preferences[preference_offset:preference_end])))
+        qualification_offset, preference_offset = qualification_end, preference_end
+    
+    return workers, warehouses, cargo_loads, days
+def encode_request(workers: List[Worker], warehouses: List[Warehouse], cargo_loads: List[CargoLoad],
+                   days: List[str]):
+    request = shift_optimizer_pb2.OptimizeShiftsRequestV2(days=[DAY_ORDINALS[day] for day in days])
+    warehouse_ordinals = {}
+    for ordinal, warehouse in enumerate(warehouses):
+        warehouse_ordinals[warehouse.uuid] = ordinal
+        request.warehouses.add(uuid=warehouse.uuid, name=warehouse.name, capacity=warehouse.capacity,
+                               min_workers=warehouse.min_workers, min_basic_workers=warehouse.min_basic_workers,
+                               min_drivers=warehouse.min_drivers, min_engineers=warehouse.min_engineers,
+                               is_active=warehouse.is_active)
+    
+    uuids, usernames, qualification_counts, preference_counts = [], [], [], []
+    qualification_types, qualification_levels = [], []
+    preference_warehouses, preference_priorities, preference_distances = [], [], []
+    for worker in workers:
+        uuids.append(worker.uuid)
+        usernames.append(worker.username)
+        qualification_counts.append(len(worker.qualifications))
+        for qualification in worker.qualifications:
+            qualification_types.append(shift_optimizer_pb2.QualificationType.Value(qualification.type))
+            qualification_levels.append(qualification.level)
+        
+        # Preferences for warehouses outside the request cannot be used by the optimizer and are dropped
+        count = 0
+        for preference in worker.warehouse_preferences:
+            ordinal = warehouse_ordinals.get(preference.warehouse_uuid)
+            if ordinal is not None:
+                preference_warehouses.append(ordinal)
+                preference_priorities.append(preference.priority)
+                preference_distances.append(preference.distance)
+                count += 1
+        preference_counts.append(count)
+    
+    # Whole columns are extended at once, which is far cheaper than adding messages one by one
+    columns = request.workers
+    columns.uuids.extend(uuids)
+    columns.usernames.extend(usernames)
+    columns.qualification_counts.extend(qualification_counts)
+    columns.qualification_types.extend(qualification_types)
+    columns.qualification_levels.extend(qualification_levels)
+    columns.preference_counts.extend(preference_counts)
+    columns.preference_warehouses.extend(preference_warehouses)
+    columns.preference_priorities.extend(preference_priorities)
+    columns.preference_distances.extend(preference_distances)
+    
+    known_loads = [load for load in cargo_loads if load.warehouse_uuid in warehouse_ordinals]
+    request.cargo_loads.warehouses.extend(warehouse_ordinals[load.warehouse_uuid] for load in known_loads)
+    request.cargo_loads.dates.extend(date_to_days(load.date) for load in known_loads)
+    request.cargo_loads.total_weights.extend(load.total_weight for load in known_loads)
+    return request
+def fill_response(response, shifts, warehouse_staffing, worker_ordinals: Dict[str, int],
+                  warehouse_ordinals: Dict[str, int]):
+    # Both ShiftTable/StaffingTable and plain row lists are accepted; columns are extended whole
+    shift_table = shifts if isinstance(shifts, ShiftTable) else ShiftTable.from_shifts(shifts)
+    staffing_table = warehouse_staffing if isinstance(warehouse_staffing, StaffingTable) \
+        else StaffingTable.from_rows(warehouse_staffing)
+    
+    # Every shift shares the same few times, so each one is parsed once
+    time_minutes = {value: minutes_from_time(value)
+                    for value in set(shift_table.start_times) | set(shift_table.end_times)}
+    
+    target = response.shifts
+    target.workers.extend(list(map(worker_ordinals.__getitem__, shift_table.worker_uuids)))
+    target.warehouses.extend(list(map(warehouse_ordinals.__getitem__, shift_table.warehouse_uuids)))
+    target.days.extend(list(map(DAY_ORDINALS.__getitem__, shift_table.days)))
+    target.start_minutes.extend(list(map(time_minutes.__getitem__, shift_table.start_times)))
+    target.end_minutes.extend(list(map(time_minutes.__getitem__, shift_table.end_times)))
+    
+    staffing = response.warehouse_staffing
+    staffing.warehouses.extend(list(map(warehouse_ordinals.__getitem__, staffing_table.warehouse_uuids)))
+    staffing.days.extend(list(map(DAY_ORDINALS.__getitem__, staffing_table.days)))
+    staffing.required_basic_workers.extend(staffing_table.required_basic_workers)
+    staffing.scheduled_basic_workers.extend(staffing_table.scheduled_basic_workers)
+    staffing.required_drivers.extend(staffing_table.required_drivers)
+    staffing.scheduled_drivers.extend(staffing_table.scheduled_drivers)
+    staffing.required_engineers.extend(staffing_table.required_engineers)
+    staffing.scheduled_engineers.extend(staffing_table.scheduled_engineers)
+    staffing.is_fully_staffed.extend(staffing_table.is_fully_staffed)
+    return response
+def decode_shifts(response, worker_uuids: List[str], warehouse_uuids: List[str]) -> List[ScheduledShift]:
+    shifts = response.shifts
+    times = {}
+    for value in set(shifts.start_minutes) | set(shifts.end_minutes):
+        times[value] = time_from_minutes(value)
+    
+    return [
+        ScheduledShift(worker_uuid=worker_uuids[worker], warehouse_uuid=warehouse_uuids[warehouse],
+                       day_of_week=DAY_NAMES[day], start_time=times[start], end_time=times[end])
+        for worker, warehouse, day, start, end in zip(shifts.workers, shifts.warehouses, shifts.days,
+                                                      shifts.start_minutes, shifts.end_minutes)
+    ]
+def decode_staffing(response, warehouses: List[Warehouse]) -> List[WarehouseStaffing]:
+    staffing = response.warehouse_staffing
+    return [
+        WarehouseStaffing(
+            warehouse_uuid=warehouses[warehouse].uuid,
+            warehouse_name=warehouses[warehouse].name,
+            day=DAY_NAMES[day],
+            required_basic_workers=required_basic,
+            scheduled_basic_workers=scheduled_basic,
+            required_drivers=required_drivers,
+            scheduled_drivers=scheduled_drivers,
+            required_engineers=required_engineers,
+            scheduled_engineers=scheduled_engineers,
+            is_fully_staffed=is_fully_staffed
+        )
+        for (warehouse, day, required_basic, scheduled_basic, required_drivers, scheduled_drivers,
+             required_engineers, scheduled_engineers, is_fully_staffed) in zip(
+            staffing.warehouses, staffing.days, staffing.required_basic_workers, staffing.scheduled_basic_workers,
+            staffing.required_drivers, staffing.scheduled_drivers, staffing.required_engineers,
+            staffing.scheduled_engineers, staffing.is_fully_staffed)
+    ]
\ No newline at end of file
@@ -0,0 +1,232 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from .models import Worker, Warehouse, CargoLoad, ScheduledShift, WarehouseStaffing
+from .index import WorkforceIndex, NO_PREFERENCE, QUALIFICATION_BITS
+from .requirements import QUALIFICATION_TYPES, RequirementTable, map_date_to_day, required_for_cell
+logger = logging.getLogger(__name__)
+@dataclass
+class IncrementalResult:
+    added_shifts: List[ScheduledShift]
+    removed_shifts: List[ScheduledShift]
+    warehouse_staffing: List[WarehouseStaffing]
+class IncrementalSchedule:
+    def __init__(self, index: WorkforceIndex, requirements: RequirementTable, cargo_loads: List[CargoLoad],
+                 shifts: List[ScheduledShift], worker_roles: Dict[str, Dict[int, int]],
+                 shift_start: str, shift_end: str):
+        self.index = index
+        self.requirements = requirements
+        self.shift_start = shift_start
+        self.shift_end = shift_end
+        
+        self._worker_ordinals = {uuid: i for i, uuid in enumerate(index.worker_uuids)}
+        day_count = len(requirements.days)
+        
+        self._busy = np.zeros((day_count, len(index.worker_uuids)), dtype=bool)
+        self._placement: List[Dict[int, Tuple[int, int]]] = [{} for _ in range(day_count)]
+        self._members: Dict[Tuple[int, int, int], List[int]] = {}
+        for shift in shifts:
+            day_idx = requirements.day_ordinals[shift.day_of_week]
+            worker_idx = self._worker_ordinals[shift.worker_uuid]
+            warehouse_idx = index.warehouse_ordinals[shift.warehouse_uuid]
+            qualification_idx = worker_roles[shift.day_of_week][worker_idx]
+            self._placement[day_idx][worker_idx] = (warehouse_idx, qualification_idx)
+            self._members.setdefault((day_idx, warehouse_idx, qualification_idx), []).append(worker_idx)
+            self._busy[day_idx, worker_idx] = True
+        
+        self._cargo: Dict[Tuple[str, str], List[int]] = {}
+        self._cell_keys: Dict[Tuple[int, int], Set[Tuple[str, str]]] = {}
+        for cargo in cargo_loads:
+            key = (cargo.warehouse_uuid, cargo.date)
+            self._cargo.setdefault(key, []).append(cargo.total_weight)
+            cell = self._cargo_cell(key)
+            if cell is not None:
+                self._cell_keys.setdefault(cell, set()).add(key)
+    
+    @classmethod
+    def from_optimizer(cls, optimizer) -> 'IncrementalSchedule':
+        return cls(optimizer.index, optimizer.requirements, optimizer.cargo_loads, optimizer.shifts,
+                   optimizer.worker_roles, optimizer.shift_start, optimizer.shift_end)
+    
+    def apply(self, upserted_workers: List[Worker], removed_worker_uuids: List[str],
+              upserted_cargo_loads: List[CargoLoad], removed_cargo_loads: List[CargoLoad]) -> IncrementalResult:
+        # Only cells touched by the change set are re-solved; every other assignment stays as it was
+        before: Dict[Tuple[int, int], Optional[int]] = {}
+        affected: Set[Tuple[int, int]] = set()
+        candidates: List[int] = []
+        
+        for worker_uuid in removed_worker_uuids:
+            worker_idx = self._worker_ordinals.pop(worker_uuid, None)
+            if worker_idx is None:
+                continue
+            for day_idx in np.flatnonzero(self._busy[:, worker_idx]).tolist():
+                affected.add((day_idx, self._release(day_idx, worker_idx, before)))
+            self.index.deactivate_worker(worker_idx)
+        
+        for worker in upserted_workers:
+            worker_idx = self._worker_ordinals.get(worker.uuid)
+            if worker_idx is None:
+                worker_idx = self.index.append_worker(worker)
+                self._worker_ordinals[worker.uuid] = worker_idx
+                self._busy = np.hstack([self._busy, np.zeros((self._busy.shape[0], 1), dtype=bool)])
+            else:
+                self.index.update_worker(worker_idx, worker)
+                for day_idx in np.flatnonzero(self._busy[:, worker_idx]).tolist():
+                    _, qualification_idx = self._placement[day_idx][worker_idx]
+                    if not self._eligible(worker_idx, qualification_idx):
+                        affected.add((day_idx, self._release(day_idx, worker_idx, before)))
+            candidates.append(worker_idx)
+        
+        for cargo in removed_cargo_loads:
+            self._set_cargo((cargo.warehouse_uuid, cargo.date), None, affected)
+        upserted: Dict[Tuple[str, str], List[int]] = {}
+        for cargo in upserted_cargo_loads:
+            upserted.setdefault((cargo.warehouse_uuid, cargo.date), []).append(cargo.total_weight)
+        for key, weights in upserted.items():
+            self._set_cargo(key, weights, affected)
+        
+        # Surplus is released before shortages are filled, so freed workers can move to other cells
+        for day_idx, warehouse_idx in sorted(affected):
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                members = self._members.get((day_idx, warehouse_idx, qualification_idx), [])
+                surplus = len(members) - int(self.requirements.required[qualification_idx, day_idx, warehouse_idx])
+                for worker_idx in members[len(members) - surplus:] if surplus > 0 else []:
+                    self._release(day_idx, worker_idx, before)
+        
+        for day_idx, warehouse_idx in sorted(affected):
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                self._fill(day_idx, warehouse_idx, qualification_idx, before)
+        
+        for worker_idx in candidates:
+            for day_idx in np.flatnonzero(~self._busy[:, worker_idx]).tolist():
+                placed = self._place_by_preference(day_idx, worker_idx, before)
+                if placed is not None:
+                    affected.add((day_idx, placed))
+        
+        return self._result(before, affected)
+    
+    def _eligible(self, worker_idx: int, qualification_idx: int) -> bool:
+        return bool(self.index.qualification_masks[worker_idx] & QUALIFICATION_BITS[QUALIFICATION_TYPES[qualification_idx]])
+    
+    def _cargo_cell(self, key: Tuple[str, str]) -> Optional[Tuple[int, int]]:
+        warehouse_idx = self.index.warehouse_ordinals.get(key[0])
+        day_idx = self.requirements.day_ordinals.get(map_date_to_day(key[1]))
+        if warehouse_idx is None or day_idx is None:
+            return None
+        return day_idx, warehouse_idx
+    
+    def _set_cargo(self, key: Tuple[str, str], weights: Optional[List[int]], affected: Set[Tuple[int, int]]):
+        if weights is None:
+            self._cargo.pop(key, None)
+        else:
+            self._cargo[key] = weights
+        
+        cell = self._cargo_cell(key)
+        if cell is None:
+            return
+        
+        keys = self._cell_keys.setdefault(cell, set())
+        if weights is None:
+            keys.discard(key)
+        else:
+            keys.add(key)
+        
+        day_idx, warehouse_idx = cell
+        cell_weights = [weight for cell_key in keys for weight in self._cargo[cell_key]]
+        self.requirements.required[:, day_idx, warehouse_idx] = required_for_cell(
+            self.requirements.minimum, warehouse_idx, cell_weights
+        )
+        affected.add(cell)
+    
+    def _touch(self, day_idx: int, worker_idx: int, before: Dict[Tuple[int, int], Optional[int]]):
+        if (day_idx, worker_idx) not in before:
+            placement = self._placement[day_idx].get(worker_idx)
+            before[(day_idx, worker_idx)] = placement[0] if placement is not None else None
+    
+    def _release(self, day_idx: int, worker_idx: int, before: Dict[Tuple[int, int], Optional[int]]) -> int:
+        self._touch(day_idx, worker_idx, before)
+        warehouse_idx, qualification_idx = self._placement[day_idx].pop(worker_idx)
+        self._members[(day_idx, warehouse_idx, qualification_idx)].remove(worker_idx)
+        self._busy[day_idx, worker_idx] = False
+        self.requirements.scheduled[qualification_idx, day_idx, warehouse_idx] -= 1
+        return warehouse_idx
+    
+    def _assign(self, day_idx: int, worker_idx: int, warehouse_idx: int, qualification_idx: int,
+                before: Dict[Tuple[int, int], Optional[int]]):
+        self._touch(day_idx, worker_idx, before)
+        self._placement[day_idx][worker_idx] = (warehouse_idx, qualification_idx)
+        self._members.setdefault((day_idx, warehouse_idx, qualification_idx), []).append(worker_idx)
+        self._busy[day_idx, worker_idx] = True
+        self.requirements.scheduled[qualification_idx, day_idx, warehouse_idx] += 1
+    
+    def _shortage(self, day_idx: int, warehouse_idx: int, qualification_idx: int) -> int:
+        return int(self.requirements.required[qualification_idx, day_idx, warehouse_idx]
+                   - len(self._members.get((day_idx, warehouse_idx, qualification_idx), [])))
+    
+    def _fill(self, day_idx: int, warehouse_idx: int, qualification_idx: int,
+              before: Dict[Tuple[int, int], Optional[int]]):
+        shortage = self._shortage(day_idx, warehouse_idx, qualification_idx)
+        if shortage <= 0:
+            return
+        
+        candidates = self.index.candidate_array(warehouse_idx, QUALIFICATION_TYPES[qualification_idx])
+        free = candidates[~self._busy[day_idx, candidates]][:shortage]
+        for worker_idx in free.tolist():
+            self._assign(day_idx, worker_idx, warehouse_idx, qualification_idx, before)
+    
+    def _place_by_preference(self, day_idx: int, worker_idx: int,
+                             before: Dict[Tuple[int, int], Optional[int]]) -> Optional[int]:
+        priorities = self.index.priorities[worker_idx]
+        preferred = np.flatnonzero(priorities != NO_PREFERENCE)
+        order = np.lexsort((self.index.distances[worker_idx, preferred], priorities[preferred]))
+        for warehouse_idx in preferred[order].tolist():
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                if self._eligible(worker_idx, qualification_idx) and \
+                        self._shortage(day_idx, warehouse_idx, qualification_idx) > 0:
+                    self._assign(day_idx, worker_idx, warehouse_idx, qualification_idx, before)
+                    return warehouse_idx
+        return None
+    
+    def _shift(self, worker_idx: int, warehouse_idx: int, day_idx: int) -> ScheduledShift:
+        return ScheduledShift(
+            worker_uuid=self.index.worker_uuids[worker_idx],
+            warehouse_uuid=self.index.warehouse_uuids[warehouse_idx],
+            day_of_week=self.requirements.days[day_idx],
+            start_time=self.shift_start,
+            end_time=self.shift_end
+        )
+    
+    def _result(self, before: Dict[Tuple[int, int], Optional[int]],
+                affected: Set[Tuple[int, int]]) -> IncrementalResult:
+        added, removed = [], []
+        for (day_idx, worker_idx), old_warehouse in before.items():
+            placement = self._placement[day_idx].get(worker_idx)
+            new_warehouse = placement[0] if placement is not None else None
+            if new_warehouse == old_warehouse:
+                continue
+            if old_warehouse is not None:
+                removed.append(self._shift(worker_idx, old_warehouse, day_idx))
+            if new_warehouse is not None:
+                added.append(self._shift(worker_idx, new_warehouse, day_idx))
+        
+        required = self.requirements.required
+        scheduled = self.requirements.scheduled
+        staffing = []
+        for day_idx, warehouse_idx in sorted(affected):
+            staffing.append(WarehouseStaffing(
+                warehouse_uuid=self.requirements.warehouse_uuids[warehouse_idx],
+                warehouse_name=self.requirements.warehouse_names[warehouse_idx],
+                day=self.requirements.days[day_idx],
+                required_basic_workers=int(required[0, day_idx, warehouse_idx]),
+                scheduled_basic_workers=int(scheduled[0, day_idx, warehouse_idx]),
+                required_drivers=int(required[1, day_idx, warehouse_idx]),
+                scheduled_drivers=int(scheduled[1, day_idx, warehouse_idx]),
+                required_engineers=int(required[2, day_idx, warehouse_idx]),
+                scheduled_engineers=int(scheduled[2, day_idx, warehouse_idx]),
+                is_fully_staffed=bool(np.all(scheduled[:, day_idx, warehouse_idx] >= required[:, day_idx, warehouse_idx]))
+            ))
+        
+        logger.info(f"Incremental update touched {len(affected)} cells: "
+                    f"{len(added)} shifts added, {len(removed)} removed")
+        return IncrementalResult(added, removed, staffing)
\ No newline at end of file
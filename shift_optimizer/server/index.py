@@ -0,0 +1,218 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .models import Worker, Warehouse
+logger = logging.getLogger(__name__)
+NO_PREFERENCE = 9999
+QUALIFICATION_BITS = {
+    "BASIC_WORKER": 1,
+    "CARGO_DRIVER": 2,
+    "ENGINEER": 4,
+}
+def preference_value(preference, field_name: str):
+    if isinstance(preference, dict):
+        return preference[field_name]
+    return getattr(preference, field_name)
+def qualification_mask(qualifications) -> int:
+    mask = 0
+    for qualification in qualifications:
+        mask |= QUALIFICATION_BITS.get(qualification.type, 0)
+    return mask
+def fill_preferences(priorities: np.ndarray, distances: np.ndarray, warehouse_ordinals: Dict[str, int],
+                     worker_idx: int, worker: Worker):
+    seen = set()
+    for preference in worker.warehouse_preferences:
+        warehouse_idx = warehouse_ordinals.get(preference_value(preference, 'warehouse_uuid'))
+        if warehouse_idx is None or warehouse_idx in seen:
+            continue
+        seen.add(warehouse_idx)
+        priorities[worker_idx, warehouse_idx] = preference_value(preference, 'priority')
+        distances[worker_idx, warehouse_idx] = preference_value(preference, 'distance')
+class WorkerBitset:
+    __slots__ = ('_bits', '_count')
+    
+    def __init__(self, size: int):
+        self._bits = bytearray((size + 7) >> 3)
+        self._count = 0
+    
+    def __contains__(self, worker_idx: int) -> bool:
+        return (self._bits[worker_idx >> 3] >> (worker_idx & 7)) & 1 == 1
+    
+    def add(self, worker_idx: int):
+        byte_idx = worker_idx >> 3
+        bit = 1 << (worker_idx & 7)
+        if not self._bits[byte_idx] & bit:
+            self._bits[byte_idx] |= bit
+            self._count += 1
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __iter__(self):
+        for byte_idx, byte in enumerate(self._bits):
+            if not byte:
+                continue
+            for bit_idx in range(8):
+                if byte >> bit_idx & 1:
+                    yield (byte_idx << 3) + bit_idx
+class WorkforceIndex:
+    def __init__(self, workers: Optional[List[Worker]], warehouses: List[Warehouse],
+                 preferences: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                 worker_uuids: Optional[List[str]] = None):
+        # workers is None when the index was built straight from request columns
+        self.workers = workers
+        self.worker_uuids = worker_uuids if worker_uuids is not None else [worker.uuid for worker in workers]
+        self.warehouse_uuids = [w.uuid for w in warehouses]
+        self.warehouse_ordinals = {uuid: i for i, uuid in enumerate(self.warehouse_uuids)}
+        
+        if preferences is not None:
+            # Filled ahead of time by WorkforceIndexBuilder while the workers were arriving
+            self.qualification_masks, self.priorities, self.distances = preferences
+        else:
+            worker_count = len(workers)
+            warehouse_count = len(self.warehouse_uuids)
+            
+            self.qualification_masks = np.array(
+                [qualification_mask(worker.qualifications) for worker in workers], dtype=np.uint8
+            )
+            
+            self.priorities = np.full((worker_count, warehouse_count), NO_PREFERENCE, dtype=np.int64)
+            self.distances = np.full((worker_count, warehouse_count), NO_PREFERENCE, dtype=np.float64)
+            
+            for worker_idx, worker in enumerate(workers):
+                self._fill_preferences(worker_idx, worker)
+        
+        self._orderings: Dict[int, np.ndarray] = {}
+        self._candidate_arrays: Dict[Tuple[int, str], np.ndarray] = {}
+        self._candidate_pools: Dict[Tuple[int, str], List[int]] = {}
+        self._preference_costs: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_columns(cls, worker_uuids: List[str], warehouses: List[Warehouse], qualification_masks: np.ndarray,
+                     priorities: np.ndarray, distances: np.ndarray) -> 'WorkforceIndex':
+        return cls(None, warehouses, (qualification_masks, priorities, distances), worker_uuids=worker_uuids)
+    
+    def _fill_preferences(self, worker_idx: int, worker: Worker):
+        fill_preferences(self.priorities, self.distances, self.warehouse_ordinals, worker_idx, worker)
+    
+    def ordering(self, warehouse_idx: int) -> np.ndarray:
+        order = self._orderings.get(warehouse_idx)
+        if order is None:
+            # lexsort is stable, so ties keep the request order exactly like list.sort did
+            order = np.lexsort((self.distances[:, warehouse_idx], self.priorities[:, warehouse_idx]))
+            self._orderings[warehouse_idx] = order
+        return order
+    
+    def candidate_array(self, warehouse_idx: int, qualification_type: str) -> np.ndarray:
+        key = (warehouse_idx, qualification_type)
+        candidates = self._candidate_arrays.get(key)
+        if candidates is None:
+            order = self.ordering(warehouse_idx)
+            bit = QUALIFICATION_BITS.get(qualification_type, 0)
+            candidates = order[(self.qualification_masks[order] & bit) != 0]
+            self._candidate_arrays[key] = candidates
+        return candidates
+    
+    def candidate_pool(self, warehouse_idx: int, qualification_type: str) -> List[int]:
+        key = (warehouse_idx, qualification_type)
+        pool = self._candidate_pools.get(key)
+        if pool is None:
+            pool = self.candidate_array(warehouse_idx, qualification_type).tolist()
+            self._candidate_pools[key] = pool
+        return pool
+    
+    def preference_costs(self) -> np.ndarray:
+        if self._preference_costs is None:
+            # Priority dominates, distance only breaks ties within a priority
+            distance_scale = (float(self.distances.max()) if self.distances.size else 0.0) + 1.0
+            self._preference_costs = self.priorities + self.distances / distance_scale
+        return self._preference_costs
+    
+    def update_worker(self, worker_idx: int, worker: Worker):
+        old_priorities = self.priorities[worker_idx].copy()
+        old_distances = self.distances[worker_idx].copy()
+        old_mask = int(self.qualification_masks[worker_idx])
+        
+        self.workers[worker_idx] = worker
+        self.worker_uuids[worker_idx] = worker.uuid
+        self.priorities[worker_idx] = NO_PREFERENCE
+        self.distances[worker_idx] = NO_PREFERENCE
+        self._fill_preferences(worker_idx, worker)
+        self.qualification_masks[worker_idx] = qualification_mask(worker.qualifications)
+        
+        changed = (self.priorities[worker_idx] != old_priorities) | (self.distances[worker_idx] != old_distances)
+        self._invalidate(np.flatnonzero(changed).tolist(), old_mask ^ int(self.qualification_masks[worker_idx]))
+    
+    def append_worker(self, worker: Worker) -> int:
+        # Growing the dense matrices copies them; fine for the occasional hire, not for bulk loads
+        worker_idx = len(self.workers)
+        self.workers.append(worker)
+        self.worker_uuids.append(worker.uuid)
+        warehouse_count = len(self.warehouse_uuids)
+        self.priorities = np.vstack([self.priorities, np.full((1, warehouse_count), NO_PREFERENCE, dtype=np.int64)])
+        self.distances = np.vstack([self.distances, np.full((1, warehouse_count), NO_PREFERENCE, dtype=np.float64)])
+        self.qualification_masks = np.append(self.qualification_masks,
+                                             np.uint8(qualification_mask(worker.qualifications)))
+        self._fill_preferences(worker_idx, worker)
+        
+        # Every ordering gains a row, so nothing cached survives
+        self._orderings.clear()
+        self._candidate_arrays.clear()
+        self._candidate_pools.clear()
+        self._preference_costs = None
+        return worker_idx
+    
+    def deactivate_worker(self, worker_idx: int):
+        # Rows stay in place so worker ordinals remain stable; an empty mask keeps the worker out of every pool
+        old_mask = int(self.qualification_masks[worker_idx])
+        self.qualification_masks[worker_idx] = 0
+        self._invalidate([], old_mask)
+    
+    def _invalidate(self, warehouse_idxs: Iterable[int], changed_bits: int):
+        for warehouse_idx in warehouse_idxs:
+            self._orderings.pop(warehouse_idx, None)
+        
+        warehouse_idxs = set(warehouse_idxs)
+        for cache in (self._candidate_arrays, self._candidate_pools):
+            for key in [key for key in cache
+                        if key[0] in warehouse_idxs or QUALIFICATION_BITS.get(key[1], 0) & changed_bits]:
+                del cache[key]
+        
+        if warehouse_idxs:
+            self._preference_costs = None
+class WorkforceIndexBuilder:
+    # Builds the index matrices chunk by chunk, so indexing overlaps with receiving the workforce
+    def __init__(self, warehouses: List[Warehouse], capacity: int = 1024):
+        self.warehouses = list(warehouses)
+        self.warehouse_ordinals = {w.uuid: i for i, w in enumerate(self.warehouses)}
+        self.count = 0
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity: int):
+        warehouse_count = len(self.warehouses)
+        masks = np.zeros(capacity, dtype=np.uint8)
+        priorities = np.full((capacity, warehouse_count), NO_PREFERENCE, dtype=np.int64)
+        distances = np.full((capacity, warehouse_count), NO_PREFERENCE, dtype=np.float64)
+        if self.count:
+            masks[:self.count] = self._masks[:self.count]
+            priorities[:self.count] = self._priorities[:self.count]
+            distances[:self.count] = self._distances[:self.count]
+        self._masks, self._priorities, self._distances = masks, priorities, distances
+    
+    def add_workers(self, workers: List[Worker]):
+        needed = self.count + len(workers)
+        if needed > len(self._masks):
+            self._allocate(max(needed, 2 * len(self._masks)))
+        
+        for worker in workers:
+            self._masks[self.count] = qualification_mask(worker.qualifications)
+            fill_preferences(self._priorities, self._distances, self.warehouse_ordinals, self.count, worker)
+            self.count += 1
+    
+    def build(self, workers: List[Worker]) -> WorkforceIndex:
+        if len(workers) != self.count:
+            raise ValueError(f"Index was built for {self.count} workers, got {len(workers)}")
+        
+        preferences = (self._masks[:self.count].copy(), self._priorities[:self.count].copy(),
+                       self._distances[:self.count].copy())
+        return WorkforceIndex(workers, self.warehouses, preferences)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+logger = logging.getLogger(__name__)
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_QUEUED_JOBS = 64
+# Finished jobs are kept for polling until newer ones push them out
+DEFAULT_KEEP_FINISHED = 64
+# Names of the JobState enum in the proto
+JOB_QUEUED = 'JOB_QUEUED'
+JOB_RUNNING = 'JOB_RUNNING'
+JOB_DONE = 'JOB_DONE'
+JOB_FAILED = 'JOB_FAILED'
+JOB_CANCELLED = 'JOB_CANCELLED'
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+class JobQueueFull(Exception):
+    pass
+class Job:
+    __slots__ = ('job_id', 'request', 'state', 'days_done', 'days_total', 'result', 'error', 'cancel_event',
+                 'submitted_at', 'started_at', 'finished_at')
+    
+    def __init__(self, job_id: str, request):
+        self.job_id = job_id
+        self.request = request
+        self.state = JOB_QUEUED
+        self.days_done = 0
+        self.days_total = 0
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+    
+    def progress(self, days_done: int, days_total: int):
+        self.days_done, self.days_total = days_done, days_total
+    
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+class JobQueue:
+    def __init__(self, run: Callable[[Job], object], workers: int = DEFAULT_JOB_WORKERS,
+                 max_queued: int = DEFAULT_MAX_QUEUED_JOBS, keep_finished: int = DEFAULT_KEEP_FINISHED):
+        # run solves one job and returns its optimization response; a response with success=False fails the job
+        self._run = run
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._finished: OrderedDict = OrderedDict()
+        self._threads: List[threading.Thread] = []
+    
+    def submit(self, request) -> Job:
+        job = Job(uuid.uuid4().hex, request)
+        with self._lock:
+            # Worker threads start with the first job, so servicers that never see one cost nothing
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"optimization-job-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            
+            self._jobs[job.job_id] = job
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                del self._jobs[job.job_id]
+                raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs waiting), retry later")
+        
+        logger.info(f"Queued optimization job {job.job_id[:12]} ({self._queue.qsize()} waiting)")
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == JOB_QUEUED:
+                # Left in the queue and skipped by the worker that takes it
+                self._finish(job, JOB_CANCELLED)
+            elif job.state == JOB_RUNNING:
+                job.cancel_event.set()
+        
+        logger.info(f"Cancellation requested for optimization job {job_id[:12]} ({job.state})")
+        return job
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+        return {
+            'queued': states.count(JOB_QUEUED),
+            'running': states.count(JOB_RUNNING),
+            'finished': sum(state in FINISHED_STATES for state in states),
+        }
+    
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.state != JOB_QUEUED:
+                    continue
+                job.state = JOB_RUNNING
+                job.started_at = time.monotonic()
+            
+            try:
+                result = self._run(job)
+                error = None if result.success else result.message
+            except Exception as e:
+                logger.error(f"Optimization job {job.job_id[:12]} failed: {str(e)}", exc_info=True)
+                result, error = None, str(e)
+            
+            with self._lock:
+                job.result, job.error = result, error
+                if job.cancel_event.is_set():
+                    self._finish(job, JOB_CANCELLED)
+                else:
+                    self._finish(job, JOB_FAILED if error is not None else JOB_DONE)
+            logger.info(f"Optimization job {job.job_id[:12]} finished as {job.state} in {job.elapsed():.2f}s")
+    
+    def _finish(self, job: Job, state: str):
+        # Called with the lock held
+        job.state = state
+        job.finished_at = time.monotonic()
+        # The request is no longer needed once the job has finished
+        job.request = None
+        self._finished[job.job_id] = job
+        while len(self._finished) > self.keep_finished:
+            evicted, _ = self._finished.popitem(last=False)
+            del self._jobs[evicted]
\ No newline at end of file
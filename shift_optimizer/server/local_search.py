@@ -0,0 +1,311 @@
+import logging
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+from .models import ScheduledShift
+from .index import WorkforceIndex, QUALIFICATION_BITS
+from .requirements import QUALIFICATION_TYPES, RequirementTable
+logger = logging.getLogger(__name__)
+# Only the head of a preference-ordered candidate pool is scanned by a single move
+SCAN_LIMIT = 64
+DEADLINE_CHECK_INTERVAL = 64
+# Consecutive non-improving iterations per assignment after which the search is considered converged
+STALE_ITERATIONS_PER_SLOT = 20
+MIN_STALE_ITERATIONS = 2000
+@dataclass
+class SearchStats:
+    iterations: int = 0
+    improvements: int = 0
+class LocalSearch:
+    def __init__(self, index: WorkforceIndex, requirements: RequirementTable, shifts: List[ScheduledShift],
+                 worker_roles: Dict[str, Dict[int, int]], shift_start: str, shift_end: str, seed: int = 0):
+        self.index = index
+        self.requirements = requirements
+        self.worker_roles = worker_roles
+        self.shift_start = shift_start
+        self.shift_end = shift_end
+        self.stats = SearchStats()
+        self._random = random.Random(seed)
+        
+        self._costs = index.preference_costs()
+        max_cost = float(self._costs.max()) if self._costs.size else 0.0
+        # A move touches at most three assignments, so one slot of shortage always outweighs any
+        # preference gain, and completing a warehouse outweighs any shortage shuffle
+        self._shortage_penalty = 4 * (max_cost + 1.0)
+        self._incomplete_penalty = 4 * self._shortage_penalty
+        
+        self._required = requirements.required.tolist()
+        self._scheduled = requirements.scheduled.tolist()
+        self._days = list(requirements.day_ordinals)
+        warehouse_count = len(requirements.warehouse_uuids)
+        self._missing = [
+            [sum(max(0, self._required[q][d][w] - self._scheduled[q][d][w]) for q in range(len(QUALIFICATION_TYPES)))
+             for w in range(warehouse_count)]
+            for d in range(len(self._days))
+        ]
+        
+        worker_ordinals = {uuid: i for i, uuid in enumerate(index.worker_uuids)}
+        
+        # A slot is one shift: its cell never changes, only the worker filling it (-1 once vacated)
+        self._shifts = shifts
+        self._slot_worker: List[int] = []
+        self._slot_cell: List[tuple] = []
+        self._assigned: List[Dict[int, int]] = [{} for _ in self._days]
+        self._cell_slots: Dict[tuple, List[int]] = {}
+        
+        for position, shift in enumerate(shifts):
+            day_idx = requirements.day_ordinals.get(shift.day_of_week)
+            worker_idx = worker_ordinals.get(shift.worker_uuid)
+            warehouse_idx = index.warehouse_ordinals.get(shift.warehouse_uuid)
+            qualification_idx = None
+            if day_idx is not None and worker_idx is not None:
+                qualification_idx = worker_roles.get(shift.day_of_week, {}).get(worker_idx)
+            if qualification_idx is None or warehouse_idx is None:
+                self._slot_worker.append(-1)
+                self._slot_cell.append(None)
+                continue
+            
+            cell = (day_idx, warehouse_idx, qualification_idx)
+            self._slot_worker.append(worker_idx)
+            self._slot_cell.append(cell)
+            self._assigned[day_idx][worker_idx] = position
+            self._cell_slots.setdefault(cell, []).append(position)
+        
+        self._original_workers = list(self._slot_worker)
+        self._short_cells = [
+            (d, w, q)
+            for q in range(len(QUALIFICATION_TYPES))
+            for d in range(len(self._days))
+            for w in range(warehouse_count)
+            if self._scheduled[q][d][w] < self._required[q][d][w]
+        ]
+    
+    def run(self, deadline: float, cancel_event=None) -> List[ScheduledShift]:
+        live_slots = [i for i, worker_idx in enumerate(self._slot_worker) if worker_idx >= 0]
+        stale_limit = max(MIN_STALE_ITERATIONS, STALE_ITERATIONS_PER_SLOT * len(live_slots))
+        stale = 0
+        moves = (self._try_relocate, self._try_replace, self._try_swap)
+        
+        while live_slots or self._short_cells:
+            if self.stats.iterations % DEADLINE_CHECK_INTERVAL == 0:
+                if time.monotonic() >= deadline or (cancel_event is not None and cancel_event.is_set()):
+                    break
+            if stale >= stale_limit:
+                break
+            self.stats.iterations += 1
+            
+            if self._random.choice(moves)():
+                self.stats.improvements += 1
+                stale = 0
+            else:
+                stale += 1
+        
+        self.requirements.scheduled[...] = self._scheduled
+        return self._build_shifts()
+    
+    def _cost(self, worker_idx: int, warehouse_idx: int) -> float:
+        return float(self._costs[worker_idx, warehouse_idx])
+    
+    def _eligible(self, worker_idx: int, qualification_idx: int) -> bool:
+        bit = QUALIFICATION_BITS[QUALIFICATION_TYPES[qualification_idx]]
+        return bool(self.index.qualification_masks[worker_idx] & bit)
+    
+    def _pool(self, warehouse_idx: int, qualification_idx: int) -> List[int]:
+        return self.index.candidate_pool(warehouse_idx, QUALIFICATION_TYPES[qualification_idx])[:SCAN_LIMIT]
+    
+    def _first_free(self, day_idx: int, warehouse_idx: int, qualification_idx: int,
+                    exclude: int = -1) -> Optional[int]:
+        assigned = self._assigned[day_idx]
+        for worker_idx in self._pool(warehouse_idx, qualification_idx):
+            if worker_idx not in assigned and worker_idx != exclude:
+                return worker_idx
+        return None
+    
+    def _random_slot(self) -> Optional[int]:
+        if not self._slot_worker:
+            return None
+        for _ in range(8):
+            position = self._random.randrange(len(self._slot_worker))
+            if self._slot_worker[position] >= 0:
+                return position
+        return None
+    
+    def _penalty_delta(self, day_idx: int, changes: Dict[tuple, int]) -> float:
+        by_warehouse: Dict[int, int] = {}
+        for (warehouse_idx, qualification_idx), step in changes.items():
+            if not step:
+                continue
+            required = self._required[qualification_idx][day_idx][warehouse_idx]
+            load = self._scheduled[qualification_idx][day_idx][warehouse_idx]
+            shortage_change = max(0, required - load - step) - max(0, required - load)
+            by_warehouse[warehouse_idx] = by_warehouse.get(warehouse_idx, 0) + shortage_change
+        
+        delta = 0.0
+        for warehouse_idx, shortage_change in by_warehouse.items():
+            before = self._missing[day_idx][warehouse_idx]
+            after = before + shortage_change
+            delta += self._shortage_penalty * shortage_change
+            delta += self._incomplete_penalty * ((after > 0) - (before > 0))
+        return delta
+    
+    def _apply_load(self, day_idx: int, changes: Dict[tuple, int]):
+        for (warehouse_idx, qualification_idx), step in changes.items():
+            if not step:
+                continue
+            required = self._required[qualification_idx][day_idx][warehouse_idx]
+            load = self._scheduled[qualification_idx][day_idx][warehouse_idx]
+            self._missing[day_idx][warehouse_idx] += max(0, required - load - step) - max(0, required - load)
+            self._scheduled[qualification_idx][day_idx][warehouse_idx] = load + step
+            if step < 0 and load + step < required:
+                self._short_cells.append((day_idx, warehouse_idx, qualification_idx))
+    
+    def _place(self, position: int, worker_idx: int):
+        day_idx, _, qualification_idx = self._slot_cell[position]
+        self._slot_worker[position] = worker_idx
+        self._assigned[day_idx][worker_idx] = position
+        self.worker_roles[self._days[day_idx]][worker_idx] = qualification_idx
+    
+    def _vacate(self, position: int):
+        day_idx = self._slot_cell[position][0]
+        worker_idx = self._slot_worker[position]
+        self._slot_worker[position] = -1
+        del self._assigned[day_idx][worker_idx]
+        self.worker_roles[self._days[day_idx]].pop(worker_idx, None)
+    
+    def _open_slot(self, cell: tuple) -> int:
+        for position in self._cell_slots.get(cell, []):
+            if self._slot_worker[position] < 0:
+                return position
+        position = len(self._slot_worker)
+        self._slot_worker.append(-1)
+        self._slot_cell.append(cell)
+        self._original_workers.append(-1)
+        self._cell_slots.setdefault(cell, []).append(position)
+        return position
+    
+    def _try_replace(self) -> bool:
+        # Hand a slot to a free worker who prefers this warehouse more
+        position = self._random_slot()
+        if position is None:
+            return False
+        
+        day_idx, warehouse_idx, qualification_idx = self._slot_cell[position]
+        current = self._slot_worker[position]
+        current_cost = self._cost(current, warehouse_idx)
+        assigned = self._assigned[day_idx]
+        
+        for worker_idx in self._pool(warehouse_idx, qualification_idx):
+            if self._cost(worker_idx, warehouse_idx) >= current_cost:
+                return False
+            if worker_idx not in assigned:
+                self._vacate(position)
+                self._place(position, worker_idx)
+                return True
+        return False
+    
+    def _try_swap(self) -> bool:
+        # Exchange two workers of the same day between warehouses when both sides get cheaper in total
+        first = self._random_slot()
+        if first is None:
+            return False
+        
+        day_idx, first_warehouse, first_qualification = self._slot_cell[first]
+        worker = self._slot_worker[first]
+        current_cost = self._cost(worker, first_warehouse)
+        
+        for preference_warehouse in self._preferred_warehouses(worker, current_cost):
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                if not self._eligible(worker, qualification_idx):
+                    continue
+                for second in self._cell_slots.get((day_idx, preference_warehouse, qualification_idx), []):
+                    other = self._slot_worker[second]
+                    if other < 0 or not self._eligible(other, first_qualification):
+                        continue
+                    delta = (self._cost(worker, preference_warehouse) + self._cost(other, first_warehouse)
+                             - current_cost - self._cost(other, preference_warehouse))
+                    if delta < 0:
+                        self._vacate(first)
+                        self._vacate(second)
+                        self._place(first, other)
+                        self._place(second, worker)
+                        return True
+        return False
+    
+    def _preferred_warehouses(self, worker_idx: int, current_cost: float) -> List[int]:
+        row = self._costs[worker_idx]
+        return [int(w) for w in (row < current_cost).nonzero()[0]][:SCAN_LIMIT]
+    
+    def _try_relocate(self) -> bool:
+        # Fill a short cell, either with a free worker or by pulling one from another cell and
+        # backfilling the cell it leaves with a free worker when there is one
+        while self._short_cells:
+            pick = self._random.randrange(len(self._short_cells))
+            day_idx, warehouse_idx, qualification_idx = self._short_cells[pick]
+            if self._scheduled[qualification_idx][day_idx][warehouse_idx] < self._required[qualification_idx][day_idx][warehouse_idx]:
+                break
+            self._short_cells[pick] = self._short_cells[-1]
+            self._short_cells.pop()
+        else:
+            return False
+        
+        target = (day_idx, warehouse_idx, qualification_idx)
+        assigned = self._assigned[day_idx]
+        
+        for worker_idx in self._pool(warehouse_idx, qualification_idx):
+            source = assigned.get(worker_idx)
+            if source is None:
+                changes = {(warehouse_idx, qualification_idx): 1}
+                if self._penalty_delta(day_idx, changes) + self._cost(worker_idx, warehouse_idx) < 0:
+                    self._apply_load(day_idx, changes)
+                    self._place(self._open_slot(target), worker_idx)
+                    return True
+                continue
+            
+            _, source_warehouse, source_qualification = self._slot_cell[source]
+            if (source_warehouse, source_qualification) == (warehouse_idx, qualification_idx):
+                continue
+            
+            backfill = self._first_free(day_idx, source_warehouse, source_qualification, exclude=worker_idx)
+            changes = {(warehouse_idx, qualification_idx): 1,
+                       (source_warehouse, source_qualification): 0 if backfill is not None else -1}
+            delta = self._penalty_delta(day_idx, changes)
+            delta += self._cost(worker_idx, warehouse_idx) - self._cost(worker_idx, source_warehouse)
+            if backfill is not None:
+                delta += self._cost(backfill, source_warehouse)
+            
+            if delta < 0:
+                self._apply_load(day_idx, changes)
+                self._vacate(source)
+                if backfill is not None:
+                    self._place(source, backfill)
+                self._place(self._open_slot(target), worker_idx)
+                return True
+        return False
+    
+    def _build_shifts(self) -> List[ScheduledShift]:
+        shifts = []
+        for position, worker_idx in enumerate(self._slot_worker):
+            cell = self._slot_cell[position]
+            if cell is None:
+                shifts.append(self._shifts[position])
+                continue
+            if worker_idx < 0:
+                continue
+            
+            worker_uuid = self.index.worker_uuids[worker_idx]
+            if position < len(self._shifts):
+                shift = self._shifts[position]
+                if worker_idx != self._original_workers[position]:
+                    shift = replace(shift, worker_uuid=worker_uuid)
+                shifts.append(shift)
+            else:
+                day_idx, warehouse_idx, _ = cell
+                shifts.append(ScheduledShift(
+                    worker_uuid=worker_uuid,
+                    warehouse_uuid=self.index.warehouse_uuids[warehouse_idx],
+                    day_of_week=self._days[day_idx],
+                    start_time=self.shift_start,
+                    end_time=self.shift_end
+                ))
+        return shifts
\ No newline at end of file
@@ -1,22 +1,23 @@
-from dataclasses import dataclass, field
-from typing import List, Optional
-from datetime import datetime
-@dataclass
+from dataclasses import dataclass
+from typing import Iterator, List, Sequence, Tuple
+# Models are slotted and frozen: no per-instance __dict__, and shared instances (snapshots, cached
+# schedules) cannot be changed behind the optimizer's back. Use dataclasses.replace to derive a copy.
+@dataclass(frozen=True, slots=True)
 class Qualification:
     type: str
     level: int
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WarehousePreference:
     warehouse_uuid: str
     priority: int
     distance: float
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Worker:
     uuid: str
     username: str
-    qualifications: List[Qualification] = field(default_factory=list)
-    warehouse_preferences: List[dict] = field(default_factory=list)
-@dataclass
+    qualifications: Tuple[Qualification, ...] = ()
+    warehouse_preferences: Tuple[WarehousePreference, ...] = ()
+@dataclass(frozen=True, slots=True)
 class Warehouse:
     uuid: str
     name: str
@@ -26,19 +27,19 @@ class Warehouse:
     min_drivers: int
     min_engineers: int
     is_active: bool
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CargoLoad:
     warehouse_uuid: str
     date: str
     total_weight: int
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ScheduledShift:
     worker_uuid: str
     warehouse_uuid: str
     day_of_week: str
     start_time: str
     end_time: str
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WarehouseStaffing:
     warehouse_uuid: str
     warehouse_name: str
@@ -49,4 +50,93 @@ class WarehouseStaffing:
     scheduled_drivers: int
     required_engineers: int
     scheduled_engineers: int
-    is_fully_staffed: bool 
\ No newline at end of file
+    is_fully_staffed: bool
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    # A what-if variant on top of a shared workforce: cargo loads are matched by (warehouse_uuid, date)
+    # as in snapshot deltas, closed warehouses need nobody, and empty days mean the base days
+    name: str
+    upserted_cargo_loads: Tuple[CargoLoad, ...] = ()
+    removed_cargo_loads: Tuple[CargoLoad, ...] = ()
+    closed_warehouse_uuids: Tuple[str, ...] = ()
+    days: Tuple[str, ...] = ()
+class ShiftTable:
+    # Shifts as parallel columns for bulk serialisation; the strings are shared, not copied
+    __slots__ = ('worker_uuids', 'warehouse_uuids', 'days', 'start_times', 'end_times')
+    
+    def __init__(self, worker_uuids: List[str], warehouse_uuids: List[str], days: List[str],
+                 start_times: List[str], end_times: List[str]):
+        self.worker_uuids = worker_uuids
+        self.warehouse_uuids = warehouse_uuids
+        self.days = days
+        self.start_times = start_times
+        self.end_times = end_times
+    
+    @classmethod
+    def from_shifts(cls, shifts: Sequence[ScheduledShift]) -> 'ShiftTable':
+        return cls([shift.worker_uuid for shift in shifts], [shift.warehouse_uuid for shift in shifts],
+                   [shift.day_of_week for shift in shifts], [shift.start_time for shift in shifts],
+                   [shift.end_time for shift in shifts])
+    
+    def __len__(self) -> int:
+        return len(self.worker_uuids)
+    
+    def slice(self, start: int, stop: int) -> 'ShiftTable':
+        return ShiftTable(*(getattr(self, column)[start:stop] for column in self.__slots__))
+    
+    def rows(self) -> Iterator[tuple]:
+        return zip(self.worker_uuids, self.warehouse_uuids, self.days, self.start_times, self.end_times)
+    
+    def __iter__(self) -> Iterator[ScheduledShift]:
+        for row in self.rows():
+            yield ScheduledShift(*row)
+class StaffingTable:
+    __slots__ = ('warehouse_uuids', 'warehouse_names', 'days', 'required_basic_workers', 'scheduled_basic_workers',
+                 'required_drivers', 'scheduled_drivers', 'required_engineers', 'scheduled_engineers',
+                 'is_fully_staffed')
+    
+    def __init__(self, warehouse_uuids: List[str], warehouse_names: List[str], days: List[str],
+                 required_basic_workers: List[int], scheduled_basic_workers: List[int], required_drivers: List[int],
+                 scheduled_drivers: List[int], required_engineers: List[int], scheduled_engineers: List[int],
+                 is_fully_staffed: List[bool]):
+        self.warehouse_uuids = warehouse_uuids
+        self.warehouse_names = warehouse_names
+        self.days = days
+        self.required_basic_workers = required_basic_workers
+        self.scheduled_basic_workers = scheduled_basic_workers
+        self.required_drivers = required_drivers
+        self.scheduled_drivers = scheduled_drivers
+        self.required_engineers = required_engineers
+        self.scheduled_engineers = scheduled_engineers
+        self.is_fully_staffed = is_fully_staffed
+    
+    @classmethod
+    def empty(cls) -> 'StaffingTable':
+        return cls([], [], [], [], [], [], [], [], [], [])
+    
+    @classmethod
+    def from_rows(cls, rows: Sequence[WarehouseStaffing]) -> 'StaffingTable':
+        table = cls.empty()
+        for row in rows:
+            table.append_row(row.warehouse_uuid, row.warehouse_name, row.day, row.required_basic_workers,
+                             row.scheduled_basic_workers, row.required_drivers, row.scheduled_drivers,
+                             row.required_engineers, row.scheduled_engineers, row.is_fully_staffed)
+        return table
+    
+    def append_row(self, *values):
+        for column, value in zip(self.__slots__, values):
+            getattr(self, column).append(value)
+    
+    def extend(self, other: 'StaffingTable'):
+        for column in self.__slots__:
+            getattr(self, column).extend(getattr(other, column))
+    
+    def __len__(self) -> int:
+        return len(self.warehouse_uuids)
+    
+    def rows(self) -> Iterator[tuple]:
+        return zip(*(getattr(self, column) for column in self.__slots__))
+    
+    def __iter__(self) -> Iterator[WarehouseStaffing]:
+        for row in self.rows():
+            yield WarehouseStaffing(*row)
\ No newline at end of file
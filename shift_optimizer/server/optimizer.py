@@ -1,22 +1,56 @@
 import logging
-from datetime import datetime, time
-from typing import Dict, List, Tuple, Set
-from .models import Worker, Warehouse, CargoLoad, ScheduledShift, WarehouseStaffing, Qualification
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .models import Worker, Warehouse, CargoLoad, ScheduledShift, WarehouseStaffing
+from .index import WorkforceIndex, WorkerBitset
+from .requirements import QUALIFICATION_TYPES, RequirementTable, build_requirement_table
+from .solvers import DaySolution, select_solver
+from .local_search import LocalSearch, SearchStats
 logger = logging.getLogger(__name__)
+CANCEL_POLL_INTERVAL = 0.1
+class OptimizationCancelled(Exception):
+    pass
 class ShiftOptimizer:
-    def __init__(self, workers: List[Worker], warehouses: List[Warehouse], 
-                 cargo_loads: List[CargoLoad], days: List[str]):
+    def __init__(self, workers: Optional[List[Worker]], warehouses: List[Warehouse], 
+                 cargo_loads: List[CargoLoad], days: List[str], processes: int = 1,
+                 strategy: str = 'greedy', deadline: Optional[float] = None,
+                 cancel_event: Optional[threading.Event] = None, index: Optional[WorkforceIndex] = None,
+                 progress: Optional[Callable[[int, int], None]] = None):
+        # workers may be None when a prebuilt index already holds the workforce as columns
+        if workers is None and index is None:
+            raise ValueError("Either workers or a prebuilt index is required")
         self.workers = workers
+        self.worker_count = len(workers) if workers is not None else len(index.worker_uuids)
         self.warehouses = {w.uuid: w for w in warehouses}
         self.cargo_loads = cargo_loads
         self.days = days
+        self.processes = processes
+        self.strategy = strategy
+        self.solver = None
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        # Called with (days solved, days in total) whenever a day is finished
+        self.progress = progress
         
         self.shift_times = [
             (time(8, 0), time(16, 0)),
             (time(16, 0), time(0, 0)),
         ]
+        shift_time = self.shift_times[0]
+        self.shift_start = shift_time[0].strftime("%H:%M")
+        self.shift_end = shift_time[1].strftime("%H:%M") if shift_time[1] != time(0, 0) else "00:00"
         
-        self.scheduled_workers = {day: set() for day in days}
+        self.scheduled_workers = {day: WorkerBitset(self.worker_count) for day in days}
+        self.worker_roles: Dict[str, Dict[int, int]] = {day: {} for day in days}
+        self._pool_cursors = {}
+        
+        self.index = index
+        self._prebuilt_index = index
+        self.requirements = None
+        self.search_stats = SearchStats()
         
         self.shifts = []
         self.warehouse_staffing = []
@@ -24,219 +58,283 @@ class ShiftOptimizer:
     def optimize(self) -> Tuple[List[ScheduledShift], List[WarehouseStaffing]]:
         logger.info("Starting shift optimization")
         
+        warehouse_requirements, unique_days, processes = self._prepare()
+        if processes > 1:
+            solutions = self._solve_days_in_pool(warehouse_requirements, unique_days, processes)
+        else:
+            solutions = []
+            self._report_progress(0, len(unique_days))
+            for day in unique_days:
+                self._check_cancelled()
+                solutions.append(self._solve_day(warehouse_requirements, day))
+                self._report_progress(len(solutions), len(unique_days))
+        
+        self._merge_day_solutions(warehouse_requirements, solutions)
+        
+        if self.deadline is not None:
+            self._improve_until_deadline(warehouse_requirements)
+        self._check_cancelled()
+        
+        self._generate_staffing_reports(warehouse_requirements)
+        self.requirements = warehouse_requirements
+        
+        logger.info(f"Optimization completed. Scheduled {len(self.shifts)} shifts")
+        
+        return self.shifts, self.warehouse_staffing
+    
+    def optimize_by_day(self) -> Iterator[Tuple[str, List[ScheduledShift], List[WarehouseStaffing]]]:
+        # Days are solved independently, so each one is handed out as soon as it is ready and
+        # nothing is accumulated. The anytime search works across days and is not applied here.
+        logger.info("Starting shift optimization by day")
+        
+        warehouse_requirements, unique_days, processes = self._prepare()
+        if processes > 1:
+            solutions = self._iter_days_in_pool(warehouse_requirements, unique_days, processes)
+        else:
+            solutions = self._iter_days(warehouse_requirements, unique_days)
+        
+        shift_count = 0
+        self._report_progress(0, len(unique_days))
+        for days_done, solution in enumerate(solutions, 1):
+            self._record_day_solution(warehouse_requirements, solution)
+            self._report_progress(days_done, len(unique_days))
+            shifts = [shift for chunks in (solution.minimum_chunks, solution.additional_chunks)
+                      for chunk in chunks for shift in chunk]
+            shift_count += len(shifts)
+            self.shifts = []
+            yield solution.day, shifts, self._staffing_for_day(warehouse_requirements, solution.day)
+        
+        self.requirements = warehouse_requirements
+        logger.info(f"Optimization completed. Scheduled {shift_count} shifts")
+    
+    def _prepare(self) -> Tuple[RequirementTable, List[str], int]:
         self.shifts = []
         self.warehouse_staffing = []
-        self.scheduled_workers = {day: set() for day in self.days}
+        self.scheduled_workers = {day: WorkerBitset(self.worker_count) for day in self.days}
+        self.worker_roles = {day: {} for day in self.days}
+        self._pool_cursors = {}
+        self.search_stats = SearchStats()
+        self.index = self._prebuilt_index or WorkforceIndex(self.workers, list(self.warehouses.values()))
         
         warehouse_requirements = self._calculate_warehouse_requirements()
+        max_daily_cells = int((warehouse_requirements.required > 0).sum(axis=(0, 2)).max()) if self.days else 0
+        self.solver = select_solver(self.strategy, self.worker_count, max_daily_cells)
         
-        self._assign_minimum_staff(warehouse_requirements)
+        unique_days = list(dict.fromkeys(self.days))
+        return warehouse_requirements, unique_days, min(self.processes, len(unique_days))
+    
+    def _report_progress(self, days_done: int, days_total: int):
+        if self.progress is not None:
+            self.progress(days_done, days_total)
+    
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise OptimizationCancelled("Optimization cancelled")
+    
+    def _calculate_warehouse_requirements(self) -> RequirementTable:
+        return build_requirement_table(list(self.warehouses.values()), self.cargo_loads, self.days)
+    
+    def _solve_day(self, requirements: RequirementTable, day: str) -> DaySolution:
+        return self.solver.solve_day(self, requirements, day)
+    
+    def _iter_days(self, requirements: RequirementTable, days: List[str]) -> Iterator[DaySolution]:
+        for day in days:
+            self._check_cancelled()
+            yield self._solve_day(requirements, day)
+    
+    def _day_pool(self, requirements: RequirementTable, processes: int) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        )
+        # The index and requirement table are shipped once per process, tasks only carry the day name
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=_init_day_worker,
+            initargs=(self.workers, list(self.warehouses.values()), self.days, self.index, requirements,
+                      self.solver.name)
+        )
+    
+    def _solve_days_in_pool(self, requirements: RequirementTable, days: List[str],
+                            processes: int) -> List[DaySolution]:
+        logger.info(f"Solving {len(days)} days in a pool of {processes} processes")
         
-        self._assign_additional_staff(warehouse_requirements)
+        with self._day_pool(requirements, processes) as executor:
+            futures = [executor.submit(_solve_day_in_worker, day) for day in days]
+            pending = set(futures)
+            self._report_progress(0, len(days))
+            while pending:
+                _, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL)
+                self._report_progress(len(days) - len(pending), len(days))
+                if pending and self.cancel_event is not None and self.cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                    self._check_cancelled()
+            return [future.result() for future in futures]
+    
+    def _iter_days_in_pool(self, requirements: RequirementTable, days: List[str],
+                           processes: int) -> Iterator[DaySolution]:
+        logger.info(f"Solving {len(days)} days in a pool of {processes} processes")
         
-        self._generate_staffing_reports(warehouse_requirements)
+        with self._day_pool(requirements, processes) as executor:
+            pending = {executor.submit(_solve_day_in_worker, day) for day in days}
+            try:
+                while pending:
+                    done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                    self._check_cancelled()
+            finally:
+                # Reached early when the consumer stops reading or the call is cancelled
+                for future in pending:
+                    future.cancel()
+    
+    def _record_day_solution(self, requirements: RequirementTable, solution: DaySolution):
+        requirements.scheduled[:, requirements.day_ordinals[solution.day], :] = solution.scheduled_counts
+        self.scheduled_workers[solution.day] = solution.scheduled_workers
+        self.worker_roles[solution.day] = solution.worker_roles
+    
+    def _merge_day_solutions(self, requirements: RequirementTable, solutions: List[DaySolution]):
+        by_day = {solution.day: solution for solution in solutions}
         
-        logger.info(f"Optimization completed. Scheduled {len(self.shifts)} shifts")
+        for solution in solutions:
+            self._record_day_solution(requirements, solution)
         
-        return self.shifts, self.warehouse_staffing
+        # Replay chunks in the order the serial passes would have produced them
+        self.shifts = []
+        for chunks_attr in ('minimum_chunks', 'additional_chunks'):
+            taken: Dict[str, int] = {}
+            for day in self.days:
+                position = taken.get(day, 0)
+                self.shifts.extend(getattr(by_day[day], chunks_attr)[position])
+                taken[day] = position + 1
     
-    def _calculate_warehouse_requirements(self) -> Dict:
-        requirements = {}
+    def _improve_until_deadline(self, requirements: RequirementTable):
+        search = LocalSearch(self._ensure_index(), requirements, self.shifts, self.worker_roles,
+                             self.shift_start, self.shift_end)
+        self.shifts = search.run(self.deadline, self.cancel_event)
+        self.search_stats = search.stats
         
-        for day in self.days:
-            requirements[day] = {}
-            
-            for warehouse_uuid, warehouse in self.warehouses.items():
-                req = {
-                    'warehouse_uuid': warehouse_uuid,
-                    'warehouse_name': warehouse.name,
-                    'min_basic_workers': warehouse.min_basic_workers,
-                    'min_drivers': warehouse.min_drivers,
-                    'min_engineers': warehouse.min_engineers,
-                    'total_basic_workers': warehouse.min_basic_workers,
-                    'total_drivers': warehouse.min_drivers,
-                    'total_engineers': warehouse.min_engineers,
-                    'scheduled_basic_workers': 0,
-                    'scheduled_drivers': 0,
-                    'scheduled_engineers': 0
-                }
-                
-                cargo_for_day = [c for c in self.cargo_loads
-                                if c.warehouse_uuid == warehouse_uuid and self._map_date_to_day(c.date) == day]
-                
-                for cargo in cargo_for_day:
-                    basic_workers = max(warehouse.min_basic_workers, 
-                                        (cargo.total_weight // 1000) + (1 if cargo.total_weight % 1000 > 0 else 0))
-                    
-                    drivers = max(warehouse.min_drivers,
-                                 (cargo.total_weight // 5000) + (1 if cargo.total_weight % 5000 > 0 else 0))
-                    
-                    engineers = max(warehouse.min_engineers,
-                                   (cargo.total_weight // 10000) + (1 if cargo.total_weight % 10000 > 0 else 0))
-                    
-                    req['total_basic_workers'] = max(req['total_basic_workers'], basic_workers)
-                    req['total_drivers'] = max(req['total_drivers'], drivers)
-                    req['total_engineers'] = max(req['total_engineers'], engineers)
-                
-                requirements[day][warehouse_uuid] = req
-        
-        return requirements
-    
-    def _assign_minimum_staff(self, warehouse_requirements: Dict):
+        logger.info(f"Local search finished after {search.stats.iterations} iterations "
+                    f"with {search.stats.improvements} improvements")
+    
+    def _assign_minimum_staff(self, requirements: RequirementTable):
         logger.info("Assigning minimum staff requirements")
         
         for day in self.days:
-            for warehouse_uuid, req in warehouse_requirements[day].items():
-                sorted_workers = self._sort_workers_by_preference(warehouse_uuid)
-                
-                self._assign_workers_by_qualification(
-                    sorted_workers, 
-                    day, 
-                    warehouse_uuid,
-                    "BASIC_WORKER", 
-                    req['min_basic_workers'],
-                    req
-                )
-                
-                self._assign_workers_by_qualification(
-                    sorted_workers, 
-                    day, 
-                    warehouse_uuid,
-                    "CARGO_DRIVER", 
-                    req['min_drivers'],
-                    req
-                )
-                
-                self._assign_workers_by_qualification(
-                    sorted_workers, 
-                    day, 
-                    warehouse_uuid,
-                    "ENGINEER", 
-                    req['min_engineers'],
-                    req
-                )
-    
-    def _assign_additional_staff(self, warehouse_requirements: Dict):
+            self._assign_minimum_staff_for_day(requirements, day)
+    
+    def _assign_minimum_staff_for_day(self, requirements: RequirementTable, day: str):
+        for warehouse_idx in range(len(requirements.warehouse_uuids)):
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                required_count = int(requirements.minimum[qualification_idx, warehouse_idx])
+                self._fill_from_pool(requirements, day, warehouse_idx, qualification_idx, required_count)
+    
+    def _assign_additional_staff(self, requirements: RequirementTable):
         logger.info("Assigning additional staff based on cargo requirements")
         
         for day in self.days:
-            for warehouse_uuid, req in warehouse_requirements[day].items():
-                sorted_workers = self._sort_workers_by_preference(warehouse_uuid)
-                
-                additional_basic = req['total_basic_workers'] - req['scheduled_basic_workers']
-                if additional_basic > 0:
-                    self._assign_workers_by_qualification(
-                        sorted_workers, 
-                        day, 
-                        warehouse_uuid,
-                        "BASIC_WORKER", 
-                        additional_basic,
-                        req
-                    )
-                
-                additional_drivers = req['total_drivers'] - req['scheduled_drivers']
-                if additional_drivers > 0:
-                    self._assign_workers_by_qualification(
-                        sorted_workers, 
-                        day, 
-                        warehouse_uuid,
-                        "CARGO_DRIVER", 
-                        additional_drivers,
-                        req
-                    )
-                
-                additional_engineers = req['total_engineers'] - req['scheduled_engineers']
-                if additional_engineers > 0:
-                    self._assign_workers_by_qualification(
-                        sorted_workers, 
-                        day, 
-                        warehouse_uuid,
-                        "ENGINEER", 
-                        additional_engineers,
-                        req
-                    )
-    
-    def _sort_workers_by_preference(self, warehouse_uuid: str) -> List[Worker]:
-        result = []
-        logger.info(self.workers)
-        
-        for worker in self.workers:
-            logger.info(worker.warehouse_preferences)
-            preference = None
-            for p in worker.warehouse_preferences:
-                if p.warehouse_uuid == warehouse_uuid:
-                    preference = p
-                    break
-            
-            if preference:
-                result.append((worker, preference.priority, preference.distance))
-            else:
-                result.append((worker, 9999, 9999))
+            self._assign_additional_staff_for_day(requirements, day)
+    
+    def _assign_additional_staff_for_day(self, requirements: RequirementTable, day: str):
+        day_idx = requirements.day_ordinals[day]
+        for warehouse_idx in range(len(requirements.warehouse_uuids)):
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                additional = int(requirements.required[qualification_idx, day_idx, warehouse_idx]
+                                 - requirements.scheduled[qualification_idx, day_idx, warehouse_idx])
+                if additional > 0:
+                    self._fill_from_pool(requirements, day, warehouse_idx, qualification_idx, additional)
+    
+    def _ensure_index(self) -> WorkforceIndex:
+        if self.index is None:
+            self.index = WorkforceIndex(self.workers, list(self.warehouses.values()))
+        return self.index
+    
+    def _fill_from_pool(self, requirements: RequirementTable, day: str, warehouse_idx: int,
+                        qualification_idx: int, required_count: int):
+        if required_count <= 0:
+            return
         
-        result.sort(key=lambda x: (x[1], x[2]))
+        pool = self._ensure_index().candidate_pool(warehouse_idx, QUALIFICATION_TYPES[qualification_idx])
         
-        return [item[0] for item in result]
+        # Everything before the cursor is already scheduled for this day, and that never changes
+        cursor_key = (day, warehouse_idx, qualification_idx)
+        start = self._pool_cursors.get(cursor_key, 0)
+        self._pool_cursors[cursor_key] = self._assign_workers_by_qualification(
+            pool, day, warehouse_idx, qualification_idx, required_count, requirements, start
+        )
     
-    def _assign_workers_by_qualification(self, workers: List[Worker], day: str, 
-                                        warehouse_uuid: str, qualification_type: str, 
-                                        required_count: int, req: Dict):
+    def _assign_workers_by_qualification(self, candidates: List[int], day: str, warehouse_idx: int,
+                                        qualification_idx: int, required_count: int,
+                                        requirements: RequirementTable, start: int = 0) -> int:
         if required_count <= 0:
-            return
+            return start
         
+        scheduled = self.scheduled_workers[day]
+        roles = self.worker_roles[day]
+        worker_uuids = self._ensure_index().worker_uuids
+        warehouse_uuid = requirements.warehouse_uuids[warehouse_idx]
         assigned_count = 0
+        position = start
         
-        for worker in workers:
-            if worker.uuid in self.scheduled_workers[day]:
-                continue
-            
-            has_qualification = any(q.type == qualification_type for q in worker.qualifications)
+        while position < len(candidates):
+            worker_idx = candidates[position]
+            position += 1
             
-            if not has_qualification:
+            if worker_idx in scheduled:
                 continue
-            shift_time = self.shift_times[0]
             
             shift = ScheduledShift(
-                worker_uuid=worker.uuid,
+                worker_uuid=worker_uuids[worker_idx],
                 warehouse_uuid=warehouse_uuid,
                 day_of_week=day,
-                start_time=shift_time[0].strftime("%H:%M"),
-                end_time=shift_time[1].strftime("%H:%M") if shift_time[1] != time(0, 0) else "00:00"
+                start_time=self.shift_start,
+                end_time=self.shift_end
             )
             
             self.shifts.append(shift)
-            self.scheduled_workers[day].add(worker.uuid)
-            
-            if qualification_type == "BASIC_WORKER":
-                req['scheduled_basic_workers'] += 1
-            elif qualification_type == "CARGO_DRIVER":
-                req['scheduled_drivers'] += 1
-            elif qualification_type == "ENGINEER":
-                req['scheduled_engineers'] += 1
+            scheduled.add(worker_idx)
+            roles[worker_idx] = qualification_idx
             
             assigned_count += 1
             if assigned_count >= required_count:
                 break
+        
+        requirements.scheduled[qualification_idx, requirements.day_ordinals[day], warehouse_idx] += assigned_count
+        return position
     
-    def _generate_staffing_reports(self, warehouse_requirements: Dict):
+    def _generate_staffing_reports(self, requirements: RequirementTable):
         for day in self.days:
-            for warehouse_uuid, req in warehouse_requirements[day].items():
-                staffing = WarehouseStaffing(
-                    warehouse_uuid=warehouse_uuid,
-                    warehouse_name=req['warehouse_name'],
-                    day=day,
-                    required_basic_workers=req['total_basic_workers'],
-                    scheduled_basic_workers=req['scheduled_basic_workers'],
-                    required_drivers=req['total_drivers'],
-                    scheduled_drivers=req['scheduled_drivers'],
-                    required_engineers=req['total_engineers'],
-                    scheduled_engineers=req['scheduled_engineers'],
-                    is_fully_staffed=(req['scheduled_basic_workers'] >= req['total_basic_workers'] and
-                                    req['scheduled_drivers'] >= req['total_drivers'] and
-                                    req['scheduled_engineers'] >= req['total_engineers'])
-                )
-                
-                self.warehouse_staffing.append(staffing)
-    
-    def _map_date_to_day(self, date_str: str) -> str:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        return date_obj.strftime("%A").lower()
\ No newline at end of file
+            self.warehouse_staffing.extend(self._staffing_for_day(requirements, day))
+    
+    def _staffing_for_day(self, requirements: RequirementTable, day: str) -> List[WarehouseStaffing]:
+        day_idx = requirements.day_ordinals[day]
+        required = requirements.required[:, day_idx, :].tolist()
+        scheduled = requirements.scheduled[:, day_idx, :].tolist()
+        fully_staffed = requirements.fully_staffed()[day_idx].tolist()
+        
+        staffing = []
+        for warehouse_idx, warehouse_uuid in enumerate(requirements.warehouse_uuids):
+            staffing.append(WarehouseStaffing(
+                warehouse_uuid=warehouse_uuid,
+                warehouse_name=requirements.warehouse_names[warehouse_idx],
+                day=day,
+                required_basic_workers=required[0][warehouse_idx],
+                scheduled_basic_workers=scheduled[0][warehouse_idx],
+                required_drivers=required[1][warehouse_idx],
+                scheduled_drivers=scheduled[1][warehouse_idx],
+                required_engineers=required[2][warehouse_idx],
+                scheduled_engineers=scheduled[2][warehouse_idx],
+                is_fully_staffed=fully_staffed[warehouse_idx]
+            ))
+        return staffing
+_day_worker: Optional[ShiftOptimizer] = None
+_day_worker_requirements: Optional[RequirementTable] = None
+def _init_day_worker(workers, warehouses, days, index, requirements, strategy):
+    global _day_worker, _day_worker_requirements
+    _day_worker = ShiftOptimizer(workers, warehouses, [], days, strategy=strategy, index=index)
+    _day_worker.solver = select_solver(strategy, _day_worker.worker_count, 0)
+    _day_worker_requirements = requirements
+def _solve_day_in_worker(day: str) -> DaySolution:
+    _day_worker.shifts = []
+    return _day_worker._solve_day(_day_worker_requirements, day)
\ No newline at end of file
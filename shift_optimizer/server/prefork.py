@@ -0,0 +1,139 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import Callable, Dict, Optional
+logger = logging.getLogger(__name__)
+SUPERVISE_INTERVAL = 0.5
+# A worker that dies sooner than this after starting is restarted with a growing delay
+MIN_HEALTHY_UPTIME = 5.0
+MAX_RESTART_DELAY = 30.0
+STOP_TIMEOUT = 10.0
+def warm_up(strategy: str):
+    # Imports, numpy and the solver code paths are exercised once so the first real request is not slower
+    import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+    from .server import ShiftOptimizerServicer
+    from .solvers import SOLVERS
+    
+    request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday", "tuesday"])
+    for i in range(6):
+        worker = request.workers.add(uuid=f"warmup-{i}", username=f"warmup-{i}")
+        worker.qualifications.add(type=i % 3, level=1)
+        worker.warehouse_preferences.add(warehouse_uuid=f"warmup-{i % 2}", priority=1, distance=1.0)
+    for i in range(2):
+        request.warehouses.add(uuid=f"warmup-{i}", name=f"warmup-{i}", min_workers=3, min_basic_workers=1,
+                               min_drivers=1, min_engineers=1, is_active=True)
+    request.cargo_loads.add(warehouse_uuid="warmup-0", date="2025-06-02", total_weight=1500)
+    
+    servicer = ShiftOptimizerServicer()
+    package_logger = logging.getLogger('shift_optimizer')
+    level = package_logger.level
+    package_logger.setLevel(logging.WARNING)
+    try:
+        for name in sorted(set(SOLVERS) | {strategy}):
+            response = servicer._optimize(request, None, name, None, None)
+            if not response.success:
+                logger.warning(f"Warm-up with strategy {name} failed: {response.message}")
+    finally:
+        package_logger.setLevel(level)
+def _run_worker(worker_id: int, aio: bool, options: dict):
+    logging.basicConfig(level=logging.INFO,
+                        format=f'%(asctime)s - worker {worker_id} - %(name)s - %(levelname)s - %(message)s')
+    # The supervisor stops workers with SIGTERM; serving loops already shut down cleanly on KeyboardInterrupt
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    started = time.perf_counter()
+    warm_up(options.get('strategy', 'greedy'))
+    logger.info(f"Worker {worker_id} warmed up in {time.perf_counter() - started:.2f}s, accepting connections")
+    
+    # Every worker binds the same port; the kernel spreads new connections between them
+    if aio:
+        import asyncio
+        from .aio_server import serve_async
+        asyncio.run(serve_async(reuse_port=True, **options))
+    else:
+        from .server import serve
+        serve(reuse_port=True, **options)
+class Supervisor:
+    def __init__(self, worker_count: int, target: Callable = _run_worker, args: tuple = ()):
+        self.worker_count = worker_count
+        self.target = target
+        self.args = args
+        self.restarts = 0
+        # grpc must not be initialised in the parent, so workers are spawned rather than forked
+        self._context = multiprocessing.get_context('spawn')
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._started_at: Dict[int, float] = {}
+        self._failures: Dict[int, int] = {}
+        self._not_before: Dict[int, float] = {}
+    
+    def start(self):
+        for worker_id in range(self.worker_count):
+            self._start_worker(worker_id)
+    
+    def _start_worker(self, worker_id: int):
+        process = self._context.Process(target=self.target, args=(worker_id,) + self.args,
+                                        name=f"shift-optimizer-worker-{worker_id}", daemon=False)
+        process.start()
+        self._processes[worker_id] = process
+        self._started_at[worker_id] = time.monotonic()
+        logger.info(f"Started worker {worker_id} (pid {process.pid})")
+    
+    def check(self):
+        now = time.monotonic()
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                if now - self._started_at[worker_id] >= MIN_HEALTHY_UPTIME:
+                    self._failures[worker_id] = 0
+                continue
+            
+            if worker_id not in self._not_before:
+                failures = self._failures.get(worker_id, 0)
+                if now - self._started_at[worker_id] < MIN_HEALTHY_UPTIME:
+                    failures += 1
+                self._failures[worker_id] = failures
+                delay = min(MAX_RESTART_DELAY, 2 ** failures - 1) if failures else 0.0
+                self._not_before[worker_id] = now + delay
+                logger.warning(f"Worker {worker_id} (pid {process.pid}) exited with code {process.exitcode}, "
+                               f"restarting in {delay:.0f}s")
+            
+            if now >= self._not_before[worker_id]:
+                del self._not_before[worker_id]
+                self.restarts += 1
+                self._start_worker(worker_id)
+    
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker pid {process.pid} did not stop in time, killing it")
+                process.kill()
+                process.join()
+    
+    def pids(self) -> Dict[int, Optional[int]]:
+        return {worker_id: process.pid for worker_id, process in self._processes.items()}
+def serve_workers(worker_count: int, aio: bool = False, **options):
+    supervisor = Supervisor(worker_count, args=(aio, options))
+    stopping = []
+    
+    def request_stop(signum, frame):
+        stopping.append(signum)
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    supervisor.start()
+    logger.info(f"Supervising {worker_count} optimizer workers on port {options.get('port', '50051')} "
+                f"(pid {os.getpid()})")
+    try:
+        while not stopping:
+            supervisor.check()
+            time.sleep(SUPERVISE_INTERVAL)
+    finally:
+        logger.info("Stopping optimizer workers")
+        supervisor.stop()
+        logger.info(f"All workers stopped ({supervisor.restarts} restarts)")
\ No newline at end of file
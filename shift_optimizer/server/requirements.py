@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+from .models import Warehouse, CargoLoad
+logger = logging.getLogger(__name__)
+QUALIFICATION_TYPES = ["BASIC_WORKER", "CARGO_DRIVER", "ENGINEER"]
+WEIGHT_PER_WORKER = np.array([1000, 5000, 10000], dtype=np.int64)
+def map_date_to_day(date_str: str) -> str:
+    date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+    return date_obj.strftime("%A").lower()
+class RequirementTable:
+    def __init__(self, days: List[str], warehouses: List[Warehouse], minimum: np.ndarray, required: np.ndarray):
+        self.days = days
+        self.day_ordinals = {day: i for i, day in enumerate(days)}
+        self.warehouse_uuids = [w.uuid for w in warehouses]
+        self.warehouse_names = [w.name for w in warehouses]
+        self.minimum = minimum
+        self.required = required
+        self.scheduled = np.zeros_like(required)
+    
+    def fully_staffed(self) -> np.ndarray:
+        return np.all(self.scheduled >= self.required, axis=0)
+def required_for_cell(minimum: np.ndarray, warehouse_idx: int, weights: List[int]) -> np.ndarray:
+    if not weights:
+        return minimum[:, warehouse_idx].copy()
+    return np.maximum(minimum[:, warehouse_idx], -(-max(weights) // WEIGHT_PER_WORKER))
+def build_requirement_table(warehouses: List[Warehouse], cargo_loads: List[CargoLoad],
+                            days: List[str]) -> RequirementTable:
+    unique_days = list(dict.fromkeys(days))
+    day_ordinals = {day: i for i, day in enumerate(unique_days)}
+    warehouse_ordinals = {w.uuid: i for i, w in enumerate(warehouses)}
+    
+    minimum = np.array(
+        [[w.min_basic_workers for w in warehouses],
+         [w.min_drivers for w in warehouses],
+         [w.min_engineers for w in warehouses]],
+        dtype=np.int64
+    ).reshape(len(QUALIFICATION_TYPES), len(warehouses))
+    
+    max_weight = np.zeros((len(unique_days), len(warehouses)), dtype=np.int64)
+    has_cargo = np.zeros((len(unique_days), len(warehouses)), dtype=bool)
+    
+    parsed_dates: Dict[str, str] = {}
+    for cargo in cargo_loads:
+        warehouse_idx = warehouse_ordinals.get(cargo.warehouse_uuid)
+        if warehouse_idx is None:
+            continue
+        
+        day = parsed_dates.get(cargo.date)
+        if day is None:
+            day = parsed_dates[cargo.date] = map_date_to_day(cargo.date)
+        
+        day_idx = day_ordinals.get(day)
+        if day_idx is None:
+            continue
+        
+        if not has_cargo[day_idx, warehouse_idx] or cargo.total_weight > max_weight[day_idx, warehouse_idx]:
+            max_weight[day_idx, warehouse_idx] = cargo.total_weight
+            has_cargo[day_idx, warehouse_idx] = True
+    
+    # Ceiling division is monotonic, so the heaviest load in a cell decides its requirement
+    by_weight = -(-max_weight[np.newaxis, :, :] // WEIGHT_PER_WORKER[:, np.newaxis, np.newaxis])
+    required = np.where(
+        has_cargo[np.newaxis, :, :],
+        np.maximum(minimum[:, np.newaxis, :], by_weight),
+        minimum[:, np.newaxis, :]
+    )
+    
+    return RequirementTable(unique_days, warehouses, minimum, required)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import replace
+from typing import Iterator, List, Optional, Tuple, Union
+from .models import Warehouse, CargoLoad, Scenario, ShiftTable, StaffingTable
+from .index import WorkforceIndex
+from .optimizer import ShiftOptimizer, OptimizationCancelled, CANCEL_POLL_INTERVAL
+from .snapshots import apply_cargo_delta
+logger = logging.getLogger(__name__)
+ScenarioOutcome = Union[Tuple[ShiftTable, StaffingTable], Exception]
+def apply_scenario(warehouses: List[Warehouse], cargo_loads: List[CargoLoad], days: List[str],
+                   scenario: Scenario) -> Tuple[List[Warehouse], List[CargoLoad], List[str]]:
+    # Warehouses keep their order, so the shared index columns still line up
+    closed = set(scenario.closed_warehouse_uuids)
+    if closed:
+        warehouses = [
+            replace(warehouse, is_active=False, min_workers=0, min_basic_workers=0, min_drivers=0, min_engineers=0)
+            if warehouse.uuid in closed else warehouse
+            for warehouse in warehouses
+        ]
+    
+    if scenario.upserted_cargo_loads or scenario.removed_cargo_loads:
+        cargo_loads = apply_cargo_delta(cargo_loads, list(scenario.upserted_cargo_loads),
+                                        list(scenario.removed_cargo_loads))
+    if closed:
+        cargo_loads = [load for load in cargo_loads if load.warehouse_uuid not in closed]
+    
+    return warehouses, cargo_loads, list(scenario.days) or days
+def solve_scenario(index: WorkforceIndex, warehouses: List[Warehouse], cargo_loads: List[CargoLoad],
+                   days: List[str], scenario: Scenario, strategy: str,
+                   cancel_event: Optional[threading.Event] = None) -> Tuple[ShiftTable, StaffingTable]:
+    warehouses, cargo_loads, days = apply_scenario(warehouses, cargo_loads, days, scenario)
+    optimizer = ShiftOptimizer(None, warehouses, cargo_loads, days, strategy=strategy, cancel_event=cancel_event,
+                               index=index)
+    shifts, staffing = optimizer.optimize()
+    # Tables pickle with every repeated UUID, day and time string stored once
+    return ShiftTable.from_shifts(shifts), StaffingTable.from_rows(staffing)
+def solve_scenarios(index: WorkforceIndex, warehouses: List[Warehouse], cargo_loads: List[CargoLoad],
+                    days: List[str], scenarios: List[Scenario], strategy: str, processes: int = 1,
+                    cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[Scenario, ScenarioOutcome]]:
+    # Every scenario shares the index; a failing scenario yields its exception and the others still run.
+    # Results come in the order of the scenarios.
+    processes = min(processes, len(scenarios))
+    if processes <= 1:
+        for scenario in scenarios:
+            if cancel_event is not None and cancel_event.is_set():
+                raise OptimizationCancelled("Optimization cancelled")
+            try:
+                yield scenario, solve_scenario(index, warehouses, cargo_loads, days, scenario, strategy,
+                                               cancel_event)
+            except OptimizationCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Scenario {scenario.name!r} failed: {str(e)}", exc_info=True)
+                yield scenario, e
+        return
+    
+    logger.info(f"Solving {len(scenarios)} scenarios in a pool of {processes} processes")
+    context = multiprocessing.get_context(
+        'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    )
+    # The index and the base data are shipped once per process, tasks only carry the scenario
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_scenario_worker,
+                             initargs=(index, warehouses, cargo_loads, days, strategy)) as executor:
+        futures = [executor.submit(_solve_scenario_in_worker, scenario) for scenario in scenarios]
+        try:
+            for scenario, future in zip(scenarios, futures):
+                while not future.done():
+                    wait([future], timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise OptimizationCancelled("Optimization cancelled")
+                
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"Scenario {scenario.name!r} failed: {str(error)}")
+                    yield scenario, error
+                else:
+                    yield scenario, future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+_scenario_base: Optional[tuple] = None
+def _init_scenario_worker(index, warehouses, cargo_loads, days, strategy):
+    global _scenario_base
+    _scenario_base = (index, warehouses, cargo_loads, days, strategy)
+def _solve_scenario_in_worker(scenario: Scenario) -> Tuple[ShiftTable, StaffingTable]:
+    index, warehouses, cargo_loads, days, strategy = _scenario_base
+    return solve_scenario(index, warehouses, cargo_loads, days, scenario, strategy)
\ No newline at end of file
@@ -1,8 +1,10 @@
+import hashlib
 import logging
 import grpc
 import time
+import threading
 from concurrent import futures
-from typing import List
+from typing import List, Optional
 import sys
 import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,80 +12,586 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
 import shift_optimizer.shift_optimizer_pb2_grpc as shift_optimizer_pb2_grpc
-from .optimizer import ShiftOptimizer
-from .models import Worker, Warehouse, CargoLoad, Qualification, WarehousePreference
+from .optimizer import ShiftOptimizer, OptimizationCancelled
+from .solvers import DEFAULT_STRATEGY
+from .cache import ResultCache, request_fingerprint, compact_request_fingerprint
+from .single_flight import SingleFlight
+from .snapshots import Snapshot, SnapshotStore
+from .incremental import IncrementalSchedule
+from .index import WorkforceIndexBuilder
+from . import compact
+from .columnar import index_from_messages, index_from_compact
+from .scenarios import solve_scenarios
+from .admission import AdmissionController, AdmissionInterceptor, SPARE_HANDLER_THREADS, BATCH
+from .admission import DEFAULT_MAX_CONCURRENT_SOLVES, DEFAULT_MAX_QUEUED_SOLVES
+from .jobs import JobQueue, JobQueueFull, JOB_FAILED, JOB_CANCELLED, DEFAULT_JOB_WORKERS, DEFAULT_MAX_QUEUED_JOBS
+from .models import Worker, Warehouse, CargoLoad, Qualification, WarehousePreference, ShiftTable, StaffingTable
+from .models import Scenario
 logger = logging.getLogger(__name__)
+# Share of the remaining call time kept back for building and sending the response
+RESPONSE_RESERVE_FRACTION = 0.1
+MIN_RESPONSE_RESERVE = 0.25
+# Upper bound on shifts per streamed message, so large days do not produce one huge message
+DEFAULT_STREAM_CHUNK_SIZE = 5000
+DEFAULT_MAX_MESSAGE_MB = 64
+# Shared client channels ping idle connections every minute; the server accepts that instead of answering GOAWAY
+KEEPALIVE_OPTIONS = [
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.min_recv_ping_interval_without_data_ms', 30000),
+]
 class ShiftOptimizerServicer(shift_optimizer_pb2_grpc.ShiftOptimizerServiceServicer):
+    def __init__(self, processes: int = 1, default_strategy: str = DEFAULT_STRATEGY,
+                 cache: Optional[ResultCache] = None, snapshots: Optional[SnapshotStore] = None,
+                 stream_chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE, job_workers: int = DEFAULT_JOB_WORKERS,
+                 max_queued_jobs: int = DEFAULT_MAX_QUEUED_JOBS, scenario_processes: Optional[int] = None,
+                 admission: Optional[AdmissionController] = None):
+        self.processes = processes
+        # Scenario batches are spread over processes even when single requests are solved serially
+        self.scenario_processes = scenario_processes or processes
+        self.stream_chunk_size = stream_chunk_size
+        self.default_strategy = default_strategy
+        self.cache = cache
+        self.in_flight = SingleFlight()
+        self.snapshots = snapshots if snapshots is not None else SnapshotStore()
+        # Job solves share the server's solver slots with the admitted RPCs
+        self.admission = admission
+        self.jobs = JobQueue(self._run_job, workers=job_workers, max_queued=max_queued_jobs)
+    
     def OptimizeShifts(self, request, context):
         logger.info("Received optimization request")
+        deadline = self._search_deadline(request, context)
         
         try:
-            workers = self._convert_workers(request.workers)
-            warehouses = self._convert_warehouses(request.warehouses)
-            cargo_loads = self._convert_cargo_loads(request.cargo_loads)
-            days = list(request.days)
+            strategy = request.strategy or self.default_strategy
+            key = request_fingerprint(request, strategy)
             
-            optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, days)
+            if self.cache is not None and key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    stats = self.cache.stats()
+                    logger.info(f"Serving cached result {key[:12]} "
+                                f"(hits: {stats['hits']}, misses: {stats['misses']})")
+                    return shift_optimizer_pb2.OptimizeShiftsResponse.FromString(cached)
+            
+            # Identical requests arriving while one is being solved wait for it instead of solving again
+            response = self.in_flight.do(
+                key, lambda cancel_event: self._optimize(request, key, strategy, deadline, cancel_event), context
+            )
+            if response is None:
+                return self._error_response("Optimization cancelled")
+            return response
+        
+        except Exception as e:
+            logger.error(f"Error during optimization: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+    
+    def OptimizeShiftsUpload(self, request_iterator, context):
+        logger.info("Receiving chunked optimization request")
+        cancel_event = threading.Event()
+        context.add_callback(cancel_event.set)
+        
+        try:
+            header, workers, warehouses, cargo_loads, index = self._receive_upload(request_iterator)
+            optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, list(header.days),
+                                       processes=self.processes, strategy=header.strategy or self.default_strategy,
+                                       deadline=self._search_deadline(header, context),
+                                       cancel_event=cancel_event, index=index)
             shifts, warehouse_staffing = optimizer.optimize()
             
-            response = shift_optimizer_pb2.OptimizeShiftsResponse()
-            response.success = True
+            logger.info(f"Optimization completed. Returning {len(shifts)} shifts")
+            return self._optimization_response(optimizer, shifts, warehouse_staffing)
+        
+        except OptimizationCancelled:
+            logger.info("Chunked optimization cancelled, the caller has gone")
+            return self._error_response("Optimization cancelled")
+        except Exception as e:
+            logger.error(f"Error during chunked optimization: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+    
+    def OptimizeShiftsStream(self, request, context):
+        logger.info("Received streaming optimization request")
+        cancel_event = threading.Event()
+        context.add_callback(cancel_event.set)
+        
+        try:
+            snapshot = None
+            if request.snapshot_id:
+                snapshot = self.snapshots.get(request.snapshot_id)
+                if snapshot is None:
+                    yield shift_optimizer_pb2.OptimizeShiftsChunk(
+                        success=False, snapshot_missing=True,
+                        message=f"Error: Snapshot {request.snapshot_id} not found, upload it again"
+                    )
+                    return
+            if request.anytime or request.incremental:
+                logger.warning("Anytime search and incremental mode are not applied to streamed optimization")
             
-            for shift in shifts:
-                grpc_shift = response.shifts.add()
-                grpc_shift.worker_uuid = shift.worker_uuid
-                grpc_shift.warehouse_uuid = shift.warehouse_uuid
-                grpc_shift.day_of_week = shift.day_of_week
-                grpc_shift.start_time = shift.start_time
-                grpc_shift.end_time = shift.end_time
-            
-            for staffing in warehouse_staffing:
-                grpc_staffing = response.warehouse_staffing.add()
-                grpc_staffing.warehouse_uuid = staffing.warehouse_uuid
-                grpc_staffing.warehouse_name = staffing.warehouse_name
-                grpc_staffing.day = staffing.day
-                grpc_staffing.required_basic_workers = staffing.required_basic_workers
-                grpc_staffing.scheduled_basic_workers = staffing.scheduled_basic_workers
-                grpc_staffing.required_drivers = staffing.required_drivers
-                grpc_staffing.scheduled_drivers = staffing.scheduled_drivers
-                grpc_staffing.required_engineers = staffing.required_engineers
-                grpc_staffing.scheduled_engineers = staffing.scheduled_engineers
-                grpc_staffing.is_fully_staffed = staffing.is_fully_staffed
+            workers, warehouses, cargo_loads, index = self._load_problem(request, snapshot)
+            optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, list(request.days),
+                                       processes=self.processes, strategy=request.strategy or self.default_strategy,
+                                       cancel_event=cancel_event, index=index)
+            yield from self._stream_days(optimizer)
+        
+        except OptimizationCancelled:
+            logger.info("Streaming optimization cancelled, the caller has gone")
+        except Exception as e:
+            logger.error(f"Error during streaming optimization: {str(e)}", exc_info=True)
+            yield shift_optimizer_pb2.OptimizeShiftsChunk(success=False, message=f"Error: {str(e)}")
+    
+    def OptimizeShiftsUploadStream(self, request_iterator, context):
+        # Large workforces arrive in chunks as in OptimizeShiftsUpload and the days stream back as they are solved
+        logger.info("Receiving chunked streaming optimization request")
+        cancel_event = threading.Event()
+        context.add_callback(cancel_event.set)
+        
+        try:
+            header, workers, warehouses, cargo_loads, index = self._receive_upload(request_iterator)
+            if header.anytime:
+                logger.warning("Anytime search is not applied to streamed optimization")
+            optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, list(header.days),
+                                       processes=self.processes, strategy=header.strategy or self.default_strategy,
+                                       cancel_event=cancel_event, index=index)
+            yield from self._stream_days(optimizer)
+        
+        except OptimizationCancelled:
+            logger.info("Chunked streaming optimization cancelled, the caller has gone")
+        except Exception as e:
+            logger.error(f"Error during chunked streaming optimization: {str(e)}", exc_info=True)
+            yield shift_optimizer_pb2.OptimizeShiftsChunk(success=False, message=f"Error: {str(e)}")
+    
+    def OptimizeShiftsV2(self, request, context):
+        logger.info(f"Received compact optimization request with {len(request.workers.uuids)} workers")
+        deadline = self._search_deadline(request, context)
+        
+        try:
+            strategy = request.strategy or self.default_strategy
+            key = compact_request_fingerprint(request, strategy)
             
-            logger.info(f"Optimization completed. Returning {len(shifts)} shifts")
+            if self.cache is not None and key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    logger.info(f"Serving cached result {key[:12]}")
+                    return shift_optimizer_pb2.OptimizeShiftsResponseV2.FromString(cached)
+            
+            response = self.in_flight.do(
+                key, lambda cancel_event: self._optimize_compact(request, key, strategy, deadline, cancel_event),
+                context
+            )
+            if response is None:
+                return self._compact_error_response("Optimization cancelled")
             return response
+        
+        except Exception as e:
+            logger.error(f"Error during compact optimization: {str(e)}", exc_info=True)
+            return self._compact_error_response(str(e))
+    
+    def OptimizeScenarios(self, request, context):
+        logger.info(f"Received {len(request.scenarios)} scenarios")
+        cancel_event = threading.Event()
+        context.add_callback(cancel_event.set)
+        
+        try:
+            if request.snapshot_id:
+                snapshot = self.snapshots.get(request.snapshot_id)
+                if snapshot is None:
+                    return shift_optimizer_pb2.OptimizeScenariosResponse(
+                        success=False, snapshot_missing=True,
+                        message=f"Error: Snapshot {request.snapshot_id} not found, upload it again"
+                    )
+                warehouses, cargo_loads, index = snapshot.warehouses, snapshot.cargo_loads, snapshot.index
+            else:
+                warehouses = self._convert_warehouses(request.warehouses)
+                cargo_loads = self._convert_cargo_loads(request.cargo_loads)
+                index = index_from_messages(request.workers, warehouses)
             
+            # The base is converted and indexed once; scenarios only change cargo, warehouses and days
+            scenarios = [self._convert_scenario(grpc_scenario) for grpc_scenario in request.scenarios]
+            strategy = request.strategy or self.default_strategy
+            response = shift_optimizer_pb2.OptimizeScenariosResponse(success=True)
+            for scenario, outcome in solve_scenarios(index, warehouses, cargo_loads, list(request.days), scenarios,
+                                                     strategy, processes=self.scenario_processes,
+                                                     cancel_event=cancel_event):
+                result = response.scenarios.add(name=scenario.name)
+                if isinstance(outcome, Exception):
+                    result.success = False
+                    result.message = f"Error: {str(outcome)}"
+                    continue
+                
+                shift_table, staffing_table = outcome
+                result.success = True
+                self._fill_shifts(result.shifts, shift_table)
+                self._fill_staffing(result.warehouse_staffing, staffing_table)
+                result.shift_count = len(shift_table)
+                result.understaffed_cells = staffing_table.is_fully_staffed.count(False)
+                result.missing_workers = sum(
+                    max(0, required - scheduled)
+                    for required_column, scheduled_column in (
+                        (staffing_table.required_basic_workers, staffing_table.scheduled_basic_workers),
+                        (staffing_table.required_drivers, staffing_table.scheduled_drivers),
+                        (staffing_table.required_engineers, staffing_table.scheduled_engineers))
+                    for required, scheduled in zip(required_column, scheduled_column)
+                )
+            
+            logger.info(f"Solved {len(scenarios)} scenarios")
+            return response
+        
+        except OptimizationCancelled:
+            logger.info("Scenario optimization cancelled, the caller has gone")
+            return shift_optimizer_pb2.OptimizeScenariosResponse(success=False, message="Error: Optimization cancelled")
         except Exception as e:
-            logger.error(f"Error during optimization: {str(e)}", exc_info=True)
-            response = shift_optimizer_pb2.OptimizeShiftsResponse()
+            logger.error(f"Error during scenario optimization: {str(e)}", exc_info=True)
+            return shift_optimizer_pb2.OptimizeScenariosResponse(success=False, message=f"Error: {str(e)}")
+    
+    def SubmitOptimization(self, request, context):
+        logger.info(f"Received optimization job with {len(request.workers)} workers")
+        try:
+            job = self.jobs.submit(request)
+            return shift_optimizer_pb2.SubmitOptimizationResponse(success=True, job_id=job.job_id)
+        
+        except JobQueueFull as e:
+            logger.warning(str(e))
+            return shift_optimizer_pb2.SubmitOptimizationResponse(success=False, queue_full=True,
+                                                                  message=f"Error: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error queueing optimization job: {str(e)}", exc_info=True)
+            return shift_optimizer_pb2.SubmitOptimizationResponse(success=False, message=f"Error: {str(e)}")
+    
+    def GetOptimizationStatus(self, request, context):
+        return self._job_status(request.job_id, self.jobs.get(request.job_id))
+    
+    def GetOptimizationResult(self, request, context):
+        job = self.jobs.get(request.job_id)
+        if job is None:
+            return self._error_response(f"Job {request.job_id} not found")
+        if job.result is not None:
+            return job.result
+        if job.state == JOB_FAILED:
+            return self._error_response(job.error)
+        if job.state == JOB_CANCELLED:
+            return self._error_response("Optimization cancelled")
+        return self._error_response(f"Job {request.job_id} has not finished yet")
+    
+    def CancelOptimization(self, request, context):
+        return self._job_status(request.job_id, self.jobs.cancel(request.job_id))
+    
+    def UploadSnapshot(self, request, context):
+        logger.info(f"Received snapshot upload with {len(request.workers)} workers, "
+                    f"{len(request.warehouses)} warehouses")
+        
+        response = shift_optimizer_pb2.UploadSnapshotResponse()
+        try:
+            # Snapshot IDs are content hashes, so re-uploading unchanged data is a cheap no-op
+            snapshot_id = hashlib.sha256(request.SerializeToString(deterministic=True)).hexdigest()
+            if self.snapshots.get(snapshot_id) is None:
+                self.snapshots.put(Snapshot(
+                    snapshot_id,
+                    self._convert_workers(request.workers),
+                    self._convert_warehouses(request.warehouses),
+                    self._convert_cargo_loads(request.cargo_loads),
+                    request.ByteSize()
+                ))
+                logger.info(f"Stored snapshot {snapshot_id[:12]} ({self.snapshots.stats()})")
+            
+            response.success = True
+            response.snapshot_id = snapshot_id
+            return response
+        
+        except Exception as e:
+            logger.error(f"Error storing snapshot: {str(e)}", exc_info=True)
             response.success = False
             response.message = f"Error: {str(e)}"
             return response
     
+    def _optimize(self, request, key: Optional[str], strategy: str, deadline: Optional[float],
+                  cancel_event: threading.Event, progress=None):
+        try:
+            snapshot = None
+            if request.snapshot_id:
+                snapshot = self.snapshots.get(request.snapshot_id)
+                if snapshot is None:
+                    response = self._error_response(f"Snapshot {request.snapshot_id} not found, upload it again")
+                    response.snapshot_missing = True
+                    return response
+                
+                if request.incremental:
+                    return self._optimize_incremental(request, key, snapshot, strategy)
+            
+            workers, warehouses, cargo_loads, index = self._load_problem(request, snapshot)
+            days = list(request.days)
+            
+            optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, days,
+                                       processes=self.processes, strategy=strategy, deadline=deadline,
+                                       cancel_event=cancel_event, index=index, progress=progress)
+            shifts, warehouse_staffing = optimizer.optimize()
+            
+            response = self._optimization_response(optimizer, shifts, warehouse_staffing)
+            if self.cache is not None and key is not None:
+                self.cache.put(key, response.SerializeToString())
+            
+            logger.info(f"Optimization completed. Returning {len(shifts)} shifts")
+            return response
+        
+        except OptimizationCancelled:
+            logger.info("Optimization cancelled, every caller has gone")
+            return self._error_response("Optimization cancelled")
+        except Exception as e:
+            logger.error(f"Error during optimization: {str(e)}", exc_info=True)
+            return self._error_response(str(e))
+    
+    def _optimize_compact(self, request, key: Optional[str], strategy: str, deadline: Optional[float],
+                          cancel_event: threading.Event):
+        try:
+            warehouses, cargo_loads, days = compact.decode_header(request)
+            index = index_from_compact(request.workers, request.warehouses, warehouses)
+            optimizer = ShiftOptimizer(None, warehouses, cargo_loads, days,
+                                       processes=self.processes, strategy=strategy, deadline=deadline,
+                                       cancel_event=cancel_event, index=index)
+            shifts, warehouse_staffing = optimizer.optimize()
+            
+            response = shift_optimizer_pb2.OptimizeShiftsResponseV2(
+                success=True,
+                search_iterations=optimizer.search_stats.iterations,
+                search_improvements=optimizer.search_stats.improvements
+            )
+            compact.fill_response(response, shifts, warehouse_staffing,
+                                  {uuid: ordinal for ordinal, uuid in enumerate(request.workers.uuids)},
+                                  {warehouse.uuid: ordinal for ordinal, warehouse in enumerate(warehouses)})
+            if self.cache is not None and key is not None:
+                self.cache.put(key, response.SerializeToString())
+            
+            logger.info(f"Compact optimization completed. Returning {len(shifts)} shifts")
+            return response
+        
+        except OptimizationCancelled:
+            logger.info("Optimization cancelled, every caller has gone")
+            return self._compact_error_response("Optimization cancelled")
+        except Exception as e:
+            logger.error(f"Error during compact optimization: {str(e)}", exc_info=True)
+            return self._compact_error_response(str(e))
+    
+    def _run_job(self, job):
+        request = job.request
+        strategy = request.strategy or self.default_strategy
+        key = request_fingerprint(request, strategy)
+        if self.cache is not None and key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Serving cached result {key[:12]} for job {job.job_id[:12]}")
+                return shift_optimizer_pb2.OptimizeShiftsResponse.FromString(cached)
+        
+        if self.admission is None:
+            return self._solve_job(job, key, strategy)
+        # Jobs solve in the batch lane, so --max-concurrent-solves bounds RPC and job solves together
+        if not self.admission.acquire_job(BATCH, job.cancel_event):
+            return self._error_response("Optimization cancelled")
+        try:
+            return self._solve_job(job, key, strategy)
+        finally:
+            self.admission.release(BATCH)
+    
+    def _solve_job(self, job, key: Optional[str], strategy: str):
+        # A job has no call deadline, so anytime search is bounded by time_budget_seconds alone
+        deadline = self._search_deadline(job.request, None)
+        return self._optimize(job.request, key, strategy, deadline, job.cancel_event, progress=job.progress)
+    
+    def _job_status(self, job_id: str, job):
+        if job is None:
+            return shift_optimizer_pb2.OptimizationJobStatus(success=False, job_id=job_id, job_missing=True,
+                                                             message=f"Error: Job {job_id} not found")
+        return shift_optimizer_pb2.OptimizationJobStatus(
+            success=True,
+            job_id=job.job_id,
+            state=shift_optimizer_pb2.JobState.Value(job.state),
+            days_done=job.days_done,
+            days_total=job.days_total,
+            elapsed_seconds=job.elapsed(),
+            message=job.error or ""
+        )
+    
+    def _receive_upload(self, request_iterator):
+        header = shift_optimizer_pb2.OptimizeShiftsRequest()
+        workers, warehouses, cargo_loads = [], [], []
+        builder = None
+        chunk_count = 0
+        
+        # Each chunk is converted and indexed on arrival, the full request is never assembled
+        for chunk in request_iterator:
+            chunk_count += 1
+            header.days.extend(chunk.days)
+            header.strategy = chunk.strategy or header.strategy
+            header.anytime = header.anytime or chunk.anytime
+            header.time_budget_seconds = chunk.time_budget_seconds or header.time_budget_seconds
+            
+            if chunk.warehouses:
+                if workers:
+                    logger.warning("Warehouses arrived after workers, indexing after the upload instead")
+                    builder = None
+                warehouses.extend(self._convert_warehouses(chunk.warehouses))
+            cargo_loads.extend(self._convert_cargo_loads(chunk.cargo_loads))
+            
+            if chunk.workers:
+                chunk_workers = self._convert_workers(chunk.workers)
+                if not workers:
+                    builder = WorkforceIndexBuilder(warehouses)
+                if builder is not None:
+                    builder.add_workers(chunk_workers)
+                workers.extend(chunk_workers)
+        
+        logger.info(f"Received {len(workers)} workers, {len(warehouses)} warehouses in {chunk_count} chunks")
+        index = builder.build(workers) if builder is not None else None
+        return header, workers, warehouses, cargo_loads, index
+    
+    def _stream_days(self, optimizer: ShiftOptimizer):
+        for day, shifts, staffing in optimizer.optimize_by_day():
+            table = ShiftTable.from_shifts(shifts)
+            for start in range(0, max(len(table), 1), self.stream_chunk_size):
+                chunk = shift_optimizer_pb2.OptimizeShiftsChunk(day=day, success=True)
+                self._fill_shifts(chunk.shifts, table.slice(start, start + self.stream_chunk_size))
+                if start == 0:
+                    self._fill_staffing(chunk.warehouse_staffing, staffing)
+                yield chunk
+            logger.info(f"Streamed {len(shifts)} shifts for {day}")
+    
+    def _load_problem(self, request, snapshot: Optional[Snapshot]):
+        if snapshot is not None:
+            return snapshot.apply(
+                self._convert_workers(request.delta.upserted_workers),
+                list(request.delta.removed_worker_uuids),
+                self._convert_cargo_loads(request.delta.upserted_cargo_loads),
+                self._convert_cargo_loads(request.delta.removed_cargo_loads)
+            )
+        
+        # Workers go straight from the messages into the index columns, no Worker objects are built
+        warehouses = self._convert_warehouses(request.warehouses)
+        return (None, warehouses, self._convert_cargo_loads(request.cargo_loads),
+                index_from_messages(request.workers, warehouses))
+    
+    def _optimize_incremental(self, request, key: Optional[str], snapshot: Snapshot, strategy: str):
+        # A schedule is handed from a snapshot to the snapshot derived from it, so a chain of
+        # small deltas is patched in place and only the first call pays for a full solve
+        days = list(request.days)
+        schedule_key = (tuple(days), strategy)
+        schedule = snapshot.schedules.pop(schedule_key, None)
+        if schedule is None:
+            logger.info(f"No schedule kept for snapshot {snapshot.snapshot_id[:12]}, solving it in full first")
+            optimizer = ShiftOptimizer(list(snapshot.workers), snapshot.warehouses, snapshot.cargo_loads, days,
+                                       processes=self.processes, strategy=strategy)
+            optimizer.optimize()
+            schedule = IncrementalSchedule.from_optimizer(optimizer)
+        
+        upserted_workers = self._convert_workers(request.delta.upserted_workers)
+        removed_worker_uuids = list(request.delta.removed_worker_uuids)
+        upserted_cargo_loads = self._convert_cargo_loads(request.delta.upserted_cargo_loads)
+        removed_cargo_loads = self._convert_cargo_loads(request.delta.removed_cargo_loads)
+        result = schedule.apply(upserted_workers, removed_worker_uuids, upserted_cargo_loads, removed_cargo_loads)
+        
+        delta_bytes = request.delta.SerializeToString(deterministic=True)
+        derived_id = hashlib.sha256(snapshot.snapshot_id.encode() + delta_bytes).hexdigest()
+        derived = snapshot.derive(derived_id, upserted_workers, removed_worker_uuids,
+                                  upserted_cargo_loads, removed_cargo_loads, len(delta_bytes))
+        derived.schedules[schedule_key] = schedule
+        self.snapshots.put(derived)
+        
+        response = shift_optimizer_pb2.OptimizeShiftsResponse()
+        response.success = True
+        response.snapshot_id = derived_id
+        self._fill_shifts(response.shifts, result.added_shifts)
+        self._fill_shifts(response.removed_shifts, result.removed_shifts)
+        self._fill_staffing(response.warehouse_staffing, result.warehouse_staffing)
+        
+        if self.cache is not None and key is not None:
+            self.cache.put(key, response.SerializeToString())
+        
+        logger.info(f"Incremental optimization completed for snapshot {derived_id[:12]}: "
+                    f"{len(result.added_shifts)} shifts added, {len(result.removed_shifts)} removed")
+        return response
+    
+    def _optimization_response(self, optimizer: ShiftOptimizer, shifts, warehouse_staffing):
+        response = shift_optimizer_pb2.OptimizeShiftsResponse()
+        response.success = True
+        response.search_iterations = optimizer.search_stats.iterations
+        response.search_improvements = optimizer.search_stats.improvements
+        self._fill_shifts(response.shifts, shifts)
+        self._fill_staffing(response.warehouse_staffing, warehouse_staffing)
+        return response
+    
+    def _fill_shifts(self, target, shifts):
+        # Serialised column by column from a ShiftTable instead of attribute by attribute per shift
+        table = shifts if isinstance(shifts, ShiftTable) else ShiftTable.from_shifts(shifts)
+        add = target.add
+        for worker_uuid, warehouse_uuid, day_of_week, start_time, end_time in table.rows():
+            add(worker_uuid=worker_uuid, warehouse_uuid=warehouse_uuid, day_of_week=day_of_week,
+                start_time=start_time, end_time=end_time)
+    
+    def _fill_staffing(self, target, warehouse_staffing):
+        table = warehouse_staffing if isinstance(warehouse_staffing, StaffingTable) \
+            else StaffingTable.from_rows(warehouse_staffing)
+        add = target.add
+        for (warehouse_uuid, warehouse_name, day, required_basic, scheduled_basic, required_drivers,
+             scheduled_drivers, required_engineers, scheduled_engineers, is_fully_staffed) in table.rows():
+            add(warehouse_uuid=warehouse_uuid, warehouse_name=warehouse_name, day=day,
+                required_basic_workers=required_basic, scheduled_basic_workers=scheduled_basic,
+                required_drivers=required_drivers, scheduled_drivers=scheduled_drivers,
+                required_engineers=required_engineers, scheduled_engineers=scheduled_engineers,
+                is_fully_staffed=is_fully_staffed)
+    
+    def _error_response(self, message: str):
+        response = shift_optimizer_pb2.OptimizeShiftsResponse()
+        response.success = False
+        response.message = f"Error: {message}"
+        return response
+    
+    def _compact_error_response(self, message: str):
+        return shift_optimizer_pb2.OptimizeShiftsResponseV2(success=False, message=f"Error: {message}")
+    
+    def _search_deadline(self, request, context) -> Optional[float]:
+        if not request.anytime:
+            return None
+        
+        budgets = []
+        if request.time_budget_seconds > 0:
+            budgets.append(request.time_budget_seconds)
+        
+        remaining = context.time_remaining() if context is not None else None
+        if remaining is not None:
+            budgets.append(remaining - max(MIN_RESPONSE_RESERVE, remaining * RESPONSE_RESERVE_FRACTION))
+        
+        if not budgets:
+            logger.warning("Anytime optimization requested without a deadline or time budget, skipping local search")
+            return None
+        
+        return time.monotonic() + max(0.0, min(budgets))
+    
     def _convert_workers(self, grpc_workers) -> List[Worker]:
         workers = []
+        # Qualifications are immutable and repeat across the workforce, so equal ones share an instance
+        shared_qualifications = {}
         
         for grpc_worker in grpc_workers:
             qualifications = []
             for grpc_qual in grpc_worker.qualifications:
-                qual_type = shift_optimizer_pb2.QualificationType.Name(grpc_qual.type)
-                qualifications.append(Qualification(
-                    type=qual_type,
-                    level=grpc_qual.level
-                ))
+                key = (grpc_qual.type, grpc_qual.level)
+                qualification = shared_qualifications.get(key)
+                if qualification is None:
+                    qualification = shared_qualifications[key] = Qualification(
+                        type=shift_optimizer_pb2.QualificationType.Name(grpc_qual.type),
+                        level=grpc_qual.level
+                    )
+                qualifications.append(qualification)
             
-            preferences = []
-            for grpc_pref in grpc_worker.warehouse_preferences:
-                preferences.append(WarehousePreference(
+            preferences = tuple(
+                WarehousePreference(
                     warehouse_uuid=grpc_pref.warehouse_uuid,
                     priority=grpc_pref.priority,
                     distance=grpc_pref.distance
-                ))
+                )
+                for grpc_pref in grpc_worker.warehouse_preferences
+            )
             
             worker = Worker(
                 uuid=grpc_worker.uuid,
                 username=grpc_worker.username,
-                qualifications=qualifications,
+                qualifications=tuple(qualifications),
                 warehouse_preferences=preferences
             )
             workers.append(worker)
@@ -108,6 +616,15 @@ class ShiftOptimizerServicer(shift_optimizer_pb2_grpc.ShiftOptimizerServiceServi
         
         return warehouses
     
+    def _convert_scenario(self, grpc_scenario) -> Scenario:
+        return Scenario(
+            name=grpc_scenario.name,
+            upserted_cargo_loads=tuple(self._convert_cargo_loads(grpc_scenario.upserted_cargo_loads)),
+            removed_cargo_loads=tuple(self._convert_cargo_loads(grpc_scenario.removed_cargo_loads)),
+            closed_warehouse_uuids=tuple(grpc_scenario.closed_warehouse_uuids),
+            days=tuple(grpc_scenario.days)
+        )
+    
     def _convert_cargo_loads(self, grpc_cargo_loads) -> List[CargoLoad]:
         cargo_loads = []
         
@@ -120,10 +637,31 @@ class ShiftOptimizerServicer(shift_optimizer_pb2_grpc.ShiftOptimizerServiceServi
             cargo_loads.append(cargo)
         
         return cargo_loads
-def serve(port='50051'):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+def serve(port='50051', processes=1, strategy=DEFAULT_STRATEGY, cache_size=128, cache_ttl=600.0, cache_dir=None,
+          snapshot_limit=16, snapshot_memory_mb=1024, stream_chunk_size=DEFAULT_STREAM_CHUNK_SIZE,
+          max_message_mb=DEFAULT_MAX_MESSAGE_MB, reuse_port=False, job_workers=DEFAULT_JOB_WORKERS,
+          max_queued_jobs=DEFAULT_MAX_QUEUED_JOBS, max_concurrent_solves=DEFAULT_MAX_CONCURRENT_SOLVES,
+          max_queued_solves=DEFAULT_MAX_QUEUED_SOLVES):
+    cache = ResultCache(max_entries=cache_size, ttl=cache_ttl, directory=cache_dir) if cache_size > 0 else None
+    snapshots = SnapshotStore(max_snapshots=snapshot_limit, max_bytes=snapshot_memory_mb * 1024 * 1024)
+    
+    max_message_bytes = max_message_mb * 1024 * 1024
+    admission = AdmissionController(max_concurrent=max_concurrent_solves, max_queued=max_queued_solves)
+    # Every admitted or waiting solve holds a handler thread; past that gRPC itself answers RESOURCE_EXHAUSTED
+    # instead of parking calls in the executor's unbounded queue
+    handler_threads = max_concurrent_solves + max_queued_solves + SPARE_HANDLER_THREADS
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=handler_threads),
+                         interceptors=[AdmissionInterceptor(admission)],
+                         maximum_concurrent_rpcs=handler_threads, options=[
+        ('grpc.max_receive_message_length', max_message_bytes),
+        ('grpc.max_send_message_length', max_message_bytes),
+        ('grpc.so_reuseport', 1 if reuse_port else 0),
+    ] + KEEPALIVE_OPTIONS)
     shift_optimizer_pb2_grpc.add_ShiftOptimizerServiceServicer_to_server(
-        ShiftOptimizerServicer(), server
+        ShiftOptimizerServicer(processes=processes, default_strategy=strategy, cache=cache,
+                               snapshots=snapshots, stream_chunk_size=stream_chunk_size,
+                               job_workers=job_workers, max_queued_jobs=max_queued_jobs,
+                               admission=admission), server
     )
     
     server_address = f'[::]:{port}'
@@ -131,7 +669,9 @@ def serve(port='50051'):
     server.start()
     
     logger.info(f"Shift Optimizer gRPC server started and listening on {server_address}")
-    logger.info(f"Server is ready to receive requests")
+    logger.info(f"Server is ready to receive requests (solver processes per request: {processes}, "
+                f"default strategy: {strategy}, concurrent solves: {max_concurrent_solves}, "
+                f"queued solves: {max_queued_solves})")
     
     try:
         while True:
@@ -0,0 +1,76 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+logger = logging.getLogger(__name__)
+WAIT_POLL_INTERVAL = 0.1
+class _Flight:
+    __slots__ = ('key', 'done', 'cancelled', 'result', 'waiters')
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+        self.result = None
+        self.waiters = 0
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        
+        self.leaders = 0
+        self.followers = 0
+    
+    def do(self, key: Optional[str], compute: Callable[[threading.Event], object], context):
+        # The first caller for a key computes, later callers wait for its result. compute gets an
+        # event that is set once every caller's RPC has ended, so the work can be abandoned.
+        # Without a key the caller computes alone.
+        if key is None:
+            cancelled = threading.Event()
+            if not context.add_callback(cancelled.set):
+                cancelled.set()
+            return compute(cancelled)
+        
+        with self._lock:
+            flight = self._flights.get(key)
+            # A cancelled flight is only unwinding; joining it would cancel a live caller too
+            leader = flight is None or flight.cancelled.is_set()
+            if leader:
+                flight = _Flight(key)
+                self._flights[key] = flight
+                self.leaders += 1
+            else:
+                self.followers += 1
+            flight.waiters += 1
+        
+        if not context.add_callback(lambda: self._leave(flight)):
+            self._leave(flight)
+        
+        if not leader:
+            logger.info(f"Joining in-flight optimization {key[:12]} ({flight.waiters} waiters)")
+            return self._wait(flight, context)
+        
+        try:
+            flight.result = compute(flight.cancelled)
+        finally:
+            with self._lock:
+                # A cancelled flight has already been replaced or removed by _leave
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result
+    
+    def _wait(self, flight: _Flight, context) -> Optional[object]:
+        while not flight.done.wait(WAIT_POLL_INTERVAL):
+            if not context.is_active():
+                return None
+        return flight.result
+    
+    def _leave(self, flight: _Flight):
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.done.is_set():
+                logger.info("Every caller of an in-flight optimization has gone, cancelling it")
+                flight.cancelled.set()
+                # Removed at once, so a caller arriving while the solve unwinds starts a new flight
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
\ No newline at end of file
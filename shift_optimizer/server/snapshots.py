@@ -0,0 +1,119 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .models import Worker, Warehouse, CargoLoad
+from .index import WorkforceIndex
+from .incremental import IncrementalSchedule
+logger = logging.getLogger(__name__)
+DEFAULT_MAX_SNAPSHOTS = 16
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Rough ratio between the Python object graph of a snapshot and its wire size
+OBJECT_OVERHEAD_FACTOR = 10
+class Snapshot:
+    def __init__(self, snapshot_id: str, workers: List[Worker], warehouses: List[Warehouse],
+                 cargo_loads: List[CargoLoad], wire_size: int):
+        self.snapshot_id = snapshot_id
+        self.workers = workers
+        self.warehouses = warehouses
+        self.cargo_loads = cargo_loads
+        self.wire_size = wire_size
+        self._index: Optional[WorkforceIndex] = None
+        # Solved schedules kept for incremental re-optimization, keyed by (days, strategy)
+        self.schedules: Dict[Tuple[Tuple[str, ...], str], IncrementalSchedule] = {}
+        matrix_bytes = len(workers) * len(warehouses) * (np.dtype(np.int64).itemsize + np.dtype(np.float64).itemsize)
+        self.estimated_bytes = wire_size * OBJECT_OVERHEAD_FACTOR + matrix_bytes + len(workers)
+    
+    @property
+    def index(self) -> WorkforceIndex:
+        # Built on first use; requests that do not touch the workforce reuse it and its cached pools
+        if self._index is None:
+            self._index = WorkforceIndex(self.workers, self.warehouses)
+        return self._index
+    
+    def apply(self, upserted_workers: List[Worker], removed_worker_uuids: List[str],
+              upserted_cargo_loads: List[CargoLoad],
+              removed_cargo_loads: List[CargoLoad]) -> Tuple[List[Worker], List[Warehouse], List[CargoLoad],
+                                                             Optional[WorkforceIndex]]:
+        workers, index = self.workers, None
+        if upserted_workers or removed_worker_uuids:
+            workers = _apply_worker_delta(self.workers, upserted_workers, removed_worker_uuids)
+        else:
+            index = self.index
+        
+        cargo_loads = self.cargo_loads
+        if upserted_cargo_loads or removed_cargo_loads:
+            cargo_loads = apply_cargo_delta(self.cargo_loads, upserted_cargo_loads, removed_cargo_loads)
+        
+        return workers, self.warehouses, cargo_loads, index
+    
+    def derive(self, snapshot_id: str, upserted_workers: List[Worker], removed_worker_uuids: List[str],
+               upserted_cargo_loads: List[CargoLoad], removed_cargo_loads: List[CargoLoad],
+               delta_size: int) -> 'Snapshot':
+        workers, warehouses, cargo_loads, _ = self.apply(upserted_workers, removed_worker_uuids,
+                                                         upserted_cargo_loads, removed_cargo_loads)
+        return Snapshot(snapshot_id, workers, warehouses, cargo_loads, self.wire_size + delta_size)
+def _apply_worker_delta(workers: List[Worker], upserted: List[Worker], removed_uuids: List[str]) -> List[Worker]:
+    removed = set(removed_uuids)
+    replacements: Dict[str, Worker] = {worker.uuid: worker for worker in upserted}
+    
+    # Changed workers keep their position so tie-breaking stays the same as in the snapshot
+    result = []
+    for worker in workers:
+        if worker.uuid in removed:
+            continue
+        replacement = replacements.pop(worker.uuid, None)
+        result.append(replacement if replacement is not None else worker)
+    
+    result.extend(worker for worker in upserted if worker.uuid in replacements and worker.uuid not in removed)
+    return result
+def apply_cargo_delta(cargo_loads: List[CargoLoad], upserted: List[CargoLoad],
+                       removed: List[CargoLoad]) -> List[CargoLoad]:
+    replaced = {(load.warehouse_uuid, load.date) for load in upserted}
+    replaced.update((load.warehouse_uuid, load.date) for load in removed)
+    
+    result = [load for load in cargo_loads if (load.warehouse_uuid, load.date) not in replaced]
+    result.extend(upserted)
+    return result
+class SnapshotStore:
+    def __init__(self, max_snapshots: int = DEFAULT_MAX_SNAPSHOTS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_snapshots = max_snapshots
+        self.max_bytes = max_bytes
+        self._snapshots: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        
+        self.evictions = 0
+    
+    def get(self, snapshot_id: str) -> Optional[Snapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(snapshot_id)
+            return snapshot
+    
+    def put(self, snapshot: Snapshot):
+        with self._lock:
+            previous = self._snapshots.pop(snapshot.snapshot_id, None)
+            if previous is not None:
+                self._size -= previous.estimated_bytes
+            
+            self._snapshots[snapshot.snapshot_id] = snapshot
+            self._size += snapshot.estimated_bytes
+            
+            # The newest snapshot is always kept, even when it alone exceeds the budget
+            while len(self._snapshots) > 1 and (len(self._snapshots) > self.max_snapshots
+                                                or self._size > self.max_bytes):
+                snapshot_id, evicted = self._snapshots.popitem(last=False)
+                self._size -= evicted.estimated_bytes
+                self.evictions += 1
+                logger.info(f"Evicted snapshot {snapshot_id[:12]} ({evicted.estimated_bytes} bytes)")
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'snapshots': len(self._snapshots),
+                'bytes': self._size,
+                'evictions': self.evictions,
+            }
\ No newline at end of file
@@ -0,0 +1,186 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from .models import ScheduledShift
+from .index import WorkerBitset, QUALIFICATION_BITS
+from .requirements import QUALIFICATION_TYPES, RequirementTable
+logger = logging.getLogger(__name__)
+AUTO_STRATEGY = 'auto'
+# Used when neither the request nor the server picks a solver; auto is opt-in, since it moves small instances
+# to the slower min-cost-flow engine
+DEFAULT_STRATEGY = 'greedy'
+# Instances up to this many (worker x staffed cell) pairs per day go to the min-cost-flow engine in auto mode
+AUTO_MIN_COST_FLOW_LIMIT = 100_000
+@dataclass
+class DaySolution:
+    day: str
+    minimum_chunks: List[List[ScheduledShift]]
+    additional_chunks: List[List[ScheduledShift]]
+    scheduled_counts: np.ndarray
+    scheduled_workers: WorkerBitset
+    worker_roles: Dict[int, int]
+class GreedySolver:
+    name = 'greedy'
+    
+    def solve_day(self, optimizer, requirements: RequirementTable, day: str) -> DaySolution:
+        occurrences = optimizer.days.count(day)
+        
+        minimum_chunks = []
+        for _ in range(occurrences):
+            start = len(optimizer.shifts)
+            optimizer._assign_minimum_staff_for_day(requirements, day)
+            minimum_chunks.append(optimizer.shifts[start:])
+        
+        additional_chunks = []
+        for _ in range(occurrences):
+            start = len(optimizer.shifts)
+            optimizer._assign_additional_staff_for_day(requirements, day)
+            additional_chunks.append(optimizer.shifts[start:])
+        
+        day_idx = requirements.day_ordinals[day]
+        return DaySolution(
+            day=day,
+            minimum_chunks=minimum_chunks,
+            additional_chunks=additional_chunks,
+            scheduled_counts=requirements.scheduled[:, day_idx, :].copy(),
+            scheduled_workers=optimizer.scheduled_workers[day],
+            worker_roles=optimizer.worker_roles[day]
+        )
+class MinCostFlowSolver:
+    name = 'min_cost_flow'
+    
+    def solve_day(self, optimizer, requirements: RequirementTable, day: str) -> DaySolution:
+        index = optimizer._ensure_index()
+        day_idx = requirements.day_ordinals[day]
+        
+        cells = []
+        demands = []
+        for warehouse_idx in range(len(requirements.warehouse_uuids)):
+            for qualification_idx in range(len(QUALIFICATION_TYPES)):
+                demand = int(requirements.required[qualification_idx, day_idx, warehouse_idx])
+                if demand > 0:
+                    cells.append((warehouse_idx, qualification_idx))
+                    demands.append(demand)
+        
+        preference_costs = index.preference_costs()
+        costs = np.full((len(index.worker_uuids), len(cells)), np.inf)
+        for cell_idx, (warehouse_idx, qualification_idx) in enumerate(cells):
+            eligible = (index.qualification_masks & QUALIFICATION_BITS[QUALIFICATION_TYPES[qualification_idx]]) != 0
+            costs[eligible, cell_idx] = preference_costs[eligible, warehouse_idx]
+        
+        warehouse_demand = np.zeros(len(requirements.warehouse_uuids))
+        for (warehouse_idx, _), demand in zip(cells, demands):
+            warehouse_demand[warehouse_idx] += demand
+        
+        assignment = {}
+        if cells and len(index.worker_uuids):
+            assignment = self._assign(costs, np.array(demands, dtype=np.int64),
+                                      np.array([warehouse_demand[w] for w, _ in cells]))
+        
+        scheduled = optimizer.scheduled_workers[day]
+        roles = optimizer.worker_roles[day]
+        shifts = []
+        for cell_idx, (warehouse_idx, qualification_idx) in enumerate(cells):
+            for worker_idx in sorted(assignment.get(cell_idx, []), key=lambda w: (costs[w, cell_idx], w)):
+                shifts.append(ScheduledShift(
+                    worker_uuid=index.worker_uuids[worker_idx],
+                    warehouse_uuid=requirements.warehouse_uuids[warehouse_idx],
+                    day_of_week=day,
+                    start_time=optimizer.shift_start,
+                    end_time=optimizer.shift_end
+                ))
+                scheduled.add(worker_idx)
+                roles[worker_idx] = qualification_idx
+                requirements.scheduled[qualification_idx, day_idx, warehouse_idx] += 1
+        optimizer.shifts.extend(shifts)
+        
+        # Every occurrence of a repeated weekday shares one solution, so only the first carries shifts
+        occurrences = optimizer.days.count(day)
+        return DaySolution(
+            day=day,
+            minimum_chunks=[shifts] + [[] for _ in range(occurrences - 1)],
+            additional_chunks=[[] for _ in range(occurrences)],
+            scheduled_counts=requirements.scheduled[:, day_idx, :].copy(),
+            scheduled_workers=scheduled,
+            worker_roles=roles
+        )
+    
+    def _assign(self, costs: np.ndarray, demands: np.ndarray, warehouse_demands: np.ndarray) -> Dict[int, List[int]]:
+        # Successive shortest paths on source -> worker -> (warehouse, qualification) cell -> sink.
+        # Filling a slot earns a reward far larger than any preference cost, split evenly over the
+        # warehouse's demand so that small warehouses get completed before large ones are topped up.
+        # The graph is bipartite, so Bellman-Ford runs as dense NumPy relaxations over workers x cells.
+        worker_count, cell_count = costs.shape
+        finite = costs[np.isfinite(costs)]
+        max_cost = float(finite.max()) if finite.size else 0.0
+        reward_unit = (max_cost + 1.0) * 2 * (worker_count + 1) * float(warehouse_demands.max())
+        rewards = reward_unit / warehouse_demands
+        
+        forward = costs.copy()
+        assigned_cell = np.full(worker_count, -1, dtype=np.int64)
+        load = np.zeros(cell_count, dtype=np.int64)
+        cell_range = np.arange(cell_count)
+        
+        while True:
+            is_assigned = assigned_cell >= 0
+            assigned_workers = np.flatnonzero(is_assigned)
+            worker_dist = np.where(is_assigned, np.inf, 0.0)
+            cell_dist = np.full(cell_count, np.inf)
+            cell_pred = np.full(cell_count, -1, dtype=np.int64)
+            
+            for _ in range(2 * (worker_count + cell_count)):
+                totals = worker_dist[:, np.newaxis] + forward
+                best_worker = np.argmin(totals, axis=0)
+                candidate = totals[best_worker, cell_range]
+                improved = candidate < cell_dist
+                cell_dist[improved] = candidate[improved]
+                cell_pred[improved] = best_worker[improved]
+                
+                back_cells = assigned_cell[assigned_workers]
+                back = cell_dist[back_cells] - costs[assigned_workers, back_cells]
+                improved_workers = back < worker_dist[assigned_workers]
+                worker_dist[assigned_workers[improved_workers]] = back[improved_workers]
+                
+                if not improved.any() and not improved_workers.any():
+                    break
+            
+            gains = np.where(load < demands, cell_dist - rewards, np.inf)
+            target = int(np.argmin(gains))
+            if not gains[target] < 0:
+                break
+            
+            cell_idx = target
+            while True:
+                worker_idx = int(cell_pred[cell_idx])
+                previous = int(assigned_cell[worker_idx])
+                if previous >= 0:
+                    forward[worker_idx, previous] = costs[worker_idx, previous]
+                forward[worker_idx, cell_idx] = np.inf
+                assigned_cell[worker_idx] = cell_idx
+                if previous < 0:
+                    break
+                cell_idx = previous
+            load[target] += 1
+        
+        assignment: Dict[int, List[int]] = {}
+        for worker_idx in np.flatnonzero(assigned_cell >= 0).tolist():
+            assignment.setdefault(int(assigned_cell[worker_idx]), []).append(worker_idx)
+        return assignment
+SOLVERS = {
+    GreedySolver.name: GreedySolver,
+    MinCostFlowSolver.name: MinCostFlowSolver,
+}
+def select_solver(strategy: Optional[str], worker_count: int, max_daily_cells: int):
+    strategy = strategy or DEFAULT_STRATEGY
+    if strategy == AUTO_STRATEGY:
+        if worker_count * max_daily_cells <= AUTO_MIN_COST_FLOW_LIMIT:
+            strategy = MinCostFlowSolver.name
+        else:
+            strategy = GreedySolver.name
+        logger.info(f"Auto-selected '{strategy}' solver for {worker_count} workers and {max_daily_cells} daily cells")
+    
+    solver_class = SOLVERS.get(strategy)
+    if solver_class is None:
+        raise ValueError(f"Unknown optimization strategy: {strategy}")
+    return solver_class()
\ No newline at end of file
@@ -8,6 +8,7 @@ setup(
         "grpcio>=1.71.0",
         "grpcio-tools>=1.71.0",
         "protobuf>=4.25.0",
+        "numpy>=1.26.0",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.10",
 ) 
\ No newline at end of file
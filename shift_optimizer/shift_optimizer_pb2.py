@@ -13,14 +13,18 @@ _runtime_version.ValidateProtobufRuntimeVersion(
     'shift_optimizer.proto'
 )
 _sym_db = _symbol_database.Default()
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x15shift_optimizer.proto\x12\x0fshift_optimizer\"\xa5\x01\n\x06Worker\x12\x0c\n\x04uuid\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x36\n\x0equalifications\x18\x03 \x03(\x0b\x32\x1e.shift_optimizer.Qualification\x12\x43\n\x15warehouse_preferences\x18\x04 \x03(\x0b\x32$.shift_optimizer.WarehousePreference\"P\n\rQualification\x12\x30\n\x04type\x18\x01 \x01(\x0e\x32\".shift_optimizer.QualificationType\x12\r\n\x05level\x18\x02 \x01(\x05\"Q\n\x13WarehousePreference\x12\x16\n\x0ewarehouse_uuid\x18\x01 \x01(\t\x12\x10\n\x08priority\x18\x02 \x01(\x05\x12\x10\n\x08\x64istance\x18\x03 \x01(\x02\"\xa8\x01\n\tWarehouse\x12\x0c\n\x04uuid\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x03 \x01(\x05\x12\x13\n\x0bmin_workers\x18\x04 \x01(\x05\x12\x19\n\x11min_basic_workers\x18\x05 \x01(\x05\x12\x13\n\x0bmin_drivers\x18\x06 \x01(\x05\x12\x15\n\rmin_engineers\x18\x07 \x01(\x05\x12\x11\n\tis_active\x18\x08 \x01(\x08\"G\n\tCargoLoad\x12\x16\n\x0ewarehouse_uuid\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x14\n\x0ctotal_weight\x18\x03 \x01(\x05\"\xb0\x01\n\x15OptimizeShiftsRequest\x12(\n\x07workers\x18\x01 \x03(\x0b\x32\x17.shift_optimizer.Worker\x12.\n\nwarehouses\x18\x02 \x03(\x0b\x32\x1a.shift_optimizer.Warehouse\x12/\n\x0b\x63\x61rgo_loads\x18\x03 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\x12\x0c\n\x04\x64\x61ys\x18\x04 \x03(\t\"x\n\x0eScheduledShift\x12\x13\n\x0bworker_uuid\x18\x01 \x01(\t\x12\x16\n\x0ewarehouse_uuid\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x61y_of_week\x18\x03 \x01(\t\x12\x12\n\nstart_time\x18\x04 \x01(\t\x12\x10\n\x08\x65nd_time\x18\x05 \x01(\t\"\xab\x01\n\x16OptimizeShiftsResponse\x12/\n\x06shifts\x18\x01 \x03(\x0b\x32\x1f.shift_optimizer.ScheduledShift\x12>\n\x12warehouse_staffing\x18\x02 \x03(\x0b\x32\".shift_optimizer.WarehouseStaffing\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x0f\n\x07message\x18\x04 \x01(\t\"\x99\x02\n\x11WarehouseStaffing\x12\x16\n\x0ewarehouse_uuid\x18\x01 \x01(\t\x12\x16\n\x0ewarehouse_name\x18\x02 \x01(\t\x12\x0b\n\x03\x64\x61y\x18\x03 \x01(\t\x12\x1e\n\x16required_basic_workers\x18\x04 \x01(\x05\x12\x1f\n\x17scheduled_basic_workers\x18\x05 \x01(\x05\x12\x18\n\x10required_drivers\x18\x06 \x01(\x05\x12\x19\n\x11scheduled_drivers\x18\x07 \x01(\x05\x12\x1a\n\x12required_engineers\x18\x08 \x01(\x05\x12\x1b\n\x13scheduled_engineers\x18\t \x01(\x05\x12\x18\n\x10is_fully_staffed\x18\n \x01(\x08*E\n\x11QualificationType\x12\x10\n\x0c\x42\x41SIC_WORKER\x10\x00\x12\x10\n\x0c\x43\x41RGO_DRIVER\x10\x01\x12\x0c\n\x08\x45NGINEER\x10\x02\x32|\n\x15ShiftOptimizerService\x12\x63\n\x0eOptimizeShifts\x12&.shift_optimizer.OptimizeShiftsRequest\x1a\'.shift_optimizer.OptimizeShiftsResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x15shift_optimizer.proto\x12\x0fshift_optimizer\"\xa5\x01\n\x06Worker\x12\x0c\n\x04uuid\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x36\n\x0equalifications\x18\x03 \x03(\x0b\x32\x1e.shift_optimizer.Qualification\x12\x43\n\x15warehouse_preferences\x18\x04 \x03(\x0b\x32$.shift_optimizer.WarehousePreference\"P\n\rQualification\x12\x30\n\x04type\x18\x01 \x01(\x0e\x32\".shift_optimizer.QualificationType\x12\r\n\x05level\x18\x02 \x01(\x05\"Q\n\x13WarehousePreference\x12\x16\n\x0ewarehouse_uuid\x18\x01 \x01(\t\x12\x10\n\x08priority\x18\x02 \x01(\x05\x12\x10\n\x08\x64istance\x18\x03 \x01(\x02\"\xa8\x01\n\tWarehouse\x12\x0c\n\x04uuid\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x03 \x01(\x05\x12\x13\n\x0bmin_workers\x18\x04 \x01(\x05\x12\x19\n\x11min_basic_workers\x18\x05 \x01(\x05\x12\x13\n\x0bmin_drivers\x18\x06 \x01(\x05\x12\x15\n\rmin_engineers\x18\x07 \x01(\x05\x12\x11\n\tis_active\x18\x08 \x01(\x08\"G\n\tCargoLoad\x12\x16\n\x0ewarehouse_uuid\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x14\n\x0ctotal_weight\x18\x03 \x01(\x05\"\xc9\x02\n\x15OptimizeShiftsRequest\x12(\n\x07workers\x18\x01 \x03(\x0b\x32\x17.shift_optimizer.Worker\x12.\n\nwarehouses\x18\x02 \x03(\x0b\x32\x1a.shift_optimizer.Warehouse\x12/\n\x0b\x63\x61rgo_loads\x18\x03 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\x12\x0c\n\x04\x64\x61ys\x18\x04 \x03(\t\x12\x10\n\x08strategy\x18\x05 \x01(\t\x12\x0f\n\x07\x61nytime\x18\x06 \x01(\x08\x12\x1b\n\x13time_budget_seconds\x18\x07 \x01(\x01\x12\x13\n\x0bsnapshot_id\x18\x08 \x01(\t\x12-\n\x05\x64\x65lta\x18\t \x01(\x0b\x32\x1e.shift_optimizer.SnapshotDelta\x12\x13\n\x0bincremental\x18\n \x01(\x08\"\xd3\x01\n\rSnapshotDelta\x12\x31\n\x10upserted_workers\x18\x01 \x03(\x0b\x32\x17.shift_optimizer.Worker\x12\x1c\n\x14removed_worker_uuids\x18\x02 \x03(\t\x12\x38\n\x14upserted_cargo_loads\x18\x03 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\x12\x37\n\x13removed_cargo_loads\x18\x04 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\"\xa2\x01\n\x15UploadSnapshotRequest\x12(\n\x07workers\x18\x01 \x03(\x0b\x32\x17.shift_optimizer.Worker\x12.\n\nwarehouses\x18\x02 \x03(\x0b\x32\x1a.shift_optimizer.Warehouse\x12/\n\x0b\x63\x61rgo_loads\x18\x03 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\"O\n\x16UploadSnapshotResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x13\n\x0bsnapshot_id\x18\x03 \x01(\t\"x\n\x0eScheduledShift\x12\x13\n\x0bworker_uuid\x18\x01 \x01(\t\x12\x16\n\x0ewarehouse_uuid\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x61y_of_week\x18\x03 \x01(\t\x12\x12\n\nstart_time\x18\x04 \x01(\t\x12\x10\n\x08\x65nd_time\x18\x05 \x01(\t\"\xcb\x02\n\x16OptimizeShiftsResponse\x12/\n\x06shifts\x18\x01 \x03(\x0b\x32\x1f.shift_optimizer.ScheduledShift\x12>\n\x12warehouse_staffing\x18\x02 \x03(\x0b\x32\".shift_optimizer.WarehouseStaffing\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x0f\n\x07message\x18\x04 \x01(\t\x12\x19\n\x11search_iterations\x18\x05 \x01(\x03\x12\x1b\n\x13search_improvements\x18\x06 \x01(\x03\x12\x18\n\x10snapshot_missing\x18\x07 \x01(\x08\x12\x37\n\x0eremoved_shifts\x18\x08 \x03(\x0b\x32\x1f.shift_optimizer.ScheduledShift\x12\x13\n\x0bsnapshot_id\x18\t \x01(\t\"\xcf\x01\n\x13OptimizeShiftsChunk\x12\x0b\n\x03\x64\x61y\x18\x01 \x01(\t\x12/\n\x06shifts\x18\x02 \x03(\x0b\x32\x1f.shift_optimizer.ScheduledShift\x12>\n\x12warehouse_staffing\x18\x03 \x03(\x0b\x32\".shift_optimizer.WarehouseStaffing\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x0f\n\x07message\x18\x05 \x01(\t\x12\x18\n\x10snapshot_missing\x18\x06 \x01(\x08\"\x99\x02\n\x11WarehouseStaffing\x12\x16\n\x0ewarehouse_uuid\x18\x01 \x01(\t\x12\x16\n\x0ewarehouse_name\x18\x02 \x01(\t\x12\x0b\n\x03\x64\x61y\x18\x03 \x01(\t\x12\x1e\n\x16required_basic_workers\x18\x04 \x01(\x05\x12\x1f\n\x17scheduled_basic_workers\x18\x05 \x01(\x05\x12\x18\n\x10required_drivers\x18\x06 \x01(\x05\x12\x19\n\x11scheduled_drivers\x18\x07 \x01(\x05\x12\x1a\n\x12required_engineers\x18\x08 \x01(\x05\x12\x1b\n\x13scheduled_engineers\x18\t \x01(\x05\x12\x18\n\x10is_fully_staffed\x18\n \x01(\x08\"\xa6\x02\n\x0e\x43ompactWorkers\x12\r\n\x05uuids\x18\x01 \x03(\t\x12\x11\n\tusernames\x18\x02 \x03(\t\x12\x1c\n\x14qualification_counts\x18\x03 \x03(\r\x12?\n\x13qualification_types\x18\x04 \x03(\x0e\x32\".shift_optimizer.QualificationType\x12\x1c\n\x14qualification_levels\x18\x05 \x03(\x05\x12\x19\n\x11preference_counts\x18\x06 \x03(\r\x12\x1d\n\x15preference_warehouses\x18\x07 \x03(\r\x12\x1d\n\x15preference_priorities\x18\x08 \x03(\x05\x12\x1c\n\x14preference_distances\x18\t \x03(\x02\"M\n\x11\x43ompactCargoLoads\x12\x12\n\nwarehouses\x18\x01 \x03(\r\x12\r\n\x05\x64\x61tes\x18\x02 \x03(\x05\x12\x15\n\rtotal_weights\x18\x03 \x03(\x05\"\x9e\x02\n\x17OptimizeShiftsRequestV2\x12.\n\nwarehouses\x18\x01 \x03(\x0b\x32\x1a.shift_optimizer.Warehouse\x12\x30\n\x07workers\x18\x02 \x01(\x0b\x32\x1f.shift_optimizer.CompactWorkers\x12\x37\n\x0b\x63\x61rgo_loads\x18\x03 \x01(\x0b\x32\".shift_optimizer.CompactCargoLoads\x12(\n\x04\x64\x61ys\x18\x04 \x03(\x0e\x32\x1a.shift_optimizer.DayOfWeek\x12\x10\n\x08strategy\x18\x05 \x01(\t\x12\x0f\n\x07\x61nytime\x18\x06 \x01(\x08\x12\x1b\n\x13time_budget_seconds\x18\x07 \x01(\x01\"\x8a\x01\n\rCompactShifts\x12\x0f\n\x07workers\x18\x01 \x03(\r\x12\x12\n\nwarehouses\x18\x02 \x03(\r\x12(\n\x04\x64\x61ys\x18\x03 \x03(\x0e\x32\x1a.shift_optimizer.DayOfWeek\x12\x15\n\rstart_minutes\x18\x04 \x03(\r\x12\x13\n\x0b\x65nd_minutes\x18\x05 \x03(\r\"\x98\x02\n\x0f\x43ompactStaffing\x12\x12\n\nwarehouses\x18\x01 \x03(\r\x12(\n\x04\x64\x61ys\x18\x02 \x03(\x0e\x32\x1a.shift_optimizer.DayOfWeek\x12\x1e\n\x16required_basic_workers\x18\x03 \x03(\x05\x12\x1f\n\x17scheduled_basic_workers\x18\x04 \x03(\x05\x12\x18\n\x10required_drivers\x18\x05 \x03(\x05\x12\x19\n\x11scheduled_drivers\x18\x06 \x03(\x05\x12\x1a\n\x12required_engineers\x18\x07 \x03(\x05\x12\x1b\n\x13scheduled_engineers\x18\x08 \x03(\x05\x12\x18\n\x10is_fully_staffed\x18\t \x03(\x08\"\xe2\x01\n\x18OptimizeShiftsResponseV2\x12.\n\x06shifts\x18\x01 \x01(\x0b\x32\x1e.shift_optimizer.CompactShifts\x12<\n\x12warehouse_staffing\x18\x02 \x01(\x0b\x32 .shift_optimizer.CompactStaffing\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x0f\n\x07message\x18\x04 \x01(\t\x12\x19\n\x11search_iterations\x18\x05 \x01(\x03\x12\x1b\n\x13search_improvements\x18\x06 \x01(\x03\"\xb9\x01\n\x08Scenario\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x38\n\x14upserted_cargo_loads\x18\x02 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\x12\x37\n\x13removed_cargo_loads\x18\x03 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\x12\x1e\n\x16\x63losed_warehouse_uuids\x18\x04 \x03(\t\x12\x0c\n\x04\x64\x61ys\x18\x05 \x03(\t\"\x88\x02\n\x18OptimizeScenariosRequest\x12(\n\x07workers\x18\x01 \x03(\x0b\x32\x17.shift_optimizer.Worker\x12.\n\nwarehouses\x18\x02 \x03(\x0b\x32\x1a.shift_optimizer.Warehouse\x12/\n\x0b\x63\x61rgo_loads\x18\x03 \x03(\x0b\x32\x1a.shift_optimizer.CargoLoad\x12\x0c\n\x04\x64\x61ys\x18\x04 \x03(\t\x12\x10\n\x08strategy\x18\x05 \x01(\t\x12,\n\tscenarios\x18\x06 \x03(\x0b\x32\x19.shift_optimizer.Scenario\x12\x13\n\x0bsnapshot_id\x18\x07 \x01(\t\"\xfb\x01\n\x0eScenarioResult\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t\x12/\n\x06shifts\x18\x04 \x03(\x0b\x32\x1f.shift_optimizer.ScheduledShift\x12>\n\x12warehouse_staffing\x18\x05 \x03(\x0b\x32\".shift_optimizer.WarehouseStaffing\x12\x13\n\x0bshift_count\x18\x06 \x01(\x05\x12\x1a\n\x12understaffed_cells\x18\x07 \x01(\x05\x12\x17\n\x0fmissing_workers\x18\x08 \x01(\x05\"\x8b\x01\n\x19OptimizeScenariosResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x32\n\tscenarios\x18\x03 \x03(\x0b\x32\x1f.shift_optimizer.ScenarioResult\x12\x18\n\x10snapshot_missing\x18\x04 \x01(\x08\"b\n\x1aSubmitOptimizationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0e\n\x06job_id\x18\x03 \x01(\t\x12\x12\n\nqueue_full\x18\x04 \x01(\x08\"(\n\x16OptimizationJobRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\xc8\x01\n\x15OptimizationJobStatus\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0e\n\x06job_id\x18\x03 \x01(\t\x12(\n\x05state\x18\x04 \x01(\x0e\x32\x19.shift_optimizer.JobState\x12\x11\n\tdays_done\x18\x05 \x01(\x05\x12\x12\n\ndays_total\x18\x06 \x01(\x05\x12\x17\n\x0f\x65lapsed_seconds\x18\x07 \x01(\x01\x12\x13\n\x0bjob_missing\x18\x08 \x01(\x08*E\n\x11QualificationType\x12\x10\n\x0c\x42\x41SIC_WORKER\x10\x00\x12\x10\n\x0c\x43\x41RGO_DRIVER\x10\x01\x12\x0c\n\x08\x45NGINEER\x10\x02*g\n\tDayOfWeek\x12\n\n\x06MONDAY\x10\x00\x12\x0b\n\x07TUESDAY\x10\x01\x12\r\n\tWEDNESDAY\x10\x02\x12\x0c\n\x08THURSDAY\x10\x03\x12\n\n\x06\x46RIDAY\x10\x04\x12\x0c\n\x08SATURDAY\x10\x05\x12\n\n\x06SUNDAY\x10\x06*\\\n\x08JobState\x12\x0e\n\nJOB_QUEUED\x10\x00\x12\x0f\n\x0bJOB_RUNNING\x10\x01\x12\x0c\n\x08JOB_DONE\x10\x02\x12\x0e\n\nJOB_FAILED\x10\x03\x12\x11\n\rJOB_CANCELLED\x10\x04\x32\xb2\t\n\x15ShiftOptimizerService\x12\x63\n\x0eOptimizeShifts\x12&.shift_optimizer.OptimizeShiftsRequest\x1a\'.shift_optimizer.OptimizeShiftsResponse\"\x00\x12\x63\n\x0eUploadSnapshot\x12&.shift_optimizer.UploadSnapshotRequest\x1a\'.shift_optimizer.UploadSnapshotResponse\"\x00\x12k\n\x14OptimizeShiftsUpload\x12&.shift_optimizer.OptimizeShiftsRequest\x1a\'.shift_optimizer.OptimizeShiftsResponse\"\x00(\x01\x12h\n\x14OptimizeShiftsStream\x12&.shift_optimizer.OptimizeShiftsRequest\x1a$.shift_optimizer.OptimizeShiftsChunk\"\x00\x30\x01\x12p\n\x1aOptimizeShiftsUploadStream\x12&.shift_optimizer.OptimizeShiftsRequest\x1a$.shift_optimizer.OptimizeShiftsChunk\"\x00(\x01\x30\x01\x12i\n\x10OptimizeShiftsV2\x12(.shift_optimizer.OptimizeShiftsRequestV2\x1a).shift_optimizer.OptimizeShiftsResponseV2\"\x00\x12k\n\x12SubmitOptimization\x12&.shift_optimizer.OptimizeShiftsRequest\x1a+.shift_optimizer.SubmitOptimizationResponse\"\x00\x12j\n\x15GetOptimizationStatus\x12\'.shift_optimizer.OptimizationJobRequest\x1a&.shift_optimizer.OptimizationJobStatus\"\x00\x12k\n\x15GetOptimizationResult\x12\'.shift_optimizer.OptimizationJobRequest\x1a\'.shift_optimizer.OptimizeShiftsResponse\"\x00\x12g\n\x12\x43\x61ncelOptimization\x12\'.shift_optimizer.OptimizationJobRequest\x1a&.shift_optimizer.OptimizationJobStatus\"\x00\x12l\n\x11OptimizeScenarios\x12).shift_optimizer.OptimizeScenariosRequest\x1a*.shift_optimizer.OptimizeScenariosResponse\"\x00\x62\x06proto3')
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'shift_optimizer_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_QUALIFICATIONTYPE']._serialized_start=1378
-  _globals['_QUALIFICATIONTYPE']._serialized_end=1447
+  _globals['_QUALIFICATIONTYPE']._serialized_start=4875
+  _globals['_QUALIFICATIONTYPE']._serialized_end=4944
+  _globals['_DAYOFWEEK']._serialized_start=4946
+  _globals['_DAYOFWEEK']._serialized_end=5049
+  _globals['_JOBSTATE']._serialized_start=5051
+  _globals['_JOBSTATE']._serialized_end=5143
   _globals['_WORKER']._serialized_start=43
   _globals['_WORKER']._serialized_end=208
   _globals['_QUALIFICATION']._serialized_start=210
@@ -32,12 +36,46 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_CARGOLOAD']._serialized_start=546
   _globals['_CARGOLOAD']._serialized_end=617
   _globals['_OPTIMIZESHIFTSREQUEST']._serialized_start=620
-  _globals['_OPTIMIZESHIFTSREQUEST']._serialized_end=796
-  _globals['_SCHEDULEDSHIFT']._serialized_start=798
-  _globals['_SCHEDULEDSHIFT']._serialized_end=918
-  _globals['_OPTIMIZESHIFTSRESPONSE']._serialized_start=921
-  _globals['_OPTIMIZESHIFTSRESPONSE']._serialized_end=1092
-  _globals['_WAREHOUSESTAFFING']._serialized_start=1095
-  _globals['_WAREHOUSESTAFFING']._serialized_end=1376
-  _globals['_SHIFTOPTIMIZERSERVICE']._serialized_start=1449
-  _globals['_SHIFTOPTIMIZERSERVICE']._serialized_end=1573
\ No newline at end of file
+  _globals['_OPTIMIZESHIFTSREQUEST']._serialized_end=949
+  _globals['_SNAPSHOTDELTA']._serialized_start=952
+  _globals['_SNAPSHOTDELTA']._serialized_end=1163
+  _globals['_UPLOADSNAPSHOTREQUEST']._serialized_start=1166
+  _globals['_UPLOADSNAPSHOTREQUEST']._serialized_end=1328
+  _globals['_UPLOADSNAPSHOTRESPONSE']._serialized_start=1330
+  _globals['_UPLOADSNAPSHOTRESPONSE']._serialized_end=1409
+  _globals['_SCHEDULEDSHIFT']._serialized_start=1411
+  _globals['_SCHEDULEDSHIFT']._serialized_end=1531
+  _globals['_OPTIMIZESHIFTSRESPONSE']._serialized_start=1534
+  _globals['_OPTIMIZESHIFTSRESPONSE']._serialized_end=1865
+  _globals['_OPTIMIZESHIFTSCHUNK']._serialized_start=1868
+  _globals['_OPTIMIZESHIFTSCHUNK']._serialized_end=2075
+  _globals['_WAREHOUSESTAFFING']._serialized_start=2078
+  _globals['_WAREHOUSESTAFFING']._serialized_end=2359
+  _globals['_COMPACTWORKERS']._serialized_start=2362
+  _globals['_COMPACTWORKERS']._serialized_end=2656
+  _globals['_COMPACTCARGOLOADS']._serialized_start=2658
+  _globals['_COMPACTCARGOLOADS']._serialized_end=2735
+  _globals['_OPTIMIZESHIFTSREQUESTV2']._serialized_start=2738
+  _globals['_OPTIMIZESHIFTSREQUESTV2']._serialized_end=3024
+  _globals['_COMPACTSHIFTS']._serialized_start=3027
+  _globals['_COMPACTSHIFTS']._serialized_end=3165
+  _globals['_COMPACTSTAFFING']._serialized_start=3168
+  _globals['_COMPACTSTAFFING']._serialized_end=3448
+  _globals['_OPTIMIZESHIFTSRESPONSEV2']._serialized_start=3451
+  _globals['_OPTIMIZESHIFTSRESPONSEV2']._serialized_end=3677
+  _globals['_SCENARIO']._serialized_start=3680
+  _globals['_SCENARIO']._serialized_end=3865
+  _globals['_OPTIMIZESCENARIOSREQUEST']._serialized_start=3868
+  _globals['_OPTIMIZESCENARIOSREQUEST']._serialized_end=4132
+  _globals['_SCENARIORESULT']._serialized_start=4135
+  _globals['_SCENARIORESULT']._serialized_end=4386
+  _globals['_OPTIMIZESCENARIOSRESPONSE']._serialized_start=4389
+  _globals['_OPTIMIZESCENARIOSRESPONSE']._serialized_end=4528
+  _globals['_SUBMITOPTIMIZATIONRESPONSE']._serialized_start=4530
+  _globals['_SUBMITOPTIMIZATIONRESPONSE']._serialized_end=4628
+  _globals['_OPTIMIZATIONJOBREQUEST']._serialized_start=4630
+  _globals['_OPTIMIZATIONJOBREQUEST']._serialized_end=4670
+  _globals['_OPTIMIZATIONJOBSTATUS']._serialized_start=4673
+  _globals['_OPTIMIZATIONJOBSTATUS']._serialized_end=4873
+  _globals['_SHIFTOPTIMIZERSERVICE']._serialized_start=5146
+  _globals['_SHIFTOPTIMIZERSERVICE']._serialized_end=6348
\ No newline at end of file
@@ -26,10 +26,110 @@ class ShiftOptimizerServiceStub(object):
                 request_serializer=shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
                 response_deserializer=shift__optimizer__pb2.OptimizeShiftsResponse.FromString,
                 _registered_method=True)
+        self.UploadSnapshot = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/UploadSnapshot',
+                request_serializer=shift__optimizer__pb2.UploadSnapshotRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.UploadSnapshotResponse.FromString,
+                _registered_method=True)
+        self.OptimizeShiftsUpload = channel.stream_unary(
+                '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsUpload',
+                request_serializer=shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizeShiftsResponse.FromString,
+                _registered_method=True)
+        self.OptimizeShiftsStream = channel.unary_stream(
+                '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsStream',
+                request_serializer=shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizeShiftsChunk.FromString,
+                _registered_method=True)
+        self.OptimizeShiftsUploadStream = channel.stream_stream(
+                '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsUploadStream',
+                request_serializer=shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizeShiftsChunk.FromString,
+                _registered_method=True)
+        self.OptimizeShiftsV2 = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsV2',
+                request_serializer=shift__optimizer__pb2.OptimizeShiftsRequestV2.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizeShiftsResponseV2.FromString,
+                _registered_method=True)
+        self.SubmitOptimization = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/SubmitOptimization',
+                request_serializer=shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.SubmitOptimizationResponse.FromString,
+                _registered_method=True)
+        self.GetOptimizationStatus = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/GetOptimizationStatus',
+                request_serializer=shift__optimizer__pb2.OptimizationJobRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizationJobStatus.FromString,
+                _registered_method=True)
+        self.GetOptimizationResult = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/GetOptimizationResult',
+                request_serializer=shift__optimizer__pb2.OptimizationJobRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizeShiftsResponse.FromString,
+                _registered_method=True)
+        self.CancelOptimization = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/CancelOptimization',
+                request_serializer=shift__optimizer__pb2.OptimizationJobRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizationJobStatus.FromString,
+                _registered_method=True)
+        self.OptimizeScenarios = channel.unary_unary(
+                '/shift_optimizer.ShiftOptimizerService/OptimizeScenarios',
+                request_serializer=shift__optimizer__pb2.OptimizeScenariosRequest.SerializeToString,
+                response_deserializer=shift__optimizer__pb2.OptimizeScenariosResponse.FromString,
+                _registered_method=True)
 class ShiftOptimizerServiceServicer(object):
     
     def OptimizeShifts(self, request, context):
         
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def UploadSnapshot(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def OptimizeShiftsUpload(self, request_iterator, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def OptimizeShiftsStream(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def OptimizeShiftsUploadStream(self, request_iterator, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def OptimizeShiftsV2(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def SubmitOptimization(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def GetOptimizationStatus(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def GetOptimizationResult(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def CancelOptimization(self, request, context):
+        
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+    def OptimizeScenarios(self, request, context):
+        
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
@@ -40,6 +140,56 @@ def add_ShiftOptimizerServiceServicer_to_server(servicer, server):
                     request_deserializer=shift__optimizer__pb2.OptimizeShiftsRequest.FromString,
                     response_serializer=shift__optimizer__pb2.OptimizeShiftsResponse.SerializeToString,
             ),
+            'UploadSnapshot': grpc.unary_unary_rpc_method_handler(
+                    servicer.UploadSnapshot,
+                    request_deserializer=shift__optimizer__pb2.UploadSnapshotRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.UploadSnapshotResponse.SerializeToString,
+            ),
+            'OptimizeShiftsUpload': grpc.stream_unary_rpc_method_handler(
+                    servicer.OptimizeShiftsUpload,
+                    request_deserializer=shift__optimizer__pb2.OptimizeShiftsRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizeShiftsResponse.SerializeToString,
+            ),
+            'OptimizeShiftsStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.OptimizeShiftsStream,
+                    request_deserializer=shift__optimizer__pb2.OptimizeShiftsRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizeShiftsChunk.SerializeToString,
+            ),
+            'OptimizeShiftsUploadStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.OptimizeShiftsUploadStream,
+                    request_deserializer=shift__optimizer__pb2.OptimizeShiftsRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizeShiftsChunk.SerializeToString,
+            ),
+            'OptimizeShiftsV2': grpc.unary_unary_rpc_method_handler(
+                    servicer.OptimizeShiftsV2,
+                    request_deserializer=shift__optimizer__pb2.OptimizeShiftsRequestV2.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizeShiftsResponseV2.SerializeToString,
+            ),
+            'SubmitOptimization': grpc.unary_unary_rpc_method_handler(
+                    servicer.SubmitOptimization,
+                    request_deserializer=shift__optimizer__pb2.OptimizeShiftsRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.SubmitOptimizationResponse.SerializeToString,
+            ),
+            'GetOptimizationStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetOptimizationStatus,
+                    request_deserializer=shift__optimizer__pb2.OptimizationJobRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizationJobStatus.SerializeToString,
+            ),
+            'GetOptimizationResult': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetOptimizationResult,
+                    request_deserializer=shift__optimizer__pb2.OptimizationJobRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizeShiftsResponse.SerializeToString,
+            ),
+            'CancelOptimization': grpc.unary_unary_rpc_method_handler(
+                    servicer.CancelOptimization,
+                    request_deserializer=shift__optimizer__pb2.OptimizationJobRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizationJobStatus.SerializeToString,
+            ),
+            'OptimizeScenarios': grpc.unary_unary_rpc_method_handler(
+                    servicer.OptimizeScenarios,
+                    request_deserializer=shift__optimizer__pb2.OptimizeScenariosRequest.FromString,
+                    response_serializer=shift__optimizer__pb2.OptimizeScenariosResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'shift_optimizer.ShiftOptimizerService', rpc_method_handlers)
@@ -72,4 +222,264 @@ class ShiftOptimizerService(object):
             wait_for_ready,
             timeout,
             metadata,
+            _registered_method=True)
+    @staticmethod
+    def UploadSnapshot(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/UploadSnapshot',
+            shift__optimizer__pb2.UploadSnapshotRequest.SerializeToString,
+            shift__optimizer__pb2.UploadSnapshotResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def OptimizeShiftsUpload(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsUpload',
+            shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizeShiftsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def OptimizeShiftsStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsStream',
+            shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizeShiftsChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def OptimizeShiftsUploadStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsUploadStream',
+            shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizeShiftsChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def OptimizeShiftsV2(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/OptimizeShiftsV2',
+            shift__optimizer__pb2.OptimizeShiftsRequestV2.SerializeToString,
+            shift__optimizer__pb2.OptimizeShiftsResponseV2.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def SubmitOptimization(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/SubmitOptimization',
+            shift__optimizer__pb2.OptimizeShiftsRequest.SerializeToString,
+            shift__optimizer__pb2.SubmitOptimizationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def GetOptimizationStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/GetOptimizationStatus',
+            shift__optimizer__pb2.OptimizationJobRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizationJobStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def GetOptimizationResult(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/GetOptimizationResult',
+            shift__optimizer__pb2.OptimizationJobRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizeShiftsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def CancelOptimization(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/CancelOptimization',
+            shift__optimizer__pb2.OptimizationJobRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizationJobStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+    @staticmethod
+    def OptimizeScenarios(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/shift_optimizer.ShiftOptimizerService/OptimizeScenarios',
+            shift__optimizer__pb2.OptimizeScenariosRequest.SerializeToString,
+            shift__optimizer__pb2.OptimizeScenariosResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
             _registered_method=True)
\ No newline at end of file
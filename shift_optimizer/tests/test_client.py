@@ -1,3 +1,5 @@
+import datetime
+import grpc
 import unittest
 import sys
 import os
@@ -7,10 +9,14 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 from shift_optimizer.client.client import ShiftOptimizerClient
-
-
+from shift_optimizer.client.channels import ChannelPool, CHANNEL_OPTIONS, close_channels
+from shift_optimizer.client.worker_cache import EncodedWorkers, frame_worker
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
 class TestShiftOptimizerClient(unittest.TestCase):
     def setUp(self):
+        # Clients share pooled channels, so every test starts from an empty pool
+        close_channels()
+        self.addCleanup(close_channels)
         self.stub_mock = MagicMock()
         
         self.mock_success_response = MagicMock()
@@ -127,7 +133,7 @@ class TestShiftOptimizerClient(unittest.TestCase):
         
         client = ShiftOptimizerClient(host='test_host', port='1234')
         
-        mock_channel.assert_called_once_with('test_host:1234')
+        mock_channel.assert_called_once_with('test_host:1234', options=list(CHANNEL_OPTIONS))
         
         mock_stub_class.assert_called_once_with(mock_channel_instance)
     
@@ -208,5 +214,355 @@ class TestShiftOptimizerClient(unittest.TestCase):
         self.assertEqual(len(staffing), 0)
         
         mock_stub_instance.OptimizeShifts.assert_called_once()
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_upload_and_optimize_snapshot(self, mock_stub_class, mock_channel):
+        mock_stub_instance = MagicMock()
+        mock_stub_instance.UploadSnapshot.return_value = MagicMock(success=True, snapshot_id="abc")
+        mock_stub_instance.OptimizeShifts.return_value = self.mock_success_response
+        mock_stub_class.return_value = mock_stub_instance
+        
+        client = ShiftOptimizerClient()
+        
+        success, message, snapshot_id = client.upload_snapshot(
+            self.mock_workers,
+            self.mock_warehouses,
+            self.mock_cargo_loads
+        )
+        self.assertTrue(success)
+        self.assertEqual(snapshot_id, "abc")
+        
+        upload_request = mock_stub_instance.UploadSnapshot.call_args[0][0]
+        self.assertEqual(len(upload_request.workers), 5)
+        self.assertEqual(len(upload_request.warehouses), 3)
+        
+        success, message, shifts, staffing = client.optimize_snapshot(
+            snapshot_id,
+            self.days,
+            upserted_workers=self.mock_workers[:1],
+            removed_worker_uuids=[self.worker_uuid]
+        )
+        self.assertTrue(success)
+        
+        request = mock_stub_instance.OptimizeShifts.call_args[0][0]
+        self.assertEqual(request.snapshot_id, "abc")
+        self.assertEqual(len(request.workers), 0)
+        self.assertEqual(len(request.delta.upserted_workers), 1)
+        self.assertEqual(list(request.delta.removed_worker_uuids), [self.worker_uuid])
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_optimize_shifts_chunked(self, mock_stub_class, mock_channel):
+        sent = []
+        mock_stub_instance = MagicMock()
+        mock_stub_instance.OptimizeShiftsUpload.side_effect = lambda chunks, timeout: (
+            sent.extend(chunks) or self.mock_success_response
+        )
+        mock_stub_class.return_value = mock_stub_instance
+        
+        client = ShiftOptimizerClient(max_message_mb=8)
+        success, message, shifts, staffing = client.optimize_shifts_chunked(
+            self.mock_workers,
+            self.mock_warehouses,
+            self.mock_cargo_loads,
+            self.days,
+            chunk_size=2
+        )
+        
+        self.assertTrue(success)
+        self.assertEqual(len(shifts), len(self.mock_success_response.shifts))
+        self.assertIn(('grpc.max_receive_message_length', 8 * 1024 * 1024), mock_channel.call_args[1]['options'])
+        
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(list(sent[0].days), self.days)
+        self.assertEqual(len(sent[0].warehouses), 3)
+        self.assertEqual(len(sent[0].workers), 0)
+        self.assertEqual([len(chunk.workers) for chunk in sent[1:]], [2, 2, 1])
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_optimize_shifts_encoded_workers(self, mock_stub_class, mock_channel):
+        raw_optimize = mock_channel.return_value.unary_unary.return_value
+        raw_optimize.return_value = self.mock_success_response
+        raw_upload = mock_channel.return_value.stream_unary.return_value
+        sent = []
+        raw_upload.side_effect = lambda chunks, timeout: sent.extend(chunks) or self.mock_success_response
+        mock_stub_instance = MagicMock()
+        mock_stub_class.return_value = mock_stub_instance
+        
+        workers = [shift_optimizer_pb2.Worker(uuid=str(uuid.uuid4()), username=f"worker{i}") for i in range(3)]
+        encoded = EncodedWorkers([frame_worker(worker) for worker in workers])
+        client = ShiftOptimizerClient()
+        success, message, shifts, staffing = client.optimize_shifts(
+            encoded, self.mock_warehouses, self.mock_cargo_loads, self.days
+        )
+        
+        self.assertTrue(success)
+        mock_stub_instance.OptimizeShifts.assert_not_called()
+        request = shift_optimizer_pb2.OptimizeShiftsRequest.FromString(raw_optimize.call_args[0][0])
+        self.assertEqual(list(request.workers), workers)
+        self.assertEqual(len(request.warehouses), len(self.mock_warehouses))
+        self.assertEqual(list(request.days), self.days)
+        
+        success, message, shifts, staffing = client.optimize_shifts_chunked(
+            encoded, self.mock_warehouses, self.mock_cargo_loads, self.days, chunk_size=2
+        )
+        self.assertTrue(success)
+        chunks = [shift_optimizer_pb2.OptimizeShiftsRequest.FromString(chunk) for chunk in sent]
+        self.assertEqual(list(chunks[0].days), self.days)
+        self.assertEqual([list(chunk.workers) for chunk in chunks[1:]], [workers[:2], workers[2:]])
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_optimize_shifts_compact(self, mock_stub_class, mock_channel):
+        for cargo in self.mock_cargo_loads:
+            cargo.date = datetime.date(2025, 6, 2)
+        self.mock_workers[0].warehouse_preferences.all.return_value = [
+            self._create_mock_warehouse_preference(self.mock_warehouses[2].uuid)
+        ]
+        
+        sent = []
+        response = shift_optimizer_pb2.OptimizeShiftsResponseV2(success=True)
+        response.shifts.workers.extend([0, 4])
+        response.shifts.warehouses.extend([2, 1])
+        response.shifts.days.extend([0, 1])
+        response.shifts.start_minutes.extend([480, 480])
+        response.shifts.end_minutes.extend([1200, 1200])
+        response.warehouse_staffing.warehouses.append(2)
+        response.warehouse_staffing.days.append(0)
+        for column in ('required_basic_workers', 'scheduled_basic_workers', 'required_drivers', 'scheduled_drivers',
+                       'required_engineers', 'scheduled_engineers'):
+            getattr(response.warehouse_staffing, column).append(3)
+        response.warehouse_staffing.is_fully_staffed.append(False)
+        mock_stub_instance = MagicMock()
+        mock_stub_instance.OptimizeShiftsV2.side_effect = lambda request, timeout: sent.append(request) or response
+        mock_stub_class.return_value = mock_stub_instance
+        
+        client = ShiftOptimizerClient()
+        success, message, shifts, staffing = client.optimize_shifts_compact(
+            self.mock_workers,
+            self.mock_warehouses,
+            self.mock_cargo_loads,
+            self.days,
+            strategy="greedy"
+        )
+        
+        self.assertTrue(success)
+        request = sent[0]
+        self.assertEqual(list(request.days), [0, 1, 2])
+        self.assertEqual(request.strategy, "greedy")
+        self.assertEqual(list(request.workers.uuids), [str(worker.uuid) for worker in self.mock_workers])
+        self.assertEqual(list(request.workers.qualification_counts), [2] * 5)
+        # Preferences for warehouses outside the request are dropped
+        self.assertEqual(list(request.workers.preference_counts), [1, 0, 0, 0, 0])
+        self.assertEqual(list(request.workers.preference_warehouses), [2])
+        self.assertEqual(list(request.cargo_loads.warehouses), [0, 1, 2, 0, 1])
+        self.assertEqual(set(request.cargo_loads.dates), {(datetime.date(2025, 6, 2) - datetime.date(1970, 1, 1)).days})
+        
+        self.assertEqual(shifts[1], {
+            'worker_uuid': self.mock_workers[4].uuid,
+            'warehouse_uuid': self.mock_warehouses[1].uuid,
+            'day_of_week': 'tuesday',
+            'start_time': '08:00',
+            'end_time': '20:00'
+        })
+        self.assertEqual(staffing[0]['warehouse_name'], 'warehouse_2')
+        self.assertEqual(staffing[0]['required_basic_workers'], 3)
+        self.assertFalse(staffing[0]['is_fully_staffed'])
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_optimize_scenarios(self, mock_stub_class, mock_channel):
+        response = shift_optimizer_pb2.OptimizeScenariosResponse(success=True)
+        response.scenarios.add(name="closed", success=True, shift_count=1, missing_workers=2).shifts.add(
+            worker_uuid="w", warehouse_uuid="h", day_of_week="monday", start_time="08:00", end_time="16:00")
+        mock_stub_instance = MagicMock()
+        mock_stub_instance.OptimizeScenarios.return_value = response
+        mock_stub_class.return_value = mock_stub_instance
+        
+        client = ShiftOptimizerClient()
+        success, message, results = client.optimize_scenarios(
+            self.mock_workers, self.mock_warehouses, self.mock_cargo_loads, self.days,
+            [{'name': "closed", 'closed_warehouse_uuids': [self.mock_warehouses[0].uuid],
+              'cargo_loads': self.mock_cargo_loads[:1]}]
+        )
+        
+        self.assertTrue(success)
+        request = mock_stub_instance.OptimizeScenarios.call_args[0][0]
+        self.assertEqual(len(request.workers), len(self.mock_workers))
+        self.assertEqual(list(request.scenarios[0].closed_warehouse_uuids), [str(self.mock_warehouses[0].uuid)])
+        self.assertEqual(len(request.scenarios[0].upserted_cargo_loads), 1)
+        self.assertEqual(results[0]['name'], "closed")
+        self.assertEqual(results[0]['missing_workers'], 2)
+        self.assertEqual(results[0]['shifts'][0]['worker_uuid'], "w")
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_optimization_job(self, mock_stub_class, mock_channel):
+        mock_stub_instance = MagicMock()
+        mock_stub_instance.SubmitOptimization.return_value = shift_optimizer_pb2.SubmitOptimizationResponse(
+            success=True, job_id="job-1")
+        mock_stub_instance.GetOptimizationStatus.return_value = shift_optimizer_pb2.OptimizationJobStatus(
+            success=True, job_id="job-1", state=shift_optimizer_pb2.JOB_RUNNING, days_done=1, days_total=3)
+        result = shift_optimizer_pb2.OptimizeShiftsResponse(success=True)
+        result.shifts.add(worker_uuid="w", warehouse_uuid="h", day_of_week="monday", start_time="08:00",
+                          end_time="16:00")
+        mock_stub_instance.GetOptimizationResult.return_value = result
+        mock_stub_class.return_value = mock_stub_instance
+        
+        client = ShiftOptimizerClient()
+        success, message, job_id = client.submit_optimization(self.mock_workers, self.mock_warehouses,
+                                                              self.mock_cargo_loads, self.days, time_budget=5.0)
+        self.assertTrue(success)
+        self.assertEqual(job_id, "job-1")
+        request = mock_stub_instance.SubmitOptimization.call_args[0][0]
+        self.assertEqual(len(request.workers), len(self.mock_workers))
+        self.assertEqual(request.time_budget_seconds, 5.0)
+        
+        success, message, status = client.get_optimization_status(job_id)
+        self.assertTrue(success)
+        self.assertEqual((status['state'], status['days_done'], status['days_total']), ('running', 1, 3))
+        
+        success, message, shifts, staffing = client.get_optimization_result(job_id)
+        self.assertTrue(success)
+        self.assertEqual(shifts[0]['worker_uuid'], "w")
+        
+        mock_stub_instance.SubmitOptimization.return_value = shift_optimizer_pb2.SubmitOptimizationResponse(
+            success=False, queue_full=True, message="Error: Job queue is full")
+        success, message, job_id = client.submit_optimization(self.mock_workers, self.mock_warehouses,
+                                                              self.mock_cargo_loads, self.days)
+        self.assertFalse(success)
+        self.assertIsNone(job_id)
+    
+    @patch('shift_optimizer.client.channels.grpc.insecure_channel')
+    def test_channel_pool(self, mock_channel):
+        mock_channel.side_effect = lambda target, options: MagicMock(target=target)
+        pool = ChannelPool()
+        
+        channel = pool.get('optimizer:50051')
+        self.assertIs(pool.get('optimizer:50051'), channel)
+        self.assertIsNot(pool.get('optimizer:50051', max_message_mb=8), channel)
+        self.assertEqual(mock_channel.call_count, 2)
+        
+        # After a fork the child opens its own channel and leaves the parent's connection alone
+        with patch('shift_optimizer.client.channels.os.getpid', return_value=os.getpid() + 1):
+            forked = pool.get('optimizer:50051')
+        self.assertIsNot(forked, channel)
+        channel.close.assert_not_called()
+        
+        with patch('shift_optimizer.client.channels.os.getpid', return_value=os.getpid() + 1):
+            pool.close()
+        forked.close.assert_called_once()
+        channel.close.assert_not_called()
+    
+    @patch('shift_optimizer.client.client.grpc.intercept_channel')
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_priority_and_overload(self, mock_stub_class, mock_channel, mock_intercept_channel):
+        client = ShiftOptimizerClient(priority='batch')
+        
+        channel, interceptor = mock_intercept_channel.call_args[0]
+        self.assertIs(channel, mock_channel.return_value)
+        mock_stub_class.assert_called_once_with(mock_intercept_channel.return_value)
+        continuation = MagicMock()
+        details = MagicMock(metadata=[('x-request-id', '1')])
+        interceptor.intercept_unary_unary(continuation, details, "request")
+        details._replace.assert_called_once_with(metadata=[('x-request-id', '1'), ('x-priority', 'batch')])
+        
+        class OverloadedError(grpc.RpcError):
+            def code(self):
+                return grpc.StatusCode.RESOURCE_EXHAUSTED
+            
+            def details(self):
+                return "Optimizer is overloaded (4 solves running, 32 waiting), retry later"
+        
+        mock_stub_class.return_value.OptimizeShifts.side_effect = OverloadedError()
+        success, message, _, _ = client.optimize_shifts(self.mock_workers, self.mock_warehouses,
+                                                        self.mock_cargo_loads, self.days)
+        self.assertFalse(success)
+        self.assertTrue(message.startswith("Optimizer server is busy, retry later"))
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_optimize_shifts_stream(self, mock_stub_class, mock_channel):
+        mock_stub_instance = MagicMock()
+        shifts = self.mock_success_response.shifts
+        mock_stub_instance.OptimizeShiftsStream.return_value = iter([
+            MagicMock(success=True, day="monday", shifts=shifts[:2],
+                      warehouse_staffing=self.mock_success_response.warehouse_staffing),
+            MagicMock(success=True, day="tuesday", shifts=shifts[2:], warehouse_staffing=[]),
+        ])
+        mock_stub_class.return_value = mock_stub_instance
+        
+        received = []
+        client = ShiftOptimizerClient()
+        success, message, shift_count, staffing = client.optimize_shifts_stream(
+            self.mock_workers,
+            self.mock_warehouses,
+            self.mock_cargo_loads,
+            self.days,
+            lambda day, chunk_shifts, chunk_staffing: received.append((day, len(chunk_shifts)))
+        )
+        
+        self.assertTrue(success)
+        self.assertEqual(shift_count, len(shifts))
+        self.assertEqual(received, [("monday", 2), ("tuesday", len(shifts) - 2)])
+        self.assertEqual(len(staffing), len(self.mock_success_response.warehouse_staffing))
+        
+        mock_stub_instance.OptimizeShiftsStream.return_value = iter([
+            MagicMock(success=False, message="Error: boom")
+        ])
+        success, message, shift_count, staffing = client.optimize_shifts_stream(
+            self.mock_workers, self.mock_warehouses, self.mock_cargo_loads, self.days, lambda *args: None
+        )
+        self.assertFalse(success)
+        self.assertEqual(message, "Error: boom")
+        
+        # Above chunk_size the workforce is uploaded in chunks on the bidirectional call
+        uploaded = []
+        
+        def upload_stream(chunks, timeout):
+            uploaded.extend(chunks)
+            return iter([MagicMock(success=True, day="monday", shifts=shifts, warehouse_staffing=[])])
+        
+        mock_stub_instance.OptimizeShiftsUploadStream.side_effect = upload_stream
+        success, message, shift_count, staffing = client.optimize_shifts_stream(
+            self.mock_workers, self.mock_warehouses, self.mock_cargo_loads, self.days, lambda *args: None,
+            chunk_size=1
+        )
+        self.assertTrue(success)
+        self.assertEqual(shift_count, len(shifts))
+        self.assertEqual(len(uploaded), 1 + len(self.mock_workers))
+        self.assertEqual(len(uploaded[0].warehouses), len(self.mock_warehouses))
+        self.assertTrue(all(len(chunk.workers) == 1 for chunk in uploaded[1:]))
+    
+    @patch('shift_optimizer.client.client.grpc.insecure_channel')
+    @patch('shift_optimizer.client.client.shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub')
+    def test_reoptimize_snapshot(self, mock_stub_class, mock_channel):
+        mock_stub_instance = MagicMock()
+        mock_stub_instance.OptimizeShifts.return_value = MagicMock(
+            success=True,
+            snapshot_id="def",
+            shifts=self.mock_success_response.shifts[:1],
+            removed_shifts=self.mock_success_response.shifts[1:]
+        )
+        mock_stub_class.return_value = mock_stub_instance
+        
+        client = ShiftOptimizerClient()
+        success, message, added, removed, snapshot_id = client.reoptimize_snapshot(
+            "abc",
+            self.days,
+            removed_worker_uuids=[self.worker_uuid]
+        )
+        
+        self.assertTrue(success)
+        self.assertEqual(snapshot_id, "def")
+        self.assertEqual(len(added), 1)
+        self.assertEqual(len(removed), len(self.mock_success_response.shifts) - 1)
+        
+        request = mock_stub_instance.OptimizeShifts.call_args[0][0]
+        self.assertTrue(request.incremental)
+        self.assertEqual(list(request.delta.removed_worker_uuids), [self.worker_uuid])
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
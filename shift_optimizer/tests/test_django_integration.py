@@ -13,6 +13,8 @@ mock_django_conf = MagicMock()
 mock_django_settings = MagicMock()
 sys.modules['django.conf'] = mock_django_conf
 sys.modules['django.conf.settings'] = mock_django_settings
+# No shared cache here; tests that need the worker frame cache give the service a store of their own
+mock_django_conf.settings.SHIFT_OPTIMIZER_WORKER_CACHE = None
 mock_user_models = MagicMock()
 mock_warehouses_models = MagicMock()
 mock_cargo_models = MagicMock()
@@ -25,7 +27,26 @@ sys.modules['cargo'] = MagicMock()
 sys.modules['cargo.models'] = mock_cargo_models
 sys.modules['shifts'] = MagicMock()
 sys.modules['shifts.models'] = mock_shifts_models
-from shift_optimizer.client.django_integration import ShiftOptimizationService
+from shift_optimizer.client.django_integration import ShiftOptimizationService, _worker_frames, _worker_data_changed
+from shift_optimizer.client.worker_cache import EncodedWorkers
+from shift_optimizer.client.client import ShiftOptimizerClient, DEFAULT_TIMEOUT
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+class DictCache:
+    # The calls of a Django cache used for the worker version stamps
+    def __init__(self):
+        self.values = {}
+    
+    def get(self, key):
+        return self.values.get(key)
+    
+    def set(self, key, value, timeout=None):
+        self.values[key] = value
+    
+    def get_many(self, keys):
+        return {key: self.values[key] for key in keys if key in self.values}
+    
+    def set_many(self, values, timeout=None):
+        self.values.update(values)
 class TestShiftOptimizationService(unittest.TestCase):
     def setUp(self):
         self.client_mock = MagicMock()
@@ -237,6 +258,108 @@ class TestShiftOptimizationService(unittest.TestCase):
                     self.assertIn('is_optimized', defaults, f"В вызове {i} отсутствует is_optimized")
                     self.assertTrue(defaults['is_optimized'], f"В вызове {i} is_optimized должен быть True")
     
+    def test_load_optimization_input_from_flat_rows(self):
+        warehouse_rows = [(i + 1, uid, f"warehouse_{i}", 50, 3, 1, 1, 1, True)
+                          for i, uid in enumerate(self.warehouse_uuids)]
+        worker_rows = [(i + 1, uid, f"worker_{i}") for i, uid in enumerate(self.worker_uuids)]
+        
+        warehouse_queryset = MagicMock()
+        warehouse_queryset.values_list.return_value = warehouse_rows
+        mock_warehouses_models.Warehouse.objects.filter = MagicMock(return_value=warehouse_queryset)
+        mock_user_models.User.objects.filter.return_value.values_list.return_value = worker_rows
+        mock_user_models.WorkerQualification.objects.filter.return_value.values_list.return_value = [
+            (1, 'cargo_driver', 2), (1, 'engineer', 3), (2, 'basic_worker', 1)
+        ]
+        mock_user_models.WorkerWarehousePreference.objects.filter.return_value.values_list.return_value = [
+            (1, 2, 1, 4.5), (3, 1, 2, None)
+        ]
+        mock_cargo_models.CargoLoad.objects.filter.return_value.values_list.return_value = [
+            (3, self.today, 1200)
+        ]
+        
+        with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient'):
+            service = ShiftOptimizationService()
+        error, workers, warehouses, cargo_loads, days = service._load_optimization_input(self.today)
+        
+        self.assertIsNone(error)
+        self.assertEqual([worker.uuid for worker in workers], self.worker_uuids)
+        self.assertEqual([(q.type, q.level) for q in workers[0].qualifications], [
+            (shift_optimizer_pb2.QualificationType.CARGO_DRIVER, 2), (shift_optimizer_pb2.QualificationType.ENGINEER, 3)
+        ])
+        self.assertEqual(workers[0].warehouse_preferences[0].warehouse_uuid, self.warehouse_uuids[1])
+        self.assertEqual(workers[2].warehouse_preferences[0].distance, 0.0)
+        self.assertEqual(len(workers[4].qualifications), 0)
+        self.assertEqual([warehouse.uuid for warehouse in warehouses], self.warehouse_uuids)
+        self.assertEqual(warehouses[0].min_engineers, 1)
+        self.assertEqual((cargo_loads[0].warehouse_uuid, cargo_loads[0].date, cargo_loads[0].total_weight),
+                         (self.warehouse_uuids[2], self.today.strftime("%Y-%m-%d"), 1200))
+        self.assertEqual(days, [self.today.strftime("%A").lower()])
+        
+        # The client copies the prepared messages into the request as they are
+        request = shift_optimizer_pb2.OptimizeShiftsRequest()
+        ShiftOptimizerClient._add_workers(MagicMock(), request.workers, workers)
+        self.assertEqual(list(request.workers), workers)
+    
+    def test_load_optimization_input_reuses_worker_frames(self):
+        warehouse_rows = [(i + 1, uid, f"warehouse_{i}", 50, 3, 1, 1, 1, True)
+                          for i, uid in enumerate(self.warehouse_uuids)]
+        worker_rows = [(i + 1, uid, f"worker_{i}") for i, uid in enumerate(self.worker_uuids)]
+        warehouse_queryset = MagicMock()
+        warehouse_queryset.values_list.return_value = warehouse_rows
+        mock_warehouses_models.Warehouse.objects.filter = MagicMock(return_value=warehouse_queryset)
+        mock_user_models.User.objects.filter.return_value.values_list.return_value = worker_rows
+        qualifications = MagicMock()
+        qualifications.values_list.return_value = [(1, 'cargo_driver', 2), (2, 'basic_worker', 1)]
+        qualifications.filter.return_value.values_list.return_value = [(2, 'engineer', 4)]
+        mock_user_models.WorkerQualification.objects.filter.return_value = qualifications
+        preferences = MagicMock()
+        preferences.values_list.return_value = [(1, 2, 1, 4.5)]
+        preferences.filter.return_value.values_list.return_value = []
+        mock_user_models.WorkerWarehousePreference.objects.filter.return_value = preferences
+        mock_cargo_models.CargoLoad.objects.filter.return_value.values_list.return_value = []
+        
+        with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient'):
+            service = ShiftOptimizationService()
+        service.worker_versions = DictCache()
+        _worker_frames.clear()
+        self.addCleanup(_worker_frames.clear)
+        # Everyone is new on the first load and reads all rows; a single changed worker reads its own
+        limit = patch('shift_optimizer.client.django_integration.CHANGED_WORKERS_QUERY_LIMIT', 1)
+        limit.start()
+        self.addCleanup(limit.stop)
+        
+        _, workers, _, _, _ = service._load_optimization_input(self.today, encoded=True)
+        self.assertIsInstance(workers, EncodedWorkers)
+        _, messages, _, _, _ = service._load_optimization_input(self.today)
+        self.assertEqual(workers.to_messages(), messages)
+        # The frames plus the rest of the request parse as one request
+        rest = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"])
+        request = shift_optimizer_pb2.OptimizeShiftsRequest.FromString(workers.to_bytes() + rest.SerializeToString())
+        self.assertEqual(list(request.workers), messages)
+        self.assertEqual(list(request.days), ["monday"])
+        
+        # Nothing changed: neither the stamps nor the qualification and preference rows are read again
+        qualifications.values_list.reset_mock()
+        with patch.object(service.worker_versions, 'get_many') as get_many:
+            _, cached, _, _, _ = service._load_optimization_input(self.today, encoded=True)
+        get_many.assert_not_called()
+        self.assertEqual(cached.frames, workers.frames)
+        qualifications.values_list.assert_not_called()
+        qualifications.filter.assert_not_called()
+        
+        # A bumped worker is encoded again from its own rows only
+        with patch('shift_optimizer.client.django_integration._worker_version_cache',
+                   return_value=service.worker_versions), patch('django.db.transaction.on_commit',
+                                                               side_effect=lambda bump: bump()):
+            _worker_data_changed(sender=None, instance=MagicMock(user_id=2))
+        _, updated, _, _, _ = service._load_optimization_input(self.today, encoded=True)
+        qualifications.filter.assert_called_once_with(user_id__in=[2])
+        updated_workers = updated.to_messages()
+        self.assertEqual([(q.type, q.level) for q in updated_workers[1].qualifications],
+                         [(shift_optimizer_pb2.QualificationType.ENGINEER, 4)])
+        self.assertEqual(updated.frames[0], workers.frames[0])
+        self.assertEqual(updated.frames[2:], workers.frames[2:])
+    
     def test_optimize_shifts_date_validation(self):
         
         with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient') as client_class_mock:
@@ -265,6 +388,21 @@ class TestShiftOptimizationService(unittest.TestCase):
             
             client_instance.optimize_shifts.assert_not_called()
     
+    def _mock_bulk_save(self, stored_rows=()):
+        mock_user_models.User.objects.filter.return_value.values_list.return_value = [
+            (uuid.UUID(uid), i + 1) for i, uid in enumerate(self.worker_uuids)
+        ]
+        mock_warehouses_models.Warehouse.objects.filter = MagicMock()
+        mock_warehouses_models.Warehouse.objects.filter.return_value.values_list.return_value = [
+            (uuid.UUID(uid), i + 1) for i, uid in enumerate(self.warehouse_uuids)
+        ]
+        mock_shifts_models.Shift = MagicMock(side_effect=lambda **fields: fields)
+        mock_shifts_models.Shift.objects.filter.return_value.values_list.return_value = list(stored_rows)
+        atomic = patch('django.db.transaction.atomic')
+        atomic.start()
+        self.addCleanup(atomic.stop)
+        return mock_shifts_models.Shift.objects
+    
     def test_save_optimized_shifts_success(self):
         
         with patch.dict('sys.modules', {
@@ -272,10 +410,13 @@ class TestShiftOptimizationService(unittest.TestCase):
             'warehouses.models': mock_warehouses_models,
             'shifts.models': mock_shifts_models,
         }):
-            self._reset_mocks()
-            
-            mock_update_or_create = MagicMock(return_value=(MagicMock(), True))
-            mock_shifts_models.Shift.objects.update_or_create = mock_update_or_create
+            nine, five = datetime.time(9), datetime.time(17)
+            # Worker 1 keeps its shift, worker 2 moves to another warehouse, worker 5's old shift is stale
+            shift_objects = self._mock_bulk_save(stored_rows=[
+                (11, 1, 1, 'monday', nine, five),
+                (12, 2, 1, 'monday', nine, five),
+                (15, 5, 3, 'monday', nine, five),
+            ])
             
             service = ShiftOptimizationService()
             
@@ -286,15 +427,23 @@ class TestShiftOptimizationService(unittest.TestCase):
                     'day_of_week': 'monday',
                     'start_time': '09:00',
                     'end_time': '17:00'
-                } for i in range(5)
+                } for i in range(4)
             ]
             
             success, message, saved_count = service.save_optimized_shifts(shifts)
             
             self.assertTrue(success)
-            self.assertEqual(saved_count, 5)
+            self.assertEqual(saved_count, 4)
+            self.assertEqual(message, "Saved 4 shifts: 2 created, 1 updated, 1 removed, 1 unchanged")
             
-            self.assertEqual(mock_update_or_create.call_count, 5)
+            shift_objects.filter.assert_any_call(id__in=[15])
+            shift_objects.filter.return_value.delete.assert_called_once()
+            # New and moved shifts are written by one upsert on the unique key
+            upserted = shift_objects.bulk_create.call_args[0][0]
+            self.assertEqual([(shift['user_id'], shift['warehouse_id']) for shift in upserted], [(2, 2), (3, 3), (4, 1)])
+            self.assertTrue(shift_objects.bulk_create.call_args[1]['update_conflicts'])
+            self.assertEqual(shift_objects.bulk_create.call_args[1]['unique_fields'], ['user', 'day_of_week', 'start_time'])
+            shift_objects.update_or_create.assert_not_called()
     
     def test_save_optimized_shifts_worker_not_found(self):
         
@@ -303,65 +452,108 @@ class TestShiftOptimizationService(unittest.TestCase):
             'warehouses.models': mock_warehouses_models,
             'shifts.models': mock_shifts_models,
         }):
-            self._reset_mocks()
-            
-            mock_update_or_create = MagicMock(return_value=(MagicMock(), True))
-            mock_shifts_models.Shift.objects.update_or_create = mock_update_or_create
+            shift_objects = self._mock_bulk_save()
             
             service = ShiftOptimizationService()
             
             invalid_worker_uuid = str(uuid.uuid4())
             shifts = [
                 {
-                    'worker_uuid': self.worker_uuids[0],
-                    'warehouse_uuid': self.warehouse_uuids[0],
-                    'day_of_week': 'monday',
-                    'start_time': '09:00',
-                    'end_time': '17:00'
-                },
-                {
-                    'worker_uuid': invalid_worker_uuid,
-                    'warehouse_uuid': self.warehouse_uuids[1],
-                    'day_of_week': 'monday',
-                    'start_time': '09:00',
-                    'end_time': '17:00'
-                },
-                {
-                    'worker_uuid': self.worker_uuids[2],
-                    'warehouse_uuid': self.warehouse_uuids[2],
-                    'day_of_week': 'monday',
-                    'start_time': '09:00',
-                    'end_time': '17:00'
-                },
-                {
-                    'worker_uuid': self.worker_uuids[3],
-                    'warehouse_uuid': self.warehouse_uuids[0],
-                    'day_of_week': 'monday',
-                    'start_time': '09:00',
-                    'end_time': '17:00'
-                },
-                {
-                    'worker_uuid': self.worker_uuids[4],
-                    'warehouse_uuid': self.warehouse_uuids[1],
+                    'worker_uuid': worker_uuid,
+                    'warehouse_uuid': self.warehouse_uuids[i % 3],
                     'day_of_week': 'monday',
                     'start_time': '09:00',
                     'end_time': '17:00'
-                }
+                } for i, worker_uuid in enumerate(self.worker_uuids[:4] + [invalid_worker_uuid])
             ]
             
-            def mock_worker_get_with_exception(uuid=None, **kwargs):
-                if uuid == invalid_worker_uuid:
-                    raise mock_user_models.Worker.DoesNotExist(f"Worker with UUID {uuid} not found")
-                return next((w for w in self.mock_workers if w.uuid == uuid), None)
-            
-            mock_user_models.Worker.objects.get.side_effect = mock_worker_get_with_exception
-            
             success, message, saved_count = service.save_optimized_shifts(shifts)
             
             self.assertTrue(success)
             self.assertEqual(saved_count, 4)
             
-            self.assertEqual(mock_update_or_create.call_count, 4)
+            self.assertEqual(len(shift_objects.bulk_create.call_args[0][0]), 4)
+    def test_streaming_saves_each_day_whole(self):
+        with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient'):
+            service = ShiftOptimizationService()
+        warehouses = [shift_optimizer_pb2.Warehouse(uuid=uid) for uid in self.warehouse_uuids]
+        service._load_optimization_input = MagicMock(return_value=(None, [], warehouses, [], ['monday', 'tuesday']))
+        service.save_optimized_shifts = MagicMock(side_effect=lambda shifts, **kwargs: (True, "", len(shifts)))
+        
+        def stream(workers, warehouses, cargo_loads, days, on_chunk, **kwargs):
+            # Monday arrives in two chunks
+            on_chunk('monday', [{'n': 1}, {'n': 2}], [])
+            on_chunk('monday', [{'n': 3}], [])
+            on_chunk('tuesday', [{'n': 4}], [])
+            return True, "Optimization successful", 4, []
+        
+        service.client.optimize_shifts_stream.side_effect = stream
+        success, message, saved_count, days_saved, staffing = service.optimize_shifts_streaming(self.today)
+        
+        self.assertTrue(success)
+        self.assertEqual((saved_count, days_saved), (4, 2))
+        # Each save gets only its own day's shifts; nothing is kept for the whole period
+        saves = [([shift['n'] for shift in call[0][0]], call[1]['days'])
+                 for call in service.save_optimized_shifts.call_args_list]
+        self.assertEqual(saves, [([1, 2, 3], ['monday']), ([4], ['tuesday'])])
+        self.assertEqual(service.save_optimized_shifts.call_args[1]['warehouse_uuids'], self.warehouse_uuids)
+    
+    def test_streaming_reports_progress(self):
+        with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient'):
+            service = ShiftOptimizationService()
+        warehouses = [shift_optimizer_pb2.Warehouse(uuid=uid) for uid in self.warehouse_uuids]
+        service._load_optimization_input = MagicMock(
+            return_value=(None, [MagicMock()] * 3, warehouses, [MagicMock()], ['monday', 'tuesday'])
+        )
+        service.save_optimized_shifts = MagicMock(side_effect=lambda shifts, **kwargs: (True, "", len(shifts)))
+        
+        def stream(workers, warehouses, cargo_loads, days, on_chunk, **kwargs):
+            on_chunk('monday', [{'n': 1}, {'n': 2}], [])
+            on_chunk('tuesday', [{'n': 3}], [])
+            return True, "Optimization successful", 3, []
+        
+        service.client.optimize_shifts_stream.side_effect = stream
+        reports = []
+        service.optimize_shifts_streaming(self.today, progress=lambda stage, **counts: reports.append((stage, counts)))
+        
+        self.assertEqual(reports, [
+            ('loading', {}),
+            ('solving', {'workers': 3, 'warehouses': len(warehouses), 'cargo_loads': 1, 'days': 2}),
+            ('saving', {'days_saved': 1, 'shifts': 2}),
+            ('saving', {'days_saved': 2, 'shifts': 3}),
+        ])
+    
+    def test_failing_progress_does_not_fail_optimization(self):
+        with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient'):
+            service = ShiftOptimizationService()
+        service.upload_chunk_size = 2000
+        service._load_optimization_input = MagicMock(return_value=(None, [], [], [], ['monday']))
+        service.save_optimized_shifts = MagicMock(return_value=(True, "", 1))
+        service.client.optimize_shifts.return_value = (True, "Optimization successful", [{'n': 1}], [])
+        
+        success, message, shifts, staffing = service.optimize_shifts(
+            self.today, progress=MagicMock(side_effect=RuntimeError("result backend is down"))
+        )
+        
+        self.assertTrue(success)
+        service.save_optimized_shifts.assert_called_once()
+    
+    def test_timeout_reaches_client(self):
+        with patch('shift_optimizer.client.django_integration.ShiftOptimizerClient'):
+            service = ShiftOptimizationService()
+        service.upload_chunk_size = 2000
+        service._load_optimization_input = MagicMock(return_value=(None, [], [], [], ['monday']))
+        service.save_optimized_shifts = MagicMock(return_value=(True, "", 0))
+        service.client.optimize_shifts.return_value = (True, "Optimization successful", [], [])
+        service.client.optimize_shifts_stream.return_value = (True, "Optimization successful", 0, [])
+        
+        service.optimize_shifts(self.today)
+        service.optimize_shifts_streaming(self.today, timeout=None)
+        
+        self.assertEqual(service.client.optimize_shifts.call_args[1]['timeout'], DEFAULT_TIMEOUT)
+        # None lets a background run wait for the optimizer without a deadline
+        self.assertIsNone(service.client.optimize_shifts_stream.call_args[1]['timeout'])
+    
     def test_save_optimized_shifts_is_called(self):
         
         
@@ -1,36 +1,48 @@
+import asyncio
+import dataclasses
+import logging
 import unittest
 import uuid
 import sys
 import os
+import time
+import tempfile
+import threading
+from concurrent import futures
 from datetime import datetime
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+import grpc
+import numpy as np
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
-from shift_optimizer.server.models import Worker, Warehouse, CargoLoad, Qualification
+from shift_optimizer.server.models import Worker, Warehouse, CargoLoad, Qualification, ShiftTable, StaffingTable
 from shift_optimizer.server.optimizer import ShiftOptimizer
+from shift_optimizer.server.index import WorkforceIndex, WorkforceIndexBuilder, WorkerBitset
+from shift_optimizer.server.requirements import build_requirement_table
+from shift_optimizer.server.server import ShiftOptimizerServicer
+from shift_optimizer.server.aio_server import AsyncShiftOptimizerServicer
+from shift_optimizer.server import prefork
+from shift_optimizer.server.prefork import Supervisor
+from shift_optimizer.server.cache import ResultCache, request_fingerprint
+from shift_optimizer.server.single_flight import SingleFlight
+from shift_optimizer.server.admission import AdmissionController, AdmissionInterceptor, AdmissionRejected
+from shift_optimizer.server.admission import INTERACTIVE, BATCH
+from shift_optimizer.server.jobs import JobQueue, JobQueueFull, JOB_CANCELLED, JOB_RUNNING
+from shift_optimizer.server.snapshots import Snapshot, SnapshotStore
+from shift_optimizer.server.incremental import IncrementalSchedule
+from shift_optimizer.server import compact
+from shift_optimizer.server.columnar import index_from_messages, index_from_compact
+import shift_optimizer.shift_optimizer_pb2 as shift_optimizer_pb2
+import shift_optimizer.shift_optimizer_pb2_grpc as shift_optimizer_pb2_grpc
+from shift_optimizer.server.solvers import GreedySolver, MinCostFlowSolver, select_solver
+from shift_optimizer.benchmarks.synthetic import generate_instance, to_request
 class TestShiftOptimizer(unittest.TestCase):
     def setUp(self):
         self.basic_qualification = Qualification(type='BASIC_WORKER', level=1)
         self.driver_qualification = Qualification(type='CARGO_DRIVER', level=2)
         self.engineer_qualification = Qualification(type='ENGINEER', level=3)
         
-        self.workers = [
-            Worker(
-                uuid=str(uuid.uuid4()),
-                username=f"worker_{i}",
-                qualifications=[
-                    self.basic_qualification if i % 3 == 0 else None,
-                    self.driver_qualification if i % 3 == 1 else None,
-                    self.engineer_qualification if i % 3 == 2 else None
-                ],
-                warehouse_preferences=[]
-            ) for i in range(10)
-        ]
-        
-        for worker in self.workers:
-            worker.qualifications = [q for q in worker.qualifications if q is not None]
-        
         self.warehouses = [
             Warehouse(
                 uuid=str(uuid.uuid4()),
@@ -52,14 +64,25 @@ class TestShiftOptimizer(unittest.TestCase):
             ) for i, warehouse in enumerate(self.warehouses)
         ]
         
-        for i, worker in enumerate(self.workers):
-            worker.warehouse_preferences = [
-                {
-                    "warehouse_uuid": self.warehouses[i % 3].uuid,
-                    "priority": 1,
-                    "distance": 10.0
-                }
-            ]
+        # Models are frozen, so every worker is built with its final qualifications and preferences
+        self.workers = [
+            Worker(
+                uuid=str(uuid.uuid4()),
+                username=f"worker_{i}",
+                qualifications=[q for q in (
+                    self.basic_qualification if i % 3 == 0 else None,
+                    self.driver_qualification if i % 3 == 1 else None,
+                    self.engineer_qualification if i % 3 == 2 else None
+                ) if q is not None],
+                warehouse_preferences=[
+                    {
+                        "warehouse_uuid": self.warehouses[i % 3].uuid,
+                        "priority": 1,
+                        "distance": 10.0
+                    }
+                ]
+            ) for i in range(10)
+        ]
         
         self.days = ["monday", "tuesday", "wednesday"]
         
@@ -81,101 +104,133 @@ class TestShiftOptimizer(unittest.TestCase):
         self.assertGreater(len(engineers), 0)
         
         day = self.days[0]
-        warehouse_uuid = self.warehouses[0].uuid
         
-        requirements = {
-            'scheduled_basic_workers': 0,
-            'scheduled_drivers': 0,
-            'scheduled_engineers': 0
-        }
+        requirements = self.optimizer._calculate_warehouse_requirements()
         
         self.optimizer.shifts = []
-        self.optimizer.scheduled_workers = {d: set() for d in self.days}
+        self.optimizer.scheduled_workers = {d: WorkerBitset(len(self.workers)) for d in self.days}
         
+        basic_candidates = [self.workers.index(w) for w in basic_workers[:2]]
         self.optimizer._assign_workers_by_qualification(
-            basic_workers[:2], day, warehouse_uuid, 'BASIC_WORKER', 2, requirements
+            basic_candidates, day, 0, 0, 2, requirements
         )
         
-        self.assertEqual(requirements['scheduled_basic_workers'], 2)
+        self.assertEqual(requirements.scheduled[0, 0, 0], 2)
         self.assertEqual(len(self.optimizer.shifts), 2)
         
         self.assertEqual(len(self.optimizer.scheduled_workers[day]), 2)
         
-        assigned_worker_uuids = list(self.optimizer.scheduled_workers[day])
-        assigned_workers = [w for w in self.workers if w.uuid in assigned_worker_uuids]
+        assigned_worker_uuids = [self.workers[i].uuid for i in self.optimizer.scheduled_workers[day]]
+        self.assertEqual(sorted(assigned_worker_uuids), sorted(w.uuid for w in basic_workers[:2]))
         
         orig_shifts_count = len(self.optimizer.shifts)
         self.optimizer._assign_workers_by_qualification(
-            assigned_workers, day, warehouse_uuid, 'BASIC_WORKER', 2, requirements
+            list(self.optimizer.scheduled_workers[day]), day, 0, 0, 2, requirements
         )
         
         self.assertEqual(len(self.optimizer.shifts), orig_shifts_count)
+        self.assertEqual(requirements.scheduled[0, 0, 0], 2)
+    
+    def test_candidate_pools_and_bitset(self):
+        index = WorkforceIndex(self.workers, self.warehouses)
+        
+        for warehouse_idx in range(len(self.warehouses)):
+            order = list(index.ordering(warehouse_idx))
+            for qualification_type in ('BASIC_WORKER', 'CARGO_DRIVER', 'ENGINEER'):
+                pool = index.candidate_pool(warehouse_idx, qualification_type)
+                expected = [i for i in order
+                            if any(q.type == qualification_type for q in self.workers[i].qualifications)]
+                self.assertEqual(pool, expected)
+        
+        bitset = WorkerBitset(20)
+        for worker_idx in (0, 7, 8, 19, 7):
+            bitset.add(worker_idx)
+        self.assertEqual(len(bitset), 4)
+        self.assertEqual(list(bitset), [0, 7, 8, 19])
+        self.assertIn(19, bitset)
+        self.assertNotIn(9, bitset)
     
     def test_calculate_warehouse_requirements(self):
         requirements = self.optimizer._calculate_warehouse_requirements()
         
-        for day in self.days:
-            self.assertIn(day, requirements)
-            
-            self.assertTrue(isinstance(requirements[day], dict))
+        self.assertEqual(requirements.days, self.days)
+        self.assertEqual(requirements.warehouse_uuids, [w.uuid for w in self.warehouses])
+        self.assertEqual(requirements.warehouse_names, [w.name for w in self.warehouses])
+        self.assertEqual(requirements.required.shape, (3, len(self.days), len(self.warehouses)))
+        
+        for warehouse_idx, warehouse in enumerate(self.warehouses):
+            minimums = [warehouse.min_basic_workers, warehouse.min_drivers, warehouse.min_engineers]
+            self.assertEqual(requirements.minimum[:, warehouse_idx].tolist(), minimums)
             
-            for warehouse in self.warehouses:
-                self.assertIn(warehouse.uuid, requirements[day])
-                
-                day_req = requirements[day][warehouse.uuid]
-                
-                self.assertIn("warehouse_uuid", day_req)
-                self.assertIn("warehouse_name", day_req)
-                self.assertIn("min_basic_workers", day_req)
-                self.assertIn("min_drivers", day_req)
-                self.assertIn("min_engineers", day_req)
-                self.assertIn("total_basic_workers", day_req)
-                self.assertIn("total_drivers", day_req)
-                self.assertIn("total_engineers", day_req)
-                self.assertIn("scheduled_basic_workers", day_req)
-                self.assertIn("scheduled_drivers", day_req)
-                self.assertIn("scheduled_engineers", day_req)
-                
-                self.assertEqual(day_req["warehouse_uuid"], warehouse.uuid)
-                self.assertEqual(day_req["warehouse_name"], warehouse.name)
-                self.assertEqual(day_req["min_basic_workers"], warehouse.min_basic_workers)
-                self.assertEqual(day_req["min_drivers"], warehouse.min_drivers)
-                self.assertEqual(day_req["min_engineers"], warehouse.min_engineers)
-                
-                self.assertGreaterEqual(day_req["total_basic_workers"], warehouse.min_basic_workers)
-                self.assertGreaterEqual(day_req["total_drivers"], warehouse.min_drivers)
-                self.assertGreaterEqual(day_req["total_engineers"], warehouse.min_engineers)
-                
-                self.assertEqual(day_req["scheduled_basic_workers"], 0)
-                self.assertEqual(day_req["scheduled_drivers"], 0)
-                self.assertEqual(day_req["scheduled_engineers"], 0)
+            for day_idx in range(len(self.days)):
+                for qualification_idx in range(3):
+                    self.assertGreaterEqual(requirements.required[qualification_idx, day_idx, warehouse_idx],
+                                            minimums[qualification_idx])
+                    self.assertEqual(requirements.scheduled[qualification_idx, day_idx, warehouse_idx], 0)
+    
+    def test_requirements_from_cargo(self):
+        warehouse = self.warehouses[0]
+        cargo_loads = [
+            CargoLoad(warehouse_uuid=warehouse.uuid, date="2023-06-05", total_weight=12500),
+            CargoLoad(warehouse_uuid=warehouse.uuid, date="2023-06-05", total_weight=3000),
+            CargoLoad(warehouse_uuid=warehouse.uuid, date="2023-06-06", total_weight=0),
+            CargoLoad(warehouse_uuid="unknown", date="2023-06-05", total_weight=90000),
+        ]
+        
+        requirements = build_requirement_table(self.warehouses, cargo_loads, ["monday", "tuesday", "monday"])
+        
+        self.assertEqual(requirements.days, ["monday", "tuesday"])
+        self.assertEqual(requirements.required[:, 0, 0].tolist(), [13, 3, 2])
+        self.assertEqual(requirements.required[:, 1, 0].tolist(), [1, 1, 1])
+        self.assertEqual(requirements.required[:, 0, 1].tolist(), [1, 1, 1])
     
     def test_sort_workers_by_preference(self):
         warehouse_uuid = self.warehouses[0].uuid
-        sorted_workers = self.optimizer._sort_workers_by_preference(warehouse_uuid)
+        index = WorkforceIndex(self.workers, self.warehouses)
+        sorted_workers = [index.workers[i] for i in index.ordering(index.warehouse_ordinals[warehouse_uuid])]
         
-        self.assertGreater(len(sorted_workers), 0)
+        self.assertEqual(len(sorted_workers), len(self.workers))
         
         for worker in sorted_workers:
             self.assertIsInstance(worker, Worker)
         
-        has_preference = False
-        for worker in sorted_workers:
-            for pref in worker.warehouse_preferences:
-                if pref["warehouse_uuid"] == warehouse_uuid:
-                    has_preference = True
-                    break
-            
-            if has_preference:
-                break
-                
-        self.assertTrue(has_preference, "No workers with preference for this warehouse found")
+        # Workers who prefer the warehouse come before those who do not
+        self.assertTrue(any(pref["warehouse_uuid"] == warehouse_uuid
+                            for pref in sorted_workers[0].warehouse_preferences),
+                        "No workers with preference for this warehouse found")
+    
+    def test_preference_index_ordering(self):
+        warehouse = self.warehouses[0]
+        workers = [
+            Worker(uuid="w-0", username="w0", warehouse_preferences=[]),
+            Worker(uuid="w-1", username="w1", qualifications=[self.basic_qualification], warehouse_preferences=[
+                {"warehouse_uuid": warehouse.uuid, "priority": 2, "distance": 1.0}
+            ]),
+            Worker(uuid="w-2", username="w2", warehouse_preferences=[
+                {"warehouse_uuid": warehouse.uuid, "priority": 1, "distance": 7.5},
+                {"warehouse_uuid": warehouse.uuid, "priority": 9, "distance": 0.0}
+            ]),
+            Worker(uuid="w-3", username="w3", qualifications=[self.basic_qualification], warehouse_preferences=[
+                {"warehouse_uuid": warehouse.uuid, "priority": 1, "distance": 2.5}
+            ]),
+            Worker(uuid="w-4", username="w4", qualifications=[self.basic_qualification], warehouse_preferences=[]),
+        ]
+        
+        index = WorkforceIndex(workers, self.warehouses)
+        
+        self.assertEqual(index.priorities[2, 0], 1)
+        self.assertEqual(index.distances[2, 0], 7.5)
+        self.assertEqual([index.worker_uuids[i] for i in index.ordering(0)], ["w-3", "w-2", "w-1", "w-0", "w-4"])
+        self.assertIs(index.ordering(0), index.ordering(0))
+        # Candidates keep the preference order among the workers with the qualification
+        self.assertEqual([index.worker_uuids[i] for i in index.candidate_array(0, "BASIC_WORKER")],
+                         ["w-3", "w-1", "w-4"])
     
     def test_assign_minimum_staff(self):
         requirements = self.optimizer._calculate_warehouse_requirements()
         
         self.optimizer.shifts = []
-        self.optimizer.scheduled_workers = {day: set() for day in self.days}
+        self.optimizer.scheduled_workers = {day: WorkerBitset(len(self.workers)) for day in self.days}
         
         self.optimizer._assign_minimum_staff(requirements)
         
@@ -221,7 +276,7 @@ class TestShiftOptimizer(unittest.TestCase):
         
         for warehouse in self.warehouses:
             self.assertIn(warehouse.uuid, reported_warehouses)
-            
+        
         for day in self.days:
             self.assertIn(day, reported_days)
     
@@ -243,5 +298,935 @@ class TestShiftOptimizer(unittest.TestCase):
         
         min_workers_required = min(len(self.workers), sum(w.min_workers for w in self.warehouses))
         self.assertGreaterEqual(len(assigned_workers), min_workers_required)
+    def test_parallel_days_match_serial(self):
+        days = ["monday", "tuesday", "monday", "wednesday"]
+        serial = ShiftOptimizer(self.workers, self.warehouses, self.cargo_loads, days).optimize()
+        parallel = ShiftOptimizer(self.workers, self.warehouses, self.cargo_loads, days, processes=2).optimize()
+        
+        self.assertEqual(parallel, serial)
+    
+    def test_min_cost_flow_staffs_at_least_greedy(self):
+        workers, warehouses, cargo_loads, days = generate_instance(60, 8, 3, seed=7)
+        _, greedy_staffing = ShiftOptimizer(workers, warehouses, cargo_loads, days).optimize()
+        shifts, flow_staffing = ShiftOptimizer(workers, warehouses, cargo_loads, days,
+                                               strategy='min_cost_flow').optimize()
+        
+        greedy_filled = sum(s.scheduled_basic_workers + s.scheduled_drivers + s.scheduled_engineers
+                            for s in greedy_staffing)
+        flow_filled = sum(s.scheduled_basic_workers + s.scheduled_drivers + s.scheduled_engineers
+                          for s in flow_staffing)
+        self.assertGreaterEqual(flow_filled, greedy_filled)
+        self.assertGreaterEqual(sum(s.is_fully_staffed for s in flow_staffing),
+                                sum(s.is_fully_staffed for s in greedy_staffing))
+        
+        booked = [(shift.worker_uuid, shift.day_of_week) for shift in shifts]
+        self.assertEqual(len(booked), len(set(booked)))
+    
+    def test_min_cost_flow_prefers_completing_a_warehouse(self):
+        # One engineer-driver and one driver: the greedy pass hands the engineer-driver to the
+        # driver slot of its favourite warehouse and starves the engineer slot
+        both = Worker(uuid="both", username="both", qualifications=[self.driver_qualification,
+                                                                    self.engineer_qualification],
+                      warehouse_preferences=[{"warehouse_uuid": "w", "priority": 1, "distance": 1.0}])
+        driver = Worker(uuid="driver", username="driver", qualifications=[self.driver_qualification],
+                        warehouse_preferences=[{"warehouse_uuid": "w", "priority": 2, "distance": 1.0}])
+        warehouse = Warehouse(uuid="w", name="w", capacity=100, min_workers=2, min_basic_workers=0,
+                              min_drivers=1, min_engineers=1, is_active=True)
+        
+        _, staffing = ShiftOptimizer([both, driver], [warehouse], [], ["monday"],
+                                     strategy='min_cost_flow').optimize()
+        self.assertTrue(staffing[0].is_fully_staffed)
+    
+    def test_local_search_fixes_starved_warehouse(self):
+        both = Worker(uuid="both", username="both", qualifications=[self.driver_qualification,
+                                                                    self.engineer_qualification],
+                      warehouse_preferences=[{"warehouse_uuid": "w", "priority": 1, "distance": 1.0}])
+        driver = Worker(uuid="driver", username="driver", qualifications=[self.driver_qualification],
+                        warehouse_preferences=[{"warehouse_uuid": "w", "priority": 2, "distance": 1.0}])
+        warehouse = Warehouse(uuid="w", name="w", capacity=100, min_workers=2, min_basic_workers=0,
+                              min_drivers=1, min_engineers=1, is_active=True)
+        
+        optimizer = ShiftOptimizer([both, driver], [warehouse], [], ["monday"], deadline=time.monotonic() + 1.0)
+        shifts, staffing = optimizer.optimize()
+        
+        self.assertTrue(staffing[0].is_fully_staffed)
+        self.assertEqual(sorted(shift.worker_uuid for shift in shifts), ["both", "driver"])
+        self.assertGreaterEqual(optimizer.search_stats.improvements, 1)
+    
+    def test_local_search_never_worsens_greedy(self):
+        workers, warehouses, cargo_loads, days = generate_instance(80, 10, 3, seed=3)
+        _, greedy_staffing = ShiftOptimizer(workers, warehouses, cargo_loads, days).optimize()
+        shifts, searched_staffing = ShiftOptimizer(workers, warehouses, cargo_loads, days,
+                                                   deadline=time.monotonic() + 0.5).optimize()
+        
+        self.assertGreaterEqual(sum(s.is_fully_staffed for s in searched_staffing),
+                                sum(s.is_fully_staffed for s in greedy_staffing))
+        booked = [(shift.worker_uuid, shift.day_of_week) for shift in shifts]
+        self.assertEqual(len(booked), len(set(booked)))
+    
+    def test_servicer_stops_before_deadline(self):
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"], strategy="greedy", anytime=True)
+        context = MagicMock()
+        context.time_remaining.return_value = 0.5
+        
+        with patch.object(ShiftOptimizerServicer, '_convert_workers', return_value=self.workers), \
+                patch.object(ShiftOptimizerServicer, '_convert_warehouses', return_value=self.warehouses), \
+                patch.object(ShiftOptimizerServicer, '_convert_cargo_loads', return_value=self.cargo_loads):
+            started = time.monotonic()
+            response = ShiftOptimizerServicer().OptimizeShifts(request, context)
+            elapsed = time.monotonic() - started
+        
+        self.assertTrue(response.success)
+        self.assertLess(elapsed, 0.5)
+        self.assertGreater(response.search_iterations, 0)
+    
+    def test_request_fingerprint_ignores_order(self):
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday", "tuesday"])
+        for i in range(3):
+            worker = request.workers.add(uuid=f"worker_{i}", username=f"worker_{i}")
+            worker.qualifications.add(type=shift_optimizer_pb2.BASIC_WORKER, level=1)
+            worker.qualifications.add(type=shift_optimizer_pb2.ENGINEER, level=2)
+            worker.warehouse_preferences.add(warehouse_uuid="a", priority=1, distance=1.0)
+            worker.warehouse_preferences.add(warehouse_uuid="b", priority=2, distance=2.0)
+            request.warehouses.add(uuid=f"warehouse_{i}", name=f"warehouse_{i}", is_active=True)
+        
+        shuffled = shift_optimizer_pb2.OptimizeShiftsRequest(days=["tuesday", "monday"])
+        for i in reversed(range(3)):
+            worker = shuffled.workers.add(uuid=f"worker_{i}", username=f"worker_{i}")
+            worker.qualifications.add(type=shift_optimizer_pb2.ENGINEER, level=2)
+            worker.qualifications.add(type=shift_optimizer_pb2.BASIC_WORKER, level=1)
+            worker.warehouse_preferences.add(warehouse_uuid="b", priority=2, distance=2.0)
+            worker.warehouse_preferences.add(warehouse_uuid="a", priority=1, distance=1.0)
+            shuffled.warehouses.add(uuid=f"warehouse_{i}", name=f"warehouse_{i}", is_active=True)
+        
+        self.assertEqual(request_fingerprint(request, "greedy"), request_fingerprint(shuffled, "greedy"))
+        self.assertNotEqual(request_fingerprint(request, "greedy"), request_fingerprint(request, "min_cost_flow"))
+        
+        shuffled.workers[0].warehouse_preferences[0].priority = 3
+        self.assertNotEqual(request_fingerprint(request, "greedy"), request_fingerprint(shuffled, "greedy"))
+        
+        # The budget matters only to anytime search, whose results get no key at all
+        key = request_fingerprint(request, "greedy")
+        request.time_budget_seconds = 5.0
+        self.assertEqual(request_fingerprint(request, "greedy"), key)
+        request.anytime = True
+        self.assertIsNone(request_fingerprint(request, "greedy"))
+    
+    def test_result_cache_eviction(self):
+        now = [0.0]
+        cache = ResultCache(max_entries=2, ttl=10.0, clock=lambda: now[0])
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        self.assertEqual(cache.get("a"), b"1")
+        cache.put("c", b"3")
+        
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"3")
+        
+        now[0] = 11.0
+        self.assertIsNone(cache.get("a"))
+        
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 2, 1))
+        
+        size_bound = ResultCache(max_entries=10, max_bytes=4)
+        size_bound.put("a", b"12")
+        size_bound.put("b", b"34")
+        size_bound.put("c", b"56")
+        self.assertIsNone(size_bound.get("a"))
+        self.assertEqual(size_bound.get("c"), b"56")
+    
+    def test_result_cache_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ResultCache(directory=directory).put("key", b"payload")
+            
+            restarted = ResultCache(directory=directory)
+            self.assertEqual(restarted.get("key"), b"payload")
+            self.assertEqual(restarted.stats()['disk_hits'], 1)
+    
+    def test_servicer_serves_repeat_requests_from_cache(self):
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"])
+        worker = request.workers.add(uuid="w1", username="w1")
+        worker.qualifications.add(type=shift_optimizer_pb2.BASIC_WORKER, level=1)
+        request.warehouses.add(uuid="a", name="a", min_workers=1, min_basic_workers=1, is_active=True)
+        
+        servicer = ShiftOptimizerServicer(default_strategy="greedy", cache=ResultCache())
+        first = servicer.OptimizeShifts(request, MagicMock())
+        with patch('shift_optimizer.server.server.ShiftOptimizer') as optimizer_class:
+            second = servicer.OptimizeShifts(request, MagicMock())
+            optimizer_class.assert_not_called()
+        
+        self.assertEqual(first, second)
+        self.assertEqual(servicer.cache.stats()['hits'], 1)
+        
+        # An anytime result depends on how long the search ran, so it is neither stored nor served
+        anytime = shift_optimizer_pb2.OptimizeShiftsRequest()
+        anytime.CopyFrom(request)
+        anytime.anytime, anytime.time_budget_seconds = True, 0.05
+        for _ in range(2):
+            self.assertTrue(servicer.OptimizeShifts(anytime, _FakeContext()).success)
+        self.assertEqual(servicer.cache.stats()['hits'], 1)
+        self.assertEqual(servicer.cache.stats()['entries'], 1)
+    
+    def test_single_flight_shares_leader_result(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+        
+        def compute(cancel_event):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "response"
+        
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("key", compute, _FakeContext())))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("key", compute, _FakeContext())))
+                     for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        while flight.followers < 3:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+        
+        self.assertEqual(results, ["response"] * 4)
+        self.assertEqual(len(calls), 1)
+    
+    def test_single_flight_cancels_when_every_caller_leaves(self):
+        flight = SingleFlight()
+        contexts = [_FakeContext(), _FakeContext()]
+        started = threading.Event()
+        observed = []
+        
+        def compute(cancel_event):
+            started.set()
+            observed.append(cancel_event.wait(5))
+            return "response"
+        
+        leader = threading.Thread(target=lambda: flight.do("key", compute, contexts[0]))
+        leader.start()
+        started.wait(5)
+        results = []
+        follower = threading.Thread(target=lambda: results.append(flight.do("key", compute, contexts[1])))
+        follower.start()
+        while flight.followers < 1:
+            time.sleep(0.01)
+        
+        contexts[0].terminate()
+        time.sleep(0.05)
+        self.assertEqual(observed, [])
+        
+        contexts[1].terminate()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(observed, [True])
+        self.assertFalse(follower.is_alive())
+    
+    def test_single_flight_new_caller_after_cancel_gets_result(self):
+        flight = SingleFlight()
+        first_context = _FakeContext()
+        started, unwinding = threading.Event(), threading.Event()
+        calls = []
+        
+        def compute(cancel_event):
+            calls.append(1)
+            if len(calls) == 1:
+                started.set()
+                cancel_event.wait(5)
+                # Still unwinding when the second caller arrives
+                unwinding.wait(5)
+                return "cancelled"
+            return "response"
+        
+        first_results = []
+        first = threading.Thread(target=lambda: first_results.append(flight.do("key", compute, first_context)))
+        first.start()
+        started.wait(5)
+        first_context.terminate()
+        
+        second = flight.do("key", compute, _FakeContext())
+        unwinding.set()
+        first.join(5)
+        
+        self.assertEqual(second, "response")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flight.leaders, 2)
+        self.assertEqual(flight.followers, 0)
+    
+    def test_snapshot_delta(self):
+        snapshot = Snapshot("s", self.workers, self.warehouses, self.cargo_loads, wire_size=100)
+        
+        workers, warehouses, cargo_loads, index = snapshot.apply([], [], [], [])
+        self.assertIs(workers, self.workers)
+        self.assertIs(index, snapshot.index)
+        
+        changed = Worker(uuid=self.workers[1].uuid, username="changed", qualifications=[self.basic_qualification])
+        added = Worker(uuid="new", username="new", qualifications=[self.engineer_qualification])
+        moved_load = CargoLoad(warehouse_uuid=self.warehouses[0].uuid, date="2023-06-01", total_weight=9000)
+        workers, _, cargo_loads, index = snapshot.apply([changed, added], [self.workers[0].uuid], [moved_load],
+                                                        [self.cargo_loads[2]])
+        
+        self.assertIsNone(index)
+        self.assertEqual([w.uuid for w in workers],
+                         [w.uuid for w in self.workers[1:]] + ["new"])
+        self.assertEqual(workers[0].username, "changed")
+        self.assertEqual(cargo_loads, [self.cargo_loads[1], moved_load])
+    
+    def test_snapshot_store_eviction(self):
+        store = SnapshotStore(max_snapshots=2)
+        for snapshot_id in ("a", "b"):
+            store.put(Snapshot(snapshot_id, self.workers, self.warehouses, [], wire_size=10))
+        store.get("a")
+        store.put(Snapshot("c", self.workers, self.warehouses, [], wire_size=10))
+        self.assertIsNone(store.get("b"))
+        self.assertIsNotNone(store.get("a"))
+        
+        budget = store.get("a").estimated_bytes
+        store = SnapshotStore(max_bytes=budget * 2)
+        for snapshot_id in ("a", "b", "c"):
+            store.put(Snapshot(snapshot_id, self.workers, self.warehouses, [], wire_size=10))
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.stats()['snapshots'], 2)
+    
+    def test_servicer_optimizes_uploaded_snapshot(self):
+        upload = shift_optimizer_pb2.UploadSnapshotRequest()
+        for i in range(4):
+            worker = upload.workers.add(uuid=f"w{i}", username=f"w{i}")
+            worker.qualifications.add(type=shift_optimizer_pb2.BASIC_WORKER, level=1)
+            worker.warehouse_preferences.add(warehouse_uuid="a", priority=i, distance=1.0)
+        upload.warehouses.add(uuid="a", name="a", min_workers=2, min_basic_workers=2, is_active=True)
+        
+        servicer = ShiftOptimizerServicer(default_strategy="greedy")
+        uploaded = servicer.UploadSnapshot(upload, MagicMock())
+        self.assertTrue(uploaded.success)
+        self.assertEqual(servicer.UploadSnapshot(upload, MagicMock()).snapshot_id, uploaded.snapshot_id)
+        
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"], snapshot_id=uploaded.snapshot_id)
+        request.delta.removed_worker_uuids.append("w0")
+        response = servicer.OptimizeShifts(request, MagicMock())
+        
+        direct = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"])
+        direct.workers.extend(upload.workers[1:])
+        direct.warehouses.extend(upload.warehouses)
+        self.assertEqual(response.shifts, servicer.OptimizeShifts(direct, MagicMock()).shifts)
+        self.assertEqual([shift.worker_uuid for shift in response.shifts], ["w1", "w2"])
+        
+        missing = servicer.OptimizeShifts(
+            shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"], snapshot_id="unknown"), MagicMock()
+        )
+        self.assertFalse(missing.success)
+        self.assertTrue(missing.snapshot_missing)
+    
+    def test_incremental_cargo_change_touches_one_cell(self):
+        workers, warehouses, cargo_loads, days = generate_instance(200, 10, 3, seed=11)
+        optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, days, strategy="greedy")
+        optimizer.optimize()
+        schedule = IncrementalSchedule.from_optimizer(optimizer)
+        
+        load = cargo_loads[0]
+        result = schedule.apply([], [], [], [load])
+        
+        self.assertEqual(len(result.warehouse_staffing), 1)
+        self.assertEqual(result.warehouse_staffing[0].warehouse_uuid, load.warehouse_uuid)
+        self.assertEqual(result.added_shifts, [])
+        self.assertGreater(len(result.removed_shifts), 0)
+        self.assertTrue(all(shift.warehouse_uuid == load.warehouse_uuid for shift in result.removed_shifts))
+        
+        # Bringing the load back re-staffs the cell from the workers that were just released
+        restored = schedule.apply([], [], [load], [])
+        self.assertEqual(restored.removed_shifts, [])
+        self.assertEqual({shift.worker_uuid for shift in restored.added_shifts},
+                         {shift.worker_uuid for shift in result.removed_shifts})
+    
+    def test_incremental_worker_changes(self):
+        workers, warehouses, cargo_loads, days = generate_instance(200, 10, 3, seed=12)
+        optimizer = ShiftOptimizer(workers, warehouses, cargo_loads, days, strategy="greedy")
+        shifts, _ = optimizer.optimize()
+        schedule = IncrementalSchedule.from_optimizer(optimizer)
+        
+        removed = shifts[0]
+        engineer = Worker(uuid="new-engineer", username="new-engineer",
+                          qualifications=[self.engineer_qualification],
+                          warehouse_preferences=[{"warehouse_uuid": removed.warehouse_uuid, "priority": 1,
+                                                  "distance": 1.0}])
+        result = schedule.apply([engineer], [removed.worker_uuid], [], [])
+        
+        self.assertIn(removed.worker_uuid, {shift.worker_uuid for shift in result.removed_shifts})
+        self.assertNotIn(removed.worker_uuid, {shift.worker_uuid for shift in result.added_shifts})
+        
+        # The patched schedule never double-books and keeps every cell within its requirement
+        placements = {}
+        for day_idx, day_placement in enumerate(schedule._placement):
+            for worker_idx, (warehouse_idx, qualification_idx) in day_placement.items():
+                self.assertTrue(schedule._eligible(worker_idx, qualification_idx))
+                placements.setdefault((day_idx, warehouse_idx, qualification_idx), []).append(worker_idx)
+        for (day_idx, warehouse_idx, qualification_idx), members in placements.items():
+            self.assertEqual(len(members), schedule.requirements.scheduled[qualification_idx, day_idx, warehouse_idx])
+            self.assertLessEqual(len(members), schedule.requirements.required[qualification_idx, day_idx, warehouse_idx])
+    
+    def test_servicer_incremental_chain(self):
+        upload = shift_optimizer_pb2.UploadSnapshotRequest()
+        for i in range(4):
+            worker = upload.workers.add(uuid=f"w{i}", username=f"w{i}")
+            worker.qualifications.add(type=shift_optimizer_pb2.BASIC_WORKER, level=1)
+            worker.warehouse_preferences.add(warehouse_uuid="a", priority=i, distance=1.0)
+        upload.warehouses.add(uuid="a", name="a", min_workers=2, min_basic_workers=2, is_active=True)
+        
+        servicer = ShiftOptimizerServicer(default_strategy="greedy")
+        snapshot_id = servicer.UploadSnapshot(upload, MagicMock()).snapshot_id
+        
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"], snapshot_id=snapshot_id,
+                                                            incremental=True)
+        request.delta.removed_worker_uuids.append("w0")
+        response = servicer.OptimizeShifts(request, MagicMock())
+        self.assertTrue(response.success)
+        self.assertEqual([shift.worker_uuid for shift in response.removed_shifts], ["w0"])
+        self.assertEqual([shift.worker_uuid for shift in response.shifts], ["w2"])
+        self.assertTrue(response.warehouse_staffing[0].is_fully_staffed)
+        
+        derived = servicer.snapshots.get(response.snapshot_id)
+        self.assertEqual([worker.uuid for worker in derived.workers], ["w1", "w2", "w3"])
+        self.assertIn((("monday",), "greedy"), derived.schedules)
+        
+        follow_up = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"], snapshot_id=response.snapshot_id,
+                                                              incremental=True)
+        follow_up.delta.removed_worker_uuids.append("w1")
+        response = servicer.OptimizeShifts(follow_up, MagicMock())
+        self.assertEqual([shift.worker_uuid for shift in response.removed_shifts], ["w1"])
+        self.assertEqual([shift.worker_uuid for shift in response.shifts], ["w3"])
+    
+    def test_optimize_by_day_matches_optimize(self):
+        workers, warehouses, cargo_loads, days = generate_instance(150, 8, 4, seed=13)
+        shifts, staffing = ShiftOptimizer(workers, warehouses, cargo_loads, days, strategy="greedy").optimize()
+        
+        streamed_days, streamed_shifts, streamed_staffing = [], [], []
+        for day, day_shifts, day_staffing in ShiftOptimizer(workers, warehouses, cargo_loads, days,
+                                                            strategy="greedy").optimize_by_day():
+            streamed_days.append(day)
+            streamed_shifts.extend(day_shifts)
+            streamed_staffing.extend(day_staffing)
+        
+        self.assertEqual(streamed_days, days)
+        self.assertEqual(sorted(streamed_shifts, key=repr), sorted(shifts, key=repr))
+        self.assertEqual(streamed_staffing, staffing)
+    
+    def test_servicer_streams_chunks_per_day(self):
+        workers, warehouses, cargo_loads, days = generate_instance(100, 5, 3, seed=14)
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=days, strategy="greedy")
+        servicer = ShiftOptimizerServicer(stream_chunk_size=10)
+        
+        with patch.object(servicer, '_convert_workers', return_value=workers), \
+                patch.object(servicer, '_convert_warehouses', return_value=warehouses), \
+                patch.object(servicer, '_convert_cargo_loads', return_value=cargo_loads):
+            chunks = list(servicer.OptimizeShiftsStream(request, _FakeContext()))
+            unary = servicer.OptimizeShifts(request, _FakeContext())
+        
+        self.assertTrue(all(chunk.success for chunk in chunks))
+        self.assertTrue(all(len(chunk.shifts) <= 10 for chunk in chunks))
+        self.assertEqual(list(dict.fromkeys(chunk.day for chunk in chunks)), days)
+        self.assertEqual(sum(len(chunk.warehouse_staffing) for chunk in chunks), len(unary.warehouse_staffing))
+        streamed = [shift for chunk in chunks for shift in chunk.shifts]
+        self.assertEqual(sorted(s.SerializeToString() for s in streamed),
+                         sorted(s.SerializeToString() for s in unary.shifts))
+    
+    def test_index_builder_matches_index(self):
+        workers, warehouses, _, _ = generate_instance(300, 12, 1, seed=15)
+        builder = WorkforceIndexBuilder(warehouses, capacity=16)
+        for start in range(0, len(workers), 70):
+            builder.add_workers(workers[start:start + 70])
+        built = builder.build(workers)
+        index = WorkforceIndex(workers, warehouses)
+        
+        np.testing.assert_array_equal(built.qualification_masks, index.qualification_masks)
+        np.testing.assert_array_equal(built.priorities, index.priorities)
+        np.testing.assert_array_equal(built.distances, index.distances)
+        with self.assertRaises(ValueError):
+            builder.build(workers[:-1])
+    
+    def test_servicer_accepts_chunked_upload(self):
+        request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday", "tuesday"], strategy="greedy")
+        for i in range(9):
+            worker = request.workers.add(uuid=f"w{i}", username=f"w{i}")
+            worker.qualifications.add(type=i % 3, level=1)
+            worker.warehouse_preferences.add(warehouse_uuid=f"h{i % 2}", priority=i % 4, distance=float(i))
+        for i in range(2):
+            request.warehouses.add(uuid=f"h{i}", name=f"h{i}", min_workers=3, min_basic_workers=1, min_drivers=1,
+                                   min_engineers=1, is_active=True)
+        request.cargo_loads.add(warehouse_uuid="h0", date="2025-06-02", total_weight=1500)
+        
+        header = shift_optimizer_pb2.OptimizeShiftsRequest(days=request.days, strategy="greedy")
+        header.warehouses.extend(request.warehouses)
+        header.cargo_loads.extend(request.cargo_loads)
+        chunks = [header] + [shift_optimizer_pb2.OptimizeShiftsRequest(workers=request.workers[start:start + 4])
+                             for start in range(0, len(request.workers), 4)]
+        
+        servicer = ShiftOptimizerServicer()
+        uploaded = servicer.OptimizeShiftsUpload(iter(chunks), _FakeContext())
+        self.assertTrue(uploaded.success)
+        self.assertEqual(uploaded, servicer.OptimizeShifts(request, _FakeContext()))
+        
+        streamed = list(servicer.OptimizeShiftsUploadStream(iter(chunks), _FakeContext()))
+        self.assertTrue(all(chunk.success for chunk in streamed))
+        self.assertEqual(list(dict.fromkeys(chunk.day for chunk in streamed)), list(request.days))
+        self.assertEqual(sorted(shift.SerializeToString() for chunk in streamed for shift in chunk.shifts),
+                         sorted(shift.SerializeToString() for shift in uploaded.shifts))
+    
+    def test_async_servicer_solves_in_process_pool(self):
+        workers, warehouses, cargo_loads, days = generate_instance(120, 6, 2, seed=16)
+        request = to_request(workers, warehouses, cargo_loads, days)
+        request.strategy = "greedy"
+        
+        servicer = AsyncShiftOptimizerServicer(solver_processes=1, cache=ResultCache())
+        try:
+            async def call_twice():
+                return await asyncio.gather(servicer.OptimizeShifts(request, _FakeContext()),
+                                            servicer.OptimizeShifts(request, _FakeContext()))
+            
+            first, second = asyncio.run(call_twice())
+            compact_request = compact.encode_request(workers, warehouses, cargo_loads, days)
+            compact_request.strategy = "greedy"
+            compact_response = asyncio.run(servicer.OptimizeShiftsV2(compact_request, _FakeContext()))
+        finally:
+            servicer.executor.shutdown()
+        
+        self.assertTrue(first.success)
+        self.assertEqual(first, second)
+        self.assertEqual(first, ShiftOptimizerServicer().OptimizeShifts(request, _FakeContext()))
+        self.assertEqual(compact_response, ShiftOptimizerServicer().OptimizeShiftsV2(compact_request, _FakeContext()))
+        self.assertEqual(servicer.cache.stats()['entries'], 2)
+    
+    def test_async_join_cancels_when_every_caller_leaves(self):
+        servicer = AsyncShiftOptimizerServicer.__new__(AsyncShiftOptimizerServicer)
+        servicer._in_flight, servicer._waiters = {}, {}
+        started, cancelled = [], []
+        
+        async def solve():
+            started.append(True)
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        
+        async def scenario():
+            callers = [asyncio.ensure_future(servicer._join("key", solve)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            callers[0].cancel()
+            await asyncio.sleep(0.05)
+            self.assertEqual(cancelled, [])
+            callers[1].cancel()
+            await asyncio.sleep(0.05)
+        
+        asyncio.run(scenario())
+        self.assertEqual(started, [True])
+        self.assertEqual(cancelled, [True])
+        self.assertEqual(servicer._in_flight, {})
+    
+    def test_async_join_starts_new_flight_after_cancel(self):
+        servicer = AsyncShiftOptimizerServicer.__new__(AsyncShiftOptimizerServicer)
+        servicer._in_flight, servicer._waiters = {}, {}
+        started = []
+        
+        async def solve():
+            started.append(True)
+            try:
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                # The cancelled solve takes a while to stop, as a process pool solve does
+                await asyncio.sleep(0.1)
+                raise
+            return b"solved"
+        
+        async def scenario():
+            leaving = asyncio.ensure_future(servicer._join("key", solve))
+            await asyncio.sleep(0.01)
+            leaving.cancel()
+            await asyncio.sleep(0)
+            # The cancelled flight is still winding down, the new caller does not join it
+            result = await servicer._join("key", solve)
+            await asyncio.sleep(0.2)
+            return result
+        
+        self.assertEqual(asyncio.run(scenario()), b"solved")
+        self.assertEqual(started, [True, True])
+        self.assertEqual((servicer._in_flight, servicer._waiters), ({}, {}))
+    
+    def test_compact_request_round_trip(self):
+        workers, warehouses, cargo_loads, days = generate_instance(40, 5, 3, seed=3)
+        request = compact.encode_request(workers, warehouses, cargo_loads, days)
+        payload = shift_optimizer_pb2.OptimizeShiftsRequestV2.FromString(request.SerializeToString())
+        
+        # Decodes to the same objects as the v1 request, including float32 distances
+        v1 = to_request(workers, warehouses, cargo_loads, days)
+        servicer = ShiftOptimizerServicer()
+        self.assertEqual(compact.decode_request(payload), (
+            servicer._convert_workers(v1.workers), servicer._convert_warehouses(v1.warehouses),
+            servicer._convert_cargo_loads(v1.cargo_loads), days
+        ))
+        self.assertLess(request.ByteSize(), v1.ByteSize())
+        
+        del payload.workers.preference_priorities[-1]
+        with self.assertRaises(ValueError):
+            compact.decode_request(payload)
+    
+    def test_servicer_compact_matches_v1(self):
+        workers, warehouses, cargo_loads, days = generate_instance(60, 6, 3, seed=5)
+        servicer = ShiftOptimizerServicer(cache=ResultCache())
+        expected = servicer.OptimizeShifts(to_request(workers, warehouses, cargo_loads, days), _FakeContext())
+        
+        request = compact.encode_request(workers, warehouses, cargo_loads, days)
+        response = servicer.OptimizeShiftsV2(request, _FakeContext())
+        self.assertTrue(response.success)
+        
+        shifts = compact.decode_shifts(response, [worker.uuid for worker in workers],
+                                       [warehouse.uuid for warehouse in warehouses])
+        self.assertEqual([(shift.worker_uuid, shift.warehouse_uuid, shift.day_of_week, shift.start_time,
+                           shift.end_time) for shift in shifts],
+                         [(shift.worker_uuid, shift.warehouse_uuid, shift.day_of_week, shift.start_time,
+                           shift.end_time) for shift in expected.shifts])
+        staffing = compact.decode_staffing(response, warehouses)
+        self.assertEqual([(row.warehouse_name, row.day, row.scheduled_basic_workers) for row in staffing],
+                         [(row.warehouse_name, row.day, row.scheduled_basic_workers)
+                          for row in expected.warehouse_staffing])
+        
+        # v1 and v2 results are cached under separate keys
+        self.assertEqual(servicer.cache.stats()['entries'], 2)
+        self.assertEqual(servicer.OptimizeShiftsV2(request, _FakeContext()), response)
+    
+    def test_columnar_index_matches_dataclass_index(self):
+        workers, warehouses, cargo_loads, days = generate_instance(50, 6, 2, seed=9)
+        request = to_request(workers, warehouses, cargo_loads, days)
+        # A repeated warehouse keeps its first preference, an unknown one is ignored
+        request.workers[0].warehouse_preferences.add(warehouse_uuid=warehouses[5].uuid, priority=1, distance=1.0)
+        request.workers[0].warehouse_preferences.add(warehouse_uuid=warehouses[5].uuid, priority=7, distance=9.0)
+        request.workers[1].warehouse_preferences.add(warehouse_uuid="unknown", priority=1, distance=1.0)
+        
+        servicer = ShiftOptimizerServicer()
+        converted = servicer._convert_warehouses(request.warehouses)
+        expected = WorkforceIndex(servicer._convert_workers(request.workers), converted)
+        compact_request = compact.encode_request(servicer._convert_workers(request.workers), converted,
+                                                 servicer._convert_cargo_loads(request.cargo_loads), days)
+        
+        for index in (index_from_messages(request.workers, converted),
+                      index_from_compact(compact_request.workers, compact_request.warehouses, converted)):
+            self.assertIsNone(index.workers)
+            self.assertEqual(index.worker_uuids, expected.worker_uuids)
+            np.testing.assert_array_equal(index.qualification_masks, expected.qualification_masks)
+            np.testing.assert_array_equal(index.priorities, expected.priorities)
+            np.testing.assert_array_equal(index.distances, expected.distances)
+        
+        optimizer = ShiftOptimizer(None, converted, servicer._convert_cargo_loads(request.cargo_loads), days,
+                                   index=index_from_messages(request.workers, converted))
+        reference = ShiftOptimizer(servicer._convert_workers(request.workers), converted,
+                                   servicer._convert_cargo_loads(request.cargo_loads), days)
+        self.assertEqual(optimizer.optimize(), reference.optimize())
+    
+    def test_models_are_slotted_and_frozen(self):
+        worker = self.workers[0]
+        self.assertFalse(hasattr(worker, '__dict__'))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            worker.username = "renamed"
+        
+        # Equal qualifications in a request share one instance
+        request = shift_optimizer_pb2.OptimizeShiftsRequest()
+        for i in range(2):
+            request.workers.add(uuid=f"w{i}").qualifications.add(type=shift_optimizer_pb2.ENGINEER, level=2)
+        first, second = ShiftOptimizerServicer()._convert_workers(request.workers)
+        self.assertIs(first.qualifications[0], second.qualifications[0])
+    
+    def test_tables_serialise_like_rows(self):
+        shifts, staffing = self.optimizer.optimize()
+        shift_table, staffing_table = ShiftTable.from_shifts(shifts), StaffingTable.from_rows(staffing)
+        self.assertEqual(list(shift_table), shifts)
+        self.assertEqual(list(staffing_table), staffing)
+        self.assertEqual(list(shift_table.slice(1, 3)), shifts[1:3])
+        
+        servicer = ShiftOptimizerServicer()
+        from_rows = servicer._optimization_response(self.optimizer, shifts, staffing)
+        self.assertEqual(servicer._optimization_response(self.optimizer, shift_table, staffing_table), from_rows)
+        self.assertEqual(len(from_rows.shifts), len(shifts))
+        
+        worker_ordinals = {worker.uuid: i for i, worker in enumerate(self.workers)}
+        warehouse_ordinals = {warehouse.uuid: i for i, warehouse in enumerate(self.warehouses)}
+        self.assertEqual(
+            compact.fill_response(shift_optimizer_pb2.OptimizeShiftsResponseV2(), shift_table, staffing_table,
+                                  worker_ordinals, warehouse_ordinals),
+            compact.fill_response(shift_optimizer_pb2.OptimizeShiftsResponseV2(), shifts, staffing,
+                                  worker_ordinals, warehouse_ordinals))
+    
+    def test_optimizer_reports_day_progress(self):
+        progress = []
+        optimizer = ShiftOptimizer(self.workers, self.warehouses, self.cargo_loads, self.days,
+                                   progress=lambda done, total: progress.append((done, total)))
+        optimizer.optimize()
+        self.assertEqual(progress, [(0, 3), (1, 3), (2, 3), (3, 3)])
+    
+    def test_optimization_job_lifecycle(self):
+        workers, warehouses, cargo_loads, days = generate_instance(60, 6, 3, seed=5)
+        request = to_request(workers, warehouses, cargo_loads, days)
+        servicer = ShiftOptimizerServicer()
+        expected = servicer.OptimizeShifts(request, _FakeContext())
+        
+        submitted = servicer.SubmitOptimization(request, _FakeContext())
+        self.assertTrue(submitted.success)
+        job_request = shift_optimizer_pb2.OptimizationJobRequest(job_id=submitted.job_id)
+        status = servicer.GetOptimizationStatus(job_request, _FakeContext())
+        started = time.monotonic()
+        while status.state in (shift_optimizer_pb2.JOB_QUEUED, shift_optimizer_pb2.JOB_RUNNING):
+            self.assertLess(time.monotonic() - started, 30)
+            time.sleep(0.01)
+            status = servicer.GetOptimizationStatus(job_request, _FakeContext())
+        
+        self.assertEqual(status.state, shift_optimizer_pb2.JOB_DONE)
+        self.assertEqual((status.days_done, status.days_total), (3, 3))
+        self.assertEqual(servicer.GetOptimizationResult(job_request, _FakeContext()).shifts, expected.shifts)
+        
+        missing = shift_optimizer_pb2.OptimizationJobRequest(job_id="missing")
+        self.assertTrue(servicer.GetOptimizationStatus(missing, _FakeContext()).job_missing)
+        self.assertFalse(servicer.GetOptimizationResult(missing, _FakeContext()).success)
+    
+    def test_job_queue_is_bounded_and_cancellable(self):
+        started = threading.Event()
+        
+        def run(job):
+            started.set()
+            job.cancel_event.wait(10)
+            return shift_optimizer_pb2.OptimizeShiftsResponse(success=False, message="Error: Optimization cancelled")
+        
+        jobs = JobQueue(run, workers=1, max_queued=1)
+        running = jobs.submit(None)
+        self.assertTrue(started.wait(10))
+        queued = jobs.submit(None)
+        with self.assertRaises(JobQueueFull):
+            jobs.submit(None)
+        
+        # A queued job is dropped at once, a running one stops at its next cancellation check
+        self.assertEqual(jobs.cancel(queued.job_id).state, JOB_CANCELLED)
+        jobs.cancel(running.job_id)
+        started_at = time.monotonic()
+        while jobs.get(running.job_id).state == JOB_RUNNING:
+            self.assertLess(time.monotonic() - started_at, 10)
+            time.sleep(0.01)
+        self.assertEqual(jobs.get(running.job_id).state, JOB_CANCELLED)
+        self.assertEqual(jobs.stats(), {'queued': 0, 'running': 0, 'finished': 2})
+        self.assertIsNone(jobs.cancel("missing"))
+    
+    def test_jobs_take_batch_admission_slot(self):
+        workers, warehouses, cargo_loads, days = generate_instance(30, 3, 2, seed=9)
+        request = to_request(workers, warehouses, cargo_loads, days)
+        admission = AdmissionController(max_concurrent=2, max_queued=4)
+        servicer = ShiftOptimizerServicer(admission=admission)
+        
+        def wait_until(condition):
+            started_at = time.monotonic()
+            while not condition():
+                self.assertLess(time.monotonic() - started_at, 30)
+                time.sleep(0.01)
+        
+        def state(job_id):
+            job_request = shift_optimizer_pb2.OptimizationJobRequest(job_id=job_id)
+            return servicer.GetOptimizationStatus(job_request, _FakeContext()).state
+        
+        # With the only batch slot taken by a call, the job waits for it instead of solving alongside
+        admission.acquire(BATCH, _FakeContext())
+        waiting = servicer.SubmitOptimization(request, _FakeContext())
+        wait_until(lambda: admission.stats()['queued_batch'] == 1)
+        admission.release(BATCH)
+        wait_until(lambda: state(waiting.job_id) == shift_optimizer_pb2.JOB_DONE)
+        
+        # A job cancelled while it waits leaves the queue without taking the slot
+        admission.acquire(BATCH, _FakeContext())
+        cancelled = servicer.SubmitOptimization(request, _FakeContext())
+        wait_until(lambda: admission.stats()['queued_batch'] == 1)
+        servicer.CancelOptimization(shift_optimizer_pb2.OptimizationJobRequest(job_id=cancelled.job_id),
+                                    _FakeContext())
+        wait_until(lambda: state(cancelled.job_id) == shift_optimizer_pb2.JOB_CANCELLED)
+        admission.release(BATCH)
+        self.assertEqual(admission.stats(), {'running_interactive': 0, 'running_batch': 0, 'queued_interactive': 0,
+                                             'queued_batch': 0, 'rejected': 0})
+    
+    def test_optimize_scenarios(self):
+        workers, warehouses, cargo_loads, days = generate_instance(80, 6, 3, seed=7)
+        base = to_request(workers, warehouses, cargo_loads, days)
+        request = shift_optimizer_pb2.OptimizeScenariosRequest(workers=base.workers, warehouses=base.warehouses,
+                                                               cargo_loads=base.cargo_loads, days=days)
+        closed = warehouses[0].uuid
+        heavy = request.scenarios.add(name="heavy")
+        for load in cargo_loads:
+            heavy.upserted_cargo_loads.add(warehouse_uuid=load.warehouse_uuid, date=load.date,
+                                           total_weight=load.total_weight * 3)
+        request.scenarios.add(name="base")
+        request.scenarios.add(name="closed", closed_warehouse_uuids=[closed])
+        request.scenarios.add(name="broken").upserted_cargo_loads.add(warehouse_uuid=closed, date="not a date",
+                                                                      total_weight=1)
+        
+        response = ShiftOptimizerServicer().OptimizeScenarios(request, _FakeContext())
+        self.assertTrue(response.success)
+        self.assertEqual([result.name for result in response.scenarios], ["heavy", "base", "closed", "broken"])
+        heavy_result, base_result, closed_result, broken = response.scenarios
+        
+        # An empty overlay gives the plain optimization result
+        expected = ShiftOptimizerServicer().OptimizeShifts(base, _FakeContext())
+        self.assertEqual(base_result.shifts, expected.shifts)
+        self.assertEqual(base_result.shift_count, len(expected.shifts))
+        self.assertGreater(heavy_result.missing_workers + heavy_result.shift_count,
+                           base_result.missing_workers + base_result.shift_count)
+        self.assertNotIn(closed, {shift.warehouse_uuid for shift in closed_result.shifts})
+        self.assertFalse(broken.success)
+        self.assertTrue(broken.message.startswith("Error: "))
+        
+        # Spreading the scenarios over processes gives the same schedules
+        pooled = ShiftOptimizerServicer(scenario_processes=2).OptimizeScenarios(request, _FakeContext())
+        self.assertEqual(pooled, response)
+    
+    def test_admission_prefers_interactive_lane(self):
+        admission = AdmissionController(max_concurrent=1, max_queued=2, interactive_reserve=0)
+        admission.acquire(BATCH, _FakeContext())
+        admitted = []
+        
+        def wait_for_slot(lane):
+            admission.acquire(lane, _FakeContext())
+            admitted.append(lane)
+        
+        def wait_until(condition):
+            started_at = time.monotonic()
+            while not condition():
+                self.assertLess(time.monotonic() - started_at, 10)
+                time.sleep(0.01)
+        
+        # The batch call queues first, the interactive one still gets the next free slot
+        threads = [threading.Thread(target=wait_for_slot, args=(BATCH,))]
+        threads[0].start()
+        wait_until(lambda: admission.stats()['queued_batch'] == 1)
+        threads.append(threading.Thread(target=wait_for_slot, args=(INTERACTIVE,)))
+        threads[1].start()
+        wait_until(lambda: admission.stats()['queued_interactive'] == 1)
+        with self.assertRaises(AdmissionRejected):
+            admission.acquire(INTERACTIVE, _FakeContext())
+        
+        admission.release(BATCH)
+        wait_until(lambda: admitted == [INTERACTIVE])
+        admission.release(INTERACTIVE)
+        wait_until(lambda: admitted == [INTERACTIVE, BATCH])
+        admission.release(BATCH)
+        for thread in threads:
+            thread.join(10)
+        
+        # A caller that goes away leaves the queue without taking a slot
+        admission.acquire(BATCH, _FakeContext())
+        context = _FakeContext()
+        waiting = threading.Thread(target=lambda: self.assertRaises(AdmissionRejected, admission.acquire,
+                                                                    INTERACTIVE, context))
+        waiting.start()
+        wait_until(lambda: admission.stats()['queued_interactive'] == 1)
+        context.terminate()
+        waiting.join(10)
+        admission.release(BATCH)
+        self.assertEqual(admission.stats(), {'running_interactive': 0, 'running_batch': 0, 'queued_interactive': 0,
+                                             'queued_batch': 0, 'rejected': 1})
+    
+    def test_admission_rejects_with_resource_exhausted(self):
+        solving, finish = threading.Event(), threading.Event()
+        
+        class BlockingServicer(ShiftOptimizerServicer):
+            def OptimizeShifts(self, request, context):
+                solving.set()
+                finish.wait(10)
+                return shift_optimizer_pb2.OptimizeShiftsResponse(success=True)
+        
+        admission = AdmissionController(max_concurrent=1, max_queued=0)
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=4), interceptors=[AdmissionInterceptor(admission)])
+        shift_optimizer_pb2_grpc.add_ShiftOptimizerServiceServicer_to_server(BlockingServicer(), server)
+        port = server.add_insecure_port('127.0.0.1:0')
+        server.start()
+        try:
+            with grpc.insecure_channel(f'127.0.0.1:{port}') as channel:
+                stub = shift_optimizer_pb2_grpc.ShiftOptimizerServiceStub(channel)
+                request = shift_optimizer_pb2.OptimizeShiftsRequest(days=["monday"])
+                first = stub.OptimizeShifts.future(request, timeout=10, metadata=[('x-priority', 'batch')])
+                self.assertTrue(solving.wait(10))
+                self.assertEqual(admission.stats()['running_batch'], 1)
+                
+                with self.assertRaises(grpc.RpcError) as rejected:
+                    stub.OptimizeShifts(request, timeout=10)
+                self.assertEqual(rejected.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+                # Calls that do not solve are not held back by a full server
+                status = stub.GetOptimizationStatus(shift_optimizer_pb2.OptimizationJobRequest(job_id="missing"),
+                                                    timeout=10)
+                self.assertTrue(status.job_missing)
+                
+                finish.set()
+                self.assertTrue(first.result().success)
+        finally:
+            finish.set()
+            server.stop(0)
+        self.assertEqual(admission.stats()['running_batch'], 0)
+    
+    def test_supervisor_restarts_dead_workers(self):
+        supervisor = Supervisor(2, target=_exit_worker)
+        supervisor.start()
+        try:
+            first = supervisor.pids()
+            for process in supervisor._processes.values():
+                process.join(10)
+            
+            # A worker that crashed right after starting waits before its restart
+            supervisor.check()
+            self.assertEqual(supervisor.restarts, 0)
+            
+            with patch.object(prefork, 'MIN_HEALTHY_UPTIME', 0.0):
+                for process in supervisor._processes.values():
+                    process.join(10)
+                supervisor._not_before.clear()
+                supervisor._failures.clear()
+                supervisor.check()
+            self.assertEqual(supervisor.restarts, 2)
+            self.assertTrue(set(first.values()).isdisjoint(supervisor.pids().values()))
+        finally:
+            supervisor.stop(timeout=5)
+    
+    def test_warm_up_restores_log_level(self):
+        package_logger = logging.getLogger('shift_optimizer')
+        level = package_logger.level
+        with patch.object(prefork.logger, 'warning') as warning:
+            prefork.warm_up('auto')
+        warning.assert_not_called()
+        self.assertEqual(package_logger.level, level)
+    
+    def test_select_solver(self):
+        self.assertIsInstance(select_solver('greedy', 10, 10), GreedySolver)
+        self.assertIsInstance(select_solver(None, 10, 10), GreedySolver)
+        self.assertIsInstance(select_solver('auto', 10, 10), MinCostFlowSolver)
+        self.assertIsInstance(select_solver('auto', 1_000_000, 1_000), GreedySolver)
+        with self.assertRaises(ValueError):
+            select_solver('simplex', 10, 10)
+        # Servers solve with greedy unless auto is asked for, so callers that pick nothing keep its speed
+        self.assertEqual(ShiftOptimizerServicer().default_strategy, 'greedy')
+def _exit_worker(worker_id):
+    # Supervisor target for the restart test; exits as soon as it is started
+    return None
+class _FakeContext:
+    def __init__(self):
+        self.active = True
+        self.callbacks = []
+    
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+        return True
+    
+    def is_active(self):
+        return self.active
+    
+    def time_remaining(self):
+        return None
+    
+    def terminate(self):
+        self.active = False
+        for callback in self.callbacks:
+            callback()
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
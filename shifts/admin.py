@@ -2,8 +2,8 @@ from django.contrib import admin
 from django.urls import path
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.http import JsonResponse
 from django import forms
-from django.utils.html import format_html
 from django.template.response import TemplateResponse
 
 from shifts.models import Shift
@@ -31,6 +31,10 @@ class ShiftAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('optimize-shifts/', self.admin_site.admin_view(self.optimize_shifts_view), name='optimize-shifts'),
+            path('optimize-shifts/<str:task_id>/', self.admin_site.admin_view(self.optimize_progress_view),
+                 name='optimize-shifts-progress'),
+            path('optimize-shifts/<str:task_id>/status/', self.admin_site.admin_view(self.optimize_status_view),
+                 name='optimize-shifts-status'),
         ]
         return custom_urls + urls
     
@@ -41,26 +45,15 @@ class ShiftAdmin(admin.ModelAdmin):
                 start_date = form.cleaned_data['start_date']
                 end_date = form.cleaned_data.get('end_date')
                 
+                # Оптимизация выполняется в Celery, ход работы показывает страница прогресса
                 service = ShiftService()
-                result = service.optimize_shifts(
+                task_id = service.start_optimization(
                     start_date=start_date,
                     end_date=end_date
                 )
                 
-                if result['success']:
-                    messages.success(request, format_html(
-                        'Оптимизация успешно завершена. Оптимизировано смен: {}<br>'
-                        'Сообщение: {}',
-                        len(result['shifts']), 
-                        result['message']
-                    ))
-                else:
-                    messages.error(request, format_html(
-                        'Ошибка при оптимизации смен: {}',
-                        result['message']
-                    ))
-                
-                return redirect('admin:shifts_shift_changelist')
+                messages.info(request, 'Оптимизация смен поставлена в очередь')
+                return redirect('admin:optimize-shifts-progress', task_id=task_id)
         else:
             form = OptimizeShiftsForm()
         
@@ -71,6 +64,18 @@ class ShiftAdmin(admin.ModelAdmin):
         }
         return render(request, 'admin/shifts/optimize_shifts.html', context)
     
+    def optimize_progress_view(self, request, task_id):
+        context = {
+            'task_id': task_id,
+            'title': 'Ход оптимизации смен',
+            'opts': self.model._meta,
+        }
+        return render(request, 'admin/shifts/optimize_progress.html', context)
+    
+    def optimize_status_view(self, request, task_id):
+        service = ShiftService()
+        return JsonResponse(service.optimization_status(task_id))
+    
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['show_optimize_button'] = True
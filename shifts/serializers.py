@@ -114,16 +114,21 @@ class WarehouseStaffingSerializer(serializers.Serializer):
     is_fully_staffed = serializers.BooleanField()
 
 
-class OptimizedShiftSerializer(serializers.Serializer):
-    worker_uuid = serializers.CharField()
-    warehouse_uuid = serializers.CharField()
-    day_of_week = serializers.CharField()
-    start_time = serializers.CharField()
-    end_time = serializers.CharField()
+class ShiftOptimizationTaskSerializer(serializers.Serializer):
+    task_id = serializers.CharField()
+    state = serializers.CharField()
 
 
-class ShiftOptimizationResponseSerializer(serializers.Serializer):
+class ShiftOptimizationSummarySerializer(serializers.Serializer):
     success = serializers.BooleanField()
     message = serializers.CharField()
-    shifts = OptimizedShiftSerializer(many=True)
-    warehouse_staffing = WarehouseStaffingSerializer(many=True) 
\ No newline at end of file
+    shift_count = serializers.IntegerField()
+    warehouse_staffing = WarehouseStaffingSerializer(many=True)
+
+
+class ShiftOptimizationStatusSerializer(serializers.Serializer):
+    task_id = serializers.CharField()
+    state = serializers.CharField()
+    progress = serializers.DictField(allow_null=True)
+    result = ShiftOptimizationSummarySerializer(allow_null=True)
+    message = serializers.CharField(allow_blank=True)
\ No newline at end of file
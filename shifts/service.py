@@ -1,6 +1,7 @@
 import logging
 from typing import Dict, List, Tuple
-from shift_optimizer.client.django_integration import ShiftOptimizationService
+from django.conf import settings
+from shift_optimizer.client.django_integration import ShiftOptimizationService, DEFAULT_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
@@ -8,7 +9,8 @@ class ShiftService:
     def __init__(self):
         self.optimizer = ShiftOptimizationService()
     
-    def optimize_shifts(self, start_date, end_date=None, warehouse_ids=None) -> Dict:
+    def optimize_shifts(self, start_date, end_date=None, warehouse_ids=None, progress=None,
+                        timeout=DEFAULT_TIMEOUT) -> Dict:
         """
         Оптимизирует смены для заданного диапазона дат и складов.
         
@@ -16,27 +18,104 @@ class ShiftService:
             start_date: Начальная дата оптимизации
             end_date: Конечная дата оптимизации (по умолчанию равна start_date)
             warehouse_ids: Список ID складов для оптимизации (опционально)
+            progress: Функция progress(stage, **counts), вызываемая на этапах
+                'loading', 'solving' и 'saving' (опционально)
+            timeout: Сколько секунд ждать сервер оптимизации; None — без ограничения
             
         Returns:
             Dict: Словарь с результатами оптимизации:
                 {
                     'success': bool,
                     'message': str,
-                    'shifts': List[Dict],
+                    'shift_count': int,  # смены уже сохранены в базе
                     'warehouse_staffing': List[Dict]
                 }
         """
         logger.info(f"Starting shift optimization for date range {start_date} to {end_date}")
         
-        success, message, shifts, staffing = self.optimizer.optimize_shifts(
-            start_date=start_date,
-            end_date=end_date,
-            warehouse_ids=warehouse_ids
-        )
+        # При потоковом режиме смены сохраняются по мере прихода каждого дня и в памяти не копятся
+        if getattr(settings, 'SHIFT_OPTIMIZER_STREAMING', False):
+            success, message, shift_count, days_saved, staffing = self.optimizer.optimize_shifts_streaming(
+                start_date=start_date,
+                end_date=end_date,
+                warehouse_ids=warehouse_ids,
+                progress=progress,
+                timeout=timeout
+            )
+            logger.info(f"Streaming optimization saved {shift_count} shifts for {days_saved} days")
+        else:
+            success, message, shifts, staffing = self.optimizer.optimize_shifts(
+                start_date=start_date,
+                end_date=end_date,
+                warehouse_ids=warehouse_ids,
+                progress=progress,
+                timeout=timeout
+            )
+            shift_count = len(shifts)
         
         return {
             'success': success,
             'message': message,
-            'shifts': shifts,
+            'shift_count': shift_count,
             'warehouse_staffing': staffing
         }
+    
+    def start_optimization(self, start_date, end_date=None, warehouse_ids=None) -> str:
+        """
+        Ставит оптимизацию смен в очередь Celery и сразу возвращает управление.
+        
+        Args:
+            start_date: Начальная дата оптимизации
+            end_date: Конечная дата оптимизации (по умолчанию равна start_date)
+            warehouse_ids: Список ID складов для оптимизации (опционально)
+            
+        Returns:
+            str: ID задачи для запроса статуса через optimization_status
+        """
+        from shifts.tasks import optimize_shifts_task
+        
+        # Аргументы задачи проходят через JSON, поэтому даты передаются строками
+        task = optimize_shifts_task.delay(
+            start_date.isoformat(),
+            end_date.isoformat() if end_date else None,
+            warehouse_ids
+        )
+        logger.info(f"Queued shift optimization task {task.id} for date range {start_date} to {end_date}")
+        return task.id
+    
+    def optimization_status(self, task_id) -> Dict:
+        """
+        Возвращает состояние фоновой оптимизации.
+        
+        Args:
+            task_id: ID задачи, полученный от start_optimization
+            
+        Returns:
+            Dict: Словарь с состоянием задачи:
+                {
+                    'task_id': str,
+                    'state': str,  # PENDING, STARTED, PROGRESS, SUCCESS или FAILURE
+                    'progress': Dict или None,  # этап и счётчики, пока задача выполняется
+                    'result': Dict или None,  # итог оптимизации после SUCCESS
+                    'message': str
+                }
+        """
+        from shifts.tasks import optimize_shifts_task, PROGRESS_STATE
+        
+        task = optimize_shifts_task.AsyncResult(task_id)
+        # Celery не отличает неизвестную задачу от ещё не начатой: обе в состоянии PENDING
+        status = {
+            'task_id': task_id,
+            'state': task.state,
+            'progress': None,
+            'result': None,
+            'message': ''
+        }
+        if task.state == PROGRESS_STATE:
+            status['progress'] = task.info
+        elif task.successful():
+            status['result'] = task.result
+            status['message'] = task.result['message']
+        elif task.failed():
+            status['message'] = f"Error: {str(task.result)}"
+        return status
@@ -0,0 +1,54 @@
+import datetime
+import logging
+from celery import shared_task
+from django.conf import settings
+from shifts.service import ShiftService
+
+logger = logging.getLogger(__name__)
+
+# Состояние задачи, пока она загружает данные, решает и сохраняет смены
+PROGRESS_STATE = 'PROGRESS'
+
+
+@shared_task(bind=True, name='shifts.optimize_shifts')
+def optimize_shifts_task(self, start_date, end_date=None, warehouse_ids=None):
+    """
+    Фоновая оптимизация смен через ShiftService.optimize_shifts.
+    
+    Args:
+        start_date: Начальная дата в формате ISO
+        end_date: Конечная дата в формате ISO (опционально)
+        warehouse_ids: Список ID складов для оптимизации (опционально)
+        
+    Returns:
+        Dict: Итог оптимизации, смены к этому моменту сохранены в базе:
+            {
+                'success': bool,
+                'message': str,
+                'shift_count': int,
+                'warehouse_staffing': List[Dict]
+            }
+    """
+    counts = {}
+    
+    def report(stage, **stage_counts):
+        # Счётчики накапливаются, чтобы на этапе сохранения был виден и размер задачи
+        counts.update(stage_counts)
+        self.update_state(state=PROGRESS_STATE, meta={'stage': stage, **counts})
+    
+    result = ShiftService().optimize_shifts(
+        start_date=datetime.date.fromisoformat(start_date),
+        end_date=datetime.date.fromisoformat(end_date) if end_date else None,
+        warehouse_ids=warehouse_ids,
+        progress=report,
+        # Фоновой задаче не нужен короткий срок интерактивного вызова; 0 снимает ограничение
+        timeout=getattr(settings, 'SHIFT_OPTIMIZER_TASK_TIMEOUT', 3600) or None
+    )
+    logger.info(f"Shift optimization task {self.request.id} finished: {result['message']}")
+    
+    return {
+        'success': result['success'],
+        'message': result['message'],
+        'shift_count': result['shift_count'],
+        'warehouse_staffing': result['warehouse_staffing']
+    }
@@ -3,7 +3,8 @@ import json
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.utils import timezone
-from datetime import timedelta
+from datetime import timedelta, date
+from unittest.mock import patch
 
 from warehouses.models import Warehouse
 from shifts.models import Shift
@@ -218,4 +219,55 @@ class TestShiftAPI:
         
         assert response.status_code == 200
         assert response.data['id'] == shift.id
-        assert response.data['warehouse'] == warehouse.id 
\ No newline at end of file
+        assert response.data['warehouse'] == warehouse.id 
+
+
+class TestShiftOptimizationAPI:
+    @patch('shifts.views.ShiftService.start_optimization', return_value='task-1')
+    def test_optimize_queues_task(self, start_optimization, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('shift-optimize')
+        response = api_client.post(url, {'start_date': '2025-06-02', 'end_date': '2025-06-04'}, format='json')
+        
+        assert response.status_code == 202
+        assert response.data == {'task_id': 'task-1', 'state': 'PENDING'}
+        start_optimization.assert_called_once_with(
+            start_date=date(2025, 6, 2),
+            end_date=date(2025, 6, 4),
+            warehouse_ids=None
+        )
+        
+    @patch('shifts.views.ShiftService.optimization_status')
+    def test_optimize_status_reports_progress(self, optimization_status, api_client, admin_user):
+        optimization_status.return_value = {
+            'task_id': 'task-1',
+            'state': 'PROGRESS',
+            'progress': {'stage': 'solving', 'workers': 120, 'warehouses': 3, 'cargo_loads': 21, 'days': 7},
+            'result': None,
+            'message': ''
+        }
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('shift-optimize-status', args=['task-1'])
+        response = api_client.get(url)
+        
+        assert response.status_code == 200
+        assert response.data['state'] == 'PROGRESS'
+        assert response.data['progress']['stage'] == 'solving'
+        assert response.data['progress']['workers'] == 120
+        optimization_status.assert_called_once_with('task-1')
+        
+    def test_optimize_runs_in_background_task(self, api_client, admin_user, settings):
+        # The test settings run tasks eagerly with the in-memory broker, so the result is ready at once
+        settings.SHIFT_OPTIMIZER_TASK_TIMEOUT = 7200
+        result = {'success': True, 'message': 'Optimization successful', 'shift_count': 2, 'warehouse_staffing': []}
+        api_client.force_authenticate(user=admin_user)
+        
+        with patch('shifts.tasks.ShiftService.optimize_shifts', return_value=result) as optimize_shifts:
+            response = api_client.post(reverse('shift-optimize'), {'start_date': '2025-06-02'}, format='json')
+        status_response = api_client.get(reverse('shift-optimize-status', args=[response.data['task_id']]))
+        
+        assert optimize_shifts.call_args[1]['start_date'] == date(2025, 6, 2)
+        # The task waits for the optimizer far longer than the 30 second interactive deadline
+        assert optimize_shifts.call_args[1]['timeout'] == 7200
+        assert status_response.data['state'] == 'SUCCESS'
+        assert status_response.data['result']['shift_count'] == 2
@@ -16,7 +16,8 @@ from shifts.serializers import (
     ShiftUpdateSerializer, 
     ShiftResponseSerializer,
     ShiftOptimizationRequestSerializer,
-    ShiftOptimizationResponseSerializer
+    ShiftOptimizationTaskSerializer,
+    ShiftOptimizationStatusSerializer
 )
 from shifts.service import ShiftService
 
@@ -135,8 +136,9 @@ class ShiftViewSet(viewsets.ModelViewSet):
         
     @extend_schema(
         request=ShiftOptimizationRequestSerializer,
-        responses={200: ShiftOptimizationResponseSerializer},
-        description="Optimize shifts for a specific date range and warehouses",
+        responses={202: ShiftOptimizationTaskSerializer},
+        description="Queue shift optimization for a specific date range and warehouses; "
+                    "poll optimize/{task_id}/ for progress and the result",
     )
     @action(
         detail=False, 
@@ -151,18 +153,34 @@ class ShiftViewSet(viewsets.ModelViewSet):
         end_date = serializer.validated_data.get('end_date', start_date)
         warehouse_ids = serializer.validated_data.get('warehouse_ids')
         
+        # The solve runs in a Celery worker, so the request returns as soon as the task is queued
         service = ShiftService()
-        result = service.optimize_shifts(
+        task_id = service.start_optimization(
             start_date=start_date,
             end_date=end_date,
             warehouse_ids=warehouse_ids
         )
         
-        response_serializer = ShiftOptimizationResponseSerializer(data=result)
-        response_serializer.is_valid(raise_exception=True)
+        return Response(
+            ShiftOptimizationTaskSerializer({'task_id': task_id, 'state': 'PENDING'}).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+    
+    @extend_schema(
+        responses={200: ShiftOptimizationStatusSerializer},
+        description="Get the progress or the result of a queued shift optimization",
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'optimize/(?P<task_id>[^/.]+)',
+    )
+    def optimize_status(self, request, task_id=None):
+        service = ShiftService()
+        result = service.optimization_status(task_id)
         
         return Response(
-            response_serializer.data,
+            ShiftOptimizationStatusSerializer(result).data,
             status=status.HTTP_200_OK,
         )
         